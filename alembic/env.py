@@ -0,0 +1,66 @@
+import re
+import asyncio
+from logging.config import fileConfig
+from typing import Any
+
+from alembic import context
+from alembic.runtime.environment import NameFilterParentNames, NameFilterType
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import webapp.models.sirius  # noqa: F401 - регистрирует таблицы в metadata
+from conf.config import settings
+from webapp.models.meta import DEFAULT_SCHEMA, metadata
+
+config = context.config
+
+# Секции бронирований создаются и удаляются приложением (webapp/db/partitions.py), а не миграциями
+PARTITION = re.compile(r'^reservation_(default|\d{4}_\d{2})$')
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+
+def include_name(name: str | None, type_: NameFilterType, parent_names: NameFilterParentNames) -> bool:
+    # Миграции управляют только схемой приложения
+    if type_ == 'schema':
+        return name == DEFAULT_SCHEMA
+    if type_ == 'table':
+        return name is not None and not PARTITION.match(name)
+    return True
+
+
+def configure(**kwargs: Any) -> None:
+    context.configure(
+        target_metadata=metadata,
+        include_schemas=True,
+        include_name=include_name,
+        version_table_schema=DEFAULT_SCHEMA,
+        **kwargs,
+    )
+
+
+def run_migrations_offline() -> None:
+    configure(url=settings.DB_URL, literal_binds=True, dialect_opts={'paramstyle': 'named'})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    configure(connection=connection)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    engine = create_async_engine(settings.DB_URL, poolclass=pool.NullPool)
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
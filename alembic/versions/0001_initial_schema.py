@@ -0,0 +1,119 @@
+"""initial schema
+
+Схема в том виде, в каком ее создавал scripts/migrate.py через metadata.create_all.
+Существующие базы помечаются этой ревизией без выполнения (см. scripts/migrate.py).
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 15:04:52.941725
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLE_CATEGORY = postgresql.ENUM('ADMIN', 'STAFF', 'USER', name='role_category')
+DISH_CATEGORY = postgresql.ENUM(
+    'APPETIZER', 'MAIN_COURSE', 'DESSERT', 'SOUP', 'SALAD', 'HOT_DRINK', 'COLD_DRINK', name='dish_category'
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'file',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('url', sa.Text(), nullable=False),
+        sa.Column('task_id', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_file')),
+        schema='sirius',
+    )
+    op.create_index(op.f('ix_sirius_file_id'), 'file', ['id'], unique=False, schema='sirius')
+    op.create_table(
+        'restaurant',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('address', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_restaurant')),
+        schema='sirius',
+    )
+    op.create_index(op.f('ix_sirius_restaurant_id'), 'restaurant', ['id'], unique=False, schema='sirius')
+    op.create_table(
+        'user',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('phone', sa.String(), nullable=False),
+        sa.Column('role', ROLE_CATEGORY, nullable=False),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_user')),
+        sa.UniqueConstraint('username', name=op.f('uq_user_username')),
+        schema='sirius',
+    )
+    op.create_index(op.f('ix_sirius_user_id'), 'user', ['id'], unique=False, schema='sirius')
+    op.create_table(
+        'dish',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('restaurant_id', sa.Integer(), nullable=False),
+        sa.Column('category', DISH_CATEGORY, nullable=False),
+        sa.Column('dish_name', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('price', sa.DECIMAL(precision=10, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['restaurant_id'], ['sirius.restaurant.id'], name=op.f('fk_dish_restaurant_id_restaurant')
+        ),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_dish')),
+        schema='sirius',
+    )
+    op.create_index(op.f('ix_sirius_dish_id'), 'dish', ['id'], unique=False, schema='sirius')
+    op.create_table(
+        'reservation',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('restaurant_id', sa.Integer(), nullable=False),
+        sa.Column('date_reserv', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('guest_count', sa.Integer(), nullable=False),
+        sa.Column('status', sa.Boolean(), nullable=False),
+        sa.Column('comment', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['restaurant_id'], ['sirius.restaurant.id'], name=op.f('fk_reservation_restaurant_id_restaurant')
+        ),
+        sa.ForeignKeyConstraint(['user_id'], ['sirius.user.id'], name=op.f('fk_reservation_user_id_user')),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_reservation')),
+        schema='sirius',
+    )
+    op.create_index(op.f('ix_sirius_reservation_id'), 'reservation', ['id'], unique=False, schema='sirius')
+    op.create_table(
+        'user_file',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('file_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['file_id'], ['sirius.file.id'], name=op.f('fk_user_file_file_id_file')),
+        sa.ForeignKeyConstraint(['user_id'], ['sirius.user.id'], name=op.f('fk_user_file_user_id_user')),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_user_file')),
+        schema='sirius',
+    )
+    op.create_index(op.f('ix_sirius_user_file_id'), 'user_file', ['id'], unique=False, schema='sirius')
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_sirius_user_file_id'), table_name='user_file', schema='sirius')
+    op.drop_table('user_file', schema='sirius')
+    op.drop_index(op.f('ix_sirius_reservation_id'), table_name='reservation', schema='sirius')
+    op.drop_table('reservation', schema='sirius')
+    op.drop_index(op.f('ix_sirius_dish_id'), table_name='dish', schema='sirius')
+    op.drop_table('dish', schema='sirius')
+    op.drop_index(op.f('ix_sirius_user_id'), table_name='user', schema='sirius')
+    op.drop_table('user', schema='sirius')
+    op.drop_index(op.f('ix_sirius_restaurant_id'), table_name='restaurant', schema='sirius')
+    op.drop_table('restaurant', schema='sirius')
+    op.drop_index(op.f('ix_sirius_file_id'), table_name='file', schema='sirius')
+    op.drop_table('file', schema='sirius')
+    DISH_CATEGORY.drop(op.get_bind())
+    ROLE_CATEGORY.drop(op.get_bind())
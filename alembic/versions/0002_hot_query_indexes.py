@@ -0,0 +1,57 @@
+"""hot query indexes
+
+Составные индексы под запросы webapp/crud: страницы меню и списков блюд по ключу (id),
+бронирования пользователя и ресторана, файлы пользователя. Индексы строятся через
+CREATE INDEX CONCURRENTLY вне транзакции миграции, чтобы не блокировать запись в таблицы.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 15:06:01.417212
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (имя индекса, таблица, колонки)
+INDEXES = [
+    ('ix_dish_restaurant_id_id', 'dish', ['restaurant_id', 'id']),
+    ('ix_dish_restaurant_id_category_id', 'dish', ['restaurant_id', 'category', 'id']),
+    ('ix_dish_category_id', 'dish', ['category', 'id']),
+    ('ix_reservation_user_id_id', 'reservation', ['user_id', 'id']),
+    ('ix_reservation_restaurant_id_date_reserv', 'reservation', ['restaurant_id', 'date_reserv']),
+    ('ix_user_file_user_id_file_id', 'user_file', ['user_id', 'file_id']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            # Прерванный CREATE INDEX CONCURRENTLY оставляет невалидный индекс: он не используется
+            # планировщиком, но мешает IF NOT EXISTS - такой индекс строится заново
+            if not context.is_offline_mode() and _invalid(name):
+                op.drop_index(name, table_name=table, schema='sirius', postgresql_concurrently=True)
+            op.create_index(
+                name, table, columns, unique=False, schema='sirius', postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def _invalid(name: str) -> bool:
+    return bool(
+        op.get_bind().scalar(
+            sa.text('SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)'),
+            {'name': f'sirius.{name}'},
+        )
+    )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, schema='sirius', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,124 @@
+"""reservation partitions
+
+Бронирования секционируются по месяцам date_reserv (RANGE, секции reservation_YYYY_MM и секция
+по умолчанию, см. webapp/db/partitions.py). Существующая таблица переименовывается, создается
+секционированная с секциями на все месяцы ее данных и три месяца вперед, строки копируются в нее.
+Ключ секционирования входит в первичный ключ. Каталог архива бронирований - sirius.reservation_archive.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 21:40:12.518203
+
+"""
+from typing import List, Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (имя индекса, колонки)
+INDEXES = [
+    ('ix_sirius_reservation_id', ['id']),
+    ('ix_reservation_user_id_id', ['user_id', 'id']),
+    ('ix_reservation_restaurant_id_date_reserv', ['restaurant_id', 'date_reserv']),
+]
+
+CREATE_MONTH_PARTITIONS = '''
+DO $$
+DECLARE
+    month date;
+BEGIN
+    FOR month IN
+        SELECT generate_series(date_trunc('month', first_month), date_trunc('month', last_month), interval '1 month')::date
+        FROM (
+            SELECT least(min(date_reserv), now()) AT TIME ZONE 'UTC' AS first_month,
+                   greatest(max(date_reserv), now() + interval '3 months') AT TIME ZONE 'UTC' AS last_month
+            FROM sirius.reservation_unpartitioned
+        ) AS bounds
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE sirius.%I PARTITION OF sirius.reservation FOR VALUES FROM (%L) TO (%L)',
+            'reservation_' || to_char(month, 'YYYY_MM'),
+            month::text || ' 00:00:00+00',
+            (month + interval '1 month')::date::text || ' 00:00:00+00'
+        );
+    END LOOP;
+END
+$$
+'''
+
+
+def _columns(partitioned: bool) -> List[sa.schema.SchemaItem]:
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('sirius.reservation_id_seq')"), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('restaurant_id', sa.Integer(), nullable=False),
+        sa.Column('date_reserv', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('guest_count', sa.Integer(), nullable=False),
+        sa.Column('status', sa.Boolean(), nullable=False),
+        sa.Column('comment', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['restaurant_id'], ['sirius.restaurant.id'], name=op.f('fk_reservation_restaurant_id_restaurant')
+        ),
+        sa.ForeignKeyConstraint(['user_id'], ['sirius.user.id'], name=op.f('fk_reservation_user_id_user')),
+        sa.PrimaryKeyConstraint(*(['id', 'date_reserv'] if partitioned else ['id']), name=op.f('pk_reservation')),
+    ]
+
+
+def _replace_table(partitioned: bool) -> None:
+    # Старая таблица уступает имена новой: индексы и первичный ключ именуются в пределах схемы
+    op.rename_table('reservation', 'reservation_unpartitioned', schema='sirius')
+    op.execute('ALTER TABLE sirius.reservation_unpartitioned RENAME CONSTRAINT pk_reservation TO pk_reservation_old')
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name='reservation_unpartitioned', schema='sirius')
+
+    options = {'postgresql_partition_by': 'RANGE (date_reserv)'} if partitioned else {}
+    op.create_table('reservation', *_columns(partitioned), schema='sirius', **options)
+    op.execute('ALTER SEQUENCE sirius.reservation_id_seq OWNED BY sirius.reservation.id')
+    for name, columns in INDEXES:
+        op.create_index(name, 'reservation', columns, unique=False, schema='sirius')
+    if partitioned:
+        op.execute('CREATE TABLE sirius.reservation_default PARTITION OF sirius.reservation DEFAULT')
+        op.execute(CREATE_MONTH_PARTITIONS)
+
+    op.execute('INSERT INTO sirius.reservation SELECT * FROM sirius.reservation_unpartitioned')
+    op.drop_table('reservation_unpartitioned', schema='sirius')
+
+
+def upgrade() -> None:
+    _replace_table(partitioned=True)
+
+    op.create_table(
+        'reservation_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('restaurant_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('object_name', sa.String(), nullable=False),
+        sa.Column('rows', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_reservation_archive')),
+        schema='sirius',
+    )
+    op.create_index(
+        op.f('ix_sirius_reservation_archive_id'), 'reservation_archive', ['id'], unique=False, schema='sirius'
+    )
+    op.create_index(
+        'ix_reservation_archive_user_id_month',
+        'reservation_archive',
+        ['user_id', 'month'],
+        unique=False,
+        schema='sirius',
+    )
+    op.create_index(
+        'ix_reservation_archive_restaurant_id', 'reservation_archive', ['restaurant_id'], unique=False, schema='sirius'
+    )
+
+
+def downgrade() -> None:
+    # Бронирования, уже выгруженные в архив, в таблицу не возвращаются
+    op.drop_table('reservation_archive', schema='sirius')
+    _replace_table(partitioned=False)
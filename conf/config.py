@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List, Literal
 
 from pydantic_settings import BaseSettings
 
@@ -6,7 +6,43 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     BIND_IP: str
     BIND_PORT: int
+    # Окружение: вне production доступны отладочные ручки (/debug/...) и выборочный EXPLAIN медленных запросов
+    APP_ENV: Literal['development', 'testing', 'production'] = 'production'
     DB_URL: str
+    # Пул соединений с БД на процесс: воркеров * (DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW) должно укладываться
+    # в max_connections Postgres. Ожидание свободного соединения дольше DB_POOL_TIMEOUT секунд - ошибка,
+    # соединения старше DB_POOL_RECYCLE секунд переоткрываются, DB_POOL_PRE_PING проверяет соединение перед выдачей
+    DB_POOL_SIZE: int = 10
+    DB_POOL_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Открывать DB_POOL_SIZE соединений при старте, а не на первых запросах
+    DB_POOL_PREWARM: bool = True
+    # Подготовленные запросы: direct - соединение напрямую с Postgres (или PgBouncer 1.21+ с max_prepared_statements),
+    # запросы подготавливаются один раз на соединение и хранятся в LRU на DB_STATEMENT_CACHE_SIZE запросов;
+    # pgbouncer - PgBouncer в режиме transaction: каждый запрос подготавливается заново под уникальным именем,
+    # так как следующий запрос может попасть на другое серверное соединение
+    DB_PREPARED_STATEMENTS: Literal['direct', 'pgbouncer'] = 'direct'
+    DB_STATEMENT_CACHE_SIZE: int = 256
+    # Кэш скомпилированных SQLAlchemy запросов на процесс
+    DB_QUERY_CACHE_SIZE: int = 1000
+    # Запросы к БД учитываются по отпечатку (текст без значений): время, число строк (метрики sirius_db_statement_*).
+    # Запросы дольше DB_SLOW_STATEMENT_THRESHOLD секунд пишутся в лог вместе с типами параметров
+    DB_SLOW_STATEMENT_THRESHOLD: float = 0.2
+    # Вне production доля медленных SELECT, которые повторяются через EXPLAIN (ANALYZE, BUFFERS) на отдельном соединении;
+    # последние DB_EXPLAIN_MAX_PLANS планов отдает /debug/statements. 0 - выключено
+    DB_EXPLAIN_SAMPLE_RATE: float = 0.1
+    DB_EXPLAIN_MAX_PLANS: int = 100
+
+    # Реплика для чтения: GET-запросы идут на нее, пока она отстает от основной БД не больше DB_REPLICA_MAX_LAG секунд
+    # и за это время не было записей. Задержка проверяется не чаще раза в DB_REPLICA_LAG_CHECK_INTERVAL секунд.
+    # Клиент, сделавший запись, DB_READ_YOUR_WRITES_TTL секунд читает с основной БД (cookie)
+    DB_REPLICA_URL: str | None = None
+    DB_REPLICA_MAX_LAG: float = 1.0
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = 1.0
+    DB_REPLICA_LAG_CHECK_TIMEOUT: float = 0.5
+    DB_READ_YOUR_WRITES_TTL: float = 5.0
 
     JWT_SECRET_SALT: str
     KAFKA_BOOTSTRAP_SERVERS: List[str]
@@ -17,5 +53,87 @@ class Settings(BaseSettings):
     REDIS_PASSWORD: str
     REDIS_SIRIUS_CACHE_PREFIX: str = 'sirius'
 
+    # Объектное хранилище (MinIO из docker-compose.yml)
+    MINIO_ENDPOINT: str = 'minio:9000'
+    MINIO_ACCESS_KEY: str = 'MINIO_LOGIN'
+    MINIO_SECRET_KEY: str = 'MINIO_PASS'
+    MINIO_SECURE: bool = False
+
+    # Через CACHE_TTL секунд запись считается устаревшей, но еще CACHE_STALE_TTL секунд
+    # отдается клиентам, пока значение обновляется в фоне
+    CACHE_TTL: int = 3600
+    CACHE_STALE_TTL: int = 600
+    # Коэффициент вероятностного раннего обновления (XFetch), 0 - выключено
+    CACHE_XFETCH_BETA: float = 1.0
+    # Пустые значения (записи нет) кэшируются короче, чтобы перебор несуществующих id не раздувал Redis
+    CACHE_EMPTY_TTL: int = 300
+    # Случайный разброс TTL в долях: записи, построенные одновременно, не устаревают одновременно
+    CACHE_TTL_JITTER: float = 0.1
+    # TTL по семействам ключей поверх общих значений, например {"menu": 600, "reservations": 60}
+    CACHE_FAMILY_TTL: Dict[str, int] = {}
+    CACHE_FAMILY_EMPTY_TTL: Dict[str, int] = {}
+    # Кодек значений: json - как есть, columnar - списки объектов хранятся по колонкам (см. webapp/cache/codec.py).
+    # columnar меньше до сжатия, но дороже декодируется (scripts/bench/cache_codec.py)
+    CACHE_CODEC: Literal['json', 'columnar'] = 'json'
+    # Значения от CACHE_COMPRESS_MIN_BYTES байт сжимаются zlib, 0 - без сжатия
+    CACHE_COMPRESS_MIN_BYTES: int = 1024
+    CACHE_COMPRESS_LEVEL: int = 1
+
+    # Локальный (in-process) кэш перед Redis
+    CACHE_L1_ENABLED: bool = True
+    CACHE_L1_MAX_ENTRIES: int = 10_000
+    CACHE_L1_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_L1_TTL: float = 5.0
+
+    # Аренда на перестроение ключа при промахе: один воркер ходит в БД, остальные ждут
+    CACHE_LEASE_TTL: float = 5.0
+    CACHE_LEASE_WAIT: float = 2.0
+    CACHE_LEASE_POLL_INTERVAL: float = 0.05
+
+    # Прогрев кэша при старте: первые страницы списков ресторанов и блюд, меню по категориям и блюда
+    # CACHE_WARMUP_RESTAURANTS ресторанов с наибольшим числом бронирований за CACHE_WARMUP_RESERVATION_DAYS дней.
+    # Пока прогрев не закончен (или не истек CACHE_WARMUP_TIMEOUT), /ready отвечает 503
+    CACHE_WARMUP_ENABLED: bool = True
+    CACHE_WARMUP_TIMEOUT: float = 30.0
+    CACHE_WARMUP_RESTAURANTS: int = 100
+    CACHE_WARMUP_RESERVATION_DAYS: int = 30
+    # Ключей в одном конвейере SET и число одновременно выполняемых конвейеров
+    CACHE_WARMUP_BATCH_SIZE: int = 500
+    CACHE_WARMUP_CONCURRENCY: int = 4
+
+    # Запись в кэш при изменении (write-through): новое значение записывается в ключ по id,
+    # закэшированные списки исправляются на месте, вместо промаха при следующем чтении
+    CACHE_WRITE_THROUGH: bool = False
+
+    # Cache-Control ответов кэшируемых чтений по семействам (JSON, например {"menu": "public, max-age=30"});
+    # по умолчанию публичные данные "public, no-cache", данные пользователя "private, no-cache"
+    HTTP_CACHE_CONTROL: Dict[str, str] = {}
+
+    # Фильтр существования id (битовая карта известных id в Redis и ее копия в памяти процесса):
+    # запросы несуществующих id получают 404 без обращения к кэшу и БД. Как и L1, работает,
+    # пока активна подписка на инвалидации; копия перечитывается не реже EXISTENCE_FILTER_LOCAL_TTL секунд
+    EXISTENCE_FILTER_ENABLED: bool = True
+    EXISTENCE_FILTER_LOCAL_TTL: float = 60.0
+
+    # Максимальное число id в одном пакетном запросе (?ids=...)
+    BATCH_MAX_IDS: int = 100
+    # Максимальное число блюд в одном пакетном изменении (/dishes/bulk): изменение выполняется одним запросом
+    DISH_BULK_MAX_ITEMS: int = 1000
+
+    # Размер страницы списков (?limit=...) по умолчанию и наибольший допустимый
+    PAGE_DEFAULT_LIMIT: int = 100
+    PAGE_MAX_LIMIT: int = 1000
+
+    # Бронирования хранятся секциями по месяцам date_reserv. Секции на RESERVATION_PARTITION_MONTHS_AHEAD месяцев
+    # вперед создаются при старте и затем раз в RESERVATION_PARTITION_CHECK_INTERVAL секунд
+    RESERVATION_PARTITION_MONTHS_AHEAD: int = 3
+    RESERVATION_PARTITION_CHECK_INTERVAL: float = 3600.0
+    # Секции месяцев, закончившихся больше RESERVATION_HOT_MONTHS месяцев назад, scripts/archive_reservations.py
+    # выгружает в бакет RESERVATION_ARCHIVE_BUCKET сжатым JSONL и удаляет из БД. В архиве месяца
+    # RESERVATION_ARCHIVE_SHARDS объектов (по user_id): история пользователя читает только свои объекты
+    RESERVATION_HOT_MONTHS: int = 12
+    RESERVATION_ARCHIVE_BUCKET: str = 'reservation-archive'
+    RESERVATION_ARCHIVE_SHARDS: int = 64
+
 
 settings = Settings()
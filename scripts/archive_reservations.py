@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import argparse
+from datetime import datetime, timezone
+from typing import List
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from conf.config import settings
+from webapp.cache.client import invalidate_tags
+from webapp.cache.existence import RESERVATION_IDS, record_existence
+from webapp.cache.tags import reservation_tag, restaurant_reservations_tag, user_reservations_tag
+from webapp.db.archive import ArchiveReport, archive_month, ensure_bucket
+from webapp.db.minio import minio
+from webapp.db.partitions import add_months, ensure_partitions, month_start, partition_months
+from webapp.db.postgres import engine
+
+parser = argparse.ArgumentParser(
+    description='Архивация бронирований: секции месяцев старше --hot-months выгружаются в MinIO и удаляются из БД'
+)
+
+parser.add_argument(
+    '--hot-months', type=int, default=settings.RESERVATION_HOT_MONTHS, help='Месяцев до текущего, остающихся в БД'
+)
+parser.add_argument(
+    '--shards', type=int, default=settings.RESERVATION_ARCHIVE_SHARDS, help='Объектов в архиве одного месяца'
+)
+parser.add_argument('--bucket', default=settings.RESERVATION_ARCHIVE_BUCKET, help='Бакет архива')
+parser.add_argument('--dry-run', action='store_true', help='Только показать месяцы, которые будут выгружены')
+
+args = parser.parse_args()
+
+INVALIDATE_BATCH_SIZE = 1_000
+
+
+async def invalidate(reports: List[ArchiveReport]) -> None:
+    # Архивированные бронирования не должны оставаться ни в кэше (по id и в списках), ни в фильтре существования
+    reservation_ids = [reservation_id for report in reports for reservation_id in report.reservation_ids]
+    tags = [reservation_tag(reservation_id) for reservation_id in reservation_ids]
+    tags += [user_reservations_tag(user_id) for report in reports for user_id in report.user_ids]
+    tags += [
+        restaurant_reservations_tag(restaurant_id) for report in reports for restaurant_id in report.restaurant_ids
+    ]
+    redis = Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, password=settings.REDIS_PASSWORD)
+    try:
+        for offset in range(0, len(tags), INVALIDATE_BATCH_SIZE):
+            await invalidate_tags(redis, *tags[offset : offset + INVALIDATE_BATCH_SIZE])
+        for offset in range(0, len(reservation_ids), INVALIDATE_BATCH_SIZE):
+            removed = reservation_ids[offset : offset + INVALIDATE_BATCH_SIZE]
+            await record_existence(redis, removed=[(RESERVATION_IDS, reservation_id) for reservation_id in removed])
+    except (RedisError, OSError):
+        logging.warning(
+            'Archived reservations were not invalidated, run scripts/warm_cache.py or wait for the cache TTL'
+        )
+    finally:
+        await redis.aclose()
+
+
+async def main() -> None:
+    today = datetime.now(timezone.utc).date()
+    oldest_hot = add_months(month_start(today), -args.hot_months)
+    try:
+        async with engine.begin() as connection:
+            await ensure_partitions(connection, today, settings.RESERVATION_PARTITION_MONTHS_AHEAD)
+        async with engine.connect() as connection:
+            months = [month for month in await partition_months(connection) if month < oldest_hot]
+        print(f'Months to archive: {", ".join(f"{month:%Y-%m}" for month in months) or "none"}')
+        if args.dry_run or not months:
+            return
+
+        await ensure_bucket(minio, args.bucket)
+        reports = []
+        for month in months:
+            report = await archive_month(engine, minio, args.bucket, month, args.shards)
+            print(
+                f'{month:%Y-%m}: {report.rows} rows, {len(report.user_ids)} users '
+                f'in {report.objects} objects, {report.seconds:.2f} s'
+            )
+            reports.append(report)
+        await invalidate(reports)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
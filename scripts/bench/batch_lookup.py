@@ -0,0 +1,126 @@
+import time
+import asyncio
+import argparse
+from typing import Any, List
+
+from httpx import AsyncClient
+from redis.asyncio import Redis
+from sqlalchemy import event
+
+from webapp.cache.key_builder import get_dish_by_id_cache
+from webapp.crud.dish import create_dish
+from webapp.crud.restaurant import create_restaurant, delete_restaurant
+from webapp.db import redis
+from webapp.db.postgres import async_session, engine
+from webapp.main import create_app
+from webapp.models.sirius.dish import DishCategory
+from webapp.on_startup.redis import start_redis
+from webapp.schema.restaurant.dish import DishCreate
+from webapp.schema.restaurant.restaurant import RestaurantCreate
+
+parser = argparse.ArgumentParser(description='Сетевые обмены с Redis и БД: N запросов /dishes/{id} против /dishes?ids=')
+
+parser.add_argument('--ids', type=int, default=50, help='Количество блюд в пакете')
+parser.add_argument('--rounds', type=int, default=20, help='Количество повторов каждого варианта')
+
+args = parser.parse_args()
+
+
+class RoundTrips:
+    def __init__(self, client: Redis) -> None:
+        self.redis = 0
+        self.db = 0
+
+        # Команды клиента и выполнение конвейера считаются как один сетевой обмен
+        execute_command = client.execute_command
+        pipeline = client.pipeline
+
+        async def counted_execute_command(*args: Any, **kwargs: Any) -> Any:
+            self.redis += 1
+            return await execute_command(*args, **kwargs)
+
+        def counted_pipeline(*args: Any, **kwargs: Any) -> Any:
+            pipe = pipeline(*args, **kwargs)
+            execute = pipe.execute
+
+            async def counted_execute(*args: Any, **kwargs: Any) -> Any:
+                self.redis += 1
+                return await execute(*args, **kwargs)
+
+            pipe.execute = counted_execute  # type: ignore[method-assign]
+            return pipe
+
+        client.execute_command = counted_execute_command  # type: ignore[method-assign]
+        client.pipeline = counted_pipeline  # type: ignore[method-assign]
+
+        def before_cursor_execute(
+            conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+        ) -> None:
+            self.db += 1
+
+        event.listen(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+
+    def reset(self) -> None:
+        self.redis = 0
+        self.db = 0
+
+
+async def main() -> None:
+    app = create_app()
+    await start_redis()
+    round_trips = RoundTrips(redis.get_redis())
+
+    async with async_session() as session:
+        restaurant = await create_restaurant(
+            session=session,
+            restaurant_data=RestaurantCreate(name='Бенчмарк', address='ул. Тестовая, 1', description='-'),
+        )
+        dish_ids: List[int] = []
+        for i in range(args.ids):
+            dish = await create_dish(
+                session=session,
+                dish_data=DishCreate(
+                    restaurant_id=restaurant.id,
+                    category=DishCategory.MAIN_COURSE,
+                    dish_name=f'Блюдо №{i}',
+                    description='-',
+                    price=100,
+                ),
+            )
+            assert dish.id is not None
+            dish_ids.append(dish.id)
+
+    try:
+        async with AsyncClient(app=app, base_url='http://bench') as client:
+
+            async def one_by_one() -> None:
+                for dish_id in dish_ids:
+                    response = await client.get(f'/dishes/{dish_id}')
+                    response.raise_for_status()
+
+            async def batch() -> None:
+                response = await client.get('/dishes/', params={'ids': dish_ids})
+                response.raise_for_status()
+
+            for name, variant in (('one by one', one_by_one), ('batch', batch)):
+                await redis.get_redis().delete(*(get_dish_by_id_cache(dish_id=dish_id) for dish_id in dish_ids))
+                round_trips.reset()
+                await variant()
+                print(f'{name:>12} cold: redis round trips {round_trips.redis:4d}, db queries {round_trips.db:4d}')
+
+                round_trips.reset()
+                start = time.perf_counter()
+                for _ in range(args.rounds):
+                    await variant()
+                elapsed = (time.perf_counter() - start) / args.rounds
+                print(
+                    f'{name:>12} warm: redis round trips {round_trips.redis // args.rounds:4d}, '
+                    f'db queries {round_trips.db // args.rounds:4d}, {elapsed * 1000:8.2f} ms per {args.ids} dishes'
+                )
+    finally:
+        async with async_session() as session:
+            await delete_restaurant(session=session, restaurant_id=restaurant.id)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+import time
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Literal, Tuple
+
+from conf.config import settings
+from webapp.cache.entry import CacheEntry
+from webapp.cache.response import dump_model, dump_models
+from webapp.models.sirius.dish import DishCategory
+from webapp.schema.reservation.reservation import ReservationRead
+from webapp.schema.restaurant.dish import DishRead
+
+parser = argparse.ArgumentParser(description='Размер записей кэша и стоимость их декодирования для разных кодеков')
+
+parser.add_argument('--menu-size', type=int, default=50, help='Блюд в меню ресторана')
+parser.add_argument('--dishes-size', type=int, default=1000, help='Блюд в общем списке')
+parser.add_argument('--reservations-size', type=int, default=200, help='Бронирований ресторана')
+parser.add_argument('--decodes', type=int, default=2000, help='Количество декодирований каждой записи')
+parser.add_argument('--redis', action='store_true', help='Дополнительно замерить MEMORY USAGE в Redis из настроек')
+
+args = parser.parse_args()
+
+# (кодек, порог сжатия): 0 - без сжатия
+CodecT = Literal['json', 'columnar']
+
+VARIANTS: List[Tuple[CodecT, int]] = [('json', 0), ('json', 1024), ('columnar', 0), ('columnar', 1024)]
+
+random.seed(42)
+
+WORDS = ['нежное', 'мясо', 'овощи', 'гриль', 'соус', 'лесные', 'ягоды', 'сливочный', 'томатный', 'пряный']
+WORDS += ['свежий', 'хрустящий', 'домашний', 'сыр', 'зелень']
+
+
+def text(words: int) -> str:
+    return ' '.join(random.choices(WORDS, k=words)).capitalize()
+
+
+def dishes(count: int, restaurant_id: int | None = None) -> List[DishRead]:
+    return [
+        DishRead(
+            id=i,
+            restaurant_id=restaurant_id or random.randint(1, 100),
+            category=random.choice(list(DishCategory)),
+            dish_name=f'{text(2)} №{i}',
+            description=text(10),
+            price=round(random.uniform(100, 3000), 2),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def reservations(count: int) -> List[ReservationRead]:
+    start = datetime(2024, 3, 1, 12, tzinfo=timezone.utc)
+    return [
+        ReservationRead(
+            id=i,
+            user_id=random.randint(1, 10_000),
+            restaurant_id=1,
+            date_reserv=start + timedelta(minutes=30 * i),
+            guest_count=random.randint(1, 8),
+            status=random.random() < 0.5,
+            comment=random.choice(['У окна', 'День рождения', None, text(4)]),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+FAMILIES: Dict[str, bytes] = {
+    'dish': dump_model(dishes(1)[0]),
+    'menu': dump_models(dishes(args.menu_size, restaurant_id=1)),
+    'dishes': dump_models(dishes(args.dishes_size)),
+    'reservations': dump_models(reservations(args.reservations_size)),
+}
+
+
+def encode(payload: bytes, codec: CodecT, compress_min_bytes: int) -> bytes:
+    settings.CACHE_CODEC = codec
+    settings.CACHE_COMPRESS_MIN_BYTES = compress_min_bytes
+    return CacheEntry(payload=payload, soft_expires_at=time.time() + 60, delta=0.01, generations=(1,)).encode()
+
+
+def decode_cost(value: bytes) -> float:
+    start = time.perf_counter()
+    for _ in range(args.decodes):
+        CacheEntry.decode(value)
+    return (time.perf_counter() - start) / args.decodes
+
+
+async def redis_memory(values: Dict[Tuple[str, str], bytes]) -> Dict[Tuple[str, str], int]:
+    from webapp.db import redis
+    from webapp.on_startup.redis import start_redis
+
+    await start_redis()
+    client = redis.get_redis()
+    usage = {}
+    for (family, variant), value in values.items():
+        key = f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:bench:codec:{family}:{variant}'
+        await client.set(key, value, ex=60)
+        usage[(family, variant)] = await client.memory_usage(key)
+        await client.delete(key)
+    return usage
+
+
+def main() -> None:
+    values: Dict[Tuple[str, str], bytes] = {}
+    for family, payload in FAMILIES.items():
+        for codec, compress_min_bytes in VARIANTS:
+            variant = codec + ('+zlib' if compress_min_bytes else '')
+            values[(family, variant)] = encode(payload, codec, compress_min_bytes)
+
+    usage = asyncio.run(redis_memory(values)) if args.redis else {}
+
+    print(f'{"family":>14} {"codec":>15} {"bytes":>9} {"ratio":>6} {"decode, us":>11}' + ('  redis' if usage else ''))
+    for (family, variant), value in values.items():
+        baseline = len(values[(family, 'json')])
+        line = (
+            f'{family:>14} {variant:>15} {len(value):9d} {len(value) / baseline:6.2f} '
+            f'{decode_cost(value) * 1_000_000:11.1f}'
+        )
+        if usage:
+            line += f'  {usage[(family, variant)]:5d}'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Awaitable, Callable, Dict
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from webapp.cache.response import dump_models
+from webapp.crud.dish import get_dishes_by_restaurant_id_and_category, get_menu_json
+from webapp.crud.restaurant import create_restaurant, delete_restaurant
+from webapp.db.postgres import async_session
+from webapp.models.sirius.dish import Dish, DishCategory
+from webapp.schema.restaurant.dish import DishRead
+from webapp.schema.restaurant.restaurant import RestaurantCreate
+
+parser = argparse.ArgumentParser(
+    description='Строк в секунду при чтении меню: ORM против Core с проекцией колонок (моделями и сразу JSON)'
+)
+
+parser.add_argument('--dishes', type=int, default=2000, help='Количество блюд в меню')
+parser.add_argument('--runs', type=int, default=30, help='Количество замеров на каждый вариант')
+
+args = parser.parse_args()
+
+
+async def orm(session: AsyncSession, restaurant_id: int) -> bytes:
+    # Прежний путь: сущности в identity map, затем модели схемы и JSON
+    result = await session.execute(select(Dish).where(Dish.restaurant_id == restaurant_id).order_by(Dish.id))
+    return dump_models([DishRead.model_validate(dish) for dish in result.scalars().all()])
+
+
+async def core_models(session: AsyncSession, restaurant_id: int) -> bytes:
+    return dump_models(
+        await get_dishes_by_restaurant_id_and_category(session=session, restaurant_id=restaurant_id) or []
+    )
+
+
+async def core_json(session: AsyncSession, restaurant_id: int) -> bytes:
+    return await get_menu_json(session=session, restaurant_id=restaurant_id) or b'[]'
+
+
+READERS: Dict[str, Callable[[AsyncSession, int], Awaitable[bytes]]] = {
+    'orm': orm,
+    'core models': core_models,
+    'core json': core_json,
+}
+
+
+async def main() -> None:
+    categories = list(DishCategory)
+    async with async_session() as session:
+        restaurant = await create_restaurant(
+            session=session,
+            restaurant_data=RestaurantCreate(name='Бенчмарк', address='ул. Тестовая, 1', description='-'),
+        )
+        await session.execute(
+            insert(Dish),
+            [
+                {
+                    'restaurant_id': restaurant.id,
+                    'category': categories[i % len(categories)],
+                    'dish_name': f'Блюдо №{i}',
+                    'description': 'Описание блюда',
+                    'price': 100 + i / 4,
+                }
+                for i in range(args.dishes)
+            ],
+        )
+        await session.commit()
+
+    try:
+        print(f'{args.dishes} dishes, median of {args.runs} runs')
+        bodies = set()
+        for name, read in READERS.items():
+            timings = []
+            async with async_session() as session:
+                bodies.add(await read(session, restaurant.id))
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    await read(session, restaurant.id)
+                    timings.append(time.perf_counter() - start)
+                    # Каждый запрос API идет в новой сессии: identity map не переиспользуется
+                    await session.rollback()
+                    session.expunge_all()
+            print(f'{name:>12}: {args.dishes / statistics.median(timings):10,.0f} rows/s')
+        # Все варианты отдают одно и то же тело ответа
+        assert len(bodies) == 1
+    finally:
+        async with async_session() as session:
+            await delete_restaurant(session=session, restaurant_id=restaurant.id)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+import time
+import asyncio
+import argparse
+import contextlib
+import statistics
+from typing import List
+
+from httpx import AsyncClient
+
+from conf.config import settings
+from webapp.cache.client import cache_delete, cache_get, listen_invalidations
+from webapp.cache.entry import CacheEntry
+from webapp.cache.key_builder import get_restaurant_by_id_cache
+from webapp.cache.local import local_cache
+from webapp.cache.response import dump_model
+from webapp.cache.tags import restaurant_tag
+from webapp.db import redis
+from webapp.main import create_app
+from webapp.on_startup.redis import start_redis
+from webapp.schema.restaurant.restaurant import RestaurantRead
+
+parser = argparse.ArgumentParser(description='Задержка /restaurants/{id} на попадании в кэш с L1 и без него')
+
+parser.add_argument('--requests', type=int, default=5000, help='Количество запросов на каждый вариант')
+parser.add_argument('--concurrency', type=int, default=20, help='Количество одновременных запросов')
+parser.add_argument('--restaurant-id', type=int, default=10**9, help='id ресторана для синтетической записи')
+
+args = parser.parse_args()
+
+
+async def measure(client: AsyncClient, url: str, total: int, concurrency: int) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(url)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return latencies
+
+
+def report(name: str, latencies: List[float]) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f'{name:>8}: p50={quantiles[49] * 1000:7.3f} ms  p99={quantiles[98] * 1000:7.3f} ms')
+
+
+async def main() -> None:
+    settings.CACHE_L1_ENABLED = False
+    app = create_app()
+    await start_redis()
+
+    cache_key = get_restaurant_by_id_cache(restaurant_id=args.restaurant_id)
+    restaurant = RestaurantRead(id=args.restaurant_id, name='Бенчмарк', address='ул. Тестовая, 1', description='-')
+    _, generations = await cache_get(redis.get_redis(), cache_key, [restaurant_tag(args.restaurant_id)])
+    entry = CacheEntry(
+        payload=dump_model(restaurant), soft_expires_at=time.time() + 600, delta=0, generations=generations
+    )
+    await redis.get_redis().set(cache_key, entry.encode(), ex=600)
+    url = f'/restaurants/{args.restaurant_id}'
+
+    listener = None
+    try:
+        async with AsyncClient(app=app, base_url='http://bench') as client:
+            await measure(client, url, args.concurrency, args.concurrency)
+            report('L1 off', await measure(client, url, args.requests, args.concurrency))
+
+            listener = asyncio.create_task(listen_invalidations(redis.get_redis()))
+            while not local_cache.enabled:
+                await asyncio.sleep(0.01)
+            await measure(client, url, args.concurrency, args.concurrency)
+            report('L1 on', await measure(client, url, args.requests, args.concurrency))
+    finally:
+        if listener is not None:
+            listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await listener
+        await cache_delete(redis.get_redis(), cache_key)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+import time
+import asyncio
+import argparse
+from typing import Any, List
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from httpx import AsyncClient
+
+from webapp.cache.client import cache_get
+from webapp.cache.entry import CacheEntry
+from webapp.cache.key_builder import get_restaurant_menu_by_id_cache
+from webapp.cache.response import dump_models
+from webapp.cache.tags import restaurant_menu_tag
+from webapp.db import redis
+from webapp.main import create_app
+from webapp.models.sirius.dish import DishCategory
+from webapp.on_startup.redis import start_redis
+from webapp.schema.restaurant.dish import DishRead
+
+parser = argparse.ArgumentParser(description='Запросов в секунду на попадание в кэш /restaurants/{id}/menu')
+
+parser.add_argument('--dishes', type=int, default=500, help='Количество блюд в меню')
+parser.add_argument('--requests', type=int, default=2000, help='Количество запросов на каждый вариант')
+parser.add_argument('--concurrency', type=int, default=50, help='Количество одновременных запросов')
+parser.add_argument('--restaurant-id', type=int, default=10**9, help='id ресторана для синтетического меню')
+
+args = parser.parse_args()
+
+
+def build_menu(restaurant_id: int, size: int) -> List[DishRead]:
+    categories = list(DishCategory)
+    return [
+        DishRead(
+            id=i,
+            restaurant_id=restaurant_id,
+            category=categories[i % len(categories)],
+            dish_name=f'Блюдо №{i}',
+            description='Описание блюда с достаточно длинным текстом, как в настоящем меню',
+            price=100 + i % 1000,
+        )
+        for i in range(1, size + 1)
+    ]
+
+
+async def measure(client: AsyncClient, url: str, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            response = await client.get(url)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    app = create_app()
+
+    # Прежний путь попадания: orjson.loads + валидация response_model + сериализация ORJSONResponse
+    @app.get('/bench/legacy/{restaurant_id}/menu', response_model=List[DishRead], response_class=ORJSONResponse)
+    async def legacy_menu(restaurant_id: int) -> Any:
+        raw = await redis.get_redis().get(get_restaurant_menu_by_id_cache(restaurant_id=restaurant_id))
+        entry = CacheEntry.decode(raw)
+        return orjson.loads(entry.payload) if entry is not None else None
+
+    await start_redis()
+    cache_key = get_restaurant_menu_by_id_cache(restaurant_id=args.restaurant_id)
+    payload = dump_models(build_menu(args.restaurant_id, args.dishes))
+    _, generations = await cache_get(redis.get_redis(), cache_key, [restaurant_menu_tag(args.restaurant_id)])
+    entry = CacheEntry(payload=payload, soft_expires_at=time.time() + 600, delta=0, generations=generations)
+    await redis.get_redis().set(cache_key, entry.encode(), ex=600)
+
+    try:
+        async with AsyncClient(app=app, base_url='http://bench') as client:
+            variants = {
+                'legacy (loads + validate)': f'/bench/legacy/{args.restaurant_id}/menu',
+                'raw bytes': f'/restaurants/{args.restaurant_id}/menu',
+            }
+            for url in variants.values():
+                await measure(client, url, args.concurrency, args.concurrency)
+
+            print(f'menu: {args.dishes} dishes, {len(payload)} bytes')
+            results = {}
+            for name, url in variants.items():
+                results[name] = await measure(client, url, args.requests, args.concurrency)
+                print(f'{name:>28}: {results[name]:10.1f} req/s')
+
+            speedup = results['raw bytes'] / results['legacy (loads + validate)']
+            print(f'{"speedup":>28}: {speedup:10.2f}x')
+    finally:
+        await redis.get_redis().delete(cache_key)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
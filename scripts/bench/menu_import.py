@@ -0,0 +1,88 @@
+import time
+import asyncio
+import argparse
+import statistics
+from typing import List
+
+from sqlalchemy import delete
+
+from webapp.cache.client import invalidate_tags
+from webapp.cache.existence import DISH_IDS, record_existence, reserve_ids
+from webapp.cache.tags import dish_write_tags
+from webapp.crud.dish import create_dish, create_dishes
+from webapp.crud.restaurant import create_restaurant, delete_restaurant
+from webapp.db import redis
+from webapp.db.postgres import async_session
+from webapp.models.sirius.dish import Dish, DishCategory
+from webapp.on_startup.redis import start_redis
+from webapp.schema.restaurant.dish import DishCreate
+from webapp.schema.restaurant.restaurant import RestaurantCreate
+
+parser = argparse.ArgumentParser(
+    description='Время загрузки меню: POST /dishes по одному блюду против POST /dishes/bulk'
+)
+
+parser.add_argument('--dishes', type=int, default=500, help='Количество блюд в меню')
+parser.add_argument('--runs', type=int, default=5, help='Количество замеров на каждый вариант')
+
+args = parser.parse_args()
+
+
+async def one_by_one(menu: List[DishCreate]) -> None:
+    # Как create_dish_endpoint: коммит, инвалидация и фильтр существования на каждое блюдо
+    client = redis.get_redis()
+    async with async_session() as session:
+        for dish_data in menu:
+            dish = await create_dish(session=session, dish_data=dish_data, before_commit=reserve_ids(client, DISH_IDS))
+            await invalidate_tags(client, *dish_write_tags(dish))
+            await record_existence(client, added=[(DISH_IDS, dish.id)])
+
+
+async def bulk(menu: List[DishCreate]) -> None:
+    # Как create_dishes_endpoint: один INSERT, одна инвалидация на весь пакет
+    client = redis.get_redis()
+    async with async_session() as session:
+        dishes = await create_dishes(session=session, dishes_data=menu, before_commit=reserve_ids(client, DISH_IDS))
+        await invalidate_tags(client, *dish_write_tags(*dishes))
+        await record_existence(client, added=[(DISH_IDS, dish.id) for dish in dishes])
+
+
+async def main() -> None:
+    await start_redis()
+    categories = list(DishCategory)
+
+    async with async_session() as session:
+        restaurant = await create_restaurant(
+            session=session,
+            restaurant_data=RestaurantCreate(name='Бенчмарк', address='ул. Тестовая, 1', description='-'),
+        )
+    menu = [
+        DishCreate(
+            restaurant_id=restaurant.id,
+            category=categories[i % len(categories)],
+            dish_name=f'Блюдо №{i}',
+            description='Описание блюда',
+            price=100 + i,
+        )
+        for i in range(args.dishes)
+    ]
+
+    try:
+        print(f'{args.dishes} dishes, median of {args.runs} runs')
+        for name, load in (('one by one', one_by_one), ('bulk', bulk)):
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                await load(menu)
+                timings.append(time.perf_counter() - start)
+                async with async_session() as session:
+                    await session.execute(delete(Dish).where(Dish.restaurant_id == restaurant.id))
+                    await session.commit()
+            print(f'{name:>10}: {statistics.median(timings) * 1000:8.1f} ms')
+    finally:
+        async with async_session() as session:
+            await delete_restaurant(session=session, restaurant_id=restaurant.id)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+import time
+import asyncio
+import argparse
+import tracemalloc
+from typing import Any, Awaitable, Callable, Tuple
+
+from httpx import AsyncClient
+from sqlalchemy import delete, func, insert, select, text
+
+from webapp.cache.response import dump_models
+from webapp.crud.dish import estimate_dishes, get_dishes
+from webapp.crud.restaurant import create_restaurant
+from webapp.db import redis
+from webapp.db.postgres import async_session
+from webapp.main import create_app
+from webapp.models.sirius.dish import Dish, DishCategory
+from webapp.models.sirius.restaurant import Restaurant
+from webapp.on_startup.redis import start_redis
+from webapp.schema.restaurant.restaurant import RestaurantCreate
+from webapp.utils.pagination import Page
+
+parser = argparse.ArgumentParser(description='Задержка и память списка блюд целиком против страниц по ключу')
+
+parser.add_argument('--dishes', type=int, default=1_000_000, help='Количество блюд')
+parser.add_argument('--limit', type=int, default=100, help='Размер страницы')
+parser.add_argument('--rounds', type=int, default=200, help='Количество повторов для страниц')
+parser.add_argument('--batch-size', type=int, default=10_000, help='Размер пакета вставки')
+
+args = parser.parse_args()
+
+
+async def measured(call: Callable[[], Awaitable[Any]]) -> Tuple[float, int]:
+    # Время в секундах и пик памяти Python в байтах
+    tracemalloc.start()
+    start = time.perf_counter()
+    await call()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+async def timed(call: Callable[[], Awaitable[Any]], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await call()
+    return (time.perf_counter() - start) / rounds
+
+
+async def main() -> None:
+    app = create_app()
+    await start_redis()
+    categories = list(DishCategory)
+
+    async with async_session() as session:
+        restaurant = await create_restaurant(
+            session=session,
+            restaurant_data=RestaurantCreate(name='Бенчмарк', address='ул. Тестовая, 1', description='-'),
+        )
+        for start in range(0, args.dishes, args.batch_size):
+            rows = [
+                {
+                    'restaurant_id': restaurant.id,
+                    'category': categories[i % len(categories)],
+                    'dish_name': f'Блюдо №{i}',
+                    'description': 'Описание блюда для бенчмарка',
+                    'price': 100,
+                }
+                for i in range(start, min(start + args.batch_size, args.dishes))
+            ]
+            await session.execute(insert(Dish), rows)
+        await session.commit()
+        await session.execute(text('ANALYZE sirius.dish'))
+        last_id = await session.scalar(select(func.max(Dish.id)))
+
+    try:
+        print(f'{args.dishes} dishes, page size {args.limit}')
+        async with async_session() as session:
+
+            async def full_list() -> None:
+                dump_models(await get_dishes(session=session) or [])
+                session.expunge_all()
+
+            async def first_page() -> None:
+                dump_models(await get_dishes(session=session, page=Page(limit=args.limit)) or [])
+                session.expunge_all()
+
+            async def deep_page() -> None:
+                page = Page(limit=args.limit, after=last_id - args.limit * 2)
+                dump_models(await get_dishes(session=session, page=page) or [])
+                session.expunge_all()
+
+            elapsed, peak = await measured(full_list)
+            print(f'{"full list":>16}: {elapsed * 1000:10.2f} ms, peak {peak / 2**20:8.1f} MiB')
+            for name, variant in (('first page', first_page), ('last pages', deep_page)):
+                _, peak = await measured(variant)
+                elapsed = await timed(variant, args.rounds)
+                print(f'{name:>16}: {elapsed * 1000:10.2f} ms, peak {peak / 2**20:8.1f} MiB')
+
+            async def count() -> None:
+                await session.scalar(select(func.count()).select_from(Dish))
+
+            async def estimate() -> None:
+                await estimate_dishes(session=session)
+
+            for name, variant in (('COUNT(*)', count), ('planner estimate', estimate)):
+                elapsed = await timed(variant, 5)
+                print(f'{name:>16}: {elapsed * 1000:10.2f} ms')
+
+        await redis.get_redis().flushdb()
+        async with AsyncClient(app=app, base_url='http://bench') as client:
+
+            async def http_page() -> None:
+                response = await client.get('/dishes/', params={'limit': args.limit})
+                response.raise_for_status()
+
+            elapsed, _ = await measured(http_page)
+            print(f'{"http cold":>16}: {elapsed * 1000:10.2f} ms')
+            elapsed = await timed(http_page, args.rounds)
+            print(f'{"http cached":>16}: {elapsed * 1000:10.2f} ms')
+    finally:
+        async with async_session() as session:
+            await session.execute(delete(Dish).where(Dish.restaurant_id == restaurant.id))
+            await session.execute(delete(Restaurant).where(Restaurant.id == restaurant.id))
+            await session.commit()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
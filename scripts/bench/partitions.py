@@ -0,0 +1,178 @@
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from datetime import datetime, timezone
+from typing import Dict
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from webapp.db.partitions import add_months, month_start, partition_bounds
+from webapp.db.postgres import engine
+
+parser = argparse.ArgumentParser(
+    description='Ближайшие бронирования ресторана и пользователя: обычная таблица против секций по месяцам'
+)
+
+parser.add_argument('--rows', type=int, default=50_000_000, help='Количество бронирований')
+parser.add_argument('--months', type=int, default=36, help='Месяцев истории до текущего')
+parser.add_argument('--restaurants', type=int, default=10_000, help='Количество ресторанов')
+parser.add_argument('--users', type=int, default=1_000_000, help='Количество пользователей')
+parser.add_argument('--runs', type=int, default=500, help='Количество запросов на каждый вариант')
+
+args = parser.parse_args()
+
+SCHEMA = 'bench_partitions'
+BATCH_SIZE = 1_000_000
+MONTHS_AHEAD = 3
+
+COLUMNS = '''
+    id bigint NOT NULL, user_id integer NOT NULL, restaurant_id integer NOT NULL,
+    date_reserv timestamp with time zone NOT NULL, guest_count integer NOT NULL, status boolean NOT NULL,
+    comment varchar NOT NULL
+'''
+
+# Бронирования равномерно по истории и месяцам вперед
+FILL = '''
+INSERT INTO {table}
+SELECT i,
+       1 + (random() * (CAST(:users AS integer) - 1))::int,
+       1 + (random() * (CAST(:restaurants AS integer) - 1))::int,
+       CAST(:first AS timestamptz) + random() * (CAST(:last AS timestamptz) - CAST(:first AS timestamptz)),
+       2, true, '-'
+FROM generate_series(CAST(:start AS bigint), CAST(:stop AS bigint)) AS i
+'''
+
+QUERIES = {
+    'restaurant upcoming': (
+        'SELECT * FROM {table} WHERE restaurant_id = $1 AND date_reserv >= now() ORDER BY date_reserv LIMIT 20',
+        'restaurants',
+    ),
+    'user upcoming': (
+        'SELECT * FROM {table} WHERE user_id = $1 AND date_reserv >= now() ORDER BY date_reserv LIMIT 20',
+        'users',
+    ),
+}
+
+
+async def create_tables(connection: AsyncConnection) -> None:
+    await connection.execute(text(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE'))
+    await connection.execute(text(f'CREATE SCHEMA {SCHEMA}'))
+    await connection.execute(text(f'CREATE TABLE {SCHEMA}.plain ({COLUMNS}, PRIMARY KEY (id))'))
+    await connection.execute(
+        text(
+            f'CREATE TABLE {SCHEMA}.partitioned ({COLUMNS}, PRIMARY KEY (id, date_reserv)) '
+            'PARTITION BY RANGE (date_reserv)'
+        )
+    )
+    current = month_start(datetime.now(timezone.utc).date())
+    for offset in range(-args.months, MONTHS_AHEAD + 1):
+        month = add_months(current, offset)
+        lower, upper = partition_bounds(month)
+        await connection.execute(
+            text(
+                f'CREATE TABLE {SCHEMA}.partitioned_{month:%Y_%m} PARTITION OF {SCHEMA}.partitioned '
+                f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+            )
+        )
+
+
+async def fill(connection: AsyncConnection) -> None:
+    current = month_start(datetime.now(timezone.utc).date())
+    first, _ = partition_bounds(add_months(current, -args.months))
+    _, last = partition_bounds(add_months(current, MONTHS_AHEAD))
+    for table in ('plain', 'partitioned'):
+        start = time.perf_counter()
+        for offset in range(1, args.rows + 1, BATCH_SIZE):
+            await connection.execute(
+                text(FILL.format(table=f'{SCHEMA}.{table}')),
+                {
+                    'users': args.users,
+                    'restaurants': args.restaurants,
+                    'first': first,
+                    'last': last,
+                    'start': offset,
+                    'stop': min(offset + BATCH_SIZE - 1, args.rows),
+                },
+            )
+            await connection.commit()
+        for columns in ('restaurant_id, date_reserv', 'user_id, date_reserv'):
+            await connection.execute(text(f'CREATE INDEX ON {SCHEMA}.{table} ({columns})'))
+        await connection.commit()
+        print(f'{table:>12}: filled in {time.perf_counter() - start:.1f} s')
+    autocommit = await connection.execution_options(isolation_level='AUTOCOMMIT')
+    await autocommit.execute(text(f'VACUUM ANALYZE {SCHEMA}.plain'))
+    await autocommit.execute(text(f'VACUUM ANALYZE {SCHEMA}.partitioned'))
+
+
+async def measure(connection: AsyncConnection, statement: str, bound: int) -> float:
+    timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        await connection.exec_driver_sql(statement, (random.randint(1, bound),))
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+async def index_size(connection: AsyncConnection, table: str) -> int:
+    # Индексы секций не входят в pg_indexes_size секционированной таблицы
+    return await connection.scalar(
+        text(
+            'SELECT sum(pg_indexes_size(relid)) FROM pg_partition_tree(:table) WHERE isleaf'
+            if table == 'partitioned'
+            else 'SELECT pg_indexes_size(:table)'
+        ),
+        {'table': f'{SCHEMA}.{table}'},
+    )
+
+
+async def drop_month(connection: AsyncConnection) -> Dict[str, float]:
+    # Удаление самого старого месяца: DELETE из обычной таблицы против отсоединения и удаления секции
+    month = add_months(month_start(datetime.now(timezone.utc).date()), -args.months)
+    lower, upper = partition_bounds(month)
+    start = time.perf_counter()
+    await connection.execute(
+        text(f'DELETE FROM {SCHEMA}.plain WHERE date_reserv >= :lower AND date_reserv < :upper'),
+        {'lower': lower, 'upper': upper},
+    )
+    await connection.commit()
+    plain = time.perf_counter() - start
+    start = time.perf_counter()
+    await connection.execute(
+        text(f'ALTER TABLE {SCHEMA}.partitioned DETACH PARTITION {SCHEMA}.partitioned_{month:%Y_%m}')
+    )
+    await connection.execute(text(f'DROP TABLE {SCHEMA}.partitioned_{month:%Y_%m}'))
+    await connection.commit()
+    return {'plain': plain, 'partitioned': time.perf_counter() - start}
+
+
+async def main() -> None:
+    bounds = {'restaurants': args.restaurants, 'users': args.users}
+    async with engine.connect() as connection:
+        await create_tables(connection)
+        await connection.commit()
+        try:
+            await fill(connection)
+            print(
+                f'{args.rows:,} reservations over {args.months + MONTHS_AHEAD + 1} months, median of {args.runs} runs'
+            )
+            for table in ('plain', 'partitioned'):
+                print(f'{table:>12}: indexes {await index_size(connection, table) / 2**20:,.0f} MiB')
+            for name, (statement, bound) in QUERIES.items():
+                for table in ('plain', 'partitioned'):
+                    seconds = await measure(connection, statement.format(table=f'{SCHEMA}.{table}'), bounds[bound])
+                    print(f'{name:>20} {table:>12}: {seconds * 1000:.3f} ms')
+                await connection.rollback()
+            for table, seconds in (await drop_month(connection)).items():
+                print(f'{"drop oldest month":>20} {table:>12}: {seconds:.2f} s')
+        finally:
+            await connection.rollback()
+            await connection.execute(text(f'DROP SCHEMA {SCHEMA} CASCADE'))
+            await connection.commit()
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
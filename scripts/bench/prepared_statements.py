@@ -0,0 +1,109 @@
+import time
+import random
+import asyncio
+import argparse
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conf.config import settings
+from webapp.crud.dish import get_dish
+from webapp.crud.restaurant import get_restaurant
+from webapp.db import postgres
+from webapp.models.sirius.dish import Dish, DishCategory
+from webapp.models.sirius.restaurant import Restaurant
+
+parser = argparse.ArgumentParser(
+    description='Запросов в секунду get_dish и get_restaurant в режимах подготовки запросов'
+)
+
+parser.add_argument('--restaurants', type=int, default=1000, help='Количество ресторанов')
+parser.add_argument('--dishes', type=int, default=10_000, help='Количество блюд')
+parser.add_argument('--concurrency', type=int, default=10, help='Количество одновременных сессий')
+parser.add_argument('--duration', type=float, default=5.0, help='Длительность замера в секундах')
+
+args = parser.parse_args()
+
+# Режим -> размер кэшей подготовленных запросов; uncached - direct без кэшей, каждый запрос готовится заново
+MODES = {
+    'direct': settings.DB_STATEMENT_CACHE_SIZE,
+    'uncached': 0,
+    'pgbouncer': 0,
+}
+
+QUERIES: Dict[str, Callable[[AsyncSession, int], Awaitable[object]]] = {
+    'get_dish': lambda session, key: get_dish(session=session, dish_id=key),
+    'get_restaurant': lambda session, key: get_restaurant(session=session, restaurant_id=key),
+}
+
+
+async def qps(query: Callable[[AsyncSession, int], Awaitable[object]], ids: List[int], duration: float) -> float:
+    # Сессии работают параллельно, каждая выполняет запросы подряд со случайными id
+    session_maker = postgres.create_session(postgres.engine)
+    deadline = time.perf_counter() + duration
+    counts = [0] * args.concurrency
+
+    async def worker(number: int) -> None:
+        async with session_maker() as session:
+            while time.perf_counter() < deadline:
+                await query(session, random.choice(ids))
+                await session.rollback()
+                counts[number] += 1
+
+    await asyncio.gather(*(worker(number) for number in range(args.concurrency)))
+    return sum(counts) / duration
+
+
+async def main() -> None:
+    random.seed(0)
+    async with postgres.async_session() as session:
+        restaurant_ids = list(
+            await session.scalars(
+                insert(Restaurant).returning(Restaurant.id),
+                [{'name': f'Ресторан {i}', 'address': '-', 'description': '-'} for i in range(args.restaurants)],
+            )
+        )
+        dish_ids = list(
+            await session.scalars(
+                insert(Dish).returning(Dish.id),
+                [
+                    {
+                        'restaurant_id': restaurant_ids[i % len(restaurant_ids)],
+                        'category': DishCategory.SOUP,
+                        'dish_name': f'Блюдо {i}',
+                        'description': '-',
+                        'price': 100,
+                    }
+                    for i in range(args.dishes)
+                ],
+            )
+        )
+        await session.commit()
+
+    ids = {'get_dish': dish_ids, 'get_restaurant': restaurant_ids}
+    settings.DB_POOL_SIZE = args.concurrency
+    try:
+        print(f'{args.concurrency} sessions, {args.duration:.0f} s per run')
+        for mode, cache_size in MODES.items():
+            settings.DB_PREPARED_STATEMENTS = 'pgbouncer' if mode == 'pgbouncer' else 'direct'
+            settings.DB_STATEMENT_CACHE_SIZE = cache_size
+            postgres.engine = postgres.create_engine()
+            try:
+                for name, query in QUERIES.items():
+                    # Прогон для открытия соединений и заполнения кэшей
+                    await qps(query, ids[name], 1.0)
+                    print(f'{mode:>10} {name:>15}: {await qps(query, ids[name], args.duration):10.0f} q/s')
+            finally:
+                await postgres.engine.dispose()
+    finally:
+        postgres.engine = postgres.create_engine()
+        async with postgres.create_session(postgres.engine)() as session:
+            await session.execute(delete(Dish).where(Dish.id.in_(dish_ids)))
+            await session.execute(delete(Restaurant).where(Restaurant.id.in_(restaurant_ids)))
+            await session.commit()
+        await postgres.engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+import time
+import random
+import asyncio
+import argparse
+from typing import Any, List
+
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from conf.config import settings
+from webapp.cache.existence import rebuild_filters
+from webapp.cache.local import local_cache
+from webapp.crud.dish import create_dish
+from webapp.crud.restaurant import create_restaurant, delete_restaurant
+from webapp.db import redis
+from webapp.db.postgres import async_session, engine
+from webapp.main import create_app
+from webapp.models.sirius.dish import DishCategory
+from webapp.on_startup.redis import start_redis
+from webapp.schema.restaurant.dish import DishCreate
+from webapp.schema.restaurant.restaurant import RestaurantCreate
+
+parser = argparse.ArgumentParser(
+    description='Перебор случайных id /dishes/{id}: запросы в БД, новые ключи Redis и запросов в секунду с фильтром и без'
+)
+
+parser.add_argument('--dishes', type=int, default=100, help='Количество существующих блюд')
+parser.add_argument('--requests', type=int, default=2000, help='Количество запросов на каждый вариант')
+parser.add_argument('--max-id', type=int, default=2**31 - 1, help='Верхняя граница перебираемых id')
+parser.add_argument('--seed', type=int, default=1, help='Начальное значение генератора')
+
+args = parser.parse_args()
+
+
+class Queries:
+    def __init__(self) -> None:
+        self.count = 0
+
+        def before_cursor_execute(
+            conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+        ) -> None:
+            self.count += 1
+
+        event.listen(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+
+
+async def main() -> None:
+    app = create_app()
+    await start_redis()
+    client = redis.get_redis()
+    queries = Queries()
+    # Фильтр (как и L1) работает, пока активна подписка на инвалидации; здесь подписки нет
+    local_cache.enabled = True
+
+    async with async_session() as session:
+        restaurant = await create_restaurant(
+            session=session,
+            restaurant_data=RestaurantCreate(name='Бенчмарк', address='ул. Тестовая, 1', description='-'),
+        )
+        dish_ids: List[int] = []
+        for i in range(args.dishes):
+            dish = await create_dish(
+                session=session,
+                dish_data=DishCreate(
+                    restaurant_id=restaurant.id,
+                    category=DishCategory.MAIN_COURSE,
+                    dish_name=f'Блюдо №{i}',
+                    description='-',
+                    price=100,
+                ),
+            )
+            assert dish.id is not None
+            dish_ids.append(dish.id)
+
+    try:
+        print(f'{args.dishes} dishes, {args.requests} requests for random ids up to {args.max_id}')
+        async with AsyncClient(app=app, base_url='http://bench') as http:
+            for name, enabled in (('no filter', False), ('filter', True)):
+                settings.EXISTENCE_FILTER_ENABLED = enabled
+                local_cache.clear()
+                await client.flushdb()
+                if enabled:
+                    async with async_session() as session:
+                        await rebuild_filters(client, session)
+                # Первый запрос читает копию карты, в замер не входит
+                await http.get(f'/dishes/{dish_ids[0]}')
+
+                rng = random.Random(args.seed)
+                keys = await client.dbsize()
+                queries.count = 0
+                start = time.perf_counter()
+                for _ in range(args.requests):
+                    dish_id = rng.randint(1, args.max_id)
+                    response = await http.get(f'/dishes/{dish_id}')
+                    assert response.status_code in (200, 404)
+                elapsed = time.perf_counter() - start
+                print(
+                    f'{name:>10}: db queries {queries.count:5d}, new redis keys {await client.dbsize() - keys:5d}, '
+                    f'{args.requests / elapsed:8.0f} req/s'
+                )
+    finally:
+        async with async_session() as session:
+            await delete_restaurant(session=session, restaurant_id=restaurant.id)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+import time
+import asyncio
+import argparse
+from typing import Any, List
+
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from webapp.cache.client import cache_delete
+from webapp.cache.key_builder import get_restaurant_menu_by_id_cache, get_restaurants_cache
+from webapp.db import redis
+from webapp.db.postgres import engine
+from webapp.main import create_app
+from webapp.on_startup.redis import start_redis
+
+parser = argparse.ArgumentParser(description='Число запросов в БД при одновременном истечении ключа кэша')
+
+parser.add_argument('--concurrency', type=int, default=500, help='Количество одновременных запросов')
+parser.add_argument('--rounds', type=int, default=5, help='Количество синхронных истечений ключа')
+parser.add_argument('--restaurant-id', type=int, default=1, help='id ресторана, меню которого запрашивается')
+
+args = parser.parse_args()
+
+
+async def main() -> None:
+    app = create_app()
+    await start_redis()
+
+    statements: List[str] = []
+
+    def before_cursor_execute(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        if statement.startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+
+    targets = {
+        get_restaurants_cache(): '/restaurants/',
+        get_restaurant_menu_by_id_cache(restaurant_id=args.restaurant_id): f'/restaurants/{args.restaurant_id}/menu',
+    }
+    async with AsyncClient(app=app, base_url='http://bench') as client:
+        for cache_key, url in targets.items():
+            for round_number in range(1, args.rounds + 1):
+                await cache_delete(redis.get_redis(), cache_key)
+                statements.clear()
+
+                start = time.perf_counter()
+                responses = await asyncio.gather(*(client.get(url) for _ in range(args.concurrency)))
+                elapsed = time.perf_counter() - start
+
+                statuses = {response.status_code for response in responses}
+                print(
+                    f'{url} round {round_number}: {args.concurrency} requests, '
+                    f'{len(statements)} DB queries, {elapsed * 1000:.1f} ms, statuses {sorted(statuses)}'
+                )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+import random
+import asyncio
+import argparse
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from conf.config import settings
+from webapp.cache.client import invalidate_tags
+from webapp.cache.engine import CachedRead
+from webapp.cache.families import DISH, DISHES, MENU
+from webapp.cache.tags import dish_write_tags
+from webapp.cache.write_through import dish_write_through
+from webapp.crud.dish import create_dish, get_dish, get_dishes, get_dishes_by_restaurant_id_and_category, update_dish
+from webapp.crud.restaurant import create_restaurant, delete_restaurant
+from webapp.db import redis
+from webapp.db.postgres import async_session
+from webapp.models.sirius.dish import DishCategory
+from webapp.on_startup.redis import start_redis
+from webapp.schema.restaurant.dish import DishCreate, DishUpdate
+from webapp.schema.restaurant.restaurant import RestaurantCreate
+
+parser = argparse.ArgumentParser(
+    description='Доля промахов кэша при смешанной нагрузке: инвалидация против write-through'
+)
+
+parser.add_argument('--dishes', type=int, default=50, help='Количество блюд')
+parser.add_argument('--operations', type=int, default=5000, help='Количество операций на каждый вариант')
+parser.add_argument('--write-ratio', type=float, default=0.05, help='Доля изменений среди операций')
+parser.add_argument('--seed', type=int, default=1, help='Начальное значение генератора')
+
+args = parser.parse_args()
+
+ReadT = Tuple[CachedRead, Dict[str, Any], Callable[..., Awaitable[Any]]]
+
+
+class Misses:
+    def __init__(self) -> None:
+        self.reads = 0
+        self.misses = 0
+
+    def counted(self, loader: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        async def load(session: Any) -> Any:
+            self.misses += 1
+            return await loader(session)
+
+        return load
+
+
+def build_reads(restaurant_id: int, dish_ids: List[int]) -> List[ReadT]:
+    reads: List[ReadT] = [
+        (DISHES, {}, lambda session: get_dishes(session=session)),
+        (
+            MENU,
+            {'restaurant_id': restaurant_id},
+            lambda session: get_dishes_by_restaurant_id_and_category(session, restaurant_id),
+        ),
+    ]
+    for category in DishCategory:
+        reads.append(
+            (
+                MENU,
+                {'restaurant_id': restaurant_id, 'category': category},
+                lambda session, c=category: get_dishes_by_restaurant_id_and_category(session, restaurant_id, c),
+            )
+        )
+    for dish_id in dish_ids:
+        reads.append((DISH, {'dish_id': dish_id}, lambda session, d=dish_id: get_dish(session=session, dish_id=d)))
+    return reads
+
+
+async def run(restaurant_id: int, dish_ids: List[int], write_through: bool) -> Misses:
+    settings.CACHE_WRITE_THROUGH = write_through
+    rng = random.Random(args.seed)
+    reads = build_reads(restaurant_id, dish_ids)
+    misses = Misses()
+    client = redis.get_redis()
+    await client.flushdb()
+
+    async with async_session() as session:
+        # Прогрев: первое чтение каждого ключа - промах в обоих вариантах и не учитывается
+        for family, params, loader in reads:
+            await family.read(client, session, loader, **params)
+
+        for _ in range(args.operations):
+            if rng.random() < args.write_ratio:
+                dish_id = rng.choice(dish_ids)
+                price = rng.randint(100, 1000)
+                updated = await update_dish(session=session, dish_id=dish_id, dish_data=DishUpdate(price=price))
+                assert updated is not None
+                old_dish, dish = updated
+                generations = await invalidate_tags(client, *dish_write_tags(old_dish, dish))
+                await dish_write_through(client, generations, old_dish, dish)
+                continue
+            family, params, loader = rng.choice(reads)
+            misses.reads += 1
+            await family.read(client, session, misses.counted(loader), **params)
+    return misses
+
+
+async def main() -> None:
+    await start_redis()
+    categories = list(DishCategory)
+
+    async with async_session() as session:
+        restaurant = await create_restaurant(
+            session=session,
+            restaurant_data=RestaurantCreate(name='Бенчмарк', address='ул. Тестовая, 1', description='-'),
+        )
+        dish_ids: List[int] = []
+        for i in range(args.dishes):
+            dish = await create_dish(
+                session=session,
+                dish_data=DishCreate(
+                    restaurant_id=restaurant.id,
+                    category=categories[i % len(categories)],
+                    dish_name=f'Блюдо №{i}',
+                    description='-',
+                    price=100,
+                ),
+            )
+            assert dish.id is not None
+            dish_ids.append(dish.id)
+
+    try:
+        print(f'{args.dishes} dishes, {args.operations} operations, write ratio {args.write_ratio:.0%}')
+        for name, write_through in (('invalidate', False), ('write-through', True)):
+            misses = await run(restaurant.id, dish_ids, write_through)
+            print(
+                f'{name:>14}: {misses.misses:5d} misses / {misses.reads:5d} reads, '
+                f'miss rate {misses.misses / misses.reads:6.2%}'
+            )
+    finally:
+        async with async_session() as session:
+            await delete_restaurant(session=session, restaurant_id=restaurant.id)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
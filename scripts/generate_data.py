@@ -0,0 +1,206 @@
+import csv
+import time
+import random
+import argparse
+import itertools
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+import orjson
+
+from webapp.models.sirius.dish import DishCategory
+from webapp.models.sirius.user import RoleCategory
+from webapp.utils.auth.password import hash_password
+
+parser = argparse.ArgumentParser(
+    description='Синтетические данные в масштабе продакшена для scripts/load_data.py: '
+    'популярность ресторанов по Ципфу, бронирования в часы пик, результат определяется --seed'
+)
+
+parser.add_argument('output', help='Каталог для файлов sirius.<таблица>.<формат>')
+parser.add_argument('--users', type=int, default=100_000, help='Количество пользователей')
+parser.add_argument('--restaurants', type=int, default=10_000, help='Количество ресторанов')
+parser.add_argument('--dishes', type=int, default=500_000, help='Количество блюд')
+parser.add_argument('--reservations', type=int, default=1_000_000, help='Количество бронирований')
+parser.add_argument('--restaurant-skew', type=float, default=1.1, help='Показатель Ципфа популярности ресторанов')
+parser.add_argument('--user-skew', type=float, default=0.7, help='Показатель Ципфа активности пользователей')
+parser.add_argument(
+    '--start',
+    type=datetime.fromisoformat,
+    default=None,
+    help='Первый день броней, по умолчанию - за --days / 2 дней до текущего (половина броней предстоит)',
+)
+parser.add_argument('--days', type=int, default=365, help='Количество дней, на которые распределяются брони')
+parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl', help='Формат файлов')
+parser.add_argument('--password', default='qwerty', help='Пароль всех пользователей')
+parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора')
+
+args = parser.parse_args()
+if args.start is None:
+    # Окно вокруг текущего дня: предстоящие брони есть, а прошлые не старше RESERVATION_HOT_MONTHS и не уходят в архив
+    args.start = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=args.days // 2)
+
+BATCH_SIZE = 10_000
+
+# Доля блюд по категориям и диапазон цен
+CATEGORIES = {
+    DishCategory.APPETIZER: (0.15, 4, 15),
+    DishCategory.MAIN_COURSE: (0.30, 10, 45),
+    DishCategory.DESSERT: (0.15, 4, 12),
+    DishCategory.SOUP: (0.10, 5, 14),
+    DishCategory.SALAD: (0.12, 5, 16),
+    DishCategory.HOT_DRINK: (0.09, 2, 6),
+    DishCategory.COLD_DRINK: (0.09, 2, 8),
+}
+
+# Относительный спрос по часам (обед 12-14, ужин 18-21, пик в 19) и по дням недели (пятница и суббота)
+HOUR_WEIGHTS = {10: 1, 11: 3, 12: 8, 13: 9, 14: 5, 15: 2, 16: 2, 17: 4, 18: 9, 19: 12, 20: 10, 21: 6, 22: 2}
+WEEKDAY_WEIGHTS = [0.8, 0.8, 0.9, 1.0, 1.4, 1.6, 1.2]
+
+STREETS = ['Главная', 'Садовая', 'Лесная', 'Новая', 'Речная', 'Дубовый пр.']
+DESCRIPTIONS = ['Уютное место с вкусной едой', 'Современная кухня', 'Домашняя кухня', '-']
+GUEST_COUNTS = {1: 5, 2: 40, 3: 12, 4: 25, 5: 5, 6: 7, 8: 4, 10: 2}
+COMMENTS = ['', '', '', 'Столик у окна', 'Детский стул', 'День рождения', 'Особые требования к столику']
+CONFIRMED_SHARE = 0.7
+
+RowT = Dict[str, Any]
+
+
+def zipf_weights(size: int, skew: float, rng: random.Random) -> List[float]:
+    # Накопленные веса для random.choices: ранг k получает вес 1 / k^skew, ранги перемешаны между id
+    ranks = list(range(1, size + 1))
+    rng.shuffle(ranks)
+    return list(itertools.accumulate(1 / rank**skew for rank in ranks))
+
+
+def restaurants(rng: random.Random) -> Iterator[RowT]:
+    for restaurant_id in range(1, args.restaurants + 1):
+        yield {
+            'id': restaurant_id,
+            'name': f'Ресторан {restaurant_id}',
+            'address': f'{rng.choice(STREETS)}, {rng.randint(1, 200)}',
+            'description': rng.choice(DESCRIPTIONS),
+        }
+
+
+def users(rng: random.Random) -> Iterator[RowT]:
+    # Первые пользователи - администратор и сотрудники, как в fixture/sirius/sirius.user.json
+    hashed_password = hash_password(args.password)
+    staff = max(1, args.users // 1000)
+    for user_id in range(1, args.users + 1):
+        role = RoleCategory.ADMIN if user_id == 1 else RoleCategory.STAFF if user_id <= 1 + staff else RoleCategory.USER
+        yield {
+            'id': user_id,
+            'username': f'user{user_id}',
+            'hashed_password': hashed_password,
+            'phone': f'+79{rng.randrange(10**9):09d}',
+            'role': role.name,
+        }
+
+
+def dishes(rng: random.Random) -> Iterator[RowT]:
+    # Размер меню тоже неравномерен: у популярных ресторанов блюд больше
+    categories = list(CATEGORIES)
+    category_weights = list(itertools.accumulate(share for share, _, _ in CATEGORIES.values()))
+    menu_weights = zipf_weights(args.restaurants, args.restaurant_skew / 2, rng)
+    restaurant_ids = range(1, args.restaurants + 1)
+    for start in range(0, args.dishes, BATCH_SIZE):
+        size = min(BATCH_SIZE, args.dishes - start)
+        owners = rng.choices(restaurant_ids, cum_weights=menu_weights, k=size)
+        kinds = rng.choices(categories, cum_weights=category_weights, k=size)
+        for offset, (restaurant_id, category) in enumerate(zip(owners, kinds)):
+            _, low, high = CATEGORIES[category]
+            yield {
+                'id': start + offset + 1,
+                'restaurant_id': restaurant_id,
+                'category': category.name,
+                'dish_name': f'{category.value} №{start + offset + 1}',
+                'description': '-',
+                'price': round(rng.uniform(low, high), 2),
+            }
+
+
+def reservations(rng: random.Random) -> Iterator[RowT]:
+    restaurant_weights = zipf_weights(args.restaurants, args.restaurant_skew, rng)
+    user_weights = zipf_weights(args.users, args.user_skew, rng)
+    days = range(args.days)
+    day_weights = list(
+        itertools.accumulate(WEEKDAY_WEIGHTS[(args.start + timedelta(days=day)).weekday()] for day in days)
+    )
+    hours = list(HOUR_WEIGHTS)
+    hour_weights = list(itertools.accumulate(HOUR_WEIGHTS.values()))
+    guest_counts = list(GUEST_COUNTS)
+    guest_weights = list(itertools.accumulate(GUEST_COUNTS.values()))
+    start_day = args.start.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+    for start in range(0, args.reservations, BATCH_SIZE):
+        size = min(BATCH_SIZE, args.reservations - start)
+        columns = zip(
+            rng.choices(range(1, args.restaurants + 1), cum_weights=restaurant_weights, k=size),
+            rng.choices(range(1, args.users + 1), cum_weights=user_weights, k=size),
+            rng.choices(days, cum_weights=day_weights, k=size),
+            rng.choices(hours, cum_weights=hour_weights, k=size),
+            rng.choices(guest_counts, cum_weights=guest_weights, k=size),
+        )
+        for offset, (restaurant_id, user_id, day, hour, guest_count) in enumerate(columns):
+            date_reserv = start_day + timedelta(days=day, hours=hour, minutes=15 * rng.randrange(4))
+            yield {
+                'id': start + offset + 1,
+                'user_id': user_id,
+                'restaurant_id': restaurant_id,
+                'date_reserv': date_reserv.isoformat(),
+                'guest_count': guest_count,
+                'status': rng.random() < CONFIRMED_SHARE,
+                'comment': rng.choice(COMMENTS),
+            }
+
+
+def write_jsonl(path: Path, rows: Iterator[RowT]) -> int:
+    count = 0
+    with open(path, 'wb') as file:
+        for batch in iter(lambda: list(itertools.islice(rows, BATCH_SIZE)), []):
+            file.write(b''.join(orjson.dumps(row) + b'\n' for row in batch))
+            count += len(batch)
+    return count
+
+
+def write_csv(path: Path, rows: Iterator[RowT]) -> int:
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer: csv.DictWriter[str] | None = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(file, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+WRITERS: Dict[str, Callable[[Path, Iterator[RowT]], int]] = {'jsonl': write_jsonl, 'csv': write_csv}
+
+# У каждой таблицы свой генератор от общего seed: строки таблицы зависят только от ее объема и объемов таблиц,
+# на которые она ссылается (блюда - от --restaurants, брони - от --users и --restaurants)
+TABLES: Sequence[Tuple[str, Callable[[random.Random], Iterator[RowT]]]] = (
+    ('restaurant', restaurants),
+    ('user', users),
+    ('dish', dishes),
+    ('reservation', reservations),
+)
+
+
+def main() -> None:
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for table, generate in TABLES:
+        start = time.perf_counter()
+        path = output / f'sirius.{table}.{args.format}'
+        count = WRITERS[args.format](path, generate(random.Random(f'{args.seed}:{table}')))
+        paths.append(str(path))
+        print(f'{path}: {count} rows in {time.perf_counter() - start:.2f} s')
+    print(f'Load: python scripts/load_data.py {" ".join(paths)}')
+
+
+if __name__ == '__main__':
+    main()
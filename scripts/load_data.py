@@ -1,36 +1,58 @@
-import json
+import time
 import asyncio
+import logging
 import argparse
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import List
 
-from sqlalchemy import insert
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
-from webapp.db.postgres import async_session
-from webapp.models.meta import metadata
+from conf.config import settings
+from webapp.cache.existence import rebuild_filters
+from webapp.db.loader import load_files
+from webapp.db.partitions import ensure_partitions
+from webapp.db.postgres import async_session, engine
 
-parser = argparse.ArgumentParser()
+parser = argparse.ArgumentParser(
+    description='Загрузка данных через COPY. Имя файла - имя таблицы (sirius.dish.json), форматы: json, jsonl, csv'
+)
 
 parser.add_argument('fixtures', nargs='+', help='<Required> Set flag')
+parser.add_argument('--batch-size', type=int, default=10_000, help='Строк в одном COPY')
+parser.add_argument('--jobs', type=int, default=4, help='Таблиц, загружаемых одновременно')
 
 args = parser.parse_args()
 
 
 async def main(fixtures: List[str]) -> None:
-    for fixture in fixtures:
-        fixture_path = Path(fixture)
-        model = metadata.tables[fixture_path.stem]
-
-        with open(fixture_path, 'r') as file:
-            values = json.load(file)
-        if model.name == 'reservation':
-            for item in values:
-                item['date_reserv'] = datetime.fromisoformat(item['date_reserv'])
-
+    start = time.perf_counter()
+    reports = await load_files(engine, [Path(fixture) for fixture in fixtures], args.batch_size, args.jobs)
+    for report in reports:
+        print(f'{report.table}: {report.rows} rows in {report.seconds:.2f} s, {report.rows_per_second:,.0f} rows/s')
+    seconds = time.perf_counter() - start
+    rows = sum(report.rows for report in reports)
+    print(f'Total: {rows} rows in {seconds:.2f} s, {rows / seconds:,.0f} rows/s')
+
+    # Бронирования на месяцы без секции легли в секцию по умолчанию - переносим их в секции своих месяцев
+    async with engine.begin() as connection:
+        created = await ensure_partitions(
+            connection, datetime.now(timezone.utc).date(), settings.RESERVATION_PARTITION_MONTHS_AHEAD
+        )
+    if created:
+        print(f'Reservation partitions created: {", ".join(f"{month:%Y-%m}" for month in created)}')
+
+    # Загруженные id должны попасть в фильтры существования, иначе запущенное приложение ответит на них 404
+    redis = Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, password=settings.REDIS_PASSWORD)
+    try:
         async with async_session() as session:
-            await session.execute(insert(model).values(values))
-            await session.commit()
+            print(f'Rebuilt existence filters: {await rebuild_filters(redis, session)}')
+    except (RedisError, OSError):
+        logging.warning('Existence filters were not rebuilt, run scripts/warm_cache.py when Redis is available')
+    finally:
+        await redis.aclose()
+        await engine.dispose()
 
 
 if __name__ == '__main__':
@@ -1,19 +1,37 @@
 import asyncio
 import logging
+from pathlib import Path
 
-from sqlalchemy.exc import IntegrityError
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
 
 from webapp.db.postgres import engine
-from webapp.models import meta
+from webapp.models.meta import DEFAULT_SCHEMA
 
+ALEMBIC_CONFIG = Path(__file__).parent.parent / 'alembic.ini'
+# Ревизия схемы, которую создавал metadata.create_all до перехода на миграции
+INITIAL_REVISION = '0001'
 
-async def main() -> None:
-    try:
-        async with engine.begin() as conn:
-            await conn.run_sync(meta.metadata.create_all)
-    except IntegrityError:
-        logging.exception('Already exists')
+
+async def created_without_migrations() -> bool:
+    async with engine.connect() as conn:
+        dish = await conn.scalar(text('SELECT to_regclass(:name)'), {'name': f'{DEFAULT_SCHEMA}.dish'})
+        versions = await conn.scalar(text('SELECT to_regclass(:name)'), {'name': f'{DEFAULT_SCHEMA}.alembic_version'})
+        revision = None
+        if versions is not None:
+            revision = await conn.scalar(text(f'SELECT version_num FROM {DEFAULT_SCHEMA}.alembic_version'))
+    await engine.dispose()
+    return dish is not None and revision is None
+
+
+def main() -> None:
+    config = Config(str(ALEMBIC_CONFIG))
+    if asyncio.run(created_without_migrations()):
+        logging.warning('Schema was created without migrations, stamping revision %s', INITIAL_REVISION)
+        command.stamp(config, INITIAL_REVISION)
+    command.upgrade(config, 'head')
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    main()
@@ -0,0 +1,3 @@
+#!/usr/bin/env bash
+# Разрешает подключение реплики (web_db_replica) для потоковой репликации
+echo "host replication all all md5" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,48 @@
+import time
+import asyncio
+import argparse
+
+from redis.asyncio import Redis
+
+from conf.config import settings
+from webapp.cache.existence import rebuild_filters
+from webapp.cache.warmup import warm_up
+from webapp.db.postgres import async_session
+
+parser = argparse.ArgumentParser(
+    description='Прогрев кэша: фильтры существования id, списки ресторанов и блюд, меню популярных ресторанов'
+)
+
+parser.add_argument('--batch-size', type=int, default=settings.CACHE_WARMUP_BATCH_SIZE, help='Ключей в одном конвейере')
+parser.add_argument(
+    '--concurrency', type=int, default=settings.CACHE_WARMUP_CONCURRENCY, help='Одновременных конвейеров'
+)
+parser.add_argument(
+    '--restaurants',
+    type=int,
+    default=settings.CACHE_WARMUP_RESTAURANTS,
+    help='Ресторанов с наибольшим числом недавних бронирований, чьи меню прогреваются',
+)
+
+args = parser.parse_args()
+
+
+async def main() -> None:
+    settings.CACHE_WARMUP_BATCH_SIZE = args.batch_size
+    settings.CACHE_WARMUP_CONCURRENCY = args.concurrency
+    settings.CACHE_WARMUP_RESTAURANTS = args.restaurants
+
+    redis = Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, password=settings.REDIS_PASSWORD)
+    try:
+        start = time.perf_counter()
+        async with async_session() as session:
+            counts = await rebuild_filters(redis, session)
+            count = await warm_up(redis, session)
+        print(f'Rebuilt existence filters: {counts}')
+        print(f'Warmed up {count} keys in {time.perf_counter() - start:.2f} s')
+    finally:
+        await redis.aclose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
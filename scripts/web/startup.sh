@@ -6,10 +6,8 @@ echo "Start service"
 # python scripts/migrate.py
 
 # load fixtures
-# python scripts/load_data.py fixture/sirius/sirius.user.json
-# python scripts/load_data.py fixture/sirius/sirius.restaurant.json
-# python scripts/load_data.py fixture/sirius/sirius.dish.json
-# python scripts/load_data.py fixture/sirius/sirius.reservation.json
+# python scripts/load_data.py fixture/sirius/sirius.user.json fixture/sirius/sirius.restaurant.json \
+#     fixture/sirius/sirius.dish.json fixture/sirius/sirius.reservation.json
 
 
 exec uvicorn webapp.main:create_app --host=$BIND_IP --port=$BIND_PORT
@@ -6,8 +6,6 @@ echo "Load test data in DB"
 python scripts/migrate.py
 
 # load fixtures
-python scripts/load_data.py fixture/sirius/sirius.user.json
-python scripts/load_data.py fixture/sirius/sirius.restaurant.json
-python scripts/load_data.py fixture/sirius/sirius.dish.json
-python scripts/load_data.py fixture/sirius/sirius.reservation.json
+python scripts/load_data.py fixture/sirius/sirius.user.json fixture/sirius/sirius.restaurant.json \
+    fixture/sirius/sirius.dish.json fixture/sirius/sirius.reservation.json
 
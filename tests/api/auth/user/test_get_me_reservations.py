@@ -1,11 +1,17 @@
 from datetime import datetime
 from pathlib import Path
-from dateutil.parser import parse
+
 import pytest
+from dateutil.parser import parse
+from fastapi import FastAPI
 from httpx import AsyncClient
 from starlette import status
 
 from tests.const import URLS
+from tests.mocking.minio import TestMinio
+
+from webapp.db.minio import get_minio
+from webapp.utils.pagination import encode_cursor
 
 BASE_DIR = Path(__file__).parent
 FIXTURES_PATH = BASE_DIR / 'fixtures'
@@ -75,3 +81,41 @@ async def test_my_reservations(
     assert parse(response_data[0]['date_reserv']) == parse(date_reserv)
     assert response_data[0]['guest_count'] == guest_count
     assert response_data[0]['comment'] == comment
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures'),
+    [
+        (
+            'user',
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+                FIXTURES_PATH / 'sirius.restaurant.json',
+                FIXTURES_PATH / 'sirius.reservation.json',
+            ],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_my_reservations_history(
+    app: FastAPI,
+    client: AsyncClient,
+    username: str,
+    password: str,
+    access_token: str,
+) -> None:
+    # Без выгруженных месяцев история совпадает со списком из таблицы
+    app.dependency_overrides[get_minio] = TestMinio
+    headers = {'Authorization': f'Bearer Bearer {access_token}'}
+
+    response = await client.get(URLS['user']['reservations'], params={'history': True}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert [reservation['id'] for reservation in response.json()] == [1]
+
+    response = await client.get(
+        URLS['user']['reservations'], params={'history': True, 'cursor': encode_cursor(1)}, headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == []
@@ -0,0 +1,119 @@
+from pathlib import Path
+from typing import List
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette import status
+
+from tests.const import URLS
+from tests.mocking.redis import TestRedis
+
+from webapp.cache import entry
+from webapp.db.redis import get_redis
+from webapp.models.sirius.dish import DishCategory
+
+BASE_DIR = Path(__file__).parent
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+
+
+@pytest.fixture()
+def fixtures() -> List[Path]:
+    return [
+        FIXTURES_PATH / 'sirius.user.json',
+        FIXTURES_PATH / 'sirius.restaurant.json',
+        FIXTURES_PATH / 'sirius.dish.json',
+        FIXTURES_PATH / 'sirius.reservation.json',
+    ]
+
+
+async def login(client: AsyncClient, username: str) -> str:
+    response = await client.post(URLS['auth']['login'], json={'username': username, 'password': 'qwerty'})
+    return response.json()['access_token']
+
+
+@pytest.mark.parametrize(
+    'url',
+    [
+        URLS['restaurant']['get_all_create'],
+        URLS['restaurant']['get_menu'].format(restaurant_id=1),
+        URLS['restaurant']['get_menu_by_category'].format(restaurant_id=1, category=DishCategory.DESSERT.value),
+        URLS['dish']['get_put_delete'].format(dish_id=1),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_matching_etag_returns_304_without_database_or_decoding(
+    client: AsyncClient,
+    test_redis: TestRedis,
+    db_statements: List[str],
+    monkeypatch: pytest.MonkeyPatch,
+    url: str,
+) -> None:
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers['cache-control'] == 'public, no-cache'
+    assert response.headers['last-modified']
+    etag = response.headers['etag']
+
+    def decode_payload(raw: bytes) -> bytes:
+        raise AssertionError('Тело записи не должно раскодироваться')
+
+    monkeypatch.setattr(entry, 'decode_payload', decode_payload)
+    db_statements.clear()
+    response = await client.get(url, headers={'If-None-Match': f'W/"other", {etag}'})
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b''
+    assert response.headers['etag'] == etag
+    assert not db_statements
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_fresh_response_has_same_etag_and_answers_304(
+    app: FastAPI, client: AsyncClient, test_redis: TestRedis
+) -> None:
+    url = URLS['restaurant']['get_menu'].format(restaurant_id=1)
+    cached = await client.get(url)
+
+    # Значение, построенное заново (другим воркером или после вытеснения), получает тот же ETag
+    app.dependency_overrides[get_redis] = lambda: TestRedis()
+    fresh = await client.get(url)
+    assert fresh.headers['etag'] == cached.headers['etag']
+
+    app.dependency_overrides[get_redis] = lambda: TestRedis()
+    response = await client.get(url, headers={'If-None-Match': cached.headers['etag']})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_user_reservations_etag_changes_after_write(client: AsyncClient, test_redis: TestRedis) -> None:
+    headers = {'Authorization': f'Bearer Bearer {await login(client, "staff")}'}
+    response = await client.get(URLS['user']['reservations'], headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers['cache-control'] == 'private, no-cache'
+    etag = response.headers['etag']
+
+    reservation_id = response.json()[0]['id']
+    response = await client.put(
+        URLS['reservation']['get_put_delete'].format(reservation_id=reservation_id),
+        json={'guest_count': 7},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await client.get(URLS['user']['reservations'], headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers['etag'] != etag
+    assert [reservation['guest_count'] for reservation in response.json() if reservation['id'] == reservation_id] == [7]
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_not_found_has_no_etag(client: AsyncClient, test_redis: TestRedis) -> None:
+    response = await client.get(URLS['dish']['get_put_delete'].format(dish_id=100), headers={'If-None-Match': '*'})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert 'etag' not in response.headers
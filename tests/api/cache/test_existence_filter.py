@@ -0,0 +1,155 @@
+from pathlib import Path
+from typing import Any, AsyncGenerator, List, cast
+
+import orjson
+import pytest
+from httpx import AsyncClient
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from tests.const import URLS
+from tests.mocking.redis import TestRedis
+
+from webapp.cache.client import BUMP_GENERATIONS_SCRIPT, handle_invalidation_message
+from webapp.cache.existence import DISH_IDS, FILTERS, rebuild_filters
+from webapp.cache.local import local_cache
+
+BASE_DIR = Path(__file__).parent
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+
+
+@pytest.fixture()
+def fixtures() -> List[Path]:
+    return [
+        FIXTURES_PATH / 'sirius.user.json',
+        FIXTURES_PATH / 'sirius.restaurant.json',
+        FIXTURES_PATH / 'sirius.dish.json',
+    ]
+
+
+@pytest.fixture()
+async def _filters(
+    _common_api_fixture: None, test_redis: TestRedis, db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> AsyncGenerator[None, None]:
+    # Фильтр работает, только пока активна подписка на инвалидации (как и L1)
+    local_cache.clear()
+    monkeypatch.setattr(local_cache, 'enabled', True)
+    await rebuild_filters(cast(Redis, test_redis), db_session)
+    yield
+    local_cache.clear()
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_filters')
+async def test_unknown_ids_rejected_without_cache_and_database(
+    client: AsyncClient, test_redis: TestRedis, db_statements: List[str]
+) -> None:
+    # Первое обращение читает копию карты из Redis
+    assert (await client.get(URLS['dish']['get_put_delete'].format(dish_id=1))).status_code == status.HTTP_200_OK
+    keys = set(test_redis.storage)
+    db_statements.clear()
+
+    for dish_id in (5000, 0, -1):
+        response = await client.get(URLS['dish']['get_put_delete'].format(dish_id=dish_id))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json() == 'Блюдо не найдено'
+    response = await client.get(URLS['restaurant']['get_menu'].format(restaurant_id=4000))
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    assert not db_statements
+    # Пустые значения для несуществующих id в кэш не пишутся
+    assert set(test_redis.storage) == keys
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_filters', '_sequences')
+async def test_created_and_deleted_ids_update_filter(client: AsyncClient, test_redis: TestRedis) -> None:
+    response = await client.post(URLS['auth']['login'], json={'username': 'staff', 'password': 'qwerty'})
+    headers = {'Authorization': f'Bearer Bearer {response.json()["access_token"]}'}
+    await client.get(URLS['dish']['get_put_delete'].format(dish_id=1))
+
+    response = await client.post(
+        URLS['dish']['get_all_create'],
+        json={'restaurant_id': 1, 'category': 'Суп', 'dish_name': 'Борщ', 'description': '-', 'price': 5.5},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    dish_id = response.json()['id']
+    assert (await client.get(URLS['dish']['get_put_delete'].format(dish_id=dish_id))).status_code == status.HTTP_200_OK
+
+    response = await client.delete(URLS['dish']['get_put_delete'].format(dish_id=dish_id), headers=headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert await DISH_IDS.check(cast(Redis, test_redis), [dish_id]) == [False]
+    assert await test_redis.getbit(DISH_IDS.key, dish_id) == 0
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_filters', '_sequences')
+async def test_created_id_known_when_cache_update_fails(
+    client: AsyncClient, test_redis: TestRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Redis отказывает после коммита: запись остается успешной, а бит нового id поставлен еще до коммита
+    response = await client.post(URLS['auth']['login'], json={'username': 'staff', 'password': 'qwerty'})
+    headers = {'Authorization': f'Bearer Bearer {response.json()["access_token"]}'}
+    await client.get(URLS['dish']['get_put_delete'].format(dish_id=1))
+    evaluate = test_redis.eval
+
+    async def failing_eval(script: str, numkeys: int, *keys_and_args: Any) -> Any:
+        if script == BUMP_GENERATIONS_SCRIPT:
+            raise ConnectionError('Redis недоступен')
+        return await evaluate(script, numkeys, *keys_and_args)
+
+    monkeypatch.setattr(test_redis, 'eval', failing_eval)
+    response = await client.post(
+        URLS['dish']['get_all_create'],
+        json={'restaurant_id': 1, 'category': 'Суп', 'dish_name': 'Борщ', 'description': '-', 'price': 5.5},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    dish_id = response.json()['id']
+
+    assert await test_redis.getbit(DISH_IDS.key, dish_id) == 1
+    assert await DISH_IDS.check(cast(Redis, test_redis), [dish_id]) == [True]
+    assert (await client.get(URLS['dish']['get_put_delete'].format(dish_id=dish_id))).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_filters')
+async def test_ids_from_other_workers(client: AsyncClient, test_redis: TestRedis) -> None:
+    redis = cast(Redis, test_redis)
+    assert await DISH_IDS.check(redis, [1, 2, 4]) == [True, True, True]
+
+    # Другой воркер удалил блюдо 4: сообщение меняет копию в памяти без обращения к Redis
+    handle_invalidation_message(orjson.dumps({'origin': 'other', 'exists': {'dish': [[], [4]]}}))
+    assert await DISH_IDS.check(redis, [1, 2, 4]) == [True, True, False]
+
+    # ... затем удалил блюдо 2 и восстановил 4 (id ниже известного максимума)
+    handle_invalidation_message(orjson.dumps({'origin': 'other', 'exists': {'dish': [[4], [2]]}}))
+    assert await DISH_IDS.check(redis, [1, 2, 4]) == [True, False, True]
+
+    # id новее копии проверяется по карте в Redis
+    await test_redis.setbit(DISH_IDS.key, 100, 1)
+    assert await DISH_IDS.check(redis, [100, 101]) == [True, False]
+
+    # Пакетное чтение не запрашивает отсеянные id
+    response = await client.get(URLS['dish']['get_all_create'], params={'ids': [1, 2, 4]})
+    assert [dish['id'] for dish in response.json()] == [1, 4]
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_filter_not_built_or_inactive_passes_through(
+    client: AsyncClient, test_redis: TestRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    local_cache.clear()
+    redis = cast(Redis, test_redis)
+    assert await DISH_IDS.check(redis, [1, 5000]) == [None, None]
+
+    monkeypatch.setattr(local_cache, 'enabled', True)
+    assert await DISH_IDS.check(redis, [1, 5000]) == [None, None]
+    response = await client.get(URLS['dish']['get_put_delete'].format(dish_id=1))
+    assert response.status_code == status.HTTP_200_OK
+    assert set(FILTERS) == {'dish', 'restaurant', 'reservation'}
+    local_cache.clear()
@@ -0,0 +1,210 @@
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette import status
+
+from tests.const import URLS
+from tests.mocking.redis import TestRedis
+
+from conf.config import settings
+from webapp.db.redis import get_redis
+from webapp.models.sirius.dish import DishCategory
+
+BASE_DIR = Path(__file__).parent
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+
+USERNAMES = ['user', 'admin', 'staff']
+
+NO_PARAMS: Dict[str, Any] = {}
+
+# Все чтения, которые может затронуть запись, включая еще не существующие записи (кэш 404)
+PUBLIC_READS: List[Tuple[str, Dict[str, Any]]] = [
+    (URLS['dish']['get_all_create'], NO_PARAMS),
+    *((URLS['dish']['get_all_create'], {'category': category.value}) for category in DishCategory),
+    *((URLS['dish']['get_put_delete'].format(dish_id=dish_id), NO_PARAMS) for dish_id in range(1, 8)),
+    (URLS['dish']['get_all_create'], {'ids': list(range(1, 8))}),
+    (URLS['restaurant']['get_all_create'], NO_PARAMS),
+    (URLS['restaurant']['get_all_create'], {'ids': list(range(1, 4))}),
+    *(
+        (URLS['restaurant']['get_put_delete'].format(restaurant_id=restaurant_id), NO_PARAMS)
+        for restaurant_id in range(1, 4)
+    ),
+    *((URLS['restaurant']['get_menu'].format(restaurant_id=restaurant_id), NO_PARAMS) for restaurant_id in range(1, 4)),
+    (URLS['restaurant']['get_menu'].format(restaurant_id=1), {'category': DishCategory.DESSERT.value}),
+    (URLS['restaurant']['get_menu'].format(restaurant_id=2), {'category': DishCategory.DESSERT.value}),
+    *(
+        (URLS['reservation']['get_put_delete'].format(reservation_id=reservation_id), NO_PARAMS)
+        for reservation_id in range(1, 5)
+    ),
+    (URLS['reservation']['create'], {'ids': list(range(1, 5))}),
+]
+USER_READS = [URLS['user']['me'], URLS['user']['reservations']]
+
+ResponsesT = Dict[Tuple[str, str, str | None], Tuple[int, Any]]
+
+
+@pytest.fixture()
+def fixtures() -> List[Path]:
+    return [
+        FIXTURES_PATH / 'sirius.user.json',
+        FIXTURES_PATH / 'sirius.restaurant.json',
+        FIXTURES_PATH / 'sirius.dish.json',
+        FIXTURES_PATH / 'sirius.reservation.json',
+    ]
+
+
+async def read_all(client: AsyncClient, tokens: Dict[str, str]) -> ResponsesT:
+    responses: ResponsesT = {}
+    for url, params in PUBLIC_READS:
+        response = await client.get(url, params=params)
+        responses[(url, str(params), None)] = (response.status_code, response.json())
+    for url in USER_READS:
+        for username, token in tokens.items():
+            response = await client.get(url, headers={'Authorization': f'Bearer Bearer {token}'})
+            responses[(url, '', username)] = (response.status_code, response.json())
+    return responses
+
+
+@pytest.mark.parametrize(
+    ('username', 'method', 'url', 'payload', 'expected_status'),
+    [
+        pytest.param(
+            'admin',
+            'POST',
+            URLS['dish']['get_all_create'],
+            {
+                'category': DishCategory.SOUP.value,
+                'restaurant_id': 1,
+                'dish_name': 'Борщ',
+                'description': 'Со сметаной',
+                'price': 5.5,
+            },
+            status.HTTP_201_CREATED,
+            id='create-dish',
+        ),
+        pytest.param(
+            'staff',
+            'PUT',
+            URLS['dish']['get_put_delete'].format(dish_id=1),
+            {'category': DishCategory.DESSERT.value, 'restaurant_id': 2, 'price': 1.0},
+            status.HTTP_200_OK,
+            id='update-dish',
+        ),
+        pytest.param(
+            'staff',
+            'DELETE',
+            URLS['dish']['get_put_delete'].format(dish_id=3),
+            None,
+            status.HTTP_204_NO_CONTENT,
+            id='delete-dish',
+        ),
+        pytest.param(
+            'admin',
+            'POST',
+            URLS['restaurant']['get_all_create'],
+            {'name': 'Ресторан С', 'address': 'ул. Новая, 1', 'description': 'Только открылся'},
+            status.HTTP_201_CREATED,
+            id='create-restaurant',
+        ),
+        pytest.param(
+            'admin',
+            'PUT',
+            URLS['restaurant']['get_put_delete'].format(restaurant_id=1),
+            {'name': 'Ресторан А+'},
+            status.HTTP_200_OK,
+            id='update-restaurant',
+        ),
+        pytest.param(
+            'admin',
+            'DELETE',
+            URLS['restaurant']['get_put_delete'].format(restaurant_id=1),
+            None,
+            status.HTTP_204_NO_CONTENT,
+            id='delete-restaurant',
+        ),
+        pytest.param(
+            'user',
+            'POST',
+            URLS['reservation']['create'],
+            {
+                'user_id': 0,
+                'restaurant_id': 2,
+                'date_reserv': '2024-03-03T11:30:57.390Z',
+                'guest_count': 4,
+                'comment': 'У окна',
+            },
+            status.HTTP_201_CREATED,
+            id='create-reservation',
+        ),
+        pytest.param(
+            'staff',
+            'PUT',
+            URLS['reservation']['get_put_delete'].format(reservation_id=1),
+            {'user_id': 3, 'restaurant_id': 2, 'guest_count': 5},
+            status.HTTP_200_OK,
+            id='update-reservation',
+        ),
+        pytest.param(
+            'staff',
+            'DELETE',
+            URLS['reservation']['get_put_delete'].format(reservation_id=2),
+            None,
+            status.HTTP_204_NO_CONTENT,
+            id='delete-reservation',
+        ),
+        pytest.param(
+            'user',
+            'PUT',
+            URLS['user']['update'],
+            {'phone': '+70000000000'},
+            status.HTTP_200_OK,
+            id='update-me',
+        ),
+        pytest.param(
+            'user',
+            'DELETE',
+            URLS['user']['delete'],
+            None,
+            status.HTTP_204_NO_CONTENT,
+            id='delete-me',
+        ),
+    ],
+)
+@pytest.mark.parametrize('write_through', [False, True], ids=['invalidate', 'write-through'])
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture', '_sequences')
+async def test_no_stale_reads_after_write(
+    app: FastAPI,
+    client: AsyncClient,
+    test_redis: TestRedis,
+    monkeypatch: pytest.MonkeyPatch,
+    username: str,
+    method: str,
+    url: str,
+    payload: Dict[str, Any] | None,
+    expected_status: int,
+    write_through: bool,
+) -> None:
+    monkeypatch.setattr(settings, 'CACHE_WRITE_THROUGH', write_through)
+    tokens = {}
+    for name in USERNAMES:
+        response = await client.post(URLS['auth']['login'], json={'username': name, 'password': 'qwerty'})
+        tokens[name] = response.json()['access_token']
+
+    before = await read_all(client, tokens)
+    assert test_redis.storage
+
+    response = await client.request(
+        method, url, json=payload, headers={'Authorization': f'Bearer Bearer {tokens[username]}'}
+    )
+    assert response.status_code == expected_status
+
+    cached = await read_all(client, tokens)
+    app.dependency_overrides[get_redis] = lambda: TestRedis()
+    fresh = await read_all(client, tokens)
+
+    assert fresh != before
+    assert cached == fresh
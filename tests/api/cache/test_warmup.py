@@ -0,0 +1,154 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, List, cast
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from tests.const import URLS
+from tests.mocking.redis import TestRedis
+
+from webapp import readiness
+from webapp.cache.families import DISH, DISHES, MENU, RESTAURANT, RESTAURANTS
+from webapp.cache.key_builder import get_cache_lease
+from webapp.cache.warmup import warm_up
+from webapp.db import redis
+from webapp.db.redis import get_redis
+from webapp.models.sirius.dish import DishCategory
+from webapp.models.sirius.reservation import Reservation
+from webapp.on_startup import warmup
+
+BASE_DIR = Path(__file__).parent
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+
+# Списки, которые прогрев должен закрыть полностью (вместе с оценкой числа строк), включая пустые категории (кэш 404)
+WARMED_LISTS = [
+    URLS['dish']['get_all_create'],
+    *(URLS['dish']['get_by_category'].format(category=category.value) for category in DishCategory),
+    URLS['restaurant']['get_all_create'],
+    *(URLS['restaurant']['get_menu'].format(restaurant_id=restaurant_id) for restaurant_id in (1, 2)),
+    *(
+        URLS['restaurant']['get_menu_by_category'].format(restaurant_id=restaurant_id, category=category.value)
+        for restaurant_id in (1, 2)
+        for category in DishCategory
+    ),
+]
+WARMED_READS = [
+    *WARMED_LISTS,
+    *(URLS['dish']['get_put_delete'].format(dish_id=dish_id) for dish_id in range(1, 7)),
+    *(URLS['restaurant']['get_put_delete'].format(restaurant_id=restaurant_id) for restaurant_id in (1, 2)),
+]
+
+
+@pytest.mark.parametrize(
+    ('fixtures',),
+    [
+        (
+            [
+                FIXTURES_PATH / 'sirius.restaurant.json',
+                FIXTURES_PATH / 'sirius.dish.json',
+            ],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_warm_up_serves_public_reads_without_database(
+    app: FastAPI,
+    client: AsyncClient,
+    test_redis: TestRedis,
+    db_session: AsyncSession,
+    db_statements: List[str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(warmup.settings, 'CACHE_WARMUP_BATCH_SIZE', 10)
+
+    count = await warm_up(cast(Redis, test_redis), db_session)
+
+    assert count == len(WARMED_READS) + len(WARMED_LISTS)
+    # Первые страницы ресторанов, всех блюд и блюд по категориям, популярные рестораны и их блюда
+    assert len([statement for statement in db_statements if statement.startswith('SELECT')]) == 4 + len(DishCategory)
+    assert test_redis.pipelines_executed == -(-count // 10)
+
+    db_statements.clear()
+    warmed = [await client.get(url) for url in WARMED_READS]
+    assert not db_statements
+
+    app.dependency_overrides[get_redis] = lambda: TestRedis()
+    for url, response in zip(WARMED_READS, warmed):
+        fresh = await client.get(url)
+        assert (response.status_code, response.content) == (fresh.status_code, fresh.content), url
+
+
+@pytest.mark.asyncio()
+async def test_readiness_flips_when_warm_up_times_out(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def never_finishes(*args: Any) -> int:
+        await asyncio.sleep(3600)
+        return 0
+
+    test_redis = TestRedis()
+    monkeypatch.setattr(redis, 'redis', test_redis, raising=False)
+    monkeypatch.setattr(warmup, 'warm_up', never_finishes)
+    monkeypatch.setattr(warmup.settings, 'CACHE_WARMUP_TIMEOUT', 0.05)
+
+    await warmup.start_warmup()
+    response = await client.get('/ready')
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    assert warmup.warmup_task is not None
+    await warmup.warmup_task
+    response = await client.get('/ready')
+    assert response.status_code == status.HTTP_200_OK
+    assert readiness.ready
+    # Аренда на прогрев снята, следующий деплой прогреет кэш заново
+    assert await test_redis.get(get_cache_lease('warmup')) is None
+
+
+@pytest.mark.parametrize(
+    ('fixtures',),
+    [
+        (
+            [
+                FIXTURES_PATH / 'sirius.restaurant.json',
+                FIXTURES_PATH / 'sirius.dish.json',
+                FIXTURES_PATH / 'sirius.user.json',
+                FIXTURES_PATH / 'sirius.reservation.json',
+            ],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_warm_up_limited_to_busiest_restaurants(
+    test_redis: TestRedis, db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # У первого ресторана больше бронирований, но все они старше окна; у второго - одно предстоящее
+    db_session.add(
+        Reservation(
+            id=4,
+            user_id=1,
+            restaurant_id=2,
+            date_reserv=datetime.now(timezone.utc) + timedelta(days=1),
+            guest_count=2,
+            comment='-',
+        )
+    )
+    await db_session.flush()
+    monkeypatch.setattr(warmup.settings, 'CACHE_WARMUP_RESTAURANTS', 1)
+
+    await warm_up(cast(Redis, test_redis), db_session)
+
+    assert await test_redis.get(RESTAURANT.key(restaurant_id=2)) is not None
+    assert await test_redis.get(MENU.key(restaurant_id=2)) is not None
+    warmed_dishes = [dish_id for dish_id in range(1, 7) if await test_redis.get(DISH.key(dish_id=dish_id))]
+    assert warmed_dishes == [4, 5, 6]
+    assert await test_redis.get(RESTAURANT.key(restaurant_id=1)) is None
+    assert await test_redis.get(MENU.key(restaurant_id=1)) is None
+    # Общие списки прогреваются первой страницей независимо от ограничения
+    assert await test_redis.get(DISHES.key()) is not None
+    assert await test_redis.get(RESTAURANTS.key()) is not None
@@ -0,0 +1,170 @@
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, cast
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from redis.asyncio import Redis
+from starlette import status
+
+from tests.const import URLS
+from tests.mocking.redis import TestRedis
+
+from conf.config import settings
+from webapp.cache.client import invalidate_tags
+from webapp.cache.engine import CachedRead
+from webapp.cache.entry import CacheEntry
+from webapp.cache.families import DISH, DISHES, MENU
+from webapp.cache.key_builder import get_cache_generation
+from webapp.cache.tags import DISHES_TAG, dish_write_tags
+from webapp.cache.write_through import dish_write_through
+from webapp.db.redis import get_redis
+from webapp.models.sirius.dish import DishCategory
+from webapp.schema.restaurant.dish import DishRead
+
+BASE_DIR = Path(__file__).parent
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+
+# Чтения, которые изменение блюда 1 (перенос в другой ресторан и категорию) исправляет на месте
+DISH_READS = [
+    URLS['dish']['get_all_create'],
+    *(URLS['dish']['get_by_category'].format(category=category.value) for category in DishCategory),
+    URLS['dish']['get_put_delete'].format(dish_id=1),
+    *(URLS['restaurant']['get_menu'].format(restaurant_id=restaurant_id) for restaurant_id in (1, 2)),
+    *(
+        URLS['restaurant']['get_menu_by_category'].format(restaurant_id=restaurant_id, category=category.value)
+        for restaurant_id in (1, 2)
+        for category in DishCategory
+    ),
+]
+
+OLD_DISH = DishRead(
+    id=1, restaurant_id=1, category=DishCategory.MAIN_COURSE, dish_name='Суп', description='-', price=100
+)
+NEW_DISH = OLD_DISH.model_copy(update={'price': 200})
+
+
+@pytest.mark.parametrize(
+    ('fixtures',),
+    [
+        (
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+                FIXTURES_PATH / 'sirius.restaurant.json',
+                FIXTURES_PATH / 'sirius.dish.json',
+            ],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_update_keeps_dish_reads_cached(
+    app: FastAPI,
+    client: AsyncClient,
+    test_redis: TestRedis,
+    db_statements: List[str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, 'CACHE_WRITE_THROUGH', True)
+    response = await client.post(URLS['auth']['login'], json={'username': 'staff', 'password': 'qwerty'})
+    token = response.json()['access_token']
+    for url in DISH_READS:
+        await client.get(url)
+
+    response = await client.put(
+        URLS['dish']['get_put_delete'].format(dish_id=1),
+        json={'restaurant_id': 2, 'category': DishCategory.DESSERT.value, 'price': 99.5},
+        headers={'Authorization': f'Bearer Bearer {token}'},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    db_statements.clear()
+    cached = [await client.get(url) for url in DISH_READS]
+    assert not [statement for statement in db_statements if statement.startswith('SELECT')]
+
+    app.dependency_overrides[get_redis] = lambda: TestRedis()
+    for url, response in zip(DISH_READS, cached):
+        fresh = await client.get(url)
+        assert (response.status_code, response.content) == (fresh.status_code, fresh.content), url
+
+
+@pytest.mark.parametrize(
+    ('fixtures',),
+    [
+        (
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+                FIXTURES_PATH / 'sirius.restaurant.json',
+                FIXTURES_PATH / 'sirius.dish.json',
+            ],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_update_patches_only_first_page(
+    app: FastAPI, client: AsyncClient, test_redis: TestRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Под ключом списка - первая страница: блюдо 1 уходит с заполненной страницы меню ресторана 1,
+    # ее нельзя исправить без следующей строки; список всех блюд исправляется на месте
+    monkeypatch.setattr(settings, 'CACHE_WRITE_THROUGH', True)
+    monkeypatch.setattr(settings, 'PAGE_DEFAULT_LIMIT', 2)
+    response = await client.post(URLS['auth']['login'], json={'username': 'staff', 'password': 'qwerty'})
+    token = response.json()['access_token']
+    for url in DISH_READS:
+        await client.get(url)
+
+    response = await client.put(
+        URLS['dish']['get_put_delete'].format(dish_id=1),
+        json={'restaurant_id': 2, 'price': 99.5},
+        headers={'Authorization': f'Bearer Bearer {token}'},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    lists: List[Tuple[CachedRead, Dict[str, Any], bool]] = [(DISHES, {}, True), (MENU, {'restaurant_id': 1}, False)]
+    for family, params, patched in lists:
+        (tag,) = family.tags(**params)
+        raw = await test_redis.get(family.key(**params))
+        generation = await test_redis.get(get_cache_generation(tag))
+        assert raw is not None and generation is not None
+        entry = CacheEntry.decode(raw)
+        assert entry is not None
+        assert (entry.generations == (int(generation),)) is patched
+
+    cached = [await client.get(url) for url in DISH_READS]
+    app.dependency_overrides[get_redis] = lambda: TestRedis()
+    for url, response in zip(DISH_READS, cached):
+        fresh = await client.get(url)
+        assert (response.status_code, response.content) == (fresh.status_code, fresh.content), url
+
+
+@pytest.mark.asyncio()
+async def test_list_built_before_concurrent_write_is_not_patched(
+    test_redis: TestRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, 'CACHE_WRITE_THROUGH', True)
+    redis = cast(Redis, test_redis)
+    await test_redis.set(DISHES.key(), b'stale', ex=60)
+    # Список построен до чужого изменения, которое уже сменило поколение общего тега
+    await invalidate_tags(redis, DISHES_TAG)
+
+    generations = await invalidate_tags(redis, *dish_write_tags(OLD_DISH, NEW_DISH))
+    await dish_write_through(redis, generations, OLD_DISH, NEW_DISH)
+
+    assert await test_redis.get(DISHES.key()) == b'stale'
+    assert await test_redis.get(DISH.key(dish_id=1)) is not None
+
+
+@pytest.mark.asyncio()
+async def test_conflicting_write_deletes_key(test_redis: TestRedis, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'CACHE_WRITE_THROUGH', True)
+    redis = cast(Redis, test_redis)
+    (tag,) = DISH.tags(dish_id=1)
+    await test_redis.set(DISH.key(dish_id=1), b'stale', ex=60)
+    generations = await invalidate_tags(redis, *dish_write_tags(OLD_DISH, NEW_DISH))
+    # Следующее изменение успело сменить поколение до записи этого
+    await invalidate_tags(redis, tag)
+
+    await dish_write_through(redis, generations, OLD_DISH, NEW_DISH)
+
+    assert await test_redis.get(DISH.key(dish_id=1)) is None
+    assert await test_redis.get(get_cache_generation(tag)) == str(generations[tag] + 1).encode()
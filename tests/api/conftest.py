@@ -2,17 +2,18 @@ import json
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import AsyncGenerator, List
+from typing import Any, AsyncGenerator, Generator, List
 from unittest import mock
 
 import pytest
 from fastapi import FastAPI
 from httpx import AsyncClient
-from sqlalchemy import insert
+from sqlalchemy import event, insert, text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from tests.const import URLS
 from tests.mocking.kafka import TestKafkaProducer
+from tests.mocking.redis import TestRedis
 from tests.my_types import FixtureFunctionT
 
 from webapp.db import kafka
@@ -26,6 +27,7 @@ def redis_mock():
     # Создаем асинхронный mock объект для Redis
     mock_redis = mock.AsyncMock()
     mock_redis.get.return_value = None
+    mock_redis.mget.side_effect = lambda *keys: [None] * len(keys)
     mock_redis.delete.return_value = None
     return mock_redis
 
@@ -45,6 +47,14 @@ async def client(
     app.dependency_overrides.clear()
 
 
+@pytest.fixture()
+def test_redis(app: FastAPI, client: AsyncClient) -> TestRedis:
+    # Redis с состоянием для тестов, которым важно, что кэш действительно заполняется
+    redis = TestRedis()
+    app.dependency_overrides[get_redis] = lambda: redis
+    return redis
+
+
 @pytest.fixture()
 async def db_session(app: FastAPI) -> AsyncGenerator[AsyncSession, None]:
     async with engine.begin() as connection:
@@ -61,6 +71,49 @@ async def db_session(app: FastAPI) -> AsyncGenerator[AsyncSession, None]:
         await connection.rollback()
 
 
+@pytest.fixture()
+async def _sequences(fixtures: List[Path]) -> AsyncGenerator[None, None]:
+    # Фикстуры вставляют строки с явными id, поэтому на время теста последовательности
+    # сдвигаются за них. setval не откатывается вместе с транзакцией теста - возвращаем вручную
+    saved = []
+    async with engine.connect() as connection:
+        for fixture in fixtures:
+            with open(fixture, 'r') as file:
+                max_id = max(item['id'] for item in json.load(file))
+            sequence = await connection.scalar(text(f"SELECT pg_get_serial_sequence('{fixture.stem}', 'id')"))
+            last_value, is_called = (
+                await connection.execute(text(f'SELECT last_value, is_called FROM {sequence}'))
+            ).one()
+            saved.append((sequence, last_value, is_called))
+            await connection.execute(text('SELECT setval(:sequence, :value)'), {'sequence': sequence, 'value': max_id})
+        await connection.commit()
+
+    yield
+
+    async with engine.connect() as connection:
+        for sequence, last_value, is_called in saved:
+            await connection.execute(
+                text('SELECT setval(:sequence, :value, :is_called)'),
+                {'sequence': sequence, 'value': last_value, 'is_called': is_called},
+            )
+        await connection.commit()
+
+
+@pytest.fixture()
+def db_statements() -> Generator[List[str], None, None]:
+    # SQL-запросы, выполненные за время теста
+    statements: List[str] = []
+
+    def before_cursor_execute(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+
+
 @pytest.fixture()
 async def _load_fixtures(db_session: AsyncSession, fixtures: List[Path]) -> FixtureFunctionT:
     for fixture in fixtures:
@@ -0,0 +1,151 @@
+from pathlib import Path
+from typing import Any, Dict, List
+
+import orjson
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+from tests.const import URLS
+from tests.mocking.redis import TestRedis
+
+BASE_DIR = Path(__file__).parent
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+
+FIXTURES = [
+    FIXTURES_PATH / 'sirius.user.json',
+    FIXTURES_PATH / 'sirius.restaurant.json',
+    FIXTURES_PATH / 'sirius.dish.json',
+]
+
+
+def published_tags(test_redis: TestRedis) -> List[List[str]]:
+    messages = [orjson.loads(message) for _, message in test_redis.published_messages]
+    return [list(message['tags']) for message in messages if 'tags' in message]
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'expected_status', 'fixtures'),
+    [
+        ('staff', 'qwerty', status.HTTP_201_CREATED, FIXTURES),
+        ('user', 'qwerty', status.HTTP_403_FORBIDDEN, FIXTURES),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture', '_sequences')
+async def test_create_dishes(
+    client: AsyncClient,
+    test_redis: TestRedis,
+    db_statements: List[str],
+    expected_status: int,
+    access_token: str,
+) -> None:
+    menu = [
+        {
+            'restaurant_id': 1 + number % 2,
+            'category': 'Суп' if number % 3 else 'Десерт',
+            'dish_name': f'Блюдо {number}',
+            'description': '-',
+            'price': 10 + number,
+        }
+        for number in range(50)
+    ]
+    db_statements.clear()
+
+    response = await client.post(
+        URLS['dish']['bulk'], headers={'Authorization': f'Bearer Bearer {access_token}'}, json=menu
+    )
+
+    assert response.status_code == expected_status
+    if response.status_code == status.HTTP_201_CREATED:
+        dishes = response.json()
+        assert [dish['dish_name'] for dish in dishes] == [dish['dish_name'] for dish in menu]
+        # Весь пакет - один INSERT и одна инвалидация
+        assert len([statement for statement in db_statements if statement.startswith('INSERT')]) == 1
+        (tags,) = published_tags(test_redis)
+        assert {'dishes', 'restaurant-menu:1', 'restaurant-menu:2', f'dish:{dishes[-1]["id"]}'} <= set(tags)
+
+        cached = await client.get(URLS['dish']['get_put_delete'].format(dish_id=dishes[0]['id']))
+        assert cached.json() == dishes[0]
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures'),
+    [
+        ('staff', 'qwerty', FIXTURES),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_update_dishes(
+    client: AsyncClient, test_redis: TestRedis, db_statements: List[str], access_token: str
+) -> None:
+    headers = {'Authorization': f'Bearer Bearer {access_token}'}
+    # Закэшированное блюдо должно обновиться после пакетного изменения
+    await client.get(URLS['dish']['get_put_delete'].format(dish_id=1))
+    db_statements.clear()
+
+    response = await client.patch(
+        URLS['dish']['bulk'],
+        headers=headers,
+        json=[{'id': 3, 'price': 1.5}, {'id': 1, 'category': 'Суп', 'restaurant_id': 2}],
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    first, second = response.json()
+    assert (first['id'], first['price'], first['category']) == (3, 1.5, 'Десерт')
+    assert (second['id'], second['category'], second['restaurant_id']) == (1, 'Суп', 2)
+    assert second['dish_name'] == 'Спагетти Болоньезе'
+    assert len([statement for statement in db_statements if 'UPDATE' in statement]) == 1
+    # Блюдо пропадает из прежнего меню и категории
+    (tags,) = published_tags(test_redis)
+    assert {'restaurant-menu:1', 'restaurant-menu:2', 'dish-category:DishCategory.MAIN_COURSE'} <= set(tags)
+
+    cached = await client.get(URLS['dish']['get_put_delete'].format(dish_id=1))
+    assert cached.json() == second
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'payload', 'expected_status', 'fixtures'),
+    [
+        ('staff', 'qwerty', [{'id': 1, 'price': 1}, {'id': 99, 'price': 1}], status.HTTP_404_NOT_FOUND, FIXTURES),
+        ('staff', 'qwerty', [{'id': 1, 'price': 1}, {'id': 1, 'price': 2}], status.HTTP_400_BAD_REQUEST, FIXTURES),
+        ('staff', 'qwerty', [], status.HTTP_400_BAD_REQUEST, FIXTURES),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_update_dishes_rejects_whole_batch(
+    client: AsyncClient, payload: List[Dict[str, Any]], expected_status: int, access_token: str
+) -> None:
+    response = await client.patch(
+        URLS['dish']['bulk'], headers={'Authorization': f'Bearer Bearer {access_token}'}, json=payload
+    )
+
+    assert response.status_code == expected_status
+    dish = await client.get(URLS['dish']['get_put_delete'].format(dish_id=1))
+    assert dish.json()['price'] == 12.99
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'ids', 'expected_status', 'fixtures'),
+    [
+        ('staff', 'qwerty', [1, 5], status.HTTP_204_NO_CONTENT, FIXTURES),
+        ('staff', 'qwerty', [1, 99], status.HTTP_404_NOT_FOUND, FIXTURES),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_delete_dishes(
+    client: AsyncClient, test_redis: TestRedis, ids: List[int], expected_status: int, access_token: str
+) -> None:
+    response = await client.delete(
+        URLS['dish']['bulk'], headers={'Authorization': f'Bearer Bearer {access_token}'}, params={'ids': ids}
+    )
+
+    assert response.status_code == expected_status
+    expected_dish_status = status.HTTP_404_NOT_FOUND if expected_status == status.HTTP_204_NO_CONTENT else 200
+    dish = await client.get(URLS['dish']['get_put_delete'].format(dish_id=1))
+    assert dish.status_code == expected_dish_status
+    remaining = await client.get(URLS['dish']['get_put_delete'].format(dish_id=2))
+    assert remaining.status_code == status.HTTP_200_OK
@@ -0,0 +1,76 @@
+from pathlib import Path
+from typing import List
+
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+from tests.const import URLS
+from tests.mocking.redis import TestRedis
+
+BASE_DIR = Path(__file__).parent
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+
+
+@pytest.mark.parametrize(
+    ('ids', 'expected_ids', 'fixtures'),
+    [
+        (
+            [5, 1, 99, 3, 1],
+            [5, 1, 3],
+            [
+                FIXTURES_PATH / 'sirius.restaurant.json',
+                FIXTURES_PATH / 'sirius.dish.json',
+            ],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_get_dishes_by_ids(
+    client: AsyncClient,
+    test_redis: TestRedis,
+    db_statements: List[str],
+    ids: List[int],
+    expected_ids: List[int],
+) -> None:
+    # Одно блюдо уже в кэше: из БД читаются только промахи, одним запросом
+    await client.get(URLS['dish']['get_put_delete'].format(dish_id=5))
+    db_statements.clear()
+    test_redis.pipelines_executed = 0
+
+    response = await client.get(URLS['dish']['get_all_create'], params={'ids': ids})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [dish['id'] for dish in response.json()] == expected_ids
+    selects = [statement for statement in db_statements if statement.startswith('SELECT')]
+    assert len(selects) == 1
+    assert ' IN ' in selects[0]
+    assert test_redis.pipelines_executed == 1
+
+    db_statements.clear()
+    cached_response = await client.get(URLS['dish']['get_all_create'], params={'ids': ids})
+
+    assert cached_response.content == response.content
+    assert not db_statements
+
+
+@pytest.mark.parametrize(
+    ('fixtures',),
+    [
+        (
+            [
+                FIXTURES_PATH / 'sirius.restaurant.json',
+                FIXTURES_PATH / 'sirius.dish.json',
+            ],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_get_dishes_by_ids_limit(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr('webapp.cache.engine.settings.BATCH_MAX_IDS', 2)
+
+    response = await client.get(URLS['dish']['get_all_create'], params={'ids': [1, 2, 3]})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,94 @@
+from pathlib import Path
+from typing import Any, Dict, List
+
+import orjson
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+from tests.const import URLS
+from tests.mocking.redis import TestRedis
+
+from webapp.utils.pagination import encode_cursor
+
+BASE_DIR = Path(__file__).parent
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+
+
+@pytest.fixture()
+def fixtures() -> List[Path]:
+    return [
+        FIXTURES_PATH / 'sirius.restaurant.json',
+        FIXTURES_PATH / 'sirius.dish.json',
+    ]
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_pages_follow_next_links(client: AsyncClient, test_redis: TestRedis) -> None:
+    response = await client.get(URLS['dish']['get_all_create'], params={'limit': 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert int(response.headers['x-total-count-estimate']) >= 0
+
+    pages = [[dish['id'] for dish in response.json()]]
+    while 'next' in response.links:
+        response = await client.get(response.links['next']['url'])
+        assert response.status_code == status.HTTP_200_OK
+        assert 'x-total-count-estimate' not in response.headers
+        pages.append([dish['id'] for dish in response.json()])
+
+    # Последняя полная страница ведет на пустую
+    assert pages == [[1, 2], [3, 4], [5, 6], []]
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_pages_are_cached_separately(
+    client: AsyncClient, test_redis: TestRedis, db_statements: List[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    url = URLS['restaurant']['get_menu'].format(restaurant_id=1)
+    first = await client.get(url, params={'limit': 2})
+    second = await client.get(first.links['next']['url'])
+    assert [dish['id'] for dish in second.json()] == [3]
+    assert 'next' not in second.links
+
+    # Ссылка на следующую страницу при попадании строится по заголовку записи, без разбора тела
+    parsed: List[bytes] = []
+    loads = orjson.loads
+
+    def counted_loads(data: Any) -> Any:
+        # Курсор тоже JSON, поэтому учитываются только тела-списки
+        if isinstance(data, bytes) and data.startswith(b'['):
+            parsed.append(data)
+        return loads(data)
+
+    monkeypatch.setattr(orjson, 'loads', counted_loads)
+    db_statements.clear()
+    cached_first = await client.get(url, params={'limit': 2})
+    cached_second = await client.get(first.links['next']['url'])
+    assert not db_statements
+    assert (cached_first.content, cached_second.content) == (first.content, second.content)
+    assert (cached_first.links, cached_second.links) == (first.links, second.links)
+    assert cached_first.headers['x-total-count-estimate'] == first.headers['x-total-count-estimate']
+    assert not parsed
+
+    # Курсор указывает на строку, а не на смещение: страница после id 2 не зависит от размера первой
+    response = await client.get(url, params={'limit': 5, 'cursor': encode_cursor(2)})
+    assert [dish['id'] for dish in response.json()] == [3]
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        {'cursor': 'not-a-cursor'},
+        {'cursor': encode_cursor(-1)},
+        {'limit': 0},
+        {'limit': 1001},
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_invalid_page_rejected(client: AsyncClient, params: Dict[str, Any]) -> None:
+    response = await client.get(URLS['dish']['get_all_create'], params=params)
+
+    assert response.status_code in (status.HTTP_400_BAD_REQUEST, status.HTTP_422_UNPROCESSABLE_ENTITY)
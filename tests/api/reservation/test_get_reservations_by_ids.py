@@ -0,0 +1,40 @@
+from pathlib import Path
+from typing import List
+
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+from tests.const import URLS
+from tests.mocking.redis import TestRedis
+
+BASE_DIR = Path(__file__).parent
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+
+
+@pytest.mark.parametrize(
+    ('ids', 'expected_ids', 'fixtures'),
+    [
+        (
+            [3, 1],
+            [3, 1],
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+                FIXTURES_PATH / 'sirius.restaurant.json',
+                FIXTURES_PATH / 'sirius.reservation.json',
+            ],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_get_reservations_by_ids(
+    client: AsyncClient,
+    test_redis: TestRedis,
+    ids: List[int],
+    expected_ids: List[int],
+) -> None:
+    response = await client.get(URLS['reservation']['create'], params={'ids': ids})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [reservation['id'] for reservation in response.json()] == expected_ids
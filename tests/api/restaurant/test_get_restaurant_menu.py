@@ -1,4 +1,5 @@
 from pathlib import Path
+from unittest.mock import AsyncMock
 
 import pytest
 from httpx import AsyncClient
@@ -6,6 +7,9 @@ from starlette import status
 
 from tests.const import URLS
 
+from webapp.cache.entry import CacheEntry
+from webapp.cache.key_builder import get_restaurant_menu_by_id_cache
+
 BASE_DIR = Path(__file__).parent
 FIXTURES_PATH = BASE_DIR / 'fixtures'
 
@@ -65,3 +69,40 @@ async def test_get_restaurant_menu(
     assert response_data[0]['dish_name'] == dish_name
     assert response_data[0]['description'] == description
     assert response_data[0]['price'] == price
+
+
+@pytest.mark.parametrize(
+    ('restaurant_id', 'fixtures'),
+    [
+        (
+            2,
+            [
+                FIXTURES_PATH / 'sirius.restaurant.json',
+                FIXTURES_PATH / 'sirius.dish.json',
+            ],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_get_restaurant_menu_cache_roundtrip(
+    client: AsyncClient,
+    redis_mock: AsyncMock,
+    restaurant_id: int,
+) -> None:
+    response = await client.get(URLS['restaurant']['get_menu'].format(restaurant_id=restaurant_id))
+
+    assert response.status_code == status.HTTP_200_OK
+    # Кроме меню записывается оценка числа его строк
+    cached = {key: value for (key, value), _ in redis_mock.set.call_args_list}
+    cached_value = cached[get_restaurant_menu_by_id_cache(restaurant_id=restaurant_id)]
+    entry = CacheEntry.decode(cached_value)
+    assert entry is not None
+    assert entry.payload == response.content
+
+    redis_mock.mget.side_effect = lambda key, *generation_keys: [cached.get(key)] + [None] * len(generation_keys)
+    cached_response = await client.get(URLS['restaurant']['get_menu'].format(restaurant_id=restaurant_id))
+
+    assert cached_response.status_code == status.HTTP_200_OK
+    assert cached_response.headers['content-type'] == 'application/json'
+    assert cached_response.content == response.content
@@ -0,0 +1,35 @@
+from pathlib import Path
+from typing import List
+
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+from tests.const import URLS
+from tests.mocking.redis import TestRedis
+
+BASE_DIR = Path(__file__).parent
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+
+
+@pytest.mark.parametrize(
+    ('ids', 'expected_ids', 'expected_status', 'fixtures'),
+    [
+        ([2, 1], [2, 1], status.HTTP_200_OK, [FIXTURES_PATH / 'sirius.restaurant.json']),
+        ([3, 4], [], status.HTTP_404_NOT_FOUND, [FIXTURES_PATH / 'sirius.restaurant.json']),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_get_restaurants_by_ids(
+    client: AsyncClient,
+    test_redis: TestRedis,
+    ids: List[int],
+    expected_ids: List[int],
+    expected_status: int,
+) -> None:
+    response = await client.get(URLS['restaurant']['get_all_create'], params={'ids': ids})
+
+    assert response.status_code == expected_status
+    if response.status_code == status.HTTP_200_OK:
+        assert [restaurant['id'] for restaurant in response.json()] == expected_ids
@@ -0,0 +1,42 @@
+import asyncio
+from pathlib import Path
+from typing import List
+
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+from tests.const import URLS
+from tests.mocking.redis import TestRedis
+
+BASE_DIR = Path(__file__).parent
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+
+
+@pytest.mark.parametrize(
+    ('concurrency', 'fixtures'),
+    [
+        (
+            50,
+            [
+                FIXTURES_PATH / 'sirius.restaurant.json',
+            ],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_get_restaurants_stampede(
+    client: AsyncClient,
+    test_redis: TestRedis,
+    db_statements: List[str],
+    concurrency: int,
+) -> None:
+    # Ключ отсутствует в кэше у всех запросов одновременно, как после истечения TTL
+    db_statements.clear()
+
+    responses = await asyncio.gather(*(client.get(URLS['restaurant']['get_all_create']) for _ in range(concurrency)))
+
+    assert all(response.status_code == status.HTTP_200_OK for response in responses)
+    assert len({response.content for response in responses}) == 1
+    assert len([statement for statement in db_statements if statement.startswith('SELECT')]) == 1
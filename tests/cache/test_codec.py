@@ -0,0 +1,107 @@
+import time
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+
+from webapp.cache import codec
+from webapp.cache.entry import HEADER, CacheEntry
+from webapp.cache.response import dump_model, dump_models
+from webapp.models.sirius.dish import DishCategory
+from webapp.schema.reservation.reservation import ReservationRead
+from webapp.schema.restaurant.dish import DishRead
+
+DISHES = [
+    DishRead(
+        id=i,
+        restaurant_id=1,
+        category=DishCategory.DESSERT if i % 2 else DishCategory.SOUP,
+        dish_name=f'Блюдо {i}',
+        description='Описание',
+        price=i + 0.5,
+    )
+    for i in range(1, 41)
+]
+RESERVATIONS = [
+    ReservationRead(
+        id=i,
+        user_id=1,
+        restaurant_id=1,
+        date_reserv=datetime(2024, 3, 3, 11, 30, i, tzinfo=timezone.utc),
+        guest_count=2,
+        status=bool(i % 2),
+        comment=None if i % 3 else 'У окна',
+    )
+    for i in range(1, 41)
+]
+
+
+@pytest.fixture()
+def _codec(monkeypatch: pytest.MonkeyPatch, request: pytest.FixtureRequest) -> None:
+    name, compress_min_bytes = request.param
+    monkeypatch.setattr(codec.settings, 'CACHE_CODEC', name)
+    monkeypatch.setattr(codec.settings, 'CACHE_COMPRESS_MIN_BYTES', compress_min_bytes)
+
+
+def roundtrip(payload: bytes) -> bytes | None:
+    entry = CacheEntry(payload=payload, soft_expires_at=time.time() + 60, delta=0.01, generations=(1, 2))
+    decoded = CacheEntry.decode(entry.encode())
+    assert decoded is not None
+    assert decoded.generations == (1, 2)
+    return decoded.payload
+
+
+@pytest.mark.parametrize('_codec', [('json', 0), ('json', 1024), ('columnar', 0), ('columnar', 1024)], indirect=True)
+@pytest.mark.parametrize(
+    'payload',
+    [
+        dump_models(DISHES),
+        dump_models(RESERVATIONS),
+        dump_model(DISHES[0]),
+        b'[]',
+        b'{}',
+        orjson.dumps([{'id': 1}, {'id': 2, 'name': 'другие поля'}]),
+    ],
+)
+@pytest.mark.usefixtures('_codec')
+def test_payload_survives_roundtrip_byte_for_byte(payload: bytes) -> None:
+    # Ответ отдается из кэша как есть, поэтому декодированное значение должно совпадать побайтно
+    assert roundtrip(payload) == payload
+
+
+@pytest.mark.parametrize(
+    ('_codec', 'flags'),
+    [(('json', 0), codec.RAW), (('json', 1024), codec.ZLIB), (('columnar', 0), codec.COLUMNAR)],
+    indirect=['_codec'],
+)
+@pytest.mark.usefixtures('_codec')
+def test_list_payload_is_stored_compact(flags: int) -> None:
+    payload = dump_models(DISHES)
+
+    encoded = codec.encode_payload(payload)
+
+    assert encoded[0] == flags
+    if flags:
+        assert len(encoded) < len(payload) / 2
+
+
+def test_entry_keeps_row_count_and_last_id() -> None:
+    entry = CacheEntry(payload=dump_models(DISHES), soft_expires_at=time.time() + 60, delta=0.01)
+    decoded = CacheEntry.decode(entry.encode())
+    assert decoded is not None
+    assert (decoded.rows, decoded.last_id) == (40, 40)
+
+    single = CacheEntry(payload=dump_model(DISHES[0]), soft_expires_at=time.time() + 60, delta=0.01)
+    assert (single.rows, single.last_id) == (0, 0)
+    assert CacheEntry(payload=b'[]', soft_expires_at=0, delta=0).rows == 0
+
+
+def test_entry_with_unknown_codec_is_ignored() -> None:
+    entry = CacheEntry(payload=b'[]', soft_expires_at=time.time() + 60, delta=0.01).encode()
+    offset = len(entry) - len(b'[]') - 1
+
+    assert CacheEntry.decode(entry[:offset] + bytes((0x80,)) + b'[]') is None
+
+
+def test_entry_of_previous_format_is_ignored() -> None:
+    assert CacheEntry.decode(b'\x02' + HEADER.pack(time.time() + 60, 0.01, 0) + b'[]') is None
@@ -0,0 +1,109 @@
+from unittest import mock
+
+import orjson
+import pytest
+from redis.exceptions import ConnectionError
+from starlette import status
+
+from webapp.cache import policy
+from webapp.cache.engine import CachedRead
+from webapp.cache.entry import EMPTY_OBJECT, CacheEntry
+from webapp.metrics import CACHE_ERRORS
+from webapp.schema.restaurant.restaurant import RestaurantRead
+
+RESTAURANT = RestaurantRead(id=1, name='Ресторан', address='Адрес', description='Описание')
+
+RESTAURANT_READ = CachedRead(
+    family='test_restaurant',
+    key=lambda restaurant_id: f'test:restaurant:{restaurant_id}',
+    tags=lambda restaurant_id: [f'restaurant:{restaurant_id}'],
+    empty=EMPTY_OBJECT,
+    not_found='Не найдено',
+    batch_not_found='Ничего не найдено',
+)
+
+
+@pytest.fixture()
+def redis_mock() -> mock.AsyncMock:
+    redis_mock = mock.AsyncMock()
+    redis_mock.mget.side_effect = lambda *keys: [None] * len(keys)
+    return redis_mock
+
+
+@pytest.fixture()
+def _no_jitter(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(policy.settings, 'CACHE_TTL_JITTER', 0)
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_no_jitter')
+async def test_key_and_tags_are_built_from_params(redis_mock: mock.AsyncMock) -> None:
+    loader = mock.AsyncMock(return_value=RESTAURANT)
+
+    response = await RESTAURANT_READ.respond(redis_mock, mock.sentinel.session, loader, restaurant_id=1)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert orjson.loads(response.body) == RESTAURANT.model_dump()
+    redis_mock.mget.assert_awaited_once_with('test:restaurant:1', 'sirius:gen:restaurant:1')
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_no_jitter')
+async def test_family_ttl_overrides(redis_mock: mock.AsyncMock, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(policy.settings, 'CACHE_FAMILY_TTL', {'test_restaurant': 100})
+    monkeypatch.setattr(policy.settings, 'CACHE_FAMILY_EMPTY_TTL', {'test_restaurant': 10})
+
+    await RESTAURANT_READ.respond(
+        redis_mock, mock.sentinel.session, mock.AsyncMock(return_value=RESTAURANT), restaurant_id=1
+    )
+    response = await RESTAURANT_READ.respond(
+        redis_mock, mock.sentinel.session, mock.AsyncMock(return_value=None), restaurant_id=2
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert orjson.loads(response.body) == 'Не найдено'
+    # Остальные вызовы set - аренды на перестроение
+    writes = [call for call in redis_mock.set.call_args_list if 'ex' in call.kwargs]
+    (found_key, _), found = writes[0]
+    (empty_key, stored), empty = writes[1]
+    assert (found_key, found['ex']) == ('test:restaurant:1', 100 + policy.settings.CACHE_STALE_TTL)
+    # Отсутствие записи кэшируется, но живет меньше найденного значения
+    assert (empty_key, empty['ex']) == ('test:restaurant:2', 10 + policy.settings.CACHE_STALE_TTL)
+    decoded = CacheEntry.decode(stored)
+    assert decoded is not None
+    assert decoded.payload == EMPTY_OBJECT
+
+
+def test_ttl_jitter_stays_within_bounds(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(policy.settings, 'CACHE_TTL_JITTER', 0.1)
+
+    ttls = {policy.jittered(1000) for _ in range(100)}
+
+    assert all(900 <= ttl <= 1100 for ttl in ttls)
+    assert len(ttls) > 1
+
+
+@pytest.mark.asyncio()
+async def test_redis_error_falls_back_to_database(redis_mock: mock.AsyncMock) -> None:
+    redis_mock.mget.side_effect = ConnectionError('Redis недоступен')
+    loader = mock.AsyncMock(return_value=RESTAURANT)
+    errors = CACHE_ERRORS.labels(family='test_restaurant')._value.get()
+
+    response = await RESTAURANT_READ.respond(redis_mock, mock.sentinel.session, loader, restaurant_id=1)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert orjson.loads(response.body) == RESTAURANT.model_dump()
+    loader.assert_awaited_once_with(mock.sentinel.session)
+    assert CACHE_ERRORS.labels(family='test_restaurant')._value.get() == errors + 1
+
+
+@pytest.mark.asyncio()
+async def test_redis_error_falls_back_to_database_for_batch(redis_mock: mock.AsyncMock) -> None:
+    redis_mock.mget.side_effect = ConnectionError('Redis недоступен')
+    other = RESTAURANT.model_copy(update={'id': 2})
+    loader = mock.AsyncMock(return_value=[RESTAURANT, other])
+
+    response = await RESTAURANT_READ.respond_many(redis_mock, mock.sentinel.session, [2, 3, 1, 2], loader)
+
+    assert orjson.loads(response.body) == [other.model_dump(), RESTAURANT.model_dump()]
+    loader.assert_awaited_once_with(mock.sentinel.session, [2, 3, 1])
@@ -0,0 +1,97 @@
+import time
+from unittest import mock
+
+import pytest
+
+from webapp.cache.client import cache_get, handle_invalidation_message
+from webapp.cache.entry import CacheEntry
+from webapp.cache.local import LocalCache, local_cache
+
+
+@pytest.fixture()
+def cache() -> LocalCache:
+    cache = LocalCache(max_entries=3, max_bytes=10, ttl=60)
+    cache.enabled = True
+    return cache
+
+
+def test_disabled_cache_stores_nothing() -> None:
+    cache = LocalCache(max_entries=3, max_bytes=10, ttl=60)
+    cache.set('key', b'value')
+
+    assert cache.get('key') is None
+    assert len(cache) == 0
+
+
+def test_evicts_least_recently_used_by_entries(cache: LocalCache) -> None:
+    cache.set('a', b'1')
+    cache.set('b', b'2')
+    cache.set('c', b'3')
+    assert cache.get('a') == b'1'
+
+    cache.set('d', b'4')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == b'1'
+    assert len(cache) == 3
+
+
+def test_evicts_by_total_bytes(cache: LocalCache) -> None:
+    cache.set('a', b'12345')
+    cache.set('b', b'123456')
+
+    assert cache.get('a') is None
+    assert cache.get('b') == b'123456'
+
+    cache.set('c', b'too large value')
+    assert cache.get('c') is None
+
+
+def test_expired_entry_is_dropped(cache: LocalCache, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache.set('a', b'1')
+    monkeypatch.setattr('webapp.cache.local.time.monotonic', lambda: float('inf'))
+
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_value_read_before_invalidation_is_not_stored(cache: LocalCache) -> None:
+    epoch = cache.epoch
+    cache.invalidate(['a'])
+    cache.set('a', b'stale', epoch=epoch)
+
+    assert cache.get('a') is None
+
+
+def test_invalidation_message_from_other_worker(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(local_cache, 'enabled', True)
+    local_cache.set('sirius:restaurants', b'[]')
+
+    handle_invalidation_message(b'{"origin": "other", "keys": ["sirius:restaurants"]}')
+
+    assert local_cache.get('sirius:restaurants') is None
+
+
+def test_generations_never_go_back(cache: LocalCache) -> None:
+    cache.observe({'a': 3})
+    cache.observe({'a': 2, 'b': 1})
+
+    assert cache.generations(['a', 'b', 'c']) == (3, 1, 0)
+
+
+@pytest.mark.asyncio()
+async def test_tag_invalidation_message_outdates_local_entry(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(local_cache, 'enabled', True)
+    entry = CacheEntry(payload=b'[]', soft_expires_at=time.time() + 60, delta=0, generations=(1,))
+    local_cache.observe({'restaurants': 1})
+    local_cache.set('sirius:restaurants', entry.encode())
+    redis = mock.AsyncMock()
+    redis.mget.return_value = [entry.encode(), b'2']
+
+    assert await cache_get(redis, 'sirius:restaurants', ['restaurants']) == (entry, (1,))
+    redis.mget.assert_not_awaited()
+
+    handle_invalidation_message(b'{"origin": "other", "tags": {"restaurants": 2}}')
+
+    assert await cache_get(redis, 'sirius:restaurants', ['restaurants']) == (None, (2,))
+    local_cache.clear()
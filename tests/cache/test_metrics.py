@@ -0,0 +1,60 @@
+import time
+from typing import Dict
+from unittest import mock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from webapp.cache.entry import EMPTY_LIST, CacheEntry
+from webapp.cache.read_through import read_through
+
+
+def sample(name: str, labels: Dict[str, str]) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture()
+def redis_mock() -> mock.AsyncMock:
+    redis_mock = mock.AsyncMock()
+    redis_mock.mget.side_effect = lambda *keys: [None] * len(keys)
+    return redis_mock
+
+
+@pytest.mark.asyncio()
+async def test_miss_and_store_are_measured_per_family(redis_mock: mock.AsyncMock) -> None:
+    labels = {'family': 'metrics_miss'}
+    misses = sample('sirius_cache_requests_total', {**labels, 'tier': 'redis', 'result': 'miss'})
+    sets = sample(
+        'integration_method_latency_seconds_count', {'method': 'set', 'integration_point': 'redis:metrics_miss'}
+    )
+    stored_bytes = sample('sirius_cache_value_bytes_sum', labels)
+
+    await read_through(
+        redis_mock, mock.sentinel.session, 'key', mock.AsyncMock(return_value=None), EMPTY_LIST, 'metrics_miss'
+    )
+
+    assert sample('sirius_cache_requests_total', {**labels, 'tier': 'redis', 'result': 'miss'}) == misses + 1
+    assert (
+        sample('integration_method_latency_seconds_count', {'method': 'set', 'integration_point': 'redis:metrics_miss'})
+        == sets + 1
+    )
+    (_, stored), _ = redis_mock.set.call_args_list[-1]
+    assert sample('sirius_cache_value_bytes_sum', labels) == stored_bytes + len(stored)
+
+
+@pytest.mark.asyncio()
+async def test_hit_on_empty_value_is_counted_separately(redis_mock: mock.AsyncMock) -> None:
+    labels = {'family': 'metrics_empty', 'tier': 'redis'}
+    value = CacheEntry(payload=EMPTY_LIST, soft_expires_at=time.time() + 60, delta=0.01).encode()
+    redis_mock.mget.side_effect = None
+    redis_mock.mget.return_value = [value]
+    hits = sample('sirius_cache_requests_total', {**labels, 'result': 'hit'})
+    empty_hits = sample('sirius_cache_empty_hits_total', labels)
+
+    payload = await read_through(
+        redis_mock, mock.sentinel.session, 'key', mock.AsyncMock(), EMPTY_LIST, 'metrics_empty'
+    )
+
+    assert payload == EMPTY_LIST
+    assert sample('sirius_cache_requests_total', {**labels, 'result': 'hit'}) == hits + 1
+    assert sample('sirius_cache_empty_hits_total', labels) == empty_hits + 1
@@ -0,0 +1,160 @@
+import time
+import asyncio
+from typing import Tuple
+from unittest import mock
+
+import orjson
+import pytest
+
+from webapp.cache import read_through as read_through_module
+from webapp.cache.entry import EMPTY_LIST, CacheEntry
+from webapp.cache.read_through import read_through
+from webapp.schema.restaurant.restaurant import RestaurantRead
+
+RESTAURANT = RestaurantRead(id=1, name='Ресторан', address='Адрес', description='Описание')
+
+
+@pytest.fixture()
+def redis_mock() -> mock.AsyncMock:
+    redis_mock = mock.AsyncMock()
+    redis_mock.mget.return_value = [None]
+    return redis_mock
+
+
+@pytest.fixture()
+def refresh_session(monkeypatch: pytest.MonkeyPatch) -> mock.MagicMock:
+    # Фоновое обновление открывает собственную сессию
+    session = mock.MagicMock()
+    session_factory = mock.MagicMock()
+    session_factory.return_value.__aenter__.return_value = session
+    monkeypatch.setattr(read_through_module.postgres, 'async_session', session_factory)
+    return session
+
+
+def entry(payload: bytes, soft_ttl: float, delta: float = 0.01, generations: Tuple[int, ...] = ()) -> bytes:
+    return CacheEntry(
+        payload=payload, soft_expires_at=time.time() + soft_ttl, delta=delta, generations=generations
+    ).encode()
+
+
+async def wait_background_refreshes() -> None:
+    await asyncio.gather(*read_through_module._background_refreshes)
+
+
+@pytest.mark.asyncio()
+async def test_miss_stores_entry_with_soft_expiry(redis_mock: mock.AsyncMock) -> None:
+    loader = mock.AsyncMock(return_value=[RESTAURANT])
+
+    value = await read_through(redis_mock, mock.sentinel.session, 'key', loader, empty=EMPTY_LIST, family='test')
+
+    assert orjson.loads(value) == [RESTAURANT.model_dump()]
+    loader.assert_awaited_once_with(mock.sentinel.session)
+    (_, stored), kwargs = redis_mock.set.call_args
+    decoded = CacheEntry.decode(stored)
+    assert decoded is not None
+    assert decoded.payload == value
+    assert decoded.soft_expires_at < time.time() + kwargs['ex']
+
+
+@pytest.mark.asyncio()
+async def test_legacy_value_is_treated_as_miss(redis_mock: mock.AsyncMock) -> None:
+    redis_mock.mget.return_value = [b'[{"id": 1}]']
+    loader = mock.AsyncMock(return_value=None)
+
+    value = await read_through(redis_mock, mock.sentinel.session, 'key', loader, empty=EMPTY_LIST, family='test')
+
+    assert value == EMPTY_LIST
+    loader.assert_awaited_once()
+
+
+@pytest.mark.asyncio()
+async def test_entry_from_previous_tag_generation_is_rebuilt(redis_mock: mock.AsyncMock) -> None:
+    # После записи в БД поколение тега выросло: запись, построенная раньше, не отдается даже свежей
+    redis_mock.mget.return_value = [entry(b'[1]', soft_ttl=60, generations=(1,)), b'2']
+    loader = mock.AsyncMock(return_value=[RESTAURANT])
+
+    value = await read_through(
+        redis_mock, mock.sentinel.session, 'key', loader, empty=EMPTY_LIST, family='test', tags=['tag']
+    )
+
+    assert orjson.loads(value) == [RESTAURANT.model_dump()]
+    redis_mock.mget.assert_awaited_once_with('key', 'sirius:gen:tag')
+    (_, stored), _ = redis_mock.set.call_args_list[-1]
+    decoded = CacheEntry.decode(stored)
+    assert decoded is not None
+    assert decoded.generations == (2,)
+
+
+@pytest.mark.asyncio()
+async def test_fresh_entry_is_served_without_refresh(
+    redis_mock: mock.AsyncMock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(read_through_module.settings, 'CACHE_XFETCH_BETA', 0)
+    redis_mock.mget.return_value = [entry(b'[1]', soft_ttl=60)]
+    loader = mock.AsyncMock()
+
+    value = await read_through(redis_mock, mock.sentinel.session, 'key', loader, empty=EMPTY_LIST, family='test')
+
+    assert value == b'[1]'
+    assert not read_through_module._background_refreshes
+    loader.assert_not_awaited()
+
+
+@pytest.mark.asyncio()
+async def test_stale_entry_is_served_and_refreshed_in_background(
+    redis_mock: mock.AsyncMock, refresh_session: mock.MagicMock
+) -> None:
+    redis_mock.mget.return_value = [entry(b'[1]', soft_ttl=-5)]
+    loader = mock.AsyncMock(return_value=[RESTAURANT])
+
+    value = await read_through(redis_mock, mock.sentinel.session, 'key', loader, empty=EMPTY_LIST, family='test')
+    await wait_background_refreshes()
+
+    assert value == b'[1]'
+    loader.assert_awaited_once_with(refresh_session)
+    (_, stored), _ = redis_mock.set.call_args_list[-1]
+    decoded = CacheEntry.decode(stored)
+    assert decoded is not None
+    assert orjson.loads(decoded.payload) == [RESTAURANT.model_dump()]
+
+
+@pytest.mark.asyncio()
+async def test_expensive_entry_is_refreshed_early(redis_mock: mock.AsyncMock, refresh_session: mock.MagicMock) -> None:
+    # Построение занимает час, до мягкого устаревания секунда: XFetch обновит запись заранее
+    redis_mock.mget.return_value = [entry(b'[1]', soft_ttl=1, delta=3600)]
+    loader = mock.AsyncMock(return_value=[RESTAURANT])
+
+    value = await read_through(redis_mock, mock.sentinel.session, 'key', loader, empty=EMPTY_LIST, family='test')
+    await wait_background_refreshes()
+
+    assert value == b'[1]'
+    loader.assert_awaited_once_with(refresh_session)
+
+
+@pytest.mark.asyncio()
+async def test_waits_for_lease_holder(redis_mock: mock.AsyncMock, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(read_through_module.settings, 'CACHE_LEASE_POLL_INTERVAL', 0)
+    redis_mock.set.return_value = None
+    redis_mock.mget.side_effect = [[None], [None], [entry(b'[{"id": 1}]', soft_ttl=60)]]
+    loader = mock.AsyncMock()
+
+    value = await read_through(redis_mock, mock.sentinel.session, 'key', loader, empty=EMPTY_LIST, family='test')
+
+    assert value == b'[{"id": 1}]'
+    loader.assert_not_awaited()
+    redis_mock.eval.assert_not_awaited()
+
+
+@pytest.mark.asyncio()
+async def test_rebuilds_when_lease_holder_is_too_slow(
+    redis_mock: mock.AsyncMock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(read_through_module.settings, 'CACHE_LEASE_POLL_INTERVAL', 0)
+    monkeypatch.setattr(read_through_module.settings, 'CACHE_LEASE_WAIT', 0.01)
+    redis_mock.set.return_value = None
+    loader = mock.AsyncMock(return_value=[RESTAURANT])
+
+    value = await read_through(redis_mock, mock.sentinel.session, 'key', loader, empty=EMPTY_LIST, family='test')
+
+    assert orjson.loads(value) == [RESTAURANT.model_dump()]
+    loader.assert_awaited_once()
@@ -8,6 +8,7 @@ URLS = {
         'get_all_create': '/dishes',
         'get_by_category': '/dishes/?category={category}',
         'get_put_delete': '/dishes/{dish_id}',
+        'bulk': '/dishes/bulk',
     },
     'restaurant': {
         'get_all_create': '/restaurants',
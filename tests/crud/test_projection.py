@@ -0,0 +1,84 @@
+from typing import AsyncGenerator
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from webapp.cache.response import dump_models
+from webapp.crud.dish import get_dish, get_dishes_by_restaurant_id_and_category, get_menu_json
+from webapp.crud.reservation import get_reservations_for_user, get_reservations_for_user_json
+from webapp.crud.restaurant import get_restaurants, get_restaurants_json
+from webapp.db.postgres import engine
+from webapp.models.sirius.dish import Dish, DishCategory
+from webapp.models.sirius.reservation import Reservation
+from webapp.models.sirius.restaurant import Restaurant
+from webapp.schema.reservation.reservation import ReservationRead
+from webapp.schema.restaurant.dish import DishRead
+from webapp.schema.restaurant.restaurant import RestaurantRead
+
+SEED = [
+    '''
+    INSERT INTO sirius.restaurant (id, name, address, description)
+    VALUES (1, 'Первый', 'ул. Первая, 1', '-'), (2, 'Второй', 'ул. Вторая, 2', '-')
+    ''',
+    "INSERT INTO sirius.user (id, username, hashed_password, phone, role) VALUES (1, 'first', '-', '+7001', 'USER')",
+    '''
+    INSERT INTO sirius.dish (id, restaurant_id, category, dish_name, description, price)
+    VALUES (1, 1, 'SOUP', 'Борщ', '-', 100.5), (2, 1, 'DESSERT', 'Торт', '-', 200), (3, 2, 'SOUP', 'Уха', '-', 300)
+    ''',
+    '''
+    INSERT INTO sirius.reservation (id, user_id, restaurant_id, date_reserv, guest_count, status, comment)
+    VALUES (1, 1, 1, '2030-01-01 19:00+00', 2, false, '-'), (2, 1, 2, '2030-01-02 19:30+03', 4, true, 'Окно')
+    ''',
+]
+
+
+@pytest.fixture()
+async def session(app: FastAPI) -> AsyncGenerator[AsyncSession, None]:
+    async with engine.begin() as connection:
+        for statement in SEED:
+            await connection.execute(text(statement))
+
+        yield async_sessionmaker(bind=connection)()
+
+        await connection.rollback()
+
+
+@pytest.mark.asyncio()
+async def test_projection_matches_orm(session: AsyncSession) -> None:
+    # Чтение через Core отдает те же модели и то же тело ответа, что и через сущности ORM
+    orm_menu = (await session.scalars(select(Dish).where(Dish.restaurant_id == 1).order_by(Dish.id))).all()
+    orm_restaurants = (await session.scalars(select(Restaurant).order_by(Restaurant.id))).all()
+    orm_reservations = (
+        await session.scalars(select(Reservation).where(Reservation.user_id == 1).order_by(Reservation.id))
+    ).all()
+    expected_menu = [DishRead.model_validate(dish) for dish in orm_menu]
+    expected_restaurants = [RestaurantRead.model_validate(restaurant) for restaurant in orm_restaurants]
+    expected_reservations = [ReservationRead.model_validate(reservation) for reservation in orm_reservations]
+    session.expunge_all()
+
+    menu = await get_dishes_by_restaurant_id_and_category(session=session, restaurant_id=1)
+    assert menu == expected_menu
+    assert [type(dish.price) for dish in menu] == [float, float]
+    assert await get_dish(session=session, dish_id=1) == expected_menu[0]
+    assert await get_restaurants(session=session) == expected_restaurants
+    assert await get_reservations_for_user(session=session, user_id=1) == expected_reservations
+
+    assert await get_menu_json(session=session, restaurant_id=1) == dump_models(expected_menu)
+    assert await get_restaurants_json(session=session) == dump_models(expected_restaurants)
+    assert await get_reservations_for_user_json(session=session, user_id=1) == dump_models(expected_reservations)
+
+    # Строки не становятся сущностями сессии
+    assert not session.identity_map
+
+
+@pytest.mark.asyncio()
+async def test_projection_empty(session: AsyncSession) -> None:
+    assert await get_dish(session=session, dish_id=100) is None
+    assert (
+        await get_dishes_by_restaurant_id_and_category(session=session, restaurant_id=1, category=DishCategory.SALAD)
+        is None
+    )
+    assert await get_menu_json(session=session, restaurant_id=1, category=DishCategory.SALAD) is None
+    assert await get_reservations_for_user_json(session=session, user_id=100) is None
@@ -0,0 +1,170 @@
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Tuple
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, async_sessionmaker
+
+from webapp.crud.dish import (
+    delete_dish,
+    delete_dishes,
+    get_dish,
+    get_dishes,
+    get_dishes_by_ids,
+    get_dishes_by_restaurant_id_and_category,
+    update_dish,
+    update_dishes,
+)
+from webapp.crud.reservation import (
+    delete_reservation,
+    get_reservation,
+    get_reservations,
+    get_reservations_by_ids,
+    get_reservations_for_user,
+    update_reservation,
+)
+from webapp.crud.restaurant import delete_restaurant, get_restaurant, get_restaurants
+from webapp.crud.user import delete_user, get_user, get_user_by_id, update_user
+from webapp.crud.user_file import get_user_files
+from webapp.db.postgres import engine
+from webapp.models.sirius.dish import DishCategory
+from webapp.schema.login.user import UserLogin, UserUpdate
+from webapp.schema.reservation.reservation import ReservationUpdate
+from webapp.schema.restaurant.dish import DishBulkUpdate, DishUpdate
+from webapp.utils.pagination import Page
+
+# Объем данных, при котором планировщик уже предпочитает индекс последовательному чтению
+RESTAURANTS = 1_000
+USERS = 5_000
+DISHES = 50_000
+RESERVATIONS = 50_000
+
+SEED = [
+    f'''
+    INSERT INTO sirius.restaurant (id, name, address, description)
+    SELECT i, 'Ресторан ' || i, 'Адрес ' || i, '-' FROM generate_series(1, {RESTAURANTS}) AS i
+    ''',
+    f'''
+    INSERT INTO sirius.user (id, username, hashed_password, phone, role)
+    SELECT i, 'user' || i, md5(i::text), '+7900' || i, 'USER' FROM generate_series(1, {USERS}) AS i
+    ''',
+    f'''
+    INSERT INTO sirius.dish (id, restaurant_id, category, dish_name, description, price)
+    SELECT i, 1 + i % {RESTAURANTS}, (enum_range(NULL::dish_category))[1 + i % 7], 'Блюдо ' || i, '-', 100
+    FROM generate_series(1, {DISHES}) AS i
+    ''',
+    f'''
+    INSERT INTO sirius.reservation (id, user_id, restaurant_id, date_reserv, guest_count, status, comment)
+    SELECT i, 1 + i % {USERS}, 1 + i % {RESTAURANTS}, now() + i * interval '1 minute', 2, false, '-'
+    FROM generate_series(1, {RESERVATIONS}) AS i
+    ''',
+    f'''
+    INSERT INTO sirius.file (id, url, task_id) SELECT i, 'file' || i, md5(i::text) FROM generate_series(1, {USERS}) AS i
+    ''',
+    f'''
+    INSERT INTO sirius.user_file (id, user_id, file_id) SELECT i, i, i FROM generate_series(1, {USERS}) AS i
+    ''',
+    'ANALYZE sirius.restaurant, sirius.user, sirius.dish, sirius.reservation, sirius.file, sirius.user_file',
+]
+
+HOT_QUERIES: Dict[str, Callable[[AsyncSession], Awaitable[Any]]] = {
+    'dish': lambda session: get_dish(session=session, dish_id=42),
+    'dishes by ids': lambda session: get_dishes_by_ids(session=session, dish_ids=[1, 2, 3]),
+    'dishes page': lambda session: get_dishes(session=session, page=Page(limit=100, after=25_000)),
+    'dishes by category page': lambda session: get_dishes(
+        session=session, category=DishCategory.SOUP, page=Page(limit=100, after=25_000)
+    ),
+    'menu page': lambda session: get_dishes_by_restaurant_id_and_category(
+        session=session, restaurant_id=7, page=Page(limit=100)
+    ),
+    'menu category page': lambda session: get_dishes_by_restaurant_id_and_category(
+        session=session, restaurant_id=7, category=DishCategory.SOUP, page=Page(limit=100)
+    ),
+    'restaurant': lambda session: get_restaurant(session=session, restaurant_id=7),
+    'restaurants page': lambda session: get_restaurants(session=session, page=Page(limit=100, after=500)),
+    'login': lambda session: get_user(session=session, user_info=UserLogin(username='user7', password='secret')),
+    'user': lambda session: get_user_by_id(session=session, user_id=7),
+    'user files': lambda session: get_user_files(session=session, user_id=7),
+    'reservation': lambda session: get_reservation(session=session, reservation_id=7),
+    'reservations by ids': lambda session: get_reservations_by_ids(session=session, reservation_ids=[1, 2, 3]),
+    'restaurant reservations page': lambda session: get_reservations(
+        session=session, restaurant_id=7, page=Page(limit=100)
+    ),
+    'user reservations page': lambda session: get_reservations_for_user(
+        session=session, user_id=7, page=Page(limit=100)
+    ),
+    'update dish': lambda session: update_dish(session=session, dish_id=10, dish_data=DishUpdate(price=1)),
+    'delete dish': lambda session: delete_dish(session=session, dish_id=11),
+    'update dishes': lambda session: update_dishes(
+        session=session, dishes_data=[DishBulkUpdate(id=20, price=1), DishBulkUpdate(id=21, dish_name='Б')]
+    ),
+    'delete dishes': lambda session: delete_dishes(session=session, dish_ids=[22, 23]),
+    'update reservation': lambda session: update_reservation(
+        session=session, reservation_id=10, reservation_data=ReservationUpdate(guest_count=3)
+    ),
+    'delete reservation': lambda session: delete_reservation(session=session, reservation_id=11),
+    'update user': lambda session: update_user(session=session, user_id=10, user_data=UserUpdate(phone='+7')),
+    # Удаления в том же запросе удаляют строки, ссылающиеся на удаляемую, по внешним ключам
+    'delete restaurant': lambda session: delete_restaurant(session=session, restaurant_id=8),
+    'delete user': lambda session: delete_user(session=session, user_id=8),
+}
+
+# Запросы, план которых проверяется: EXPLAIN без ANALYZE не выполняет изменения
+CHECKED_STATEMENTS = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+
+@pytest.fixture()
+async def seeded(app: FastAPI) -> AsyncGenerator[AsyncConnection, None]:
+    async with engine.begin() as connection:
+        for statement in SEED:
+            await connection.execute(text(statement))
+
+        yield connection
+
+        await connection.rollback()
+
+
+def seq_scans(plan: Dict[str, Any]) -> List[str]:
+    found = [plan['Relation Name']] if plan['Node Type'] == 'Seq Scan' else []
+    for child in plan.get('Plans', []):
+        found.extend(seq_scans(child))
+    return found
+
+
+@pytest.mark.asyncio()
+async def test_hot_queries_use_indexes(seeded: AsyncConnection) -> None:
+    # Горячие запросы CRUD не должны читать таблицы целиком: каждый выполненный запрос
+    # проверяется через EXPLAIN на данных, где последовательное чтение заметно дороже индекса
+    session = async_sessionmaker(bind=seeded)()
+    statements: List[Tuple[str, Any]] = []
+    executed: List[Tuple[str, str, Any]] = []
+
+    def before_cursor_execute(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        if statement.lstrip().upper().startswith(CHECKED_STATEMENTS):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        for name, query in HOT_QUERIES.items():
+            statements.clear()
+            await query(session)
+            executed.extend((name, statement, parameters) for statement, parameters in statements)
+    finally:
+        event.remove(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert {name for name, _, _ in executed} == set(HOT_QUERIES)
+
+    offenders = []
+    for name, statement, parameters in executed:
+        result = await seeded.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters)
+        plan = result.scalar()
+        if isinstance(plan, (str, bytes)):
+            plan = orjson.loads(plan)
+        tables = seq_scans(plan[0]['Plan'])
+        if tables:
+            offenders.append(f'{name}: Seq Scan on {", ".join(tables)}\n{statement}')
+
+    assert not offenders, '\n\n'.join(offenders)
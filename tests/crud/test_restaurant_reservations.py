@@ -0,0 +1,57 @@
+from typing import AsyncGenerator
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from webapp.crud.reservation import get_reservations
+from webapp.db.postgres import engine
+from webapp.utils.pagination import Page
+
+# id бронирований не совпадают с id ресторанов: бронирование 1 принадлежит второму ресторану
+SEED = [
+    '''
+    INSERT INTO sirius.restaurant (id, name, address, description)
+    VALUES (1, 'Первый', 'ул. Первая, 1', '-'), (2, 'Второй', 'ул. Вторая, 2', '-')
+    ''',
+    "INSERT INTO sirius.user (id, username, hashed_password, phone, role) VALUES (1, 'first', '-', '+7001', 'USER')",
+    '''
+    INSERT INTO sirius.reservation (id, user_id, restaurant_id, date_reserv, guest_count, status, comment)
+    SELECT i, 1, CASE WHEN i % 3 = 1 THEN 2 ELSE 1 END, '2030-01-01 19:00+00'::timestamptz + i * interval '1 day',
+           2, false, '-'
+    FROM generate_series(1, 9) AS i
+    ''',
+]
+
+
+@pytest.fixture()
+async def session(app: FastAPI) -> AsyncGenerator[AsyncSession, None]:
+    async with engine.begin() as connection:
+        for statement in SEED:
+            await connection.execute(text(statement))
+
+        yield async_sessionmaker(bind=connection, expire_on_commit=False)()
+
+        await connection.rollback()
+
+
+@pytest.mark.asyncio()
+async def test_restaurant_reservations(session: AsyncSession) -> None:
+    reservations = await get_reservations(session=session, restaurant_id=1)
+
+    assert reservations is not None
+    assert [reservation.id for reservation in reservations] == [2, 3, 5, 6, 8, 9]
+    assert {reservation.restaurant_id for reservation in reservations} == {1}
+
+
+@pytest.mark.asyncio()
+async def test_restaurant_reservations_pages(session: AsyncSession) -> None:
+    first = await get_reservations(session=session, restaurant_id=1, page=Page(limit=4))
+    second = await get_reservations(session=session, restaurant_id=1, page=Page(limit=4, after=6))
+    last = await get_reservations(session=session, restaurant_id=1, page=Page(limit=4, after=9))
+
+    assert first is not None and second is not None
+    assert [reservation.id for reservation in first] == [2, 3, 5, 6]
+    assert [reservation.id for reservation in second] == [8, 9]
+    assert last is None
@@ -0,0 +1,159 @@
+from typing import Any, AsyncGenerator, Generator, List
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from webapp.crud.dish import delete_dish, update_dish
+from webapp.crud.reservation import delete_reservation, update_reservation
+from webapp.crud.restaurant import delete_restaurant, update_restaurant
+from webapp.crud.user import delete_user, update_user
+from webapp.db.postgres import engine
+from webapp.models.sirius.dish import Dish, DishCategory
+from webapp.models.sirius.reservation import Reservation
+from webapp.models.sirius.user_file import UserFile
+from webapp.schema.login.user import UserUpdate
+from webapp.schema.reservation.reservation import ReservationUpdate
+from webapp.schema.restaurant.dish import DishUpdate
+from webapp.schema.restaurant.restaurant import RestaurantUpdate
+
+SEED = [
+    '''
+    INSERT INTO sirius.restaurant (id, name, address, description)
+    VALUES (1, 'Первый', 'ул. Первая, 1', '-'), (2, 'Второй', 'ул. Вторая, 2', '-')
+    ''',
+    '''
+    INSERT INTO sirius.user (id, username, hashed_password, phone, role)
+    VALUES (1, 'first', '-', '+7001', 'USER'), (2, 'second', '-', '+7002', 'USER')
+    ''',
+    '''
+    INSERT INTO sirius.dish (id, restaurant_id, category, dish_name, description, price)
+    VALUES (1, 1, 'SOUP', 'Борщ', '-', 100), (2, 1, 'DESSERT', 'Торт', '-', 200),
+           (3, 2, 'SOUP', 'Уха', '-', 300)
+    ''',
+    '''
+    INSERT INTO sirius.reservation (id, user_id, restaurant_id, date_reserv, guest_count, status, comment)
+    VALUES (1, 1, 1, '2030-01-01 19:00+00', 2, false, '-'), (2, 2, 1, '2030-01-02 19:00+00', 4, true, 'Окно'),
+           (3, 1, 2, '2030-01-03 19:00+00', 6, false, '-')
+    ''',
+    "INSERT INTO sirius.file (id, url, task_id) VALUES (1, 'file', 'task')",
+    'INSERT INTO sirius.user_file (id, user_id, file_id) VALUES (1, 2, 1)',
+]
+
+
+@pytest.fixture()
+async def session(app: FastAPI) -> AsyncGenerator[AsyncSession, None]:
+    async with engine.begin() as connection:
+        for statement in SEED:
+            await connection.execute(text(statement))
+
+        yield async_sessionmaker(bind=connection, expire_on_commit=False)()
+
+        await connection.rollback()
+
+
+@pytest.fixture()
+def statements() -> Generator[List[str], None, None]:
+    executed: List[str] = []
+
+    def before_cursor_execute(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        executed.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+    yield executed
+    event.remove(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.mark.asyncio()
+async def test_update_returns_old_and_new_rows_in_one_query(session: AsyncSession, statements: List[str]) -> None:
+    updated_dish = await update_dish(
+        session=session, dish_id=1, dish_data=DishUpdate(category=DishCategory.SALAD, price=150)
+    )
+    assert len(statements) == 1
+    assert updated_dish is not None
+    old_dish, dish = updated_dish
+    assert (old_dish.category, old_dish.price) == (DishCategory.SOUP, 100)
+    assert (dish.id, dish.dish_name, dish.category, dish.price) == (1, 'Борщ', DishCategory.SALAD, 150)
+
+    statements.clear()
+    updated_reservation = await update_reservation(
+        session=session, reservation_id=1, reservation_data=ReservationUpdate(restaurant_id=2)
+    )
+    assert len(statements) == 1
+    assert updated_reservation is not None
+    old_reservation, reservation = updated_reservation
+    assert (old_reservation.restaurant_id, reservation.restaurant_id, reservation.guest_count) == (1, 2, 2)
+
+    statements.clear()
+    restaurant = await update_restaurant(session=session, restaurant_id=1, restaurant_data=RestaurantUpdate(name='Н'))
+    assert len(statements) == 1
+    assert restaurant is not None
+    assert (restaurant.name, restaurant.address) == ('Н', 'ул. Первая, 1')
+
+    statements.clear()
+    user = await update_user(session=session, user_id=1, user_data=UserUpdate(phone='+7999', username=''))
+    assert len(statements) == 1
+    assert user is not None
+    assert (user.username, user.phone) == ('first', '+7999')
+
+    statements.clear()
+    assert await update_dish(session=session, dish_id=404, dish_data=DishUpdate(price=1)) is None
+    assert (
+        await update_restaurant(session=session, restaurant_id=404, restaurant_data=RestaurantUpdate(name='Н')) is None
+    )
+    assert len(statements) == 2
+
+
+@pytest.mark.asyncio()
+async def test_delete_returns_deleted_row_in_one_query(session: AsyncSession, statements: List[str]) -> None:
+    dish = await delete_dish(session=session, dish_id=2)
+    assert len(statements) == 1
+    assert dish is not None
+    assert (dish.id, dish.category) == (2, DishCategory.DESSERT)
+
+    statements.clear()
+    reservation = await delete_reservation(session=session, reservation_id=3)
+    assert len(statements) == 1
+    assert reservation is not None
+    assert (reservation.id, reservation.guest_count) == (3, 6)
+
+    statements.clear()
+    assert await delete_dish(session=session, dish_id=2) is None
+    assert await delete_reservation(session=session, reservation_id=3) is None
+    assert len(statements) == 2
+
+
+@pytest.mark.asyncio()
+async def test_cascading_delete_in_one_query(session: AsyncSession, statements: List[str]) -> None:
+    restaurant = await delete_restaurant(session=session, restaurant_id=1)
+    assert len(statements) == 1
+    assert restaurant is not None
+    assert restaurant.name == 'Первый'
+    assert sorted((dish.id, dish.category) for dish in restaurant.menu) == [
+        (1, DishCategory.SOUP),
+        (2, DishCategory.DESSERT),
+    ]
+    assert sorted((item.id, item.comment, item.status) for item in restaurant.reservations) == [
+        (1, '-', False),
+        (2, 'Окно', True),
+    ]
+
+    statements.clear()
+    user = await delete_user(session=session, user_id=2)
+    assert len(statements) == 1
+    assert user is not None
+    assert user.username == 'second'
+    # Бронирование 2 уже удалено вместе с рестораном
+    assert user.reservations == []
+
+    user = await delete_user(session=session, user_id=1)
+    assert user is not None
+    assert [reservation.id for reservation in user.reservations] == [3]
+
+    assert await session.scalar(select(func.count()).select_from(Dish).where(Dish.restaurant_id == 1)) == 0
+    assert await session.scalar(select(func.count()).select_from(Reservation)) == 0
+    assert await session.scalar(select(func.count()).select_from(UserFile)) == 0
+    assert await delete_restaurant(session=session, restaurant_id=1) is None
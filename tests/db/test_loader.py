@@ -0,0 +1,183 @@
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncGenerator, List
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from webapp.db import loader
+from webapp.db.partitions import ensure_partitions
+from webapp.db.postgres import engine
+
+FIXTURES_PATH = Path(__file__).parent.parent.parent / 'fixture' / 'sirius'
+
+TABLES = ['sirius.reservation', 'sirius.dish', 'sirius.user', 'sirius.restaurant']
+RESERVATIONS = 2500
+
+# Индексы секционированной таблицы: действителен ли и на скольких секциях есть
+PARTITION_INDEXES_QUERY = '''
+SELECT parent.indexrelid::regclass::text, parent.indisvalid, count(child.inhrelid)
+FROM pg_index parent LEFT JOIN pg_inherits child ON child.inhparent = parent.indexrelid
+WHERE parent.indrelid = 'sirius.reservation'::regclass
+GROUP BY 1, 2
+'''
+
+
+@pytest.fixture()
+async def _clean_tables(app: FastAPI) -> AsyncGenerator[None, None]:
+    # Загрузчик коммитит данные и двигает последовательности: после теста все возвращается как было
+    async with engine.connect() as connection:
+        saved = []
+        for table in TABLES:
+            sequence = await connection.scalar(text(f"SELECT pg_get_serial_sequence('{table}', 'id')"))
+            saved.append(
+                (sequence, *(await connection.execute(text(f'SELECT last_value, is_called FROM {sequence}'))).one())
+            )
+
+    yield
+
+    async with engine.begin() as connection:
+        for table in TABLES:
+            await connection.execute(text(f'DELETE FROM {table}'))
+        for sequence, last_value, is_called in saved:
+            await connection.execute(
+                text('SELECT setval(:sequence, :value, :is_called)'),
+                {'sequence': sequence, 'value': last_value, 'is_called': is_called},
+            )
+
+
+@pytest.fixture()
+def fixtures(tmp_path: Path) -> List[Path]:
+    restaurants = tmp_path / 'sirius.restaurant.csv'
+    restaurants.write_text(
+        'id,name,address,description\n'
+        '1,Ресторан А,"ул. Главная, 123",-\n'
+        '2,Ресторан Б,"пр. Дубовый, 456",-\n'
+        '3,Ресторан В,"ул. Тихая, 7",\n',
+        encoding='utf-8',
+    )
+    users = tmp_path / 'sirius.user.json'
+    users.write_text(
+        json.dumps(
+            [
+                {'id': 1, 'username': 'user', 'hashed_password': '-', 'phone': '+7001'},
+                {'id': 2, 'username': 'admin', 'hashed_password': '-', 'phone': '+7002', 'role': 'ADMIN'},
+                {'id': 3, 'username': 'staff', 'hashed_password': '-', 'phone': '+7003', 'role': 'Сотрудник'},
+            ],
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding='utf-8',
+    )
+    start = datetime(2030, 1, 1, 12)
+    reservations = tmp_path / 'sirius.reservation.jsonl'
+    reservations.write_bytes(
+        b'\n'.join(
+            orjson.dumps(
+                {
+                    'user_id': 1 + number % 3,
+                    'restaurant_id': 1 + number % 2,
+                    'date_reserv': (start + timedelta(minutes=number)).isoformat(),
+                    'guest_count': 2,
+                    'comment': '-',
+                }
+            )
+            for number in range(RESERVATIONS)
+        )
+    )
+    return [reservations, FIXTURES_PATH / 'sirius.dish.json', users, restaurants]
+
+
+def test_load_order_follows_foreign_keys(fixtures: List[Path]) -> None:
+    levels = loader.load_order([loader.table_for(path) for path in fixtures])
+
+    assert [sorted(table.name for table in level) for level in levels] == [
+        ['restaurant', 'user'],
+        ['dish', 'reservation'],
+    ]
+
+
+def test_read_json_streams_objects(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # Объекты длиннее куска чтения собираются из нескольких кусков
+    monkeypatch.setattr(loader, 'JSON_CHUNK_SIZE', 7)
+    path = tmp_path / 'sirius.restaurant.json'
+    items = [{'name': f'Ресторан {number}', 'address': '[,]', 'description': '{"}'} for number in range(20)]
+    path.write_text(json.dumps(items, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    assert list(loader.read_json(path)) == items
+
+    path.write_text(json.dumps(items)[:-40], encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(loader.read_json(path))
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_clean_tables')
+async def test_load_files(fixtures: List[Path]) -> None:
+    reports = await loader.load_files(engine, fixtures, batch_size=1000, jobs=2)
+
+    assert {report.table: report.rows for report in reports} == {
+        'sirius.restaurant': 3,
+        'sirius.user': 3,
+        'sirius.dish': 6,
+        'sirius.reservation': RESERVATIONS,
+    }
+    async with engine.connect() as connection:
+        roles = (await connection.execute(text('SELECT id, role FROM sirius.user ORDER BY id'))).all()
+        assert [tuple(row) for row in roles] == [(1, 'USER'), (2, 'ADMIN'), (3, 'STAFF')]
+        assert await connection.scalar(text('SELECT description FROM sirius.restaurant WHERE id = 3')) == ''
+        # status не задан в файле и получает значение по умолчанию модели, id - из последовательности
+        reservations = (
+            await connection.execute(
+                text('SELECT count(DISTINCT id), bool_or(status), min(date_reserv) FROM sirius.reservation')
+            )
+        ).one()
+        assert reservations == (RESERVATIONS, False, datetime(2030, 1, 1, 12, tzinfo=timezone.utc))
+        # Последовательности сдвинуты за загруженные явные id
+        next_id = await connection.scalar(text("SELECT nextval(pg_get_serial_sequence('sirius.restaurant', 'id'))"))
+        assert next_id == 4
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_clean_tables')
+async def test_load_keeps_partition_indexes(fixtures: List[Path]) -> None:
+    async with engine.begin() as connection:
+        await ensure_partitions(connection, today=datetime(2030, 1, 1).date(), months_ahead=0)
+    try:
+        await loader.load_files(engine, fixtures, batch_size=1000, jobs=2)
+
+        async with engine.connect() as connection:
+            partitions = await connection.scalar(
+                text("SELECT count(*) FROM pg_partition_tree('sirius.reservation') WHERE isleaf")
+            )
+            indexes = (await connection.execute(text(PARTITION_INDEXES_QUERY))).all()
+    finally:
+        async with engine.begin() as connection:
+            await connection.execute(text('DROP TABLE sirius.reservation_2030_01'))
+
+    assert partitions == 2
+    assert {name for name, _, _ in indexes} >= {
+        'sirius.ix_sirius_reservation_id',
+        'sirius.ix_reservation_user_id_id',
+        'sirius.ix_reservation_restaurant_id_date_reserv',
+    }
+    assert [(name, valid, count) for name, valid, count in indexes if not valid or count != partitions] == []
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_clean_tables')
+async def test_load_rolls_back_failed_file(tmp_path: Path) -> None:
+    path = tmp_path / 'sirius.restaurant.jsonl'
+    path.write_text(
+        '{"name": "А", "address": "-", "description": "-"}\n{"name": "Б", "address": \n',
+        encoding='utf-8',
+    )
+
+    with pytest.raises(ValueError):
+        await loader.load_files(engine, [path], batch_size=1)
+
+    async with engine.connect() as connection:
+        assert await connection.scalar(text('SELECT count(*) FROM sirius.restaurant')) == 0
@@ -0,0 +1,170 @@
+from datetime import date
+from typing import Any, AsyncGenerator
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from tests.mocking.minio import TestMinio
+
+from conf.config import settings
+from webapp.crud.reservation import get_reservations_for_user
+from webapp.crud.restaurant import delete_restaurant
+from webapp.db.archive import archive_month, ensure_bucket
+from webapp.db.partitions import add_months, ensure_partitions, partition_months
+from webapp.db.postgres import engine
+from webapp.models.sirius.reservation_archive import ReservationArchive
+from webapp.utils.pagination import Page
+
+SEED = [
+    '''
+    INSERT INTO sirius.restaurant (id, name, address, description)
+    VALUES (901, 'Архивный', 'ул. Старая, 1', '-'), (902, 'Закрытый', 'ул. Старая, 2', '-')
+    ''',
+    '''
+    INSERT INTO sirius.user (id, username, hashed_password, phone, role)
+    VALUES (901, 'archived_first', '-', '+7901', 'USER'), (902, 'archived_second', '-', '+7902', 'USER')
+    ''',
+    '''
+    INSERT INTO sirius.reservation (id, user_id, restaurant_id, date_reserv, guest_count, status, comment)
+    VALUES (901, 901, 901, '2020-01-10 19:00+00', 2, true, '-'), (902, 901, 901, '2020-01-31 23:30+00', 4, true, '-'),
+           (903, 902, 901, '2020-01-15 12:00+00', 3, false, '-'), (904, 901, 901, '2030-05-01 18:00+00', 2, false, '-'),
+           (905, 901, 902, '2020-01-20 20:00+00', 2, true, '-')
+    ''',
+]
+
+CLEANUP = [
+    'DELETE FROM sirius.reservation_archive WHERE user_id IN (901, 902)',
+    'DELETE FROM sirius.reservation WHERE id IN (901, 902, 903, 904, 905)',
+    'DELETE FROM sirius.user WHERE id IN (901, 902)',
+    'DELETE FROM sirius.restaurant WHERE id IN (901, 902)',
+    'DROP TABLE IF EXISTS sirius.reservation_2020_01, sirius.reservation_2030_05',
+]
+
+LOCATION = (
+    'SELECT id, tableoid::regclass::text FROM sirius.reservation WHERE id IN (901, 902, 903, 904, 905) ORDER BY id'
+)
+
+
+@pytest.fixture()
+async def _archive_rows(app: FastAPI) -> AsyncGenerator[None, None]:
+    # Архивация работает в нескольких транзакциях, поэтому строки коммитятся и удаляются после теста
+    async with engine.begin() as connection:
+        for statement in SEED:
+            await connection.execute(text(statement))
+
+    yield
+
+    async with engine.begin() as connection:
+        for statement in CLEANUP:
+            await connection.execute(text(statement))
+
+
+def test_add_months() -> None:
+    assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert add_months(date(2024, 1, 1), -13) == date(2022, 12, 1)
+
+
+@pytest.mark.asyncio()
+async def test_ensure_partitions_moves_rows_from_default(app: FastAPI) -> None:
+    async with engine.begin() as connection:
+        for statement in SEED:
+            await connection.execute(text(statement))
+        assert {table for _, table in (await connection.execute(text(LOCATION))).all()} == {
+            'sirius.reservation_default'
+        }
+
+        created = await ensure_partitions(connection, today=date(2019, 12, 20), months_ahead=1)
+
+        # Текущий месяц, месяц вперед и месяцы строк из секции по умолчанию
+        assert created == [date(2019, 12, 1), date(2020, 1, 1), date(2030, 5, 1)]
+        assert (await connection.execute(text(LOCATION))).all() == [
+            (901, 'sirius.reservation_2020_01'),
+            (902, 'sirius.reservation_2020_01'),
+            (903, 'sirius.reservation_2020_01'),
+            (904, 'sirius.reservation_2030_05'),
+            (905, 'sirius.reservation_2020_01'),
+        ]
+        assert await ensure_partitions(connection, today=date(2019, 12, 20), months_ahead=1) == []
+
+        await connection.rollback()
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_archive_rows')
+async def test_archive_month_keeps_history_readable() -> None:
+    client = TestMinio()
+    bucket = settings.RESERVATION_ARCHIVE_BUCKET
+    month = date(2020, 1, 1)
+    async with engine.begin() as connection:
+        await ensure_partitions(connection, today=month, months_ahead=0)
+    await ensure_bucket(client, bucket)
+
+    report = await archive_month(engine, client, bucket, month, shards=2)
+
+    assert report.rows == 4
+    assert report.objects == len(client.objects) == 2
+    assert report.reservation_ids == {901, 902, 903, 905}
+    assert report.user_ids == {901, 902}
+    assert report.restaurant_ids == {901, 902}
+    async with engine.connect() as connection:
+        assert month not in await partition_months(connection)
+        assert await connection.scalar(text("SELECT to_regclass('sirius.reservation_2020_01')")) is None
+        catalog = await connection.scalar(
+            select(func.count()).select_from(ReservationArchive).where(ReservationArchive.user_id.in_([901, 902]))
+        )
+        # По записи на пользователя, ресторан и объект
+        assert catalog == 3
+
+    async with async_sessionmaker(bind=engine)() as session:
+        live = await get_reservations_for_user(session=session, user_id=901)
+        history = await get_reservations_for_user(session=session, user_id=901, archive=client)
+        second_page = await get_reservations_for_user(
+            session=session, user_id=901, page=Page(limit=1, after=901), archive=client
+        )
+        other = await get_reservations_for_user(session=session, user_id=902, archive=client)
+
+    assert live is not None and history is not None and second_page is not None and other is not None
+    assert [reservation.id for reservation in live] == [904]
+    assert [reservation.id for reservation in history] == [901, 902, 904, 905]
+    assert history[1].guest_count == 4
+    assert [reservation.id for reservation in second_page] == [902]
+    assert [reservation.id for reservation in other] == [903]
+
+    # Удаленный ресторан пропадает из каталога, а его бронирования - из истории
+    async with async_sessionmaker(bind=engine)() as session:
+        assert await delete_restaurant(session=session, restaurant_id=902) is not None
+        history = await get_reservations_for_user(session=session, user_id=901, archive=client)
+        catalog = await session.scalar(
+            select(func.count()).select_from(ReservationArchive).where(ReservationArchive.restaurant_id == 902)
+        )
+    assert history is not None
+    assert [reservation.id for reservation in history] == [901, 902, 904]
+    assert catalog == 0
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_archive_rows')
+async def test_archived_rows_stay_readable_until_commit() -> None:
+    # Пока архивация не закоммичена, строки месяца читаются из таблицы
+    client = TestMinio()
+    bucket = settings.RESERVATION_ARCHIVE_BUCKET
+    month = date(2020, 1, 1)
+    async with engine.begin() as connection:
+        await ensure_partitions(connection, today=month, months_ahead=0)
+    await ensure_bucket(client, bucket)
+    seen = []
+    put_object = client.put_object
+
+    async def observed_put_object(*args: Any, **kwargs: Any) -> None:
+        async with engine.connect() as connection:
+            seen.append(await connection.scalar(text('SELECT count(*) FROM sirius.reservation WHERE id IN (901, 903)')))
+        await put_object(*args, **kwargs)
+
+    client.put_object = observed_put_object  # type: ignore[method-assign]
+    await archive_month(engine, client, bucket, month, shards=2)
+
+    assert seen == [2, 2]
+    async with engine.connect() as connection:
+        assert await connection.scalar(text('SELECT count(*) FROM sirius.reservation WHERE id IN (901, 903)')) == 0
@@ -0,0 +1,62 @@
+from typing import AsyncGenerator, Dict
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import QueuePool
+
+from conf.config import settings
+from webapp.db import postgres
+from webapp.on_startup.postgres import start_postgres
+
+
+def sample(name: str, labels: Dict[str, str] | None = None) -> float:
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+
+@pytest.fixture()
+async def small_engine(monkeypatch: pytest.MonkeyPatch) -> AsyncGenerator[AsyncEngine, None]:
+    monkeypatch.setattr(settings, 'DB_POOL_SIZE', 2)
+    monkeypatch.setattr(settings, 'DB_POOL_MAX_OVERFLOW', 1)
+    monkeypatch.setattr(settings, 'DB_POOL_TIMEOUT', 0.1)
+    engine = postgres.create_engine()
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio()
+async def test_pool_reports_connections_and_timeouts(small_engine: AsyncEngine) -> None:
+    acquired = sample('sirius_db_pool_acquire_seconds_count')
+    timeouts = sample('sirius_db_pool_timeouts_total')
+
+    connections = [await small_engine.connect() for _ in range(3)]
+    for connection in connections:
+        assert await connection.scalar(text('SELECT 1')) == 1
+    assert sample('sirius_db_pool_connections', {'state': 'checked_out'}) == 3
+    assert sample('sirius_db_pool_connections', {'state': 'overflow'}) == 1
+
+    # Пул и запас исчерпаны: запрос соединения ждет DB_POOL_TIMEOUT и получает ошибку
+    with pytest.raises(exc.TimeoutError):
+        await small_engine.connect()
+    assert sample('sirius_db_pool_timeouts_total') == timeouts + 1
+    assert sample('sirius_db_pool_acquire_seconds_count') == acquired + 4
+
+    for connection in connections:
+        await connection.close()
+    assert sample('sirius_db_pool_connections', {'state': 'checked_out'}) == 0
+    # Соединение сверх DB_POOL_SIZE закрывается при возврате
+    assert sample('sirius_db_pool_connections', {'state': 'idle'}) == 2
+    assert sample('sirius_db_pool_connections', {'state': 'overflow'}) == 0
+
+
+@pytest.mark.asyncio()
+async def test_startup_prewarms_pool(monkeypatch: pytest.MonkeyPatch, small_engine: AsyncEngine) -> None:
+    monkeypatch.setattr(postgres, 'engine', small_engine)
+
+    await start_postgres()
+
+    pool = small_engine.pool
+    assert isinstance(pool, QueuePool)
+    assert pool.checkedin() == settings.DB_POOL_SIZE
+    assert pool.checkedout() == 0
@@ -0,0 +1,69 @@
+from typing import AsyncGenerator, List
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from conf.config import settings
+from webapp.db import postgres
+
+STATEMENT = text('SELECT CAST(:value AS INTEGER) + 1')
+
+
+@pytest.fixture()
+async def engine(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> AsyncGenerator[AsyncEngine, None]:
+    monkeypatch.setattr(settings, 'DB_PREPARED_STATEMENTS', request.param)
+    monkeypatch.setattr(settings, 'DB_POOL_SIZE', 1)
+    monkeypatch.setattr(settings, 'DB_POOL_MAX_OVERFLOW', 0)
+    engine = postgres.create_engine()
+    yield engine
+    await engine.dispose()
+
+
+async def prepared_names(engine: AsyncEngine) -> List[str]:
+    # Выполняет один и тот же запрос трижды в одном соединении и возвращает имена,
+    # под которыми он был подготовлен на сервере
+    names: List[str] = []
+    async with engine.connect() as connection:
+        for value in range(3):
+            assert await connection.scalar(STATEMENT, {'value': value}) == value + 1
+            names.extend(
+                await connection.scalars(
+                    text('SELECT name FROM pg_prepared_statements WHERE statement = :statement'),
+                    {'statement': 'SELECT CAST($1 AS INTEGER) + 1'},
+                )
+            )
+    return names
+
+
+@pytest.mark.parametrize('engine', ['direct'], indirect=True)
+@pytest.mark.asyncio()
+async def test_direct_mode_prepares_once_per_connection(engine: AsyncEngine) -> None:
+    names = await prepared_names(engine)
+
+    assert len(set(names)) == 1
+
+
+@pytest.fixture()
+def generated_names(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    generated: List[str] = []
+    unique_statement_name = postgres.unique_statement_name
+
+    def recorded() -> str:
+        generated.append(unique_statement_name())
+        return generated[-1]
+
+    monkeypatch.setattr(postgres, 'unique_statement_name', recorded)
+    return generated
+
+
+@pytest.mark.parametrize('engine', ['pgbouncer'], indirect=True)
+@pytest.mark.asyncio()
+async def test_pgbouncer_mode_never_reuses_statement_names(generated_names: List[str], engine: AsyncEngine) -> None:
+    names = await prepared_names(engine)
+
+    # Каждое выполнение подготавливается заново под своим именем: имя asyncpg по порядку (__asyncpg_stmt_1__)
+    # могло бы уже быть занято на серверном соединении, которое PgBouncer выдал другому клиенту.
+    # Неиспользуемые запросы закрываются, и на сервере они не накапливаются
+    assert len(set(generated_names)) == len(generated_names) >= 3
+    assert not names
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from typing import AsyncGenerator, Dict
+
+import orjson
+import pytest
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from conf.config import settings
+from webapp.db import postgres, statements
+from webapp.main import create_app
+
+
+def sample(name: str, labels: Dict[str, str]) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture()
+async def statement_engine(monkeypatch: pytest.MonkeyPatch) -> AsyncGenerator[AsyncEngine, None]:
+    monkeypatch.setattr(settings, 'APP_ENV', 'development')
+    monkeypatch.setattr(settings, 'DB_SLOW_STATEMENT_THRESHOLD', 0.05)
+    monkeypatch.setattr(settings, 'DB_EXPLAIN_SAMPLE_RATE', 1.0)
+    monkeypatch.setattr(statements, 'statement_stats', {})
+    monkeypatch.setattr(statements, 'captured_plans', statements.OrderedDict())
+    engine = postgres.create_engine()
+    yield engine
+    await engine.dispose()
+
+
+def test_fingerprint_ignores_values_and_list_sizes() -> None:
+    one = statements.fingerprint("SELECT a\n  FROM t WHERE t.id IN ($1::INTEGER) AND t.b = 'x' LIMIT 10")
+    many = statements.fingerprint(
+        "SELECT a FROM t WHERE t.id IN ($1::INTEGER, $2::INTEGER, $3::INTEGER) AND t.b = 'y' LIMIT 5"
+    )
+    assert one == many
+    assert one.sql == 'SELECT a FROM t WHERE t.id IN (...) AND t.b = ? LIMIT ?'
+    assert one.operation == 'SELECT'
+
+    rows = statements.fingerprint(
+        'INSERT INTO t (a, b) VALUES ($1::VARCHAR, $2::NUMERIC(10, 2)), ($3::VARCHAR, $4::NUMERIC(10, 2))'
+    )
+    assert rows.sql == 'INSERT INTO t (a, b) VALUES (...)'
+    # Цифры в именах (секции таблиц) - часть запроса
+    assert 'sirius.reservation_2024_01' in statements.fingerprint('SELECT 1 FROM sirius.reservation_2024_01').sql
+
+
+def test_parameter_shape_hides_values() -> None:
+    assert statements.parameter_shape((1, 'secret', [1, 2, 3], None)) == '(int, str, list[3], NoneType)'
+    assert statements.parameter_shape([(1, 'a'), (2, 'b')], executemany=True) == '2 x (int, str)'
+
+
+@pytest.mark.asyncio()
+async def test_statements_are_timed_and_slow_ones_explained(
+    statement_engine: AsyncEngine, caplog: pytest.LogCaptureFixture
+) -> None:
+    fast = statements.fingerprint('SELECT generate_series(1, $1::INTEGER)')
+    slow = statements.fingerprint('SELECT pg_sleep($1::FLOAT), $2::VARCHAR')
+    observed = sample('sirius_db_statement_seconds_count', {'fingerprint': fast.id, 'operation': 'SELECT'})
+    returned = sample('sirius_db_statement_rows_total', {'fingerprint': fast.id, 'operation': 'SELECT'})
+
+    with caplog.at_level(logging.WARNING):
+        async with statement_engine.connect() as connection:
+            for _ in range(2):
+                await connection.exec_driver_sql('SELECT generate_series(1, $1::INTEGER)', (3,))
+            await connection.exec_driver_sql('SELECT pg_sleep($1::FLOAT), $2::VARCHAR', (0.1, 'secret'))
+            await connection.rollback()
+        await asyncio.gather(*statements._explain_tasks)
+
+    assert sample('sirius_db_statement_seconds_count', {'fingerprint': fast.id, 'operation': 'SELECT'}) == observed + 2
+    assert sample('sirius_db_statement_rows_total', {'fingerprint': fast.id, 'operation': 'SELECT'}) == returned + 6
+    assert statements.statement_stats[fast.id].calls == 2
+    assert statements.statement_stats[fast.id].slow == 0
+    assert statements.statement_stats[slow.id].slow == 1
+
+    # В лог попадают типы параметров, но не значения
+    logged = [record.getMessage() for record in caplog.records if slow.id in record.getMessage()]
+    assert len(logged) == 1
+    assert '(float, str)' in logged[0]
+    assert 'secret' not in logged[0]
+
+    plan = statements.captured_plans[slow.id]
+    assert plan.parameters == '(float, str)'
+    assert plan.plan[0]['Plan']['Actual Loops'] == 1
+    assert fast.id not in statements.captured_plans
+
+
+@pytest.mark.asyncio()
+async def test_writes_are_not_explained(statement_engine: AsyncEngine) -> None:
+    async with statement_engine.connect() as connection:
+        await connection.execute(text('CREATE TEMPORARY TABLE slow_write (id integer)'))
+        await connection.execute(text('INSERT INTO slow_write SELECT i FROM generate_series(1, 3) AS i, pg_sleep(0.1)'))
+        await connection.rollback()
+    await asyncio.gather(*statements._explain_tasks)
+
+    assert any(stats.operation == 'INSERT' and stats.slow for stats in statements.statement_stats.values())
+    assert not statements.captured_plans
+
+
+@pytest.mark.asyncio()
+async def test_debug_endpoint_only_outside_production(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'APP_ENV', 'production')
+    async with AsyncClient(app=create_app(), base_url='http://test.com') as client:
+        assert (await client.get('/debug/statements')).status_code == 404
+
+    monkeypatch.setattr(settings, 'APP_ENV', 'development')
+    async with AsyncClient(app=create_app(), base_url='http://test.com') as client:
+        response = await client.get('/debug/statements')
+    assert response.status_code == 200
+    body = orjson.loads(response.content)
+    assert body['slow_threshold'] == settings.DB_SLOW_STATEMENT_THRESHOLD
+    assert {'statements', 'plans'} <= set(body)
@@ -0,0 +1,36 @@
+from typing import IO, Any, Dict, Set, Tuple
+
+
+class TestMinioObject:
+    __test__ = False
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.released = False
+
+    async def read(self) -> bytes:
+        return self.data
+
+    def release(self) -> None:
+        self.released = True
+
+
+class TestMinio:
+    __test__ = False
+
+    def __init__(self) -> None:
+        self.buckets: Set[str] = set()
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+
+    async def bucket_exists(self, bucket: str) -> bool:
+        return bucket in self.buckets
+
+    async def make_bucket(self, bucket: str) -> None:
+        self.buckets.add(bucket)
+
+    async def put_object(self, bucket: str, name: str, data: IO[bytes], length: int, **kwargs: Any) -> None:
+        assert bucket in self.buckets
+        self.objects[(bucket, name)] = data.read(length)
+
+    async def get_object(self, bucket: str, name: str, session: Any = None) -> TestMinioObject:
+        return TestMinioObject(self.objects[(bucket, name)])
@@ -0,0 +1,156 @@
+import time
+from typing import Any, Dict, List, Tuple
+
+from webapp.cache.client import BUMP_GENERATIONS_SCRIPT
+from webapp.cache.existence import CHECK_SCRIPT, MERGE_SCRIPT, UPDATE_SCRIPT
+from webapp.cache.read_through import RELEASE_LEASE_SCRIPT
+from webapp.cache.write_through import WRITE_THROUGH_SCRIPT
+
+
+class TestPipeline:
+    __test__ = False
+
+    def __init__(self, redis: 'TestRedis') -> None:
+        self.redis = redis
+        self.commands: List[Tuple[str, Tuple[Any, ...], Dict[str, Any]]] = []
+
+    async def __aenter__(self) -> 'TestPipeline':
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        self.commands.clear()
+
+    def set(self, *args: Any, **kwargs: Any) -> 'TestPipeline':
+        self.commands.append(('set', args, kwargs))
+        return self
+
+    def eval(self, *args: Any, **kwargs: Any) -> 'TestPipeline':
+        self.commands.append(('eval', args, kwargs))
+        return self
+
+    async def execute(self) -> List[Any]:
+        self.redis.pipelines_executed += 1
+        results = [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+        self.commands.clear()
+        return results
+
+
+class TestRedis:
+    __test__ = False
+
+    def __init__(self) -> None:
+        self.storage: Dict[str, Tuple[bytes, float | None]] = {}
+        self.published_messages: List[Tuple[str, bytes]] = []
+        self.pipelines_executed = 0
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode()
+
+    def _alive(self, key: str) -> bytes | None:
+        item = self.storage.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.storage[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> bytes | None:
+        return self._alive(key)
+
+    async def mget(self, *keys: str) -> List[bytes | None]:
+        return [self._alive(key) for key in keys]
+
+    async def set(
+        self, key: str, value: Any, ex: int | None = None, px: int | None = None, nx: bool = False
+    ) -> bool | None:
+        if nx and self._alive(key) is not None:
+            return None
+        expires_at = None
+        if ex is not None:
+            expires_at = time.monotonic() + ex
+        elif px is not None:
+            expires_at = time.monotonic() + px / 1000
+        self.storage[key] = (self._encode(value), expires_at)
+        return True
+
+    def pipeline(self, transaction: bool = True) -> TestPipeline:
+        return TestPipeline(self)
+
+    async def exists(self, *keys: str) -> int:
+        return sum(self._alive(key) is not None for key in keys)
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self.storage.pop(key, None) is not None for key in keys)
+
+    async def getbit(self, key: str, offset: int) -> int:
+        value = self._alive(key) or b''
+        byte = int(offset) >> 3
+        return int(byte < len(value) and bool(value[byte] & (0x80 >> (int(offset) & 7))))
+
+    async def setbit(self, key: str, offset: int, bit: int) -> int:
+        previous = await self.getbit(key, offset)
+        value = bytearray(self._alive(key) or b'')
+        byte = int(offset) >> 3
+        value.extend(bytes(max(0, byte + 1 - len(value))))
+        if int(bit):
+            value[byte] |= 0x80 >> (int(offset) & 7)
+        else:
+            value[byte] &= ~(0x80 >> (int(offset) & 7)) & 0xFF
+        self.storage[key] = (bytes(value), self.storage.get(key, (b'', None))[1])
+        return previous
+
+    async def publish(self, channel: str, message: bytes) -> int:
+        self.published_messages.append((channel, message))
+        return 0
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> Any:
+        keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        if script == RELEASE_LEASE_SCRIPT:
+            if self._alive(keys[0]) == self._encode(args[0]):
+                return await self.delete(keys[0])
+            return 0
+        if script == BUMP_GENERATIONS_SCRIPT:
+            generations = []
+            for key in keys:
+                generation = int(self._alive(key) or 0) + 1
+                self.storage[key] = (self._encode(generation), None)
+                generations.append(generation)
+            return generations
+        if script == WRITE_THROUGH_SCRIPT:
+            key, generation_keys = keys[0], keys[1:]
+            expected, value, ex, key_generations = args[0], args[1], args[2], args[3:]
+            if any(int(self._alive(k) or 0) != int(g) for k, g in zip(generation_keys, key_generations)):
+                await self.delete(key)
+                return 0
+            if expected and self._alive(key) != self._encode(expected):
+                return 0
+            await self.set(key, value, ex=int(ex))
+            return 1
+        if script == CHECK_SCRIPT:
+            if self._alive(keys[0]) is None:
+                return None
+            return [await self.getbit(keys[0], offset) for offset in args]
+        if script == UPDATE_SCRIPT:
+            arg = 0
+            for i in range(0, len(keys), 2):
+                added, removed = int(args[arg]), int(args[arg + 1])
+                ids = args[arg + 2 : arg + 2 + added + removed]
+                arg += 2 + added + removed
+                for key in keys[i : i + 2]:
+                    if self._alive(key) is not None:
+                        for j, offset in enumerate(ids):
+                            await self.setbit(key, offset, int(j < added))
+            return 1
+        if script == MERGE_SCRIPT:
+            current, merged = self._alive(keys[1]) or b'', self._encode(args[0])
+            size = max(len(current), len(merged))
+            value = bytes(a | b for a, b in zip(current.ljust(size, b'\x00'), merged.ljust(size, b'\x00')))
+            await self.delete(keys[1])
+            self.storage[keys[0]] = (value, None)
+            return 1
+        raise NotImplementedError(script)
@@ -1,73 +1,94 @@
-import orjson
-from fastapi import Depends, HTTPException
+import aiohttp
+from fastapi import Depends, HTTPException, Query, Request
 from fastapi.responses import ORJSONResponse
+from miniopy_async import Minio
+from miniopy_async.error import MinioException
 from redis.asyncio import Redis
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
+from starlette.responses import Response
 
 from webapp.api.login.router import user_router
-from webapp.cache.key_builder import get_user_by_id_cache, get_user_reservations_by_id_cache
-from webapp.crud.reservation import get_reservations_for_user
+from webapp.cache.client import after_commit, invalidate_tags
+from webapp.cache.existence import record_existence, user_deleted_ids
+from webapp.cache.families import USER, USER_RESERVATIONS
+from webapp.cache.response import CachedJSONResponse, dump_models
+from webapp.cache.tags import user_delete_tags, user_write_tags
+from webapp.cache.write_through import user_write_through
+from webapp.crud.reservation import (
+    estimate_reservations_for_user,
+    get_reservations_for_user,
+    get_reservations_for_user_json,
+)
 from webapp.crud.user import delete_user, get_user_by_id, update_user
+from webapp.db.minio import get_minio
 from webapp.db.postgres import get_session
 from webapp.db.redis import get_redis
 from webapp.schema.login.user import UserRead, UserUpdate
 from webapp.schema.reservation.reservation import ReservationRead
 from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
+from webapp.utils.pagination import Page, encode_cursor, get_page
 
 
 @user_router.get('/me', response_model=UserRead, tags=['Users'], response_class=ORJSONResponse)
 async def get_me_endpoint(
+    request: Request,
     session: AsyncSession = Depends(get_session),
     redis: Redis = Depends(get_redis),
     current_user: JwtTokenT = Depends(jwt_auth.get_current_user),
 ):
-    try:
-        cache_key_user = get_user_by_id_cache(user_id=current_user['user_id'])
-        cached_user = await redis.get(cache_key_user)
-        if cached_user:
-            if cached_user == b'{}':
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Пользователь не найден')
-            return orjson.loads(cached_user)
-        else:
-            user = await get_user_by_id(session=session, user_id=current_user['user_id'])
-            if user is None:
-                await redis.set(cache_key_user, b'{}', ex=3600)
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Пользователь не найден')
-            await redis.set(cache_key_user, orjson.dumps(user.model_dump()), ex=3600)
-            return user
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    return await USER.respond(
+        redis,
+        session,
+        lambda session: get_user_by_id(session=session, user_id=current_user['user_id']),
+        request=request,
+        user_id=current_user['user_id'],
+    )
 
 
 @user_router.get(
     '/me/reservations', response_model=list[ReservationRead], tags=['Users'], response_class=ORJSONResponse
 )
 async def get_user_reservations(
+    request: Request,
+    page: Page = Depends(get_page),
+    history: bool = Query(False, description='Вместе с архивом бронирований прошлых месяцев (без кэша)'),
     session: AsyncSession = Depends(get_session),
     redis: Redis = Depends(get_redis),
+    minio: Minio = Depends(get_minio),
     current_user: JwtTokenT = Depends(jwt_auth.get_current_user),
 ):
+    if history:
+        return await get_user_reservation_history(request, page, session, minio, current_user['user_id'])
+    return await USER_RESERVATIONS.respond(
+        redis,
+        session,
+        lambda session: get_reservations_for_user_json(session=session, user_id=current_user['user_id'], page=page),
+        request=request,
+        page=page,
+        estimate=lambda session: estimate_reservations_for_user(session=session, user_id=current_user['user_id']),
+        user_id=current_user['user_id'],
+    )
+
+
+async def get_user_reservation_history(
+    request: Request, page: Page, session: AsyncSession, minio: Minio, user_id: int
+) -> Response:
+    # История читается из архива по запросу и не кэшируется; страницы - как у списка из таблицы
     try:
-        cache_key_user_reservations = get_user_reservations_by_id_cache(user_id=current_user['user_id'])
-        cached_user_reservations = await redis.get(cache_key_user_reservations)
-        if cached_user_reservations:
-            if cached_user_reservations == b'[]':
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Бронирований не найдено')
-            return orjson.loads(cached_user_reservations)
-        else:
-            user_reservations = await get_reservations_for_user(session=session, user_id=current_user['user_id'])
-            if user_reservations is None:
-                await redis.set(cache_key_user_reservations, b'[]', ex=3600)
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Бронирований не найдено')
-            await redis.set(
-                cache_key_user_reservations,
-                orjson.dumps([user_reservation.model_dump() for user_reservation in user_reservations]),
-                ex=3600,
-            )
-            return user_reservations
-    except Exception as e:
+        reservations = await get_reservations_for_user(session=session, user_id=user_id, page=page, archive=minio)
+    except (SQLAlchemyError, MinioException, aiohttp.ClientError) as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    if reservations is None:
+        if page.after == 0:
+            return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content=USER_RESERVATIONS.not_found)
+        reservations = []
+    headers = {}
+    if len(reservations) == page.limit:
+        url = request.url.include_query_params(limit=page.limit, cursor=encode_cursor(reservations[-1].id))
+        headers['Link'] = f'<{url}>; rel="next"'
+    return CachedJSONResponse(dump_models(reservations), headers=headers)
 
 
 @user_router.put('/me/update', response_model=UserRead, tags=['Users'], response_class=ORJSONResponse)
@@ -81,8 +102,9 @@ async def update_user_endpoint(
         user = await update_user(session=session, user_id=current_user['user_id'], user_data=user_data)
         if user is None:
             return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Пользователь не найден')
-        cache_key_user = get_user_by_id_cache(user_id=current_user['user_id'])
-        await redis.delete(cache_key_user)
+        with after_commit('user update'):
+            generations = await invalidate_tags(redis, *user_write_tags(user))
+            await user_write_through(redis, generations, user)
         return user
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
@@ -95,11 +117,11 @@ async def delete_user_endpoint(
     current_user: JwtTokenT = Depends(jwt_auth.get_current_user),
 ):
     try:
-        success = await delete_user(session=session, user_id=current_user['user_id'])
-        if success is False:
+        deleted_user = await delete_user(session=session, user_id=current_user['user_id'])
+        if deleted_user is None:
             return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Пользователь не найден')
-        cache_key_user = get_user_by_id_cache(user_id=current_user['user_id'])
-        cache_key_user_reservations = get_user_reservations_by_id_cache(user_id=current_user['user_id'])
-        await redis.delete(cache_key_user, cache_key_user_reservations)
+        with after_commit('user delete'):
+            await invalidate_tags(redis, *user_delete_tags(deleted_user))
+            await record_existence(redis, removed=user_deleted_ids(deleted_user))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
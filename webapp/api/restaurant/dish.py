@@ -1,20 +1,36 @@
 from typing import List
 
-import orjson
-from fastapi import Depends, HTTPException, Query
+from fastapi import Depends, HTTPException, Query, Request
 from fastapi.responses import ORJSONResponse
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
+from conf.config import settings
 from webapp.api.restaurant.router import dish_router
-from webapp.cache.key_builder import get_dish_by_id_cache, get_dishes_cache, get_restaurant_menu_by_id_cache
-from webapp.crud.dish import create_dish, delete_dish, get_dish, get_dishes, update_dish
+from webapp.cache.client import after_commit, invalidate_tags
+from webapp.cache.existence import DISH_IDS, record_existence, reserve_ids
+from webapp.cache.families import DISH, DISHES
+from webapp.cache.tags import dish_write_tags
+from webapp.cache.write_through import dish_write_through
+from webapp.crud.dish import (
+    create_dish,
+    create_dishes,
+    delete_dish,
+    delete_dishes,
+    estimate_dishes,
+    get_dish,
+    get_dishes_by_ids,
+    get_dishes_json,
+    update_dish,
+    update_dishes,
+)
 from webapp.db.postgres import get_session
 from webapp.db.redis import get_redis
 from webapp.models.sirius.dish import DishCategory
-from webapp.schema.restaurant.dish import DishCreate, DishRead, DishUpdate
+from webapp.schema.restaurant.dish import DishBulkUpdate, DishCreate, DishRead, DishUpdate
 from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
+from webapp.utils.pagination import Page, get_page
 
 
 @dish_router.post(
@@ -28,12 +44,11 @@ async def create_dish_endpoint(
 ):
     if current_user['role'] in ['Администратор', 'Сотрудник']:
         try:
-            dish = await create_dish(session=session, dish_data=dish_data)
+            dish = await create_dish(session=session, dish_data=dish_data, before_commit=reserve_ids(redis, DISH_IDS))
 
-            cache_key_dishes = get_dishes_cache()
-            cache_key_with_category = get_dishes_cache(category=dish_data.category)
-            cache_key_restaurant_menu = get_restaurant_menu_by_id_cache(restaurant_id=dish.restaurant_id)
-            await redis.delete(cache_key_dishes, cache_key_with_category, cache_key_restaurant_menu)
+            with after_commit('dish create'):
+                await invalidate_tags(redis, *dish_write_tags(dish))
+                await record_existence(redis, added=[(DISH_IDS, dish.id)])
 
             return dish
         except Exception as e:
@@ -42,50 +57,144 @@ async def create_dish_endpoint(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Нет доступа для выполнения этой операции')
 
 
+# Пакетные изменения объявлены до маршрутов /{dish_id}: иначе DELETE /dishes/bulk разбирался бы как id блюда.
+# Пакет проверяется целиком до записи, пишется одним запросом в одной транзакции, а кэш инвалидируется
+# одним вызовом invalidate_tags на все затронутые теги
+
+
+def bulk_error(size: int, ids: List[int] | None = None) -> ORJSONResponse | None:
+    if not size:
+        return ORJSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content='Пустой пакет блюд')
+    if size > settings.DISH_BULK_MAX_ITEMS:
+        return ORJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=f'В одном пакете не более {settings.DISH_BULK_MAX_ITEMS} блюд',
+        )
+    if ids is not None and len(set(ids)) < len(ids):
+        return ORJSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content='id блюд в пакете повторяются')
+    return None
+
+
+@dish_router.post(
+    '/bulk',
+    response_model=List[DishRead],
+    status_code=status.HTTP_201_CREATED,
+    tags=['Dishes'],
+    response_class=ORJSONResponse,
+)
+async def create_dishes_endpoint(
+    dishes_data: List[DishCreate],
+    session: AsyncSession = Depends(get_session),
+    current_user: JwtTokenT = Depends(jwt_auth.get_current_user),
+    redis: Redis = Depends(get_redis),
+) -> List[DishRead] | ORJSONResponse:
+    if current_user['role'] in ['Администратор', 'Сотрудник']:
+        error = bulk_error(len(dishes_data))
+        if error is not None:
+            return error
+        try:
+            dishes = await create_dishes(
+                session=session, dishes_data=dishes_data, before_commit=reserve_ids(redis, DISH_IDS)
+            )
+
+            with after_commit('dishes create'):
+                await invalidate_tags(redis, *dish_write_tags(*dishes))
+                await record_existence(redis, added=[(DISH_IDS, dish.id) for dish in dishes])
+
+            return dishes
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    else:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Нет доступа для выполнения этой операции')
+
+
+@dish_router.patch('/bulk', response_model=List[DishRead], tags=['Dishes'], response_class=ORJSONResponse)
+async def update_dishes_endpoint(
+    dishes_data: List[DishBulkUpdate],
+    session: AsyncSession = Depends(get_session),
+    redis: Redis = Depends(get_redis),
+    current_user: JwtTokenT = Depends(jwt_auth.get_current_user),
+) -> List[DishRead] | ORJSONResponse:
+    if current_user['role'] in ['Администратор', 'Сотрудник']:
+        error = bulk_error(len(dishes_data), [dish.id for dish in dishes_data])
+        if error is not None:
+            return error
+        try:
+            updated = await update_dishes(session=session, dishes_data=dishes_data)
+            if updated is None:
+                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Обновляемые блюда не найдены')
+            old_dishes, dishes = updated
+            with after_commit('dishes update'):
+                await invalidate_tags(redis, *dish_write_tags(*old_dishes, *dishes))
+            return dishes
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    else:
+        return ORJSONResponse(status_code=status.HTTP_403_FORBIDDEN, content='Нет доступа для выполнения этой операции')
+
+
+@dish_router.delete(
+    '/bulk',
+    response_model=None,
+    status_code=status.HTTP_204_NO_CONTENT,
+    tags=['Dishes'],
+    response_class=ORJSONResponse,
+)
+async def delete_dishes_endpoint(
+    ids: List[int] = Query(..., description='id удаляемых блюд'),
+    session: AsyncSession = Depends(get_session),
+    redis: Redis = Depends(get_redis),
+    current_user: JwtTokenT = Depends(jwt_auth.get_current_user),
+) -> ORJSONResponse | None:
+    if current_user['role'] in ['Администратор', 'Сотрудник']:
+        error = bulk_error(len(ids), ids)
+        if error is not None:
+            return error
+        try:
+            dishes = await delete_dishes(session=session, dish_ids=ids)
+            if dishes is None:
+                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Удаляемые блюда не найдены')
+            with after_commit('dishes delete'):
+                await invalidate_tags(redis, *dish_write_tags(*dishes))
+                await record_existence(redis, removed=[(DISH_IDS, dish.id) for dish in dishes])
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+        return None
+    else:
+        return ORJSONResponse(status_code=status.HTTP_403_FORBIDDEN, content='Нет доступа для выполнения этой операции')
+
+
 @dish_router.get('/{dish_id}', response_model=DishRead, tags=['Dishes'], response_class=ORJSONResponse)
 async def get_dish_endpoint(
-    dish_id: int, session: AsyncSession = Depends(get_session), redis: Redis = Depends(get_redis)
+    request: Request, dish_id: int, session: AsyncSession = Depends(get_session), redis: Redis = Depends(get_redis)
 ):
-    try:
-        cache_key_dish_by_id = get_dish_by_id_cache(dish_id=dish_id)
-        cached_dish = await redis.get(cache_key_dish_by_id)
-        if cached_dish:
-            if cached_dish == b'{}':
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Блюдо не найдено')
-            return orjson.loads(cached_dish)
-        else:
-            dish = await get_dish(session=session, dish_id=dish_id)
-            if dish is None:
-                await redis.set(cache_key_dish_by_id, b'{}', ex=3600)
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Блюдо не найдено')
-            await redis.set(cache_key_dish_by_id, orjson.dumps(dish.model_dump()), ex=3600)
-            return dish
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    return await DISH.respond(
+        redis, session, lambda session: get_dish(session=session, dish_id=dish_id), request=request, dish_id=dish_id
+    )
 
 
 @dish_router.get('/', response_model=List[DishRead], tags=['Dishes'], response_class=ORJSONResponse)
 async def get_dishes_endpoint(
+    request: Request,
     session: AsyncSession = Depends(get_session),
     redis: Redis = Depends(get_redis),
     category: DishCategory = Query(None, description='Фильтр по категории блюд'),
+    ids: List[int] = Query(None, description='Пакетное чтение блюд по id, порядок сохраняется'),
+    page: Page = Depends(get_page),
 ):
-    try:
-        cache_key_dishes = get_dishes_cache(category=category)
-        cached_dishes = await redis.get(cache_key_dishes)
-        if cached_dishes:
-            if cached_dishes == b'[]':
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Блюда не найдены')
-            return orjson.loads(cached_dishes)
-        else:
-            dishes = await get_dishes(session=session, category=category)
-            if dishes is None:
-                await redis.set(cache_key_dishes, b'[]', ex=3600)
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Блюда не найдены')
-            await redis.set(cache_key_dishes, orjson.dumps([dish.model_dump() for dish in dishes]), ex=3600)
-            return dishes
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    if ids is not None:
+        return await DISH.respond_many(
+            redis, session, ids, lambda session, dish_ids: get_dishes_by_ids(session=session, dish_ids=dish_ids)
+        )
+    return await DISHES.respond(
+        redis,
+        session,
+        lambda session: get_dishes_json(session=session, category=category, page=page),
+        request=request,
+        page=page,
+        estimate=lambda session: estimate_dishes(session=session, category=category),
+        category=category,
+    )
 
 
 @dish_router.put('/{dish_id}', response_model=DishRead, tags=['Dishes'], response_class=ORJSONResponse)
@@ -98,12 +207,13 @@ async def update_dish_endpoint(
 ):
     if current_user['role'] in ['Администратор', 'Сотрудник']:
         try:
-            dish = await update_dish(session=session, dish_id=dish_id, dish_data=dish_data)
-            if dish is None:
+            updated = await update_dish(session=session, dish_id=dish_id, dish_data=dish_data)
+            if updated is None:
                 return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Обновляемое блюдо не найдено')
-            cache_key_dish_by_id = get_dish_by_id_cache(dish_id=dish_id)
-            cache_key_restaurant_menu = get_restaurant_menu_by_id_cache(restaurant_id=dish.restaurant_id)
-            await redis.delete(cache_key_dish_by_id, cache_key_restaurant_menu)
+            old_dish, dish = updated
+            with after_commit('dish update'):
+                generations = await invalidate_tags(redis, *dish_write_tags(old_dish, dish))
+                await dish_write_through(redis, generations, old_dish, dish)
             return dish
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
@@ -125,17 +235,12 @@ async def delete_dish_endpoint(
 ):
     if current_user['role'] in ['Администратор', 'Сотрудник']:
         try:
-            dish = await get_dish(session=session, dish_id=dish_id)
-            deleted_dish = await delete_dish(session=session, dish_id=dish_id)
-            if deleted_dish is False:
+            dish = await delete_dish(session=session, dish_id=dish_id)
+            if dish is None:
                 return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Удаляемое блюдо не найдено')
-            cache_key_dishes = get_dishes_cache()
-            cache_key_dish_by_id = get_dish_by_id_cache(dish_id=dish_id)
-            cache_key_with_category = get_dishes_cache(category=dish.category)
-            cache_key_restaurant_menu = get_restaurant_menu_by_id_cache(restaurant_id=dish.restaurant_id)
-            await redis.delete(
-                cache_key_dishes, cache_key_dish_by_id, cache_key_with_category, cache_key_restaurant_menu
-            )
+            with after_commit('dish delete'):
+                await invalidate_tags(redis, *dish_write_tags(dish))
+                await record_existence(redis, removed=[(DISH_IDS, dish.id)])
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
     else:
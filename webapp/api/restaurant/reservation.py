@@ -1,27 +1,30 @@
-import orjson
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Query, Request
 from fastapi.responses import ORJSONResponse
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
+from starlette.responses import Response
 
 from webapp.api.restaurant.router import reservation_router
-from webapp.cache.key_builder import (
-    get_reservation_by_id_cache,
-    get_reservations_cache,
-    get_user_reservations_by_id_cache,
-)
+from webapp.cache.client import after_commit, invalidate_tags
+from webapp.cache.existence import RESERVATION_IDS, record_existence, reserve_ids
+from webapp.cache.families import RESERVATION, RESERVATIONS
+from webapp.cache.tags import reservation_write_tags
+from webapp.cache.write_through import reservation_write_through
 from webapp.crud.reservation import (
     create_reservation,
     delete_reservation,
+    estimate_reservations,
     get_reservation,
     get_reservations,
+    get_reservations_by_ids,
     update_reservation,
 )
 from webapp.db.postgres import get_session
 from webapp.db.redis import get_redis
 from webapp.schema.reservation.reservation import ReservationCreate, ReservationRead, ReservationUpdate
 from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
+from webapp.utils.pagination import Page, get_page
 
 
 @reservation_router.post(
@@ -40,16 +43,31 @@ async def create_reservation_endpoint(
     try:
         if reservation_data.user_id == 0:
             reservation_data.user_id = current_user['user_id']
-        reservation = await create_reservation(session=session, reservation_data=reservation_data)
-        cache_key_reservations = get_reservations_cache(restaurant_id=reservation_data.restaurant_id)
-        cache_key_reservation_by_id = get_reservation_by_id_cache(reservation_id=reservation.id)
-        cache_key_user_reservations = get_user_reservations_by_id_cache(user_id=reservation.user_id)
-        await redis.delete(cache_key_reservations, cache_key_reservation_by_id, cache_key_user_reservations)
+        reservation = await create_reservation(
+            session=session, reservation_data=reservation_data, before_commit=reserve_ids(redis, RESERVATION_IDS)
+        )
+        with after_commit('reservation create'):
+            await invalidate_tags(redis, *reservation_write_tags(reservation))
+            await record_existence(redis, added=[(RESERVATION_IDS, reservation.id)])
         return reservation
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@reservation_router.get('/', response_model=list[ReservationRead], tags=['Reservations'], response_class=ORJSONResponse)
+async def read_reservations_by_ids_endpoint(
+    ids: list[int] = Query(..., description='Пакетное чтение бронирований по id, порядок сохраняется'),
+    session: AsyncSession = Depends(get_session),
+    redis: Redis = Depends(get_redis),
+) -> Response:
+    return await RESERVATION.respond_many(
+        redis,
+        session,
+        ids,
+        lambda session, reservation_ids: get_reservations_by_ids(session=session, reservation_ids=reservation_ids),
+    )
+
+
 @reservation_router.get(
     '/{reservation_id}',
     response_model=ReservationRead,
@@ -57,52 +75,39 @@ async def create_reservation_endpoint(
     response_class=ORJSONResponse,
 )
 async def read_reservation_endpoint(
-    reservation_id: int, session: AsyncSession = Depends(get_session), redis: Redis = Depends(get_redis)
+    request: Request,
+    reservation_id: int,
+    session: AsyncSession = Depends(get_session),
+    redis: Redis = Depends(get_redis),
 ):
-    try:
-        cache_key_reservation_by_id = get_reservation_by_id_cache(reservation_id=reservation_id)
-        cached_reservation = await redis.get(cache_key_reservation_by_id)
-        if cached_reservation:
-            if cached_reservation == b'{}':
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Запись о бронировании не найдена')
-            return orjson.loads(cached_reservation)
-        else:
-            reservation = await get_reservation(session=session, reservation_id=reservation_id)
-            if reservation is None:
-                await redis.set(cache_key_reservation_by_id, b'{}', ex=3600)
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Запись о бронировании не найдена')
-            await redis.set(cache_key_reservation_by_id, orjson.dumps(reservation.model_dump()), ex=3600)
-            return reservation
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    return await RESERVATION.respond(
+        redis,
+        session,
+        lambda session: get_reservation(session=session, reservation_id=reservation_id),
+        request=request,
+        reservation_id=reservation_id,
+    )
 
 
 @reservation_router.get(
     '/{restaurant_id}', response_model=list[ReservationRead], tags=['Reservations'], response_class=ORJSONResponse
 )
 async def read_reservations_endpoint(
-    restaurant_id: int, session: AsyncSession = Depends(get_session), redis: Redis = Depends(get_redis)
+    request: Request,
+    restaurant_id: int,
+    page: Page = Depends(get_page),
+    session: AsyncSession = Depends(get_session),
+    redis: Redis = Depends(get_redis),
 ):
-    try:
-        cache_key_reservations = get_reservations_cache(restaurant_id=restaurant_id)
-        cached_reservations = await redis.get(cache_key_reservations)
-        if cached_reservations:
-            if cached_reservations == b'[]':
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Записи о бронировании не найдены')
-            return orjson.loads(cached_reservations)
-        else:
-            reservations = await get_reservations(session=session, restaurant_id=restaurant_id)
-            if reservations is None:
-                await redis.set(cache_key_reservations, b'[]', ex=3600)
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Записи о бронировании не найдены')
-            await redis.set(
-                cache_key_reservations,
-                orjson.dumps([reservation.model_dump() for reservation in reservations]),
-                ex=3600,
-            )
-            return reservations
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    return await RESERVATIONS.respond(
+        redis,
+        session,
+        lambda session: get_reservations(session=session, restaurant_id=restaurant_id, page=page),
+        request=request,
+        page=page,
+        estimate=lambda session: estimate_reservations(session=session, restaurant_id=restaurant_id),
+        restaurant_id=restaurant_id,
+    )
 
 
 @reservation_router.put(
@@ -120,17 +125,17 @@ async def update_reservation_endpoint(
 ):
     if current_user['role'] == 'Сотрудник':
         try:
-            reservation = await update_reservation(
+            updated = await update_reservation(
                 session=session, reservation_id=reservation_id, reservation_data=reservation_data
             )
-            if reservation is None:
+            if updated is None:
                 return ORJSONResponse(
                     status_code=status.HTTP_404_NOT_FOUND, content='Обновляемая запись о бронировании не найдена'
                 )
-            cache_key_reservations = get_reservations_cache(restaurant_id=reservation.restaurant_id)
-            cache_key_reservation_by_id = get_reservation_by_id_cache(reservation_id=reservation_id)
-            cache_key_user_reservations = get_user_reservations_by_id_cache(user_id=reservation.user_id)
-            await redis.delete(cache_key_reservations, cache_key_reservation_by_id, cache_key_user_reservations)
+            old_reservation, reservation = updated
+            with after_commit('reservation update'):
+                generations = await invalidate_tags(redis, *reservation_write_tags(old_reservation, reservation))
+                await reservation_write_through(redis, generations, old_reservation, reservation)
             return reservation
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
@@ -149,16 +154,14 @@ async def delete_reservation_endpoint(
 ):
     if current_user['role'] == 'Сотрудник':
         try:
-            reservation = await get_reservation(session=session, reservation_id=reservation_id)
-            deleted_reservation = await delete_reservation(session=session, reservation_id=reservation_id)
-            if deleted_reservation is False:
+            reservation = await delete_reservation(session=session, reservation_id=reservation_id)
+            if reservation is None:
                 return ORJSONResponse(
                     status_code=status.HTTP_404_NOT_FOUND, content='Удаляемая запись о бронировании не найдена'
                 )
-            cache_key_reservations = get_reservations_cache(restaurant_id=reservation.restaurant_id)
-            cache_key_reservation_by_id = get_reservation_by_id_cache(reservation_id=reservation_id)
-            cache_key_user_reservations = get_user_reservations_by_id_cache(user_id=reservation.user_id)
-            await redis.delete(cache_key_reservations, cache_key_reservation_by_id, cache_key_user_reservations)
+            with after_commit('reservation delete'):
+                await invalidate_tags(redis, *reservation_write_tags(reservation))
+                await record_existence(redis, removed=[(RESERVATION_IDS, reservation.id)])
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
     else:
@@ -1,19 +1,24 @@
 from typing import List
 
-import orjson
-from fastapi import Depends, HTTPException, Query, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.responses import ORJSONResponse
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from webapp.api.restaurant.router import restaurant_router
-from webapp.cache.key_builder import get_restaurant_by_id_cache, get_restaurant_menu_by_id_cache, get_restaurants_cache
-from webapp.crud.dish import get_dishes_by_restaurant_id_and_category
+from webapp.cache.client import after_commit, invalidate_tags
+from webapp.cache.existence import RESTAURANT_IDS, record_existence, reserve_ids, restaurant_deleted_ids
+from webapp.cache.families import MENU, RESTAURANT, RESTAURANTS
+from webapp.cache.tags import restaurant_delete_tags, restaurant_write_tags
+from webapp.cache.write_through import restaurant_write_through
+from webapp.crud.dish import estimate_dishes_by_restaurant_id_and_category, get_menu_json
 from webapp.crud.restaurant import (
     create_restaurant,
     delete_restaurant,
+    estimate_restaurants,
     get_restaurant,
-    get_restaurants,
+    get_restaurants_by_ids,
+    get_restaurants_json,
     update_restaurant,
 )
 from webapp.db.postgres import get_session
@@ -22,6 +27,7 @@ from webapp.models.sirius.dish import DishCategory
 from webapp.schema.restaurant.dish import DishRead
 from webapp.schema.restaurant.restaurant import RestaurantCreate, RestaurantRead, RestaurantUpdate
 from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
+from webapp.utils.pagination import Page, get_page
 
 
 @restaurant_router.post(
@@ -39,10 +45,13 @@ async def create_new_restaurant(
 ):
     if current_user['role'] == 'Администратор':
         try:
-            restaurant = await create_restaurant(session=session, restaurant_data=restaurant_data)
+            restaurant = await create_restaurant(
+                session=session, restaurant_data=restaurant_data, before_commit=reserve_ids(redis, RESTAURANT_IDS)
+            )
 
-            cache_key = get_restaurants_cache()
-            await redis.delete(cache_key)
+            with after_commit('restaurant create'):
+                await invalidate_tags(redis, *restaurant_write_tags(restaurant))
+                await record_existence(redis, added=[(RESTAURANT_IDS, restaurant.id)])
 
             return restaurant
         except Exception as e:
@@ -55,75 +64,68 @@ async def create_new_restaurant(
     '/{restaurant_id}', response_model=RestaurantRead, tags=['Restaurants'], response_class=ORJSONResponse
 )
 async def get_single_restaurant(
+    request: Request,
     restaurant_id: int,
     session: AsyncSession = Depends(get_session),
     redis: Redis = Depends(get_redis),
 ):
-    try:
-        cache_key = get_restaurant_by_id_cache(restaurant_id=restaurant_id)
-        cached_restaurant = await redis.get(cache_key)
-        if cached_restaurant:
-            if cached_restaurant == b'{}':
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Запись о ресторане не найдена')
-            return orjson.loads(cached_restaurant)
-        else:
-            restaurant = await get_restaurant(session=session, restaurant_id=restaurant_id)
-            if restaurant is None:
-                await redis.set(cache_key, b'{}', ex=3600)
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Запись о ресторане не найдена')
-            await redis.set(cache_key, orjson.dumps(restaurant.model_dump()), ex=3600)
-            return restaurant
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    return await RESTAURANT.respond(
+        redis,
+        session,
+        lambda session: get_restaurant(session=session, restaurant_id=restaurant_id),
+        request=request,
+        restaurant_id=restaurant_id,
+    )
 
 
 @restaurant_router.get(
     '/{restaurant_id}/menu', response_model=List[DishRead], tags=['Restaurants'], response_class=ORJSONResponse
 )
 async def get_dishes_for_restaurant(
+    request: Request,
     restaurant_id: int,
     category: DishCategory = Query(None, description='Фильтр по категории блюд'),
+    page: Page = Depends(get_page),
     session: AsyncSession = Depends(get_session),
     redis: Redis = Depends(get_redis),
 ):
-    try:
-        cache_key = get_restaurant_menu_by_id_cache(restaurant_id=restaurant_id, category=category)
-        cached_menu = await redis.get(cache_key)
-        if cached_menu:
-            if cached_menu == b'[]':
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Меню ресторана не найдено')
-            return orjson.loads(cached_menu)
-        else:
-            menu = await get_dishes_by_restaurant_id_and_category(
-                session=session, restaurant_id=restaurant_id, category=category
-            )
-            if menu is None:
-                await redis.set(cache_key, b'[]', ex=3600)
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Меню ресторана не найдено')
-            await redis.set(cache_key, orjson.dumps([dish.model_dump() for dish in menu]), ex=3600)
-            return menu
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    return await MENU.respond(
+        redis,
+        session,
+        lambda session: get_menu_json(session=session, restaurant_id=restaurant_id, category=category, page=page),
+        request=request,
+        page=page,
+        estimate=lambda session: estimate_dishes_by_restaurant_id_and_category(
+            session=session, restaurant_id=restaurant_id, category=category
+        ),
+        restaurant_id=restaurant_id,
+        category=category,
+    )
 
 
 @restaurant_router.get('/', response_model=List[RestaurantRead], tags=['Restaurants'], response_class=ORJSONResponse)
-async def get_all_restaurants(session: AsyncSession = Depends(get_session), redis: Redis = Depends(get_redis)):
-    try:
-        cache_key = get_restaurants_cache()
-        cached_restaurants = await redis.get(cache_key)
-        if cached_restaurants:
-            if cached_restaurants == b'[]':
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Список ресторанов не найден')
-            return orjson.loads(cached_restaurants)
-        else:
-            restaurants = await get_restaurants(session=session)
-            if restaurants is None:
-                await redis.set(cache_key, b'[]', ex=3600)
-                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content='Список ресторанов не найден')
-            await redis.set(cache_key, orjson.dumps([restaurant.model_dump() for restaurant in restaurants]), ex=3600)
-            return restaurants
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+async def get_all_restaurants(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    redis: Redis = Depends(get_redis),
+    ids: List[int] = Query(None, description='Пакетное чтение ресторанов по id, порядок сохраняется'),
+    page: Page = Depends(get_page),
+):
+    if ids is not None:
+        return await RESTAURANT.respond_many(
+            redis,
+            session,
+            ids,
+            lambda session, restaurant_ids: get_restaurants_by_ids(session=session, restaurant_ids=restaurant_ids),
+        )
+    return await RESTAURANTS.respond(
+        redis,
+        session,
+        lambda session: get_restaurants_json(session=session, page=page),
+        request=request,
+        page=page,
+        estimate=lambda session: estimate_restaurants(session=session),
+    )
 
 
 @restaurant_router.put(
@@ -145,9 +147,9 @@ async def update_existing_restaurant(
                 return ORJSONResponse(
                     status_code=status.HTTP_404_NOT_FOUND, content='Обновляемая запись о ресторане не найдена'
                 )
-            cache_key_restaurant_by_id = get_restaurant_by_id_cache(restaurant_id=restaurant_id)
-            cache_key_restaurants = get_restaurants_cache()
-            await redis.delete(cache_key_restaurant_by_id, cache_key_restaurants)
+            with after_commit('restaurant update'):
+                generations = await invalidate_tags(redis, *restaurant_write_tags(restaurant))
+                await restaurant_write_through(redis, generations, restaurant)
             return restaurant
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
@@ -166,14 +168,14 @@ async def delete_existing_restaurant(
 ):
     if current_user['role'] == 'Администратор':
         try:
-            deleted_restaurant_id = await delete_restaurant(session=session, restaurant_id=restaurant_id)
-            if deleted_restaurant_id is False:
+            deleted_restaurant = await delete_restaurant(session=session, restaurant_id=restaurant_id)
+            if deleted_restaurant is None:
                 return ORJSONResponse(
                     status_code=status.HTTP_404_NOT_FOUND, content='Удаляемая запись о ресторане не найдена'
                 )
-            cache_key_restaurant_by_id = get_restaurant_by_id_cache(restaurant_id=restaurant_id)
-            cache_key_restaurants = get_restaurants_cache()
-            await redis.delete(cache_key_restaurant_by_id, cache_key_restaurants)
+            with after_commit('restaurant delete'):
+                await invalidate_tags(redis, *restaurant_delete_tags(deleted_restaurant))
+                await record_existence(redis, removed=restaurant_deleted_ids(deleted_restaurant))
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
     else:
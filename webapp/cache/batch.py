@@ -0,0 +1,53 @@
+import time
+from typing import Awaitable, Callable, Dict, List, Sequence, Tuple
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from webapp.cache.client import cache_get_many, cache_set_many
+from webapp.cache.entry import EMPTY_OBJECT
+from webapp.cache.policy import build_entry
+from webapp.cache.response import CachedModel, dump_model
+from webapp.metrics import CACHE_REFRESHES
+
+BatchLoaderT = Callable[[AsyncSession, List[int]], Awaitable[Sequence[CachedModel]]]
+
+
+async def read_many(
+    redis: Redis,
+    session: AsyncSession,
+    ids: Sequence[int],
+    key: Callable[[int], str],
+    tags: Callable[[int], Sequence[str]],
+    loader: BatchLoaderT,
+    family: str,
+) -> bytes:
+    # Пакетное чтение по id: попадания - одним MGET, промахи - одним запросом WHERE id IN (...),
+    # дозапись в кэш - одним конвейером. Возвращает JSON-массив найденных записей в порядке ids
+    ids = list(dict.fromkeys(ids))
+    keys = [key(item_id) for item_id in ids]
+    cached = await cache_get_many(redis, keys, [tags(item_id) for item_id in ids], family)
+
+    payloads: Dict[int, bytes] = {}
+    misses: Dict[int, Tuple[int, ...]] = {}
+    now = time.time()
+    for item_id, (entry, generations) in zip(ids, cached):
+        # Устаревшие записи не обновляются в фоне по одной, а перечитываются вместе с промахами
+        if entry is not None and entry.staleness(now) <= 0:
+            payloads[item_id] = entry.payload
+        else:
+            misses[item_id] = generations
+
+    if misses:
+        CACHE_REFRESHES.labels(family=family, reason='miss').inc(len(misses))
+        start = time.time()
+        loaded = {model.id: dump_model(model) for model in await loader(session, list(misses))}
+
+        entries = {}
+        for item_id, generations in misses.items():
+            # Отсутствующие id кэшируются пустым значением, как и при чтении по одному
+            payloads[item_id] = loaded.get(item_id, EMPTY_OBJECT)
+            entries[key(item_id)] = build_entry(payloads[item_id], EMPTY_OBJECT, family, start, generations)
+        await cache_set_many(redis, entries, family)
+
+    return b'[' + b','.join(payloads[item_id] for item_id in ids if payloads[item_id] != EMPTY_OBJECT) + b']'
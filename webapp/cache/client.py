@@ -0,0 +1,245 @@
+import time
+import uuid
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Sequence, Tuple, cast
+
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from webapp.cache.entry import EMPTY_VALUES, CacheEntry, EntryHead
+from webapp.cache.key_builder import get_cache_generation, get_cache_invalidation_channel
+from webapp.cache.local import local_cache
+from webapp.metrics import CACHE_EMPTY_HITS, CACHE_REQUESTS
+from webapp.utils.middleware import INTEGRATION_METHOD_LATENCY
+
+# Идентификатор процесса, чтобы не обрабатывать собственные сообщения об инвалидации
+INSTANCE_ID = uuid.uuid4().hex
+
+# Увеличивает поколения тегов за один проход и возвращает новые значения
+BUMP_GENERATIONS_SCRIPT = '''
+local generations = {}
+for i, key in ipairs(KEYS) do
+    generations[i] = redis.call('incr', key)
+end
+return generations
+'''
+
+# Семейство ключей для метрик, когда вызывающий его не указал
+UNKNOWN_FAMILY = 'other'
+
+# Обработчики остальных полей сообщений об инвалидации (поле - обработчик его значения):
+# через тот же канал согласуются другие локальные структуры, например фильтры существования
+message_handlers: Dict[str, Callable[[Any], None]] = {}
+
+
+@contextmanager
+def measure_redis(method: str, family: str) -> Iterator[None]:
+    # Задержка обращений к Redis в разрезе команды и семейства ключей
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        INTEGRATION_METHOD_LATENCY.labels(method=method, integration_point=f'redis:{family}').observe(
+            time.perf_counter() - start
+        )
+
+
+@contextmanager
+def after_commit(action: str) -> Iterator[None]:
+    # Обновление кэша после коммита: запись в БД уже состоялась, и ошибка Redis не должна превращать
+    # успешный ответ в 500. Устаревшие записи истекут по сроку жизни, бит нового id поставлен до коммита
+    try:
+        yield
+    except (RedisError, OSError):
+        logging.exception('Cache update after %s failed', action)
+
+
+async def eval_script(redis: Redis, script: str, keys: Sequence[str], args: Sequence[Any] = ()) -> Any:
+    # Lua-скрипт по ключам и аргументам. Заглушки redis-py описывают eval синхронным
+    # и со списками вместо отдельных ключей, поэтому вызов идет без их проверки
+    return await cast(Any, redis).eval(script, len(keys), *keys, *args)
+
+
+async def cache_get(
+    redis: Redis, key: str, tags: Sequence[str] = (), family: str = UNKNOWN_FAMILY
+) -> Tuple[CacheEntry | None, Tuple[int, ...]]:
+    # Возвращает действительную запись (или None) и текущие поколения тегов ключа.
+    # Запись, построенная при других поколениях, считается промахом
+    (result,) = await cache_get_many(redis, [key], [tags], family)
+    return result
+
+
+async def cache_get_many(
+    redis: Redis, keys: Sequence[str], tags: Sequence[Sequence[str]], family: str = UNKNOWN_FAMILY
+) -> List[Tuple[CacheEntry | None, Tuple[int, ...]]]:
+    results: List[Tuple[CacheEntry | None, Tuple[int, ...]]] = [(None, ())] * len(keys)
+    pending = []
+    for i, (key, key_tags) in enumerate(zip(keys, tags)):
+        value = local_cache.get(key)
+        if value is not None:
+            entry = CacheEntry.decode(value)
+            generations = local_cache.generations(key_tags)
+            if entry is not None and entry.generations == generations:
+                _count_hit('l1', family, entry)
+                results[i] = (entry, generations)
+                continue
+            CACHE_REQUESTS.labels(tier='l1', result='outdated', family=family).inc()
+        elif local_cache.enabled:
+            CACHE_REQUESTS.labels(tier='l1', result='miss', family=family).inc()
+        pending.append(i)
+
+    if not pending:
+        return results
+
+    # Значения и поколения их тегов читаются одним запросом
+    pending_tags = list(dict.fromkeys(tag for i in pending for tag in tags[i]))
+    epoch = local_cache.epoch
+    with measure_redis('mget', family):
+        values = await redis.mget(*(keys[i] for i in pending), *(get_cache_generation(tag) for tag in pending_tags))
+    known = {tag: int(generation or 0) for tag, generation in zip(pending_tags, values[len(pending) :])}
+    local_cache.observe(known)
+
+    for i, value in zip(pending, values):
+        generations = tuple(known[tag] for tag in tags[i])
+        results[i] = (None, generations)
+        if value is None:
+            CACHE_REQUESTS.labels(tier='redis', result='miss', family=family).inc()
+            continue
+
+        entry = CacheEntry.decode(value)
+        if entry is None or entry.generations != generations:
+            CACHE_REQUESTS.labels(tier='redis', result='outdated', family=family).inc()
+            continue
+
+        _count_hit('redis', family, entry)
+        local_cache.set(keys[i], value, epoch=epoch)
+        results[i] = (entry, generations)
+
+    return results
+
+
+async def cache_head(
+    redis: Redis, key: str, tags: Sequence[str] = (), family: str = UNKNOWN_FAMILY
+) -> EntryHead | None:
+    # Заголовок действительной записи без раскодирования значения - для условных запросов.
+    # В метриках попаданий не учитывается: при несовпадении ETag следом идет обычное чтение
+    value = local_cache.get(key)
+    if value is not None:
+        decoded = EntryHead.decode(value)
+        if decoded is not None and decoded[0].generations == local_cache.generations(tags):
+            return decoded[0]
+
+    with measure_redis('mget', family):
+        values = await redis.mget(key, *(get_cache_generation(tag) for tag in tags))
+    generations = tuple(int(generation or 0) for generation in values[1:])
+    local_cache.observe(dict(zip(tags, generations)))
+    decoded = EntryHead.decode(values[0]) if values[0] is not None else None
+    if decoded is None or decoded[0].generations != generations:
+        return None
+    return decoded[0]
+
+
+def _count_hit(tier: str, family: str, entry: CacheEntry) -> None:
+    CACHE_REQUESTS.labels(tier=tier, result='hit', family=family).inc()
+    # Попадание в закэшированное отсутствие записи (ответ 404 или пустой список)
+    if entry.payload in EMPTY_VALUES:
+        CACHE_EMPTY_HITS.labels(tier=tier, family=family).inc()
+
+
+async def cache_generations(redis: Redis, tags: Sequence[str]) -> Dict[str, int]:
+    # Текущие поколения тегов одним MGET, без чтения самих значений
+    tags = list(dict.fromkeys(tags))
+    if not tags:
+        return {}
+    with measure_redis('mget', 'tags'):
+        values = await redis.mget(*(get_cache_generation(tag) for tag in tags))
+    generations = {tag: int(generation or 0) for tag, generation in zip(tags, values)}
+    local_cache.observe(generations)
+    return generations
+
+
+async def cache_set(redis: Redis, key: str, value: bytes, ex: int, family: str = UNKNOWN_FAMILY) -> None:
+    epoch = local_cache.epoch
+    with measure_redis('set', family):
+        await redis.set(key, value, ex=ex)
+    local_cache.set(key, value, epoch=epoch)
+
+
+async def cache_set_many(redis: Redis, values: Mapping[str, Tuple[bytes, int]], family: str = UNKNOWN_FAMILY) -> None:
+    # Все значения (значение, срок жизни) записываются одним конвейером (pipeline) - один сетевой обмен
+    epoch = local_cache.epoch
+    with measure_redis('set_many', family):
+        async with redis.pipeline(transaction=False) as pipe:
+            for key, (value, ex) in values.items():
+                pipe.set(key, value, ex=ex)
+            await pipe.execute()
+    for key, (value, _) in values.items():
+        local_cache.set(key, value, epoch=epoch)
+
+
+async def cache_delete(redis: Redis, *keys: str) -> None:
+    with measure_redis('delete', UNKNOWN_FAMILY):
+        await redis.delete(*keys)
+    local_cache.invalidate(keys)
+    await redis.publish(
+        get_cache_invalidation_channel(),
+        orjson.dumps({'origin': INSTANCE_ID, 'keys': keys}),
+    )
+
+
+async def invalidate_tags(redis: Redis, *tags: str) -> Dict[str, int]:
+    # Инвалидация по тегу - O(1): ключи не перечисляются, у тега просто меняется поколение,
+    # и все записи, построенные при прежнем поколении, перестают считаться действительными.
+    # Возвращает новые поколения тегов
+    tags = tuple(dict.fromkeys(tags))
+    if not tags:
+        return {}
+
+    with measure_redis('invalidate', 'tags'):
+        generations = await eval_script(redis, BUMP_GENERATIONS_SCRIPT, [get_cache_generation(tag) for tag in tags])
+    bumped = dict(zip(tags, generations))
+    local_cache.observe(bumped)
+    await redis.publish(
+        get_cache_invalidation_channel(),
+        orjson.dumps({'origin': INSTANCE_ID, 'tags': bumped}),
+    )
+    return bumped
+
+
+def handle_invalidation_message(data: bytes) -> None:
+    message = orjson.loads(data)
+    if message['origin'] == INSTANCE_ID:
+        return
+    if 'keys' in message:
+        local_cache.invalidate(message['keys'])
+    if 'tags' in message:
+        local_cache.observe(message['tags'])
+    for field, handler in message_handlers.items():
+        if field in message:
+            handler(message[field])
+
+
+async def listen_invalidations(redis: Redis) -> None:
+    # Локальный кэш работает только пока есть подписка: пропущенные сообщения
+    # сделали бы его несогласованным с остальными воркерами
+    while True:
+        try:
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(get_cache_invalidation_channel())
+                async for message in pubsub.listen():
+                    if message['type'] == 'subscribe':
+                        local_cache.enabled = True
+                    elif message['type'] == 'message':
+                        handle_invalidation_message(message['data'])
+        except asyncio.CancelledError:
+            raise
+        except (RedisError, OSError, ValueError):
+            logging.exception('Cache invalidation listener failed, restarting')
+        finally:
+            local_cache.enabled = False
+            local_cache.clear()
+
+        await asyncio.sleep(1)
@@ -0,0 +1,81 @@
+import zlib
+from typing import Any, Dict, List
+
+import orjson
+
+from conf.config import settings
+
+# Байт кодека перед телом записи - набор флагов преобразований, примененных к JSON.
+# Декодирование не зависит от текущих настроек: смена CACHE_CODEC не делает старые записи нечитаемыми,
+# а запись с неизвестными флагами (от более новой версии приложения) считается промахом
+RAW = 0x00
+COLUMNAR = 0x01
+ZLIB = 0x02
+KNOWN_FLAGS = COLUMNAR | ZLIB
+
+# Строковая колонка кодируется словарем, если различных значений не больше половины строк
+DICTIONARY_RATIO = 0.5
+
+
+def encode_payload(payload: bytes) -> bytes:
+    flags = RAW
+    body = payload
+
+    if settings.CACHE_CODEC == 'columnar' and body.startswith(b'[{'):
+        columnar = to_columnar(orjson.loads(body))
+        if columnar is not None and len(columnar) < len(body):
+            flags |= COLUMNAR
+            body = columnar
+
+    if 0 < settings.CACHE_COMPRESS_MIN_BYTES <= len(body):
+        compressed = zlib.compress(body, settings.CACHE_COMPRESS_LEVEL)
+        if len(compressed) < len(body):
+            flags |= ZLIB
+            body = compressed
+
+    return bytes((flags,)) + body
+
+
+def decode_payload(raw: bytes) -> bytes | None:
+    if not raw:
+        return None
+    flags = raw[0]
+    if flags & ~KNOWN_FLAGS:
+        return None
+
+    body = raw[1:]
+    try:
+        if flags & ZLIB:
+            body = zlib.decompress(body)
+        if flags & COLUMNAR:
+            body = from_columnar(orjson.loads(body))
+    except (zlib.error, orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+        return None
+    return body
+
+
+def to_columnar(rows: Any) -> bytes | None:
+    # Список однотипных объектов хранится по колонкам: имена полей - один раз,
+    # повторяющиеся строки (категории, названия) - словарем с индексами
+    if not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+        return None
+    fields = list(rows[0])
+    if any(list(row) != fields for row in rows):
+        return None
+
+    columns: List[Any] = []
+    for field in fields:
+        values = [row[field] for row in rows]
+        if all(isinstance(value, str) for value in values):
+            dictionary = list(dict.fromkeys(values))
+            if len(dictionary) <= len(values) * DICTIONARY_RATIO:
+                index = {value: i for i, value in enumerate(dictionary)}
+                columns.append({'d': dictionary, 'i': [index[value] for value in values]})
+                continue
+        columns.append(values)
+    return orjson.dumps({'f': fields, 'c': columns})
+
+
+def from_columnar(table: Dict[str, Any]) -> bytes:
+    columns = [[column['d'][i] for i in column['i']] if isinstance(column, dict) else column for column in table['c']]
+    return orjson.dumps([dict(zip(table['f'], row)) for row in zip(*columns)])
@@ -0,0 +1,185 @@
+import time
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response
+
+from conf.config import settings
+from webapp.cache.batch import BatchLoaderT, read_many
+from webapp.cache.client import cache_head
+from webapp.cache.entry import EMPTY_LIST, CacheEntry, EntryHead
+from webapp.cache.existence import ExistenceFilter
+from webapp.cache.key_builder import get_list_count_cache, get_list_page_cache
+from webapp.cache.read_through import LoaderT, read_entry, serialize
+from webapp.cache.response import CachedJSONResponse, dump_models, etag_matches, validator_headers
+from webapp.metrics import CACHE_ERRORS, CACHE_NOT_MODIFIED
+from webapp.utils.pagination import Page, encode_cursor
+
+# Загрузчик оценки числа строк списка
+CountLoaderT = Callable[[AsyncSession], Awaitable[int]]
+
+
+@dataclass(frozen=True)
+class CachedRead:
+    # Кэшируемое чтение: ключ и теги строятся из параметров запроса, отсутствие данных
+    # кэшируется значением empty и превращается в 404 с сообщением not_found.
+    # TTL берется по family из настроек (см. webapp.cache.policy)
+    family: str
+    key: Callable[..., str]
+    tags: Callable[..., Sequence[str]]
+    empty: bytes
+    not_found: str
+    # Сообщение для пакетного чтения (?ids=...), когда не найден ни один id
+    batch_not_found: str = ''
+    # Cache-Control ответа; переопределяется по семейству через HTTP_CACHE_CONTROL
+    cache_control: str = 'private, no-cache'
+    # Фильтр существования id из параметра exists.param: несуществующие id получают 404 без кэша и БД
+    exists: ExistenceFilter | None = None
+
+    async def read(self, redis: Redis, session: AsyncSession, loader: LoaderT, **params: Any) -> bytes:
+        entry = await self.read_entry(redis, session, loader, **params)
+        return entry.payload
+
+    async def read_entry(
+        self, redis: Redis, session: AsyncSession, loader: LoaderT, page: Page | None = None, **params: Any
+    ) -> CacheEntry:
+        try:
+            return await read_entry(
+                redis, session, self.page_key(page, **params), loader, self.empty, self.family, tags=self.tags(**params)
+            )
+        except (RedisError, OSError):
+            # Недоступный Redis не роняет чтение: ответ строится напрямую из БД
+            logging.exception('Cache read failed for family %s, falling back to database', self.family)
+            CACHE_ERRORS.labels(family=self.family).inc()
+            payload = serialize(await loader(session), self.empty)
+            return CacheEntry(payload=payload, soft_expires_at=0, delta=0, modified_at=time.time())
+
+    async def head(self, redis: Redis, page: Page | None = None, **params: Any) -> EntryHead | None:
+        try:
+            return await cache_head(redis, self.page_key(page, **params), self.tags(**params), self.family)
+        except (RedisError, OSError):
+            # Ошибку Redis залогирует следующее за проверкой обычное чтение
+            return None
+
+    def page_key(self, page: Page | None, **params: Any) -> str:
+        # Страница списка - отдельный ключ с теми же тегами, что и весь список
+        key = self.key(**params)
+        return key if page is None else get_list_page_cache(key, page.limit, page.after)
+
+    async def estimate(self, redis: Redis, session: AsyncSession, loader: CountLoaderT, **params: Any) -> int:
+        # Оценка числа строк списка меняется только после ANALYZE, поэтому кэшируется без тегов,
+        # на TTL семейства count
+        try:
+            entry = await read_entry(redis, session, get_list_count_cache(self.key(**params)), loader, b'0', 'count')
+        except (RedisError, OSError):
+            logging.exception('Cache read failed for family count, falling back to database')
+            CACHE_ERRORS.labels(family='count').inc()
+            return await loader(session)
+        return int(entry.payload)
+
+    async def read_many(self, redis: Redis, session: AsyncSession, ids: Sequence[int], loader: BatchLoaderT) -> bytes:
+        try:
+            return await read_many(redis, session, ids, self.key, self.tags, loader, self.family)
+        except (RedisError, OSError):
+            logging.exception('Cache read failed for family %s, falling back to database', self.family)
+            CACHE_ERRORS.labels(family=self.family).inc()
+            ids = list(dict.fromkeys(ids))
+            found = {model.id: model for model in await loader(session, ids)}
+            return dump_models(found[item_id] for item_id in ids if item_id in found)
+
+    async def respond(
+        self,
+        redis: Redis,
+        session: AsyncSession,
+        loader: LoaderT,
+        request: Request | None = None,
+        page: Page | None = None,
+        estimate: CountLoaderT | None = None,
+        **params: Any,
+    ) -> Response:
+        # Ответ с ETag, Last-Modified и Cache-Control. На If-None-Match с ETag действительной записи
+        # отвечает 304 по одному заголовку записи - без БД и без раскодирования значения.
+        # Для страницы списка (page) добавляются ссылка на следующую страницу и оценка общего числа строк (estimate)
+        if_none_match = request.headers.get('if-none-match') if request is not None else None
+        present = None
+        if self.exists is not None:
+            (present,) = await self.exists.check(redis, [params[self.exists.param]])
+            if present is False:
+                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content=self.not_found)
+        try:
+            if if_none_match:
+                head = await self.head(redis, page=page, **params)
+                if head is not None and head.staleness() <= 0 and etag_matches(if_none_match, head.etag):
+                    return self._not_modified(head.etag, head.modified_at)
+            entry = await self.read_entry(redis, session, loader, page=page, **params)
+            # Пустая страница после курсора - конец списка, а не 404
+            if entry.payload == self.empty and (page is None or page.after == 0):
+                if present and self.exists is not None:
+                    self.exists.false_positive()
+                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content=self.not_found)
+            if if_none_match and etag_matches(if_none_match, entry.etag):
+                return self._not_modified(entry.etag, entry.modified_at)
+            headers = self._validators(entry.etag, entry.modified_at)
+            if page is not None:
+                headers.update(await self._page_headers(redis, session, entry, page, request, estimate, **params))
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+        return CachedJSONResponse(entry.payload, headers=headers)
+
+    async def _page_headers(
+        self,
+        redis: Redis,
+        session: AsyncSession,
+        entry: CacheEntry,
+        page: Page,
+        request: Request | None,
+        estimate: CountLoaderT | None,
+        **params: Any,
+    ) -> Dict[str, str]:
+        # Следующая страница есть, если текущая заполнена целиком (последняя полная страница ведет на пустую).
+        # Оценка общего числа строк отдается только на первой странице. Число строк и последний id
+        # хранятся в записи, поэтому тело страницы не разбирается
+        headers = {}
+        if entry.rows == page.limit and request is not None:
+            url = request.url.include_query_params(limit=page.limit, cursor=encode_cursor(entry.last_id))
+            headers['Link'] = f'<{url}>; rel="next"'
+        if estimate is not None and page.after == 0:
+            headers['X-Total-Count-Estimate'] = str(await self.estimate(redis, session, estimate, **params))
+        return headers
+
+    def _validators(self, etag: bytes, modified_at: float) -> Dict[str, str]:
+        cache_control = settings.HTTP_CACHE_CONTROL.get(self.family, self.cache_control)
+        return validator_headers(etag, modified_at, cache_control)
+
+    def _not_modified(self, etag: bytes, modified_at: float) -> Response:
+        CACHE_NOT_MODIFIED.labels(family=self.family).inc()
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=self._validators(etag, modified_at))
+
+    async def respond_many(
+        self, redis: Redis, session: AsyncSession, ids: Sequence[int], loader: BatchLoaderT
+    ) -> Response:
+        if len(ids) > settings.BATCH_MAX_IDS:
+            return ORJSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content=f'В одном запросе не более {settings.BATCH_MAX_IDS} id',
+            )
+        if self.exists is not None:
+            present = await self.exists.check(redis, ids)
+            ids = [item_id for item_id, item_present in zip(ids, present) if item_present is not False]
+            if not ids:
+                return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content=self.batch_not_found)
+        try:
+            payload = await self.read_many(redis, session, ids, loader)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+        if payload == EMPTY_LIST:
+            return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content=self.batch_not_found)
+        return CachedJSONResponse(payload)
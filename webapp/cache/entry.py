@@ -0,0 +1,147 @@
+import math
+import time
+import random
+import struct
+import hashlib
+from dataclasses import dataclass
+from typing import Tuple
+
+import orjson
+
+from webapp.cache.codec import decode_payload, encode_payload
+
+# Признак формата записи: ни одно значение в старом формате (чистый JSON) с него не начинается.
+# Записи предыдущих форматов (b'\x01' - без поколений тегов, b'\x02' - без байта кодека,
+# b'\x03' - без ETag, b'\x04' - без числа строк и id последней строки) считаются промахом
+ENTRY_MARKER = b'\x05'
+
+# Пустые значения кэшируются, чтобы не ходить в БД за отсутствующими записями
+EMPTY_OBJECT = b'{}'
+EMPTY_LIST = b'[]'
+EMPTY_VALUES = (EMPTY_OBJECT, EMPTY_LIST)
+
+# Логическое (мягкое) время устаревания, время построения значения в секундах и число тегов
+HEADER = struct.Struct('!ddH')
+GENERATION = struct.Struct('!Q')
+# Валидаторы HTTP после поколений: время построения значения (Last-Modified) и ETag
+VALIDATORS = struct.Struct('!d16s')
+# Число строк списка и id последней строки: по ним строится ссылка на следующую страницу без разбора тела
+PAGE = struct.Struct('!Iq')
+
+
+def payload_etag(payload: bytes) -> bytes:
+    # Сильный ETag зависит только от тела ответа: одинаковые значения, построенные
+    # разными воркерами или заново после вытеснения, получают один и тот же ETag
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+def payload_page(payload: bytes) -> Tuple[int, int]:
+    # Число строк и id последней строки для тела-списка; у остальных значений - нули
+    if not payload.startswith(b'['):
+        return 0, 0
+    rows = orjson.loads(payload)
+    last = rows[-1] if rows else None
+    return len(rows), last['id'] if isinstance(last, dict) and 'id' in last else 0
+
+
+@dataclass(frozen=True)
+class EntryHead:
+    # Заголовок записи без тела: достаточно, чтобы проверить If-None-Match, не раскодируя значение
+    soft_expires_at: float
+    generations: Tuple[int, ...]
+    etag: bytes
+    modified_at: float
+    rows: int = 0
+    last_id: int = 0
+
+    @classmethod
+    def decode(cls, raw: bytes) -> 'Tuple[EntryHead, float, int] | None':
+        # Возвращает заголовок, время построения значения и смещение тела записи
+        if not raw.startswith(ENTRY_MARKER) or len(raw) < len(ENTRY_MARKER) + HEADER.size:
+            return None
+
+        soft_expires_at, delta, count = HEADER.unpack_from(raw, len(ENTRY_MARKER))
+        offset = len(ENTRY_MARKER) + HEADER.size
+        if len(raw) < offset + count * GENERATION.size + VALIDATORS.size + PAGE.size:
+            return None
+
+        generations = tuple(GENERATION.unpack_from(raw, offset + i * GENERATION.size)[0] for i in range(count))
+        offset += count * GENERATION.size
+        modified_at, etag = VALIDATORS.unpack_from(raw, offset)
+        offset += VALIDATORS.size
+        rows, last_id = PAGE.unpack_from(raw, offset)
+        head = cls(
+            soft_expires_at=soft_expires_at,
+            generations=generations,
+            etag=etag,
+            modified_at=modified_at,
+            rows=rows,
+            last_id=last_id,
+        )
+        return head, delta, offset + PAGE.size
+
+    def staleness(self, now: float | None = None) -> float:
+        return (now or time.time()) - self.soft_expires_at
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    payload: bytes
+    soft_expires_at: float
+    delta: float
+    # Поколения тегов на момент чтения из БД: запись действительна, пока они не сменились
+    generations: Tuple[int, ...] = ()
+    # ETag тела (см. payload_etag) и время построения значения. ETag вычисляется один раз
+    # при создании записи перед сохранением и дальше только читается из нее
+    etag: bytes = b''
+    modified_at: float = 0.0
+    # Число строк и id последней строки списка (см. payload_page); -1 - еще не вычислены.
+    # Как и ETag, вычисляются один раз при создании записи, чтобы попадание не разбирало тело страницы
+    rows: int = -1
+    last_id: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.etag:
+            object.__setattr__(self, 'etag', payload_etag(self.payload))
+        if self.rows < 0:
+            rows, last_id = payload_page(self.payload)
+            object.__setattr__(self, 'rows', rows)
+            object.__setattr__(self, 'last_id', last_id)
+
+    def encode(self) -> bytes:
+        header = HEADER.pack(self.soft_expires_at, self.delta, len(self.generations))
+        generations = b''.join(GENERATION.pack(generation) for generation in self.generations)
+        validators = VALIDATORS.pack(self.modified_at, self.etag)
+        page = PAGE.pack(self.rows, self.last_id)
+        return ENTRY_MARKER + header + generations + validators + page + encode_payload(self.payload)
+
+    @classmethod
+    def decode(cls, raw: bytes) -> 'CacheEntry | None':
+        decoded = EntryHead.decode(raw)
+        if decoded is None:
+            return None
+
+        head, delta, offset = decoded
+        payload = decode_payload(raw[offset:])
+        if payload is None:
+            return None
+        return cls(
+            payload=payload,
+            soft_expires_at=head.soft_expires_at,
+            delta=delta,
+            generations=head.generations,
+            etag=head.etag,
+            modified_at=head.modified_at,
+            rows=head.rows,
+            last_id=head.last_id,
+        )
+
+    def staleness(self, now: float | None = None) -> float:
+        return (now or time.time()) - self.soft_expires_at
+
+    def should_refresh_early(self, beta: float, now: float | None = None) -> bool:
+        # XFetch: чем дороже построение значения и ближе мягкое устаревание,
+        # тем вероятнее, что запрос обновит запись заранее
+        if beta <= 0:
+            return False
+        return (now or time.time()) - self.delta * beta * math.log(1.0 - random.random()) >= self.soft_expires_at
@@ -0,0 +1,330 @@
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conf.config import settings
+from webapp.cache.client import INSTANCE_ID, eval_script, measure_redis, message_handlers
+from webapp.cache.key_builder import (
+    get_cache_invalidation_channel,
+    get_existence_filter,
+    get_existence_filter_merge,
+    get_existence_filter_rebuild,
+)
+from webapp.cache.local import local_cache
+from webapp.crud.returning import BeforeCommitT
+from webapp.metrics import EXISTENCE_FILTER_CHECKS, EXISTENCE_FILTER_FALSE_POSITIVES
+from webapp.models.sirius.dish import Dish
+from webapp.models.sirius.reservation import Reservation
+from webapp.models.sirius.restaurant import Restaurant
+from webapp.schema.login.user import UserDeleted
+from webapp.schema.restaurant.restaurant import RestaurantDeleted
+
+# Биты id в карте; nil - карта еще не построена
+CHECK_SCRIPT = '''
+if redis.call('exists', KEYS[1]) == 0 then
+    return nil
+end
+local bits = {}
+for i, id in ipairs(ARGV) do
+    bits[i] = redis.call('getbit', KEYS[1], id)
+end
+return bits
+'''
+
+# Изменения по фильтрам. KEYS - пары (карта, карта перестроения) на фильтр;
+# ARGV - на фильтр: число добавленных id, число удаленных id, добавленные id, удаленные id.
+# Не построенная карта не создается: ее появление означало бы, что фильтру можно верить
+UPDATE_SCRIPT = '''
+local arg = 1
+for k = 1, #KEYS, 2 do
+    local added = tonumber(ARGV[arg])
+    local removed = tonumber(ARGV[arg + 1])
+    arg = arg + 2
+    for _, key in ipairs({KEYS[k], KEYS[k + 1]}) do
+        if redis.call('exists', key) == 1 then
+            for i = 0, added + removed - 1 do
+                redis.call('setbit', key, ARGV[arg + i], i < added and 1 or 0)
+            end
+        end
+    end
+    arg = arg + added + removed
+end
+return 1
+'''
+
+# Заменяет карту построенной из БД. Изменения, пришедшие за время построения, записаны
+# в карту перестроения (KEYS[2]) и объединяются с ней, поэтому не теряются
+MERGE_SCRIPT = '''
+redis.call('set', KEYS[3], ARGV[1])
+redis.call('bitop', 'or', KEYS[2], KEYS[2], KEYS[3])
+redis.call('del', KEYS[3])
+redis.call('rename', KEYS[2], KEYS[1])
+return 1
+'''
+
+# Сколько может длиться перестроение: брошенная карта перестроения истечет сама
+REBUILD_TTL = 600
+REBUILD_BATCH_SIZE = 100_000
+
+
+# Битовая карта известных id таблицы: бит id установлен, если строка существует.
+# id выдаются последовательностью, поэтому карта точная и компактная (1 бит на id) - в отличие от фильтра Блума,
+# ложные срабатывания возможны только для удаленных id, пока удаление не дошло до копии в памяти.
+# Карта хранится в Redis, у каждого процесса - ее копия: известные несуществующие id отсекаются в памяти,
+# id новее копии проверяются одним запросом к Redis. Копию согласуют сообщения через тот же канал,
+# что и L1, поэтому, как и L1, она используется только пока активна подписка.
+# Бит нового id ставится до коммита строки (reserve_ids): если Redis недоступен, запись откатывается,
+# а не остается в БД с нулевым битом - иначе фильтр отвечал бы 404 на существующую строку
+class ExistenceFilter:
+    def __init__(self, name: str, model: Any, param: str) -> None:
+        self.name = name
+        self.model = model
+        # Имя параметра чтения (CachedRead), в котором передается id
+        self.param = param
+
+        self._bits: bytearray | None = None
+        self._max_id = -1
+        self._loaded_at = float('-inf')
+        self._resets = -1
+        self._loading: asyncio.Future[bytearray | None] | None = None
+        # Изменения, пришедшие, пока копия читается из Redis, - применяются к прочитанной копии
+        self._pending: List[Tuple[Sequence[int], Sequence[int]]] | None = None
+
+    @property
+    def key(self) -> str:
+        return get_existence_filter(self.name)
+
+    @property
+    def active(self) -> bool:
+        return settings.EXISTENCE_FILTER_ENABLED and local_cache.enabled
+
+    async def check(self, redis: Redis, ids: Sequence[int]) -> List[bool | None]:
+        # False - id точно нет, True - есть по данным фильтра, None - фильтр не может ответить
+        if not self.active:
+            self._count('none', [None] * len(ids))
+            return [None] * len(ids)
+        try:
+            bits = await self._snapshot(redis)
+            if bits is None:
+                self._count('none', [None] * len(ids))
+                return [None] * len(ids)
+
+            result: Dict[int, bool | None] = {}
+            newer = []
+            for item_id in ids:
+                if item_id < 0:
+                    result[item_id] = False
+                elif item_id <= self._max_id:
+                    result[item_id] = _test(bits, item_id)
+                else:
+                    newer.append(item_id)
+            self._count('local', list(result.values()))
+
+            if newer:
+                with measure_redis('getbit', f'exists:{self.name}'):
+                    remote = await eval_script(redis, CHECK_SCRIPT, [self.key], newer)
+                answers: List[bool | None] = (
+                    [bool(bit) for bit in remote] if remote is not None else [None] * len(newer)
+                )
+                result.update(zip(newer, answers))
+                self._count('redis', answers)
+        except (RedisError, OSError):
+            logging.exception('Existence filter %s check failed', self.name)
+            return [None] * len(ids)
+        return [result[item_id] for item_id in ids]
+
+    def false_positive(self) -> None:
+        EXISTENCE_FILTER_FALSE_POSITIVES.labels(filter=self.name).inc()
+
+    def apply(self, added: Sequence[int], removed: Sequence[int]) -> None:
+        if self._pending is not None:
+            self._pending.append((added, removed))
+        if self._bits is not None:
+            self._apply(self._bits, added, removed)
+
+    def expire(self) -> None:
+        self._loaded_at = float('-inf')
+
+    async def rebuild(self, redis: Redis, session: AsyncSession) -> int:
+        # Полное построение карты из БД. Нужно при первом запуске и после загрузки данных в обход API
+        rebuild_key = get_existence_filter_rebuild(self.name)
+        await redis.set(rebuild_key, b'\x00', ex=REBUILD_TTL)
+
+        bits = bytearray(1)
+        count = 0
+        statement = select(self.model.id).execution_options(yield_per=REBUILD_BATCH_SIZE)
+        async for item_id in await session.stream_scalars(statement):
+            _set(bits, item_id, True)
+            count += 1
+
+        with measure_redis('rebuild', f'exists:{self.name}'):
+            await eval_script(
+                redis, MERGE_SCRIPT, [self.key, rebuild_key, get_existence_filter_merge(self.name)], [bytes(bits)]
+            )
+        self.expire()
+        await redis.publish(
+            get_cache_invalidation_channel(), orjson.dumps({'origin': INSTANCE_ID, 'exists': {self.name: None}})
+        )
+        return count
+
+    async def _snapshot(self, redis: Redis) -> bytearray | None:
+        expired = time.monotonic() - self._loaded_at > settings.EXISTENCE_FILTER_LOCAL_TTL
+        if not expired and self._resets == local_cache.resets:
+            return self._bits
+
+        # Копию читает одна корутина, остальные ждут ее
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._load(redis))
+            self._loading.add_done_callback(self._loaded)
+        return await asyncio.shield(self._loading)
+
+    async def _load(self, redis: Redis) -> bytearray | None:
+        self._pending = []
+        resets = local_cache.resets
+        try:
+            with measure_redis('get', f'exists:{self.name}'):
+                raw = await redis.get(self.key)
+        finally:
+            pending, self._pending = self._pending, None
+
+        bits = bytearray(raw) if raw is not None else None
+        if bits is not None:
+            for added, removed in pending:
+                self._apply(bits, added, removed)
+        if resets == local_cache.resets:
+            self._bits = bits
+            self._max_id = _max_id(bits) if bits is not None else -1
+            self._loaded_at = time.monotonic()
+            self._resets = resets
+        return bits
+
+    def _loaded(self, future: 'asyncio.Future[bytearray | None]') -> None:
+        self._loading = None
+
+    def _apply(self, bits: bytearray, added: Sequence[int], removed: Sequence[int]) -> None:
+        for item_id in added:
+            _set(bits, item_id, True)
+            if bits is self._bits:
+                self._max_id = max(self._max_id, item_id)
+        for item_id in removed:
+            _set(bits, item_id, False)
+
+    def _count(self, tier: str, answers: Sequence[bool | None]) -> None:
+        for answer in answers:
+            result = 'unknown' if answer is None else 'present' if answer else 'absent'
+            EXISTENCE_FILTER_CHECKS.labels(filter=self.name, tier=tier, result=result).inc()
+
+
+def _test(bits: bytearray, item_id: int) -> bool:
+    # Порядок бит как у SETBIT в Redis: id 0 - старший бит первого байта
+    byte = item_id >> 3
+    return byte < len(bits) and bool(bits[byte] & (0x80 >> (item_id & 7)))
+
+
+def _set(bits: bytearray, item_id: int, value: bool) -> None:
+    byte = item_id >> 3
+    if byte >= len(bits):
+        if not value:
+            return
+        bits.extend(bytes(byte + 1 - len(bits)))
+    if value:
+        bits[byte] |= 0x80 >> (item_id & 7)
+    else:
+        bits[byte] &= ~(0x80 >> (item_id & 7)) & 0xFF
+
+
+def _max_id(bits: bytearray) -> int:
+    for byte in range(len(bits) - 1, -1, -1):
+        if bits[byte]:
+            lowest = bits[byte] & -bits[byte]
+            return byte * 8 + 8 - lowest.bit_length()
+    return -1
+
+
+DISH_IDS = ExistenceFilter('dish', Dish, param='dish_id')
+RESTAURANT_IDS = ExistenceFilter('restaurant', Restaurant, param='restaurant_id')
+RESERVATION_IDS = ExistenceFilter('reservation', Reservation, param='reservation_id')
+
+FILTERS = {existence_filter.name: existence_filter for existence_filter in (DISH_IDS, RESTAURANT_IDS, RESERVATION_IDS)}
+
+# Изменение фильтра: (фильтр, id). id бывает None только у DishRead, такие изменения пропускаются
+ChangeT = Tuple[ExistenceFilter, int | None]
+
+
+async def record_existence(redis: Redis, added: Iterable[ChangeT] = (), removed: Iterable[ChangeT] = ()) -> None:
+    # Вызывается после записи в БД рядом с инвалидацией тегов: один скрипт на все фильтры
+    # и одно сообщение остальным процессам. Ошибка здесь оставляет только ложные срабатывания:
+    # бит удаленного id остается установленным, а бит нового уже поставлен до коммита
+    if not settings.EXISTENCE_FILTER_ENABLED:
+        return
+    changes: Dict[ExistenceFilter, Tuple[List[int], List[int]]] = {}
+    for existence_filter, item_id in added:
+        if item_id is not None:
+            changes.setdefault(existence_filter, ([], []))[0].append(item_id)
+    for existence_filter, item_id in removed:
+        if item_id is not None:
+            changes.setdefault(existence_filter, ([], []))[1].append(item_id)
+    if not changes:
+        return
+
+    keys: List[str] = []
+    args: List[int] = []
+    for existence_filter, (added_ids, removed_ids) in changes.items():
+        keys += [existence_filter.key, get_existence_filter_rebuild(existence_filter.name)]
+        args += [len(added_ids), len(removed_ids), *added_ids, *removed_ids]
+    with measure_redis('setbit', 'exists'):
+        await eval_script(redis, UPDATE_SCRIPT, keys, args)
+
+    for existence_filter, (added_ids, removed_ids) in changes.items():
+        existence_filter.apply(added_ids, removed_ids)
+    message = {existence_filter.name: change for existence_filter, change in changes.items()}
+    await redis.publish(get_cache_invalidation_channel(), orjson.dumps({'origin': INSTANCE_ID, 'exists': message}))
+
+
+def reserve_ids(redis: Redis, existence_filter: ExistenceFilter) -> BeforeCommitT:
+    # Бит нового id до коммита. Если строка не закоммитится, останется ложное срабатывание - это допустимо.
+    # После коммита id записывается еще раз (record_existence): перестроение, начатое между отметкой
+    # и коммитом, не видит строку и могло заменить карту без ее бита
+    async def reserve(ids: List[int]) -> None:
+        await record_existence(redis, added=[(existence_filter, item_id) for item_id in ids])
+
+    return reserve
+
+
+async def rebuild_filters(redis: Redis, session: AsyncSession) -> Dict[str, int]:
+    return {name: await existence_filter.rebuild(redis, session) for name, existence_filter in FILTERS.items()}
+
+
+def handle_existence_message(message: Dict[str, Any]) -> None:
+    # Значение по фильтру: [добавленные id, удаленные id] или None - карта перестроена, копию нужно перечитать
+    for name, change in message.items():
+        existence_filter = FILTERS.get(name)
+        if existence_filter is None:
+            continue
+        if change is None:
+            existence_filter.expire()
+        else:
+            existence_filter.apply(*change)
+
+
+message_handlers['exists'] = handle_existence_message
+
+
+def restaurant_deleted_ids(restaurant: RestaurantDeleted) -> List[ChangeT]:
+    # Удаление ресторана каскадно удаляет меню и бронирования
+    return [
+        (RESTAURANT_IDS, restaurant.id),
+        *((DISH_IDS, dish.id) for dish in restaurant.menu),
+        *((RESERVATION_IDS, reservation.id) for reservation in restaurant.reservations),
+    ]
+
+
+def user_deleted_ids(user: UserDeleted) -> List[ChangeT]:
+    return [(RESERVATION_IDS, reservation.id) for reservation in user.reservations]
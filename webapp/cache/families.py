@@ -0,0 +1,113 @@
+from webapp.cache.engine import CachedRead
+from webapp.cache.entry import EMPTY_LIST, EMPTY_OBJECT
+from webapp.cache.existence import DISH_IDS, RESERVATION_IDS, RESTAURANT_IDS
+from webapp.cache.key_builder import (
+    get_dish_by_id_cache,
+    get_dishes_cache,
+    get_reservation_by_id_cache,
+    get_reservations_cache,
+    get_restaurant_by_id_cache,
+    get_restaurant_menu_by_id_cache,
+    get_restaurants_cache,
+    get_user_by_id_cache,
+    get_user_reservations_by_id_cache,
+)
+from webapp.cache.tags import (
+    DISHES_TAG,
+    RESTAURANTS_TAG,
+    dish_category_tag,
+    dish_tag,
+    reservation_tag,
+    restaurant_menu_tag,
+    restaurant_reservations_tag,
+    restaurant_tag,
+    user_reservations_tag,
+    user_tag,
+)
+
+# Семейства кэшируемых чтений. Имя семейства - метка в метриках и ключ
+# в CACHE_FAMILY_TTL / CACHE_FAMILY_EMPTY_TTL / HTTP_CACHE_CONTROL
+
+DISH = CachedRead(
+    family='dish',
+    key=get_dish_by_id_cache,
+    tags=lambda dish_id: [dish_tag(dish_id)],
+    empty=EMPTY_OBJECT,
+    not_found='Блюдо не найдено',
+    batch_not_found='Блюда не найдены',
+    cache_control='public, no-cache',
+    exists=DISH_IDS,
+)
+
+DISHES = CachedRead(
+    family='dishes',
+    key=get_dishes_cache,
+    tags=lambda category=None: [dish_category_tag(category) if category is not None else DISHES_TAG],
+    empty=EMPTY_LIST,
+    not_found='Блюда не найдены',
+    cache_control='public, no-cache',
+)
+
+RESTAURANT = CachedRead(
+    family='restaurant',
+    key=get_restaurant_by_id_cache,
+    tags=lambda restaurant_id: [restaurant_tag(restaurant_id)],
+    empty=EMPTY_OBJECT,
+    not_found='Запись о ресторане не найдена',
+    batch_not_found='Список ресторанов не найден',
+    cache_control='public, no-cache',
+    exists=RESTAURANT_IDS,
+)
+
+RESTAURANTS = CachedRead(
+    family='restaurants',
+    key=get_restaurants_cache,
+    tags=lambda: [RESTAURANTS_TAG],
+    empty=EMPTY_LIST,
+    not_found='Список ресторанов не найден',
+    cache_control='public, no-cache',
+)
+
+MENU = CachedRead(
+    family='menu',
+    key=get_restaurant_menu_by_id_cache,
+    tags=lambda restaurant_id, category=None: [restaurant_menu_tag(restaurant_id)],
+    empty=EMPTY_LIST,
+    not_found='Меню ресторана не найдено',
+    cache_control='public, no-cache',
+    exists=RESTAURANT_IDS,
+)
+
+RESERVATION = CachedRead(
+    family='reservation',
+    key=get_reservation_by_id_cache,
+    tags=lambda reservation_id: [reservation_tag(reservation_id)],
+    empty=EMPTY_OBJECT,
+    not_found='Запись о бронировании не найдена',
+    batch_not_found='Записи о бронировании не найдены',
+    exists=RESERVATION_IDS,
+)
+
+RESERVATIONS = CachedRead(
+    family='reservations',
+    key=get_reservations_cache,
+    tags=lambda restaurant_id: [restaurant_reservations_tag(restaurant_id)],
+    empty=EMPTY_LIST,
+    not_found='Записи о бронировании не найдены',
+)
+
+USER = CachedRead(
+    family='user',
+    key=get_user_by_id_cache,
+    tags=lambda user_id: [user_tag(user_id)],
+    empty=EMPTY_OBJECT,
+    not_found='Пользователь не найден',
+)
+
+USER_RESERVATIONS = CachedRead(
+    family='user_reservations',
+    key=get_user_reservations_by_id_cache,
+    tags=lambda user_id: [user_reservations_tag(user_id)],
+    empty=EMPTY_LIST,
+    not_found='Бронирований не найдено',
+)
@@ -43,3 +43,38 @@ def get_user_by_id_cache(user_id: int):
 
 def get_user_reservations_by_id_cache(user_id: int):
     return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:user:{user_id}:reservations'
+
+
+def get_list_page_cache(list_key: str, limit: int, after: int) -> str:
+    # Первая страница размера по умолчанию хранится под ключом самого списка: ее прогревают и исправляют на месте
+    if after == 0 and limit == settings.PAGE_DEFAULT_LIMIT:
+        return list_key
+    return f'{list_key}:page:{limit}:{after}'
+
+
+def get_list_count_cache(list_key: str) -> str:
+    return f'{list_key}:count'
+
+
+def get_cache_invalidation_channel() -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:cache:invalidate'
+
+
+def get_cache_lease(key: str) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:lease:{key}'
+
+
+def get_cache_generation(tag: str) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:gen:{tag}'
+
+
+def get_existence_filter(name: str) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:exists:{name}'
+
+
+def get_existence_filter_rebuild(name: str) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:exists:{name}:rebuild'
+
+
+def get_existence_filter_merge(name: str) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:exists:{name}:merge'
@@ -0,0 +1,110 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Mapping, Sequence, Tuple
+
+from conf.config import settings
+from webapp.metrics import CACHE_L1_BYTES, CACHE_L1_ENTRIES, CACHE_L1_EVICTIONS
+
+
+# LRU-кэш в памяти процесса, ограниченный числом записей и объемом, с TTL.
+# Согласованность между воркерами обеспечивают сообщения об инвалидации через Redis pub/sub
+# (удаленные ключи и новые поколения тегов), TTL страхует от потерянного сообщения.
+# Пока слушатель инвалидаций не запущен, кэш выключен.
+class LocalCache:
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = False
+
+        self._entries: OrderedDict[str, Tuple[float, bytes]] = OrderedDict()
+        self._bytes = 0
+        # Увеличивается при каждой инвалидации: значение, прочитанное из Redis
+        # до инвалидации, не должно попасть в локальный кэш после нее
+        self._epoch = 0
+        # Последние известные процессу поколения тегов
+        self._generations: Dict[str, int] = {}
+        # Число сбросов кэша: после переподключения подписки все локальные копии
+        # (в том числе фильтров существования) считаются устаревшими
+        self.resets = 0
+
+    @property
+    def epoch(self) -> int:
+        return self._epoch
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> bytes | None:
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._pop(key)
+            CACHE_L1_EVICTIONS.labels(reason='expired').inc()
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes, epoch: int | None = None) -> None:
+        if not self.enabled or len(value) > self.max_bytes:
+            return
+        if epoch is not None and epoch != self._epoch:
+            return
+
+        self._pop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._bytes += len(value)
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._pop(oldest_key)
+            CACHE_L1_EVICTIONS.labels(reason='capacity').inc()
+
+        self._update_gauges()
+
+    def invalidate(self, keys: Iterable[str]) -> None:
+        self._epoch += 1
+        for key in keys:
+            self._pop(key)
+        self._update_gauges()
+
+    def generations(self, tags: Sequence[str]) -> Tuple[int, ...]:
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def observe(self, generations: Mapping[str, int]) -> None:
+        # Поколения только растут: ответ Redis, прочитанный до инвалидации,
+        # не должен откатить поколение, пришедшее в сообщении после нее
+        for tag, generation in generations.items():
+            if generation > self._generations.get(tag, 0):
+                self._generations[tag] = generation
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self.resets += 1
+        self._entries.clear()
+        self._generations.clear()
+        self._bytes = 0
+        self._update_gauges()
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def _update_gauges(self) -> None:
+        CACHE_L1_ENTRIES.set(len(self._entries))
+        CACHE_L1_BYTES.set(self._bytes)
+
+
+local_cache = LocalCache(
+    max_entries=settings.CACHE_L1_MAX_ENTRIES,
+    max_bytes=settings.CACHE_L1_MAX_BYTES,
+    ttl=settings.CACHE_L1_TTL,
+)
@@ -0,0 +1,48 @@
+import time
+import random
+from typing import Tuple
+
+from conf.config import settings
+from webapp.cache.entry import CacheEntry
+from webapp.metrics import CACHE_VALUE_BYTES
+
+
+def family_ttl(family: str, empty: bool) -> int:
+    if empty:
+        return settings.CACHE_FAMILY_EMPTY_TTL.get(family, settings.CACHE_EMPTY_TTL)
+    return settings.CACHE_FAMILY_TTL.get(family, settings.CACHE_TTL)
+
+
+def jittered(ttl: float) -> float:
+    jitter = settings.CACHE_TTL_JITTER
+    return ttl * (1 + random.uniform(-jitter, jitter))
+
+
+def new_entry(
+    payload: bytes, empty: bytes, family: str, started_at: float, generations: Tuple[int, ...]
+) -> Tuple[CacheEntry, int]:
+    # Запись кэша и срок ее жизни в Redis: TTL семейства (отдельный для пустых значений)
+    # с разбросом плюс окно, в котором устаревшее значение еще отдается во время обновления.
+    now = time.time()
+    soft_ttl = jittered(family_ttl(family, empty=payload == empty))
+    entry = CacheEntry(
+        payload=payload,
+        soft_expires_at=now + soft_ttl,
+        delta=now - started_at,
+        generations=generations,
+        modified_at=now,
+    )
+    return entry, int(soft_ttl) + settings.CACHE_STALE_TTL
+
+
+def encode_entry(entry: CacheEntry, family: str) -> bytes:
+    value = entry.encode()
+    CACHE_VALUE_BYTES.labels(family=family).observe(len(value))
+    return value
+
+
+def build_entry(
+    payload: bytes, empty: bytes, family: str, started_at: float, generations: Tuple[int, ...]
+) -> Tuple[bytes, int]:
+    entry, ex = new_entry(payload, empty, family, started_at, generations)
+    return encode_entry(entry, family), ex
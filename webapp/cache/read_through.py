@@ -0,0 +1,222 @@
+import time
+import uuid
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Sequence, Set, Tuple, cast
+
+import orjson
+from pydantic import BaseModel
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conf.config import settings
+from webapp.cache.client import cache_get, cache_set, eval_script
+from webapp.cache.entry import CacheEntry
+from webapp.cache.key_builder import get_cache_lease
+from webapp.cache.policy import encode_entry, new_entry
+from webapp.cache.response import dump_model, dump_models
+from webapp.db import postgres
+from webapp.metrics import CACHE_REFRESHES, CACHE_STALE_SERVED, CACHE_STALENESS
+
+ResultT = BaseModel | Sequence[BaseModel] | bytes | int | None
+LoaderT = Callable[[AsyncSession], Awaitable[ResultT]]
+
+# Снимает аренду, только если она все еще наша
+RELEASE_LEASE_SCRIPT = '''
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+'''
+
+_in_flight: Dict[str, asyncio.Future[CacheEntry | None]] = {}
+_background_refreshes: Set[asyncio.Task[None]] = set()
+
+
+def serialize(result: ResultT, empty: bytes) -> bytes:
+    if result is None:
+        return empty
+    # Загрузчик уже собрал тело ответа (crud.projection)
+    if isinstance(result, bytes):
+        return result
+    if isinstance(result, BaseModel):
+        return dump_model(result)
+    if isinstance(result, int):
+        return orjson.dumps(result)
+    return dump_models(result)
+
+
+async def read_through(
+    redis: Redis,
+    session: AsyncSession,
+    key: str,
+    loader: LoaderT,
+    empty: bytes,
+    family: str,
+    tags: Sequence[str] = (),
+) -> bytes:
+    entry = await read_entry(redis, session, key, loader, empty, family, tags)
+    return entry.payload
+
+
+async def read_entry(
+    redis: Redis,
+    session: AsyncSession,
+    key: str,
+    loader: LoaderT,
+    empty: bytes,
+    family: str,
+    tags: Sequence[str] = (),
+) -> CacheEntry:
+    # То же, что read_through, но вместе со значением возвращает его ETag и время построения
+    entry, generations = await cache_get(redis, key, tags, family)
+
+    if entry is not None:
+        now = time.time()
+        staleness = entry.staleness(now)
+        if staleness > 0:
+            CACHE_STALE_SERVED.labels(family=family).inc()
+            CACHE_STALENESS.labels(family=family).observe(staleness)
+            _refresh_in_background(redis, key, tags, generations, loader, empty, family, reason='stale')
+        elif entry.should_refresh_early(settings.CACHE_XFETCH_BETA, now):
+            _refresh_in_background(redis, key, tags, generations, loader, empty, family, reason='early')
+        return entry
+
+    CACHE_REFRESHES.labels(family=family, reason='miss').inc()
+    entry = await _single_flight(redis, key, tags, generations, lambda: loader(session), empty, family, wait=True)
+    return cast(CacheEntry, entry)
+
+
+def _flight_key(key: str, generations: Tuple[int, ...]) -> str:
+    # Перестроение привязано к поколениям тегов: запрос, пришедший после инвалидации,
+    # не должен ждать и получить результат перестроения, начатого до нее
+    if not generations:
+        return key
+    return f'{key}@{".".join(map(str, generations))}'
+
+
+def _refresh_in_background(
+    redis: Redis,
+    key: str,
+    tags: Sequence[str],
+    generations: Tuple[int, ...],
+    loader: LoaderT,
+    empty: bytes,
+    family: str,
+    reason: str,
+) -> None:
+    if _flight_key(key, generations) in _in_flight:
+        return
+
+    CACHE_REFRESHES.labels(family=family, reason=reason).inc()
+    task = asyncio.create_task(_refresh(redis, key, tags, generations, loader, empty, family))
+    _background_refreshes.add(task)
+    task.add_done_callback(_background_refreshes.discard)
+
+
+async def _refresh(
+    redis: Redis,
+    key: str,
+    tags: Sequence[str],
+    generations: Tuple[int, ...],
+    loader: LoaderT,
+    empty: bytes,
+    family: str,
+) -> None:
+    # Сессия запроса к этому моменту уже закрыта, поэтому обновление открывает свою
+    try:
+        async with (await postgres.read_session_maker())() as session:
+            await _single_flight(redis, key, tags, generations, lambda: loader(session), empty, family, wait=False)
+    except (SQLAlchemyError, RedisError, OSError):
+        logging.exception('Background cache refresh failed for %s', key)
+
+
+async def _single_flight(
+    redis: Redis,
+    key: str,
+    tags: Sequence[str],
+    generations: Tuple[int, ...],
+    load: Callable[[], Awaitable[ResultT]],
+    empty: bytes,
+    family: str,
+    wait: bool,
+) -> CacheEntry | None:
+    # В пределах процесса ключ перестраивает одна корутина, остальные ждут ее результат
+    flight_key = _flight_key(key, generations)
+    while (future := _in_flight.get(flight_key)) is not None:
+        try:
+            result = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+        else:
+            if result is not None or not wait:
+                return result
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[flight_key] = future
+    try:
+        entry = await _rebuild(redis, key, tags, generations, load, empty, family, wait)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()
+        raise
+    else:
+        future.set_result(entry)
+        return entry
+    finally:
+        _in_flight.pop(flight_key, None)
+
+
+async def _rebuild(
+    redis: Redis,
+    key: str,
+    tags: Sequence[str],
+    generations: Tuple[int, ...],
+    load: Callable[[], Awaitable[ResultT]],
+    empty: bytes,
+    family: str,
+    wait: bool,
+) -> CacheEntry | None:
+    # Между процессами и узлами ключ перестраивает держатель аренды в Redis,
+    # остальные недолго ждут появления значения и только потом идут в БД сами.
+    # Фоновое обновление при занятой аренде просто пропускается
+    lease_key = get_cache_lease(_flight_key(key, generations))
+    token = uuid.uuid4().hex
+    acquired = await redis.set(lease_key, token, nx=True, px=int(settings.CACHE_LEASE_TTL * 1000))
+
+    if not acquired:
+        if not wait:
+            return None
+        deadline = time.monotonic() + settings.CACHE_LEASE_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.CACHE_LEASE_POLL_INTERVAL)
+            entry, _ = await cache_get(redis, key, tags, family)
+            if entry is not None and entry.staleness() <= 0:
+                return entry
+
+    try:
+        start = time.time()
+        payload = serialize(await load(), empty)
+
+        # Запись помечается поколениями, прочитанными до запроса в БД: если теги
+        # инвалидировали во время построения, запись сразу окажется недействительной
+        entry, ex = new_entry(payload, empty, family, start, generations)
+        await cache_set(redis, key, encode_entry(entry, family), ex=ex, family=family)
+        return entry
+    finally:
+        if acquired:
+            await _release_lease(redis, lease_key, token)
+
+
+async def _release_lease(redis: Redis, lease_key: str, token: str) -> None:
+    # Не снятая аренда истечет сама через CACHE_LEASE_TTL
+    try:
+        await eval_script(redis, RELEASE_LEASE_SCRIPT, [lease_key], [token])
+    except RedisError:
+        logging.exception('Failed to release cache lease %s', lease_key)
@@ -0,0 +1,51 @@
+from email.utils import formatdate
+from typing import Any, Dict, Iterable, Protocol
+
+import orjson
+from starlette.responses import Response
+
+
+class Dumpable(Protocol):
+    # Любая pydantic-модель
+    def model_dump(self) -> Dict[str, Any]:
+        ...
+
+
+class CachedModel(Dumpable, Protocol):
+    # Схема чтения, которую находят по id (RestaurantRead, DishRead, ...). У DishRead id необязателен
+    @property
+    def id(self) -> int | None:
+        ...
+
+
+class CachedJSONResponse(Response):
+    # Тело уже является готовым JSON, поэтому отдается в сокет как есть,
+    # минуя повторную валидацию response_model и сериализацию
+    media_type = 'application/json'
+
+
+def dump_model(model: Dumpable) -> bytes:
+    return orjson.dumps(model.model_dump())
+
+
+def dump_models(models: Iterable[Dumpable]) -> bytes:
+    return orjson.dumps([model.model_dump() for model in models])
+
+
+def format_etag(etag: bytes) -> str:
+    return f'"{etag.hex()}"'
+
+
+def etag_matches(if_none_match: str, etag: bytes) -> bool:
+    # If-None-Match сравнивается слабо (RFC 9110): префикс W/ у тегов клиента не важен
+    if if_none_match.strip() == '*':
+        return True
+    expected = format_etag(etag)
+    return any(tag.strip().removeprefix('W/') == expected for tag in if_none_match.split(','))
+
+
+def validator_headers(etag: bytes, modified_at: float, cache_control: str) -> Dict[str, str]:
+    headers = {'ETag': format_etag(etag), 'Cache-Control': cache_control}
+    if modified_at:
+        headers['Last-Modified'] = formatdate(modified_at, usegmt=True)
+    return headers
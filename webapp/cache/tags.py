@@ -0,0 +1,94 @@
+from typing import List
+
+from webapp.schema.login.user import UserDeleted, UserRead
+from webapp.schema.reservation.reservation import ReservationRead
+from webapp.schema.restaurant.dish import DishRead
+from webapp.schema.restaurant.restaurant import RestaurantDeleted, RestaurantRead
+
+# Теги группируют ключи кэша по данным, от которых они зависят.
+# Чтение помечает запись тегами, запись в БД меняет поколение тегов (см. invalidate_tags)
+
+DISHES_TAG = 'dishes'
+RESTAURANTS_TAG = 'restaurants'
+
+
+def dish_tag(dish_id: int) -> str:
+    return f'dish:{dish_id}'
+
+
+def dish_category_tag(category: str) -> str:
+    return f'dish-category:{category}'
+
+
+def restaurant_tag(restaurant_id: int) -> str:
+    return f'restaurant:{restaurant_id}'
+
+
+def restaurant_menu_tag(restaurant_id: int) -> str:
+    return f'restaurant-menu:{restaurant_id}'
+
+
+def restaurant_reservations_tag(restaurant_id: int) -> str:
+    return f'restaurant-reservations:{restaurant_id}'
+
+
+def reservation_tag(reservation_id: int) -> str:
+    return f'reservation:{reservation_id}'
+
+
+def user_tag(user_id: int) -> str:
+    return f'user:{user_id}'
+
+
+def user_reservations_tag(user_id: int) -> str:
+    return f'user-reservations:{user_id}'
+
+
+# Теги, которые меняет запись в БД. Для изменений передаются старое и новое состояние строки:
+# блюдо, перенесенное в другую категорию или ресторан, пропадает из прежних списков
+
+
+def dish_write_tags(*dishes: DishRead) -> List[str]:
+    tags = [DISHES_TAG]
+    for dish in dishes:
+        # id нет только у блюда, еще не записанного в БД
+        if dish.id is not None:
+            tags.append(dish_tag(dish.id))
+        tags += [dish_category_tag(dish.category), restaurant_menu_tag(dish.restaurant_id)]
+    return tags
+
+
+def reservation_write_tags(*reservations: ReservationRead) -> List[str]:
+    tags = []
+    for reservation in reservations:
+        tags += [
+            reservation_tag(reservation.id),
+            restaurant_reservations_tag(reservation.restaurant_id),
+            user_reservations_tag(reservation.user_id),
+        ]
+    return tags
+
+
+def restaurant_write_tags(restaurant: RestaurantRead) -> List[str]:
+    return [RESTAURANTS_TAG, restaurant_tag(restaurant.id)]
+
+
+def restaurant_delete_tags(restaurant: RestaurantDeleted) -> List[str]:
+    # Удаление ресторана каскадно удаляет меню и бронирования
+    tags = restaurant_write_tags(restaurant)
+    tags += [restaurant_menu_tag(restaurant.id), restaurant_reservations_tag(restaurant.id)]
+    tags += dish_write_tags(*restaurant.menu)
+    tags += reservation_write_tags(*restaurant.reservations)
+    return tags
+
+
+def user_write_tags(user: UserRead) -> List[str]:
+    return [user_tag(user.id)]
+
+
+def user_delete_tags(user: UserDeleted) -> List[str]:
+    # Удаление пользователя каскадно удаляет его бронирования
+    tags = user_write_tags(user)
+    tags += [user_reservations_tag(user.id)]
+    tags += reservation_write_tags(*user.reservations)
+    return tags
@@ -0,0 +1,118 @@
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Sequence, Tuple
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conf.config import settings
+from webapp.cache.client import cache_generations, cache_set_many
+from webapp.cache.engine import CachedRead
+from webapp.cache.families import DISH, DISHES, MENU, RESTAURANT, RESTAURANTS
+from webapp.cache.key_builder import get_list_count_cache
+from webapp.cache.policy import build_entry
+from webapp.cache.read_through import ResultT, serialize
+from webapp.cache.tags import DISHES_TAG, RESTAURANTS_TAG
+from webapp.crud.dish import estimate_dishes, get_dishes, get_dishes_by_restaurant_ids
+from webapp.crud.restaurant import estimate_restaurants, get_busiest_restaurants, get_restaurants
+from webapp.models.sirius.dish import DishCategory
+from webapp.schema.restaurant.dish import DishRead
+from webapp.utils.pagination import Page
+
+WARMUP_ATTEMPTS = 3
+GLOBAL_TAGS = [DISHES_TAG, RESTAURANTS_TAG]
+
+# (семейство, параметры ключа, результат в том виде, в каком его вернул бы загрузчик эндпоинта)
+WarmupItemT = Tuple[CachedRead, Dict[str, object], ResultT]
+
+
+async def warm_up(redis: Redis, session: AsyncSession) -> int:
+    # Прогреваются первые страницы общих списков и CACHE_WARMUP_RESTAURANTS ресторанов с наибольшим числом
+    # недавних бронирований (ресторан, меню, меню по категориям, блюда меню), поэтому объем прогрева
+    # не растет с таблицей блюд. Ключи записываются конвейерами по CACHE_WARMUP_BATCH_SIZE.
+    # Возвращает число записанных ключей
+    for _ in range(WARMUP_ATTEMPTS):
+        values = await _build(redis, session)
+        if values is not None:
+            await _set_in_batches(redis, list(values.items()))
+            return len(values)
+    logging.warning('Cache warm-up skipped: data kept changing during %d attempts', WARMUP_ATTEMPTS)
+    return 0
+
+
+async def _build(redis: Redis, session: AsyncSession) -> Dict[str, Tuple[bytes, int]] | None:
+    # Любая запись блюда или ресторана меняет поколение общего тега DISHES_TAG или RESTAURANTS_TAG.
+    # Если они не изменились за время запросов, прочитанные позже поколения остальных тегов
+    # соответствуют прочитанным данным; иначе построение повторяется
+    before = await cache_generations(redis, GLOBAL_TAGS)
+    start = time.time()
+    page = Page(limit=settings.PAGE_DEFAULT_LIMIT)
+    since = datetime.now(timezone.utc) - timedelta(days=settings.CACHE_WARMUP_RESERVATION_DAYS)
+
+    # Общие списки - первой страницей с оценкой числа строк, как их заполнил бы промах
+    items: List[WarmupItemT] = [(RESTAURANTS, {}, await get_restaurants(session=session, page=page) or [])]
+    counts = {RESTAURANTS.key(): await estimate_restaurants(session=session)}
+    for category in (None, *DishCategory):
+        params: Dict[str, object] = {} if category is None else {'category': category}
+        items.append((DISHES, params, await get_dishes(session=session, category=category, page=page) or []))
+        counts[DISHES.key(**params)] = await estimate_dishes(session=session, category=category)
+
+    restaurants = await get_busiest_restaurants(session=session, since=since, limit=settings.CACHE_WARMUP_RESTAURANTS)
+    dishes = await get_dishes_by_restaurant_ids(
+        session=session, restaurant_ids=[restaurant.id for restaurant in restaurants]
+    )
+    menus: Dict[int, List[DishRead]] = defaultdict(list)
+    menus_by_category: Dict[Tuple[int, DishCategory], List[DishRead]] = defaultdict(list)
+    for dish in dishes:
+        menus[dish.restaurant_id].append(dish)
+        menus_by_category[(dish.restaurant_id, dish.category)].append(dish)
+
+    for restaurant in restaurants:
+        items.append((RESTAURANT, {'restaurant_id': restaurant.id}, restaurant))
+        items.append((MENU, {'restaurant_id': restaurant.id}, menus[restaurant.id]))
+        for category in DishCategory:
+            items.append(
+                (
+                    MENU,
+                    {'restaurant_id': restaurant.id, 'category': category},
+                    menus_by_category[(restaurant.id, category)],
+                )
+            )
+    for dish in dishes:
+        items.append((DISH, {'dish_id': dish.id}, dish))
+
+    tags = [tag for family, params, _ in items for tag in family.tags(**params)]
+    generations = await cache_generations(redis, [*GLOBAL_TAGS, *tags])
+    if any(generations[tag] != before[tag] for tag in GLOBAL_TAGS):
+        # Повторные запросы не должны вернуть объекты, уже загруженные в сессию
+        session.expunge_all()
+        return None
+
+    values = {}
+    for family, params, result in items:
+        key = family.key(**params)
+        if isinstance(result, list):
+            # Список прогревается первой страницей размера по умолчанию (она хранится под ключом списка).
+            # Меню прочитаны целиком, их число строк точное. Пустые списки кэшируются так же,
+            # как при промахе: отсутствие значения - тоже ответ
+            count = counts.get(key, len(result))
+            values[get_list_count_cache(key)] = build_entry(serialize(count, b'0'), b'0', 'count', start, ())
+            result = result[: settings.PAGE_DEFAULT_LIMIT] or None
+        payload = serialize(result, family.empty)
+        key_generations = tuple(generations[tag] for tag in family.tags(**params))
+        values[key] = build_entry(payload, family.empty, family.family, start, key_generations)
+    return values
+
+
+async def _set_in_batches(redis: Redis, values: Sequence[Tuple[str, Tuple[bytes, int]]]) -> None:
+    semaphore = asyncio.Semaphore(settings.CACHE_WARMUP_CONCURRENCY)
+
+    async def set_batch(batch: Sequence[Tuple[str, Tuple[bytes, int]]]) -> None:
+        async with semaphore:
+            await cache_set_many(redis, dict(batch), family='warmup')
+
+    size = settings.CACHE_WARMUP_BATCH_SIZE
+    await asyncio.gather(*(set_batch(values[i : i + size]) for i in range(0, len(values), size)))
@@ -0,0 +1,224 @@
+import time
+import logging
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Tuple, cast
+
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from conf.config import settings
+from webapp.cache.client import measure_redis
+from webapp.cache.engine import CachedRead
+from webapp.cache.entry import CacheEntry
+from webapp.cache.families import (
+    DISH,
+    DISHES,
+    MENU,
+    RESERVATION,
+    RESERVATIONS,
+    RESTAURANT,
+    RESTAURANTS,
+    USER,
+    USER_RESERVATIONS,
+)
+from webapp.cache.key_builder import get_cache_generation
+from webapp.cache.local import local_cache
+from webapp.cache.policy import build_entry
+from webapp.cache.response import CachedModel, dump_model
+from webapp.metrics import CACHE_WRITE_THROUGH
+from webapp.models.sirius.dish import DishCategory
+from webapp.schema.login.user import UserRead
+from webapp.schema.reservation.reservation import ReservationRead
+from webapp.schema.restaurant.dish import DishRead
+from webapp.schema.restaurant.restaurant import RestaurantRead
+
+# Записывает значение, только если поколения тегов ключа все еще те, с которыми оно построено,
+# и (для списков) запись в кэше не изменилась с момента чтения. При смене поколений ключ удаляется:
+# запись в нем уже недействительна, и следующее чтение построит ее из БД.
+# KEYS[1] - ключ, KEYS[2..] - ключи поколений его тегов;
+# ARGV[1] - ожидаемое текущее значение ('' - не проверять), ARGV[2] - новое значение,
+# ARGV[3] - срок жизни в секундах, ARGV[4..] - поколения тегов нового значения
+WRITE_THROUGH_SCRIPT = '''
+for i = 2, #KEYS do
+    if tonumber(redis.call('get', KEYS[i]) or '0') ~= tonumber(ARGV[i + 2]) then
+        redis.call('del', KEYS[1])
+        return 0
+    end
+end
+if ARGV[1] ~= '' and redis.call('get', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('set', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+'''
+
+# Список, в котором может находиться измененная строка: семейство, параметры ключа
+# и условие, при котором строка входит в список
+ListT = Tuple[CachedRead, Dict[str, Any], Callable[[Any], bool]]
+
+
+async def write_through(
+    redis: Redis,
+    generations: Mapping[str, int],
+    entity: Tuple[CachedRead, Dict[str, Any]],
+    old: CachedModel,
+    new: CachedModel,
+    lists: Sequence[ListT] = (),
+) -> None:
+    # Вместо промаха после изменения: новое значение записывается в ключ по id, а закэшированные
+    # списки исправляются на месте. Список исправляется, только если он построен при поколениях,
+    # предшествовавших этому изменению, - иначе в нем могут не хватать чужих изменений.
+    # generations - поколения тегов, выставленные invalidate_tags для этого изменения
+    if not settings.CACHE_WRITE_THROUGH:
+        return
+    try:
+        await _write_through(redis, generations, entity, old, new, lists)
+    except RedisError:
+        # Поколения уже сменены, поэтому без записи кэш просто перестроится при чтении
+        logging.exception('Cache write-through failed for %s', entity[0].family)
+
+
+async def _write_through(
+    redis: Redis,
+    generations: Mapping[str, int],
+    entity: Tuple[CachedRead, Dict[str, Any]],
+    old: CachedModel,
+    new: CachedModel,
+    lists: Sequence[ListT],
+) -> None:
+    lists = [item for item in lists if all(tag in generations for tag in item[0].tags(**item[1]))]
+    start = time.time()
+    epoch = local_cache.epoch
+    with measure_redis('get', 'write_through'):
+        current = await redis.mget(*(family.key(**params) for family, params, _ in lists)) if lists else []
+
+    family, params = entity
+    tags = family.tags(**params)
+    value, ex = build_entry(dump_model(new), family.empty, family.family, start, _generations(generations, tags))
+    # (семейство, ключ, теги, ожидаемое значение, новое значение, срок жизни)
+    writes: List[Tuple[CachedRead, str, Sequence[str], bytes, bytes, int]] = [
+        (family, family.key(**params), tags, b'', value, ex)
+    ]
+
+    for (family, params, belongs), raw in zip(lists, current):
+        tags = family.tags(**params)
+        entry = CacheEntry.decode(raw) if raw is not None else None
+        if entry is None or entry.generations != tuple(generations[tag] - 1 for tag in tags):
+            CACHE_WRITE_THROUGH.labels(family=family.family, result='skipped').inc()
+            continue
+        payload = _patch(entry.payload, old, new, belongs, family.empty, settings.PAGE_DEFAULT_LIMIT)
+        if payload is None:
+            CACHE_WRITE_THROUGH.labels(family=family.family, result='skipped').inc()
+            continue
+        value, ex = build_entry(payload, family.empty, family.family, start, _generations(generations, tags))
+        writes.append((family, family.key(**params), tags, raw, value, ex))
+
+    with measure_redis('write_through', entity[0].family):
+        async with redis.pipeline(transaction=False) as pipe:
+            for _, key, tags, expected, value, ex in writes:
+                generation_keys = [get_cache_generation(tag) for tag in tags]
+                key_generations = _generations(generations, tags)
+                # Заглушки redis-py ожидают списки вместо отдельных ключей и аргументов (см. eval_script)
+                cast(Any, pipe).eval(
+                    WRITE_THROUGH_SCRIPT, 1 + len(tags), key, *generation_keys, expected, value, ex, *key_generations
+                )
+            stored = await pipe.execute()
+
+    for (family, key, _, _, value, _), result in zip(writes, stored):
+        if result:
+            local_cache.set(key, value, epoch=epoch)
+        CACHE_WRITE_THROUGH.labels(family=family.family, result='stored' if result else 'conflict').inc()
+
+
+def _generations(generations: Mapping[str, int], tags: Sequence[str]) -> Tuple[int, ...]:
+    return tuple(generations[tag] for tag in tags)
+
+
+def _patch(
+    payload: bytes, old: CachedModel, new: CachedModel, belongs: Callable[[Any], bool], empty: bytes, limit: int
+) -> bytes | None:
+    # Под ключом списка хранится его первая страница (limit строк в порядке id): строка удаляется
+    # со старого места и, если все еще входит в список и попадает на страницу, вставляется заново.
+    # Если строка ушла с заполненной страницы, ее место займет строка со следующей страницы,
+    # которой в записи нет, - такую страницу исправить нельзя
+    rows = orjson.loads(payload)
+    full = len(rows) >= limit
+    last_id = rows[-1]['id'] if rows else 0
+    rows = [row for row in rows if row['id'] not in (old.id, new.id)]
+    if belongs(new) and (not full or (new.id is not None and new.id <= last_id)):
+        rows.append(new.model_dump())
+        rows.sort(key=lambda row: row['id'])
+    if full and len(rows) < limit:
+        return None
+    rows = rows[:limit]
+    if not rows:
+        return empty
+    return orjson.dumps(rows)
+
+
+def _any_row(row: Any) -> bool:
+    return True
+
+
+def _dish_in(restaurant_id: int | None = None, category: DishCategory | None = None) -> Callable[[DishRead], bool]:
+    # Условие для списка блюд: все блюда, категория, меню ресторана или категория меню
+    def belongs(dish: DishRead) -> bool:
+        return (restaurant_id is None or dish.restaurant_id == restaurant_id) and (
+            category is None or dish.category == category
+        )
+
+    return belongs
+
+
+def _reservation_of(user_id: int) -> Callable[[ReservationRead], bool]:
+    def belongs(reservation: ReservationRead) -> bool:
+        return reservation.user_id == user_id
+
+    return belongs
+
+
+def _reservation_at(restaurant_id: int) -> Callable[[ReservationRead], bool]:
+    def belongs(reservation: ReservationRead) -> bool:
+        return reservation.restaurant_id == restaurant_id
+
+    return belongs
+
+
+async def dish_write_through(redis: Redis, generations: Mapping[str, int], old: DishRead, new: DishRead) -> None:
+    lists: List[ListT] = [(DISHES, {}, _any_row)]
+    for category in dict.fromkeys([old.category, new.category]):
+        lists.append((DISHES, {'category': category}, _dish_in(category=category)))
+    # Меню ресторана помечено одним тегом на все категории, поэтому после изменения
+    # перезаписываются и списки категорий, которых изменение не коснулось
+    for restaurant_id in dict.fromkeys([old.restaurant_id, new.restaurant_id]):
+        lists.append((MENU, {'restaurant_id': restaurant_id}, _dish_in(restaurant_id=restaurant_id)))
+        for category in DishCategory:
+            lists.append(
+                (
+                    MENU,
+                    {'restaurant_id': restaurant_id, 'category': category},
+                    _dish_in(restaurant_id=restaurant_id, category=category),
+                )
+            )
+    await write_through(redis, generations, (DISH, {'dish_id': new.id}), old, new, lists)
+
+
+async def restaurant_write_through(redis: Redis, generations: Mapping[str, int], new: RestaurantRead) -> None:
+    lists: List[ListT] = [(RESTAURANTS, {}, _any_row)]
+    await write_through(redis, generations, (RESTAURANT, {'restaurant_id': new.id}), new, new, lists)
+
+
+async def reservation_write_through(
+    redis: Redis, generations: Mapping[str, int], old: ReservationRead, new: ReservationRead
+) -> None:
+    lists: List[ListT] = [
+        (USER_RESERVATIONS, {'user_id': user_id}, _reservation_of(user_id))
+        for user_id in dict.fromkeys([old.user_id, new.user_id])
+    ]
+    for restaurant_id in dict.fromkeys([old.restaurant_id, new.restaurant_id]):
+        lists.append((RESERVATIONS, {'restaurant_id': restaurant_id}, _reservation_at(restaurant_id)))
+    await write_through(redis, generations, (RESERVATION, {'reservation_id': new.id}), old, new, lists)
+
+
+async def user_write_through(redis: Redis, generations: Mapping[str, int], new: UserRead) -> None:
+    await write_through(redis, generations, (USER, {'user_id': new.id}), new, new)
@@ -1,80 +1,198 @@
-from typing import List
+from typing import Any, List, Tuple
 
-from sqlalchemy import and_, select
+from sqlalchemy import ColumnElement, Select, and_, column, delete, func, insert, select, update, values
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from webapp.crud.projection import Projection
+from webapp.crud.returning import BeforeCommitT, all_locked, locked_row, locked_rows
 from webapp.models.sirius.dish import Dish, DishCategory
-from webapp.schema.restaurant.dish import DishCreate, DishRead, DishUpdate
+from webapp.schema.restaurant.dish import DishBulkUpdate, DishCreate, DishRead, DishUpdate
+from webapp.utils.pagination import Page, estimate_count, paginate
 
+DISH = Projection(Dish, DishRead)
 
-async def create_dish(session: AsyncSession, dish_data: DishCreate) -> DishRead | None:
+
+async def create_dish(
+    session: AsyncSession, dish_data: DishCreate, before_commit: BeforeCommitT | None = None
+) -> DishRead:
     dish = Dish(**dish_data.model_dump())
     session.add(dish)
+    await session.flush()
+    if before_commit is not None:
+        await before_commit([dish.id])
     await session.commit()
     await session.refresh(dish)
     return DishRead.model_validate(dish)
 
 
+# Пакет блюд одним многострочным INSERT ... RETURNING, блюда возвращаются в порядке пакета
+async def create_dishes(
+    session: AsyncSession, dishes_data: List[DishCreate], before_commit: BeforeCommitT | None = None
+) -> List[DishRead]:
+    result = (
+        await session.scalars(
+            insert(Dish).returning(Dish, sort_by_parameter_order=True), [dish.model_dump() for dish in dishes_data]
+        )
+    ).all()
+    dishes = [DishRead.model_validate(dish) for dish in result]
+    if before_commit is not None:
+        await before_commit([dish.id for dish in result])
+    await session.commit()
+    return dishes
+
+
 async def get_dish(session: AsyncSession, dish_id: int) -> DishRead | None:
-    statement = select(Dish).where(Dish.id == dish_id)
-    result = await session.execute(statement)
-    dish = result.scalar()
-    if not dish:
-        return None
+    result = await session.execute(DISH.select().where(DISH.c.id == dish_id))
+    return DISH.one(result)
+
+
+async def get_dishes(
+    session: AsyncSession, category: DishCategory | None = None, page: Page | None = None
+) -> List[DishRead] | None:
+    result = await session.execute(_dishes(category, page))
+    return DISH.all(result) or None
 
-    return DishRead.model_validate(dish)
 
+# То же, сразу телом ответа
+async def get_dishes_json(
+    session: AsyncSession, category: DishCategory | None = None, page: Page | None = None
+) -> bytes | None:
+    result = await session.execute(_dishes(category, page))
+    return DISH.json(result)
 
-async def get_dishes(session: AsyncSession, category: DishCategory = None) -> List[DishRead] | None:
-    statement = select(Dish)
+
+def _dishes(category: DishCategory | None = None, page: Page | None = None) -> Select[Any]:
+    statement = DISH.select().order_by(DISH.c.id)
+    if category:
+        statement = statement.where(DISH.c.category == category)
+    return paginate(statement, DISH.c.id, page)
+
+
+async def estimate_dishes(session: AsyncSession, category: DishCategory | None = None) -> int:
+    statement = select(Dish.id)
     if category:
         statement = statement.where(Dish.category == category)
-    result = await session.execute(statement)
-    dishes = result.scalars().all()
-    if not dishes:
+    return await estimate_count(session, statement)
+
+
+async def get_dishes_by_ids(session: AsyncSession, dish_ids: List[int]) -> List[DishRead]:
+    result = await session.execute(DISH.select().where(DISH.c.id.in_(dish_ids)))
+    return DISH.all(result)
+
+
+# Возвращает блюдо до и после изменения
+async def update_dish(session: AsyncSession, dish_id: int, dish_data: DishUpdate) -> Tuple[DishRead, DishRead] | None:
+    values = dish_data.model_dump(exclude_unset=True)
+    if not values:
+        dish = await get_dish(session=session, dish_id=dish_id)
+        return None if dish is None else (dish, dish)
+
+    old = locked_row(Dish, dish_id)
+    result = await session.execute(update(Dish).where(Dish.id == old.c.id).values(values).returning(Dish, *old.c))
+    row = result.first()
+    if row is None:
         return None
 
-    return [DishRead.model_validate(dish) for dish in dishes]
+    dish, *old_values = row
+    updated = DishRead.model_validate(dict(zip(old.c.keys(), old_values))), DishRead.model_validate(dish)
+    await session.commit()
+    return updated
 
 
-async def update_dish(session: AsyncSession, dish_id: int, dish_data: DishUpdate) -> DishRead | None:
-    statement = select(Dish).where(Dish.id == dish_id)
-    result = await session.execute(statement)
+# Возвращает удаленное блюдо
+async def delete_dish(session: AsyncSession, dish_id: int) -> DishRead | None:
+    result = await session.execute(delete(Dish).where(Dish.id == dish_id).returning(Dish))
     dish = result.scalar()
     if not dish:
         return None
 
-    for field, value in dish_data.model_dump(exclude_unset=True).items():
-        setattr(dish, field, value)
+    deleted_dish = DishRead.model_validate(dish)
+    await session.commit()
+    return deleted_dish
+
+
+# Пакетное обновление одним UPDATE ... FROM (VALUES ...): незаданные поля сохраняют прежние значения.
+# id в пакете различны. Возвращает блюда до и после изменения в порядке пакета
+# или None, если каких-то блюд нет - тогда не меняется ничего
+async def update_dishes(
+    session: AsyncSession, dishes_data: List[DishBulkUpdate]
+) -> Tuple[List[DishRead], List[DishRead]] | None:
+    rows = [dish.model_dump(exclude_none=True) for dish in dishes_data]
+    dish_ids = [row['id'] for row in rows]
+    columns = [item for item in Dish.__table__.c if item.name != 'id' and any(item.name in row for row in rows)]
+    if not columns:
+        dishes = await get_dishes_by_ids(session=session, dish_ids=dish_ids)
+        return None if len(dishes) < len(dish_ids) else (dishes, dishes)
+
+    changed = [Dish.__table__.c.id, *columns]
+    changes = values(*(column(item.name, item.type) for item in changed), name='changes').data(
+        [tuple(row.get(item.name) for item in changed) for row in rows]
+    )
+    old = locked_rows(Dish, dish_ids)
+    statement = (
+        update(Dish)
+        .where(Dish.id == changes.c.id, old.c.id == changes.c.id, all_locked(old, dish_ids))
+        .values({item.name: func.coalesce(changes.c[item.name], item) for item in columns})
+        .returning(Dish, *old.c)
+    )
+    updated = (await session.execute(statement)).all()
+    if not updated:
+        return None
 
+    order = {dish_id: position for position, dish_id in enumerate(dish_ids)}
+    result = sorted(updated, key=lambda row: order[row[0].id])
+    old_dishes = [DishRead.model_validate(dict(zip(old.c.keys(), old_values))) for _, *old_values in result]
+    dishes = [DishRead.model_validate(dish) for dish, *_ in result]
     await session.commit()
-    await session.refresh(dish)
-    return DishRead.model_validate(dish)
+    return old_dishes, dishes
 
 
-async def delete_dish(session: AsyncSession, dish_id: int) -> bool:
-    statement = select(Dish).where(Dish.id == dish_id)
-    result = await session.execute(statement)
-    dish = result.scalar()
-    if not dish:
-        return False
+# Возвращает удаленные блюда или None, если каких-то блюд нет - тогда не удаляется ничего
+async def delete_dishes(session: AsyncSession, dish_ids: List[int]) -> List[DishRead] | None:
+    old = locked_rows(Dish, dish_ids)
+    result = await session.scalars(delete(Dish).where(Dish.id == old.c.id, all_locked(old, dish_ids)).returning(Dish))
+    dishes = [DishRead.model_validate(dish) for dish in result]
+    if not dishes:
+        return None
 
-    await session.delete(dish)
     await session.commit()
-    return True
+    return dishes
+
+
+# Меню нескольких ресторанов целиком, в порядке id
+async def get_dishes_by_restaurant_ids(session: AsyncSession, restaurant_ids: List[int]) -> List[DishRead]:
+    result = await session.execute(DISH.select().where(DISH.c.restaurant_id.in_(restaurant_ids)).order_by(DISH.c.id))
+    return DISH.all(result)
 
 
 async def get_dishes_by_restaurant_id_and_category(
-    session: AsyncSession, restaurant_id: int, category: DishCategory = None
+    session: AsyncSession, restaurant_id: int, category: DishCategory | None = None, page: Page | None = None
 ) -> List[DishRead] | None:
+    result = await session.execute(_menu(restaurant_id, category, page))
+    return DISH.all(result) or None
+
+
+# То же, сразу телом ответа
+async def get_menu_json(
+    session: AsyncSession, restaurant_id: int, category: DishCategory | None = None, page: Page | None = None
+) -> bytes | None:
+    result = await session.execute(_menu(restaurant_id, category, page))
+    return DISH.json(result)
+
+
+def _menu(restaurant_id: int, category: DishCategory | None = None, page: Page | None = None) -> Select[Any]:
+    statement = DISH.select().where(and_(*_menu_filters(restaurant_id, category))).order_by(DISH.c.id)
+    return paginate(statement, DISH.c.id, page)
+
+
+async def estimate_dishes_by_restaurant_id_and_category(
+    session: AsyncSession, restaurant_id: int, category: DishCategory | None = None
+) -> int:
+    return await estimate_count(session, select(Dish.id).where(and_(*_menu_filters(restaurant_id, category))))
+
+
+def _menu_filters(restaurant_id: int, category: DishCategory | None = None) -> List[ColumnElement[bool]]:
     filters = [Dish.restaurant_id == restaurant_id]
     if category:
         filters.append(Dish.category == category)
-
-    statement = select(Dish).where(and_(*filters))
-    result = await session.execute(statement)
-    dishes = result.scalars().all()
-    if not dishes:
-        return None
-
-    return [DishRead.model_validate(dish) for dish in dishes]
+    return filters
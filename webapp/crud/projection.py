@@ -0,0 +1,45 @@
+from typing import Any, Generic, List, Type, TypeVar
+
+import orjson
+from pydantic import BaseModel
+from sqlalchemy import Float, Numeric, Result, Select, cast, select
+
+from webapp.models.meta import Base
+
+SchemaT = TypeVar('SchemaT', bound=BaseModel)
+
+
+class Projection(Generic[SchemaT]):
+    # Чтение без ORM: SELECT только колонок схемы ответа по колонкам таблицы (Core), строки не попадают
+    # в identity map сессии и сразу становятся моделью схемы или телом JSON-ответа.
+    # Типы колонок совпадают с типами полей схемы (numeric приводится к float в запросе), поэтому
+    # модели собираются без повторной валидации. Запись по-прежнему идет через ORM
+    def __init__(self, model: Type[Base], schema: Type[SchemaT]) -> None:
+        self.table = model.__table__
+        self.schema = schema
+        self.columns = []
+        for name, field in schema.model_fields.items():
+            column = self.table.c[name]
+            if field.annotation is float and isinstance(column.type, Numeric):
+                column = cast(column, Float).label(name)
+            self.columns.append(column)
+
+    @property
+    def c(self) -> Any:
+        return self.table.c
+
+    def select(self) -> Select[Any]:
+        return select(*self.columns)
+
+    def one(self, result: Result[Any]) -> SchemaT | None:
+        row = result.first()
+        return None if row is None else self.schema.model_construct(**row._asdict())
+
+    def all(self, result: Result[Any]) -> List[SchemaT]:
+        return [self.schema.model_construct(**row._asdict()) for row in result]
+
+    def json(self, result: Result[Any]) -> bytes | None:
+        # Тело ответа со списком без промежуточных моделей: совпадает с dump_models(self.all(result)).
+        # None - строк нет, как у списков, возвращающих None вместо пустого списка
+        rows = [row._asdict() for row in result]
+        return orjson.dumps(rows) if rows else None
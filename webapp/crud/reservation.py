@@ -1,72 +1,145 @@
-from sqlalchemy import select
+from typing import Any, Tuple
+
+from miniopy_async import Minio
+from sqlalchemy import Select, delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from conf.config import settings
+from webapp.crud.projection import Projection
+from webapp.crud.returning import BeforeCommitT, locked_row
+from webapp.db.archive import read_archive
 from webapp.models.sirius.reservation import Reservation
+from webapp.models.sirius.reservation_archive import ReservationArchive
 from webapp.schema.reservation.reservation import ReservationCreate, ReservationRead, ReservationUpdate
+from webapp.utils.pagination import Page, estimate_count, paginate
+
+RESERVATION = Projection(Reservation, ReservationRead)
 
 
-async def create_reservation(session: AsyncSession, reservation_data: ReservationCreate) -> ReservationRead | None:
+async def create_reservation(
+    session: AsyncSession, reservation_data: ReservationCreate, before_commit: BeforeCommitT | None = None
+) -> ReservationRead:
     reservation = Reservation(**reservation_data.model_dump())
     session.add(reservation)
+    await session.flush()
+    if before_commit is not None:
+        await before_commit([reservation.id])
     await session.commit()
     await session.refresh(reservation)
     return ReservationRead.model_validate(reservation)
 
 
 async def get_reservation(session: AsyncSession, reservation_id: int) -> ReservationRead | None:
-    statement = select(Reservation).where(Reservation.id == reservation_id)
-    result = await session.execute(statement)
-    reservation = result.scalar()
-    if not reservation:
-        return None
+    result = await session.execute(RESERVATION.select().where(RESERVATION.c.id == reservation_id))
+    return RESERVATION.one(result)
 
-    return ReservationRead.model_validate(reservation)
 
+async def get_reservations(
+    session: AsyncSession, restaurant_id: int, page: Page | None = None
+) -> list[ReservationRead] | None:
+    statement = RESERVATION.select().where(RESERVATION.c.restaurant_id == restaurant_id).order_by(RESERVATION.c.id)
+    result = await session.execute(paginate(statement, RESERVATION.c.id, page))
+    return RESERVATION.all(result) or None
 
-async def get_reservations(session: AsyncSession, restaurant_id: int) -> list[ReservationRead] | None:
-    statement = select(Reservation).where(Reservation.id == restaurant_id)
-    result = await session.execute(statement)
-    reservations = result.scalars().all()
-    if not reservations:
-        return None
 
-    return [ReservationRead.model_validate(reservation) for reservation in reservations]
+async def estimate_reservations(session: AsyncSession, restaurant_id: int) -> int:
+    return await estimate_count(session, select(Reservation.id).where(Reservation.restaurant_id == restaurant_id))
+
 
+async def get_reservations_by_ids(session: AsyncSession, reservation_ids: list[int]) -> list[ReservationRead]:
+    result = await session.execute(RESERVATION.select().where(RESERVATION.c.id.in_(reservation_ids)))
+    return RESERVATION.all(result)
 
+
+# Возвращает бронирование до и после изменения
 async def update_reservation(
     session: AsyncSession, reservation_id: int, reservation_data: ReservationUpdate
-) -> ReservationRead | None:
-    statement = select(Reservation).where(Reservation.id == reservation_id)
-    result = await session.execute(statement)
-    reservation = result.scalar()
-    if not reservation:
+) -> Tuple[ReservationRead, ReservationRead] | None:
+    values = reservation_data.model_dump(exclude_unset=True)
+    if not values:
+        reservation = await get_reservation(session=session, reservation_id=reservation_id)
+        return None if reservation is None else (reservation, reservation)
+
+    old = locked_row(Reservation, reservation_id)
+    result = await session.execute(
+        update(Reservation).where(Reservation.id == old.c.id).values(values).returning(Reservation, *old.c)
+    )
+    row = result.first()
+    if row is None:
         return None
 
-    for field, value in reservation_data.model_dump(exclude_unset=True).items():
-        setattr(reservation, field, value)
-
+    reservation, *old_values = row
+    updated = (
+        ReservationRead.model_validate(dict(zip(old.c.keys(), old_values))),
+        ReservationRead.model_validate(reservation),
+    )
     await session.commit()
-    await session.refresh(reservation)
-    return ReservationRead.model_validate(reservation)
+    return updated
 
 
-async def delete_reservation(session: AsyncSession, reservation_id: int) -> bool:
-    statement = select(Reservation).where(Reservation.id == reservation_id)
-    result = await session.execute(statement)
+# Возвращает удаленное бронирование
+async def delete_reservation(session: AsyncSession, reservation_id: int) -> ReservationRead | None:
+    result = await session.execute(delete(Reservation).where(Reservation.id == reservation_id).returning(Reservation))
     reservation = result.scalar()
     if not reservation:
-        return False
-
-    await session.delete(reservation)
-    await session.commit()
-    return True
-
-
-async def get_reservations_for_user(session: AsyncSession, user_id: int) -> list[ReservationRead] | None:
-    statement = select(Reservation).where(Reservation.user_id == user_id)
-    result = await session.execute(statement)
-    reservations = result.scalars().all()
-    if not reservations:
         return None
 
-    return [ReservationRead.model_validate(reservation) for reservation in reservations]
+    deleted_reservation = ReservationRead.model_validate(reservation)
+    await session.commit()
+    return deleted_reservation
+
+
+# С archive в список попадают и бронирования из архива (секции прошлых месяцев, выгруженные в MinIO)
+async def get_reservations_for_user(
+    session: AsyncSession, user_id: int, page: Page | None = None, archive: Minio | None = None
+) -> list[ReservationRead] | None:
+    result = await session.execute(_user_reservations(user_id, page))
+    reservations = RESERVATION.all(result)
+    if archive is not None:
+        archived = await get_archived_reservations_for_user(session=session, archive=archive, user_id=user_id)
+        reservations = _merge_pages(reservations, archived, page)
+    return reservations or None
+
+
+async def get_archived_reservations_for_user(
+    session: AsyncSession, archive: Minio, user_id: int
+) -> list[ReservationRead]:
+    statement = (
+        select(ReservationArchive.object_name, ReservationArchive.restaurant_id)
+        .where(ReservationArchive.user_id == user_id)
+        .distinct()
+    )
+    objects: dict[str, set[int]] = {}
+    for name, restaurant_id in await session.execute(statement):
+        objects.setdefault(name, set()).add(restaurant_id)
+    if not objects:
+        return []
+    rows = await read_archive(archive, settings.RESERVATION_ARCHIVE_BUCKET, objects, user_id)
+    return [ReservationRead.model_validate(row) for row in rows]
+
+
+def _merge_pages(
+    reservations: list[ReservationRead], archived: list[ReservationRead], page: Page | None
+) -> list[ReservationRead]:
+    # Та же страница по ключу (id) по объединению таблицы и архива; строка в таблице важнее копии в архиве
+    merged = {reservation.id: reservation for reservation in archived}
+    merged.update((reservation.id, reservation) for reservation in reservations)
+    ordered = sorted(merged.values(), key=lambda reservation: reservation.id)
+    if page is None:
+        return ordered
+    return [reservation for reservation in ordered if reservation.id > page.after][: page.limit]
+
+
+# Бронирования пользователя из таблицы сразу телом ответа
+async def get_reservations_for_user_json(session: AsyncSession, user_id: int, page: Page | None = None) -> bytes | None:
+    result = await session.execute(_user_reservations(user_id, page))
+    return RESERVATION.json(result)
+
+
+def _user_reservations(user_id: int, page: Page | None = None) -> Select[Any]:
+    statement = RESERVATION.select().where(RESERVATION.c.user_id == user_id).order_by(RESERVATION.c.id)
+    return paginate(statement, RESERVATION.c.id, page)
+
+
+async def estimate_reservations_for_user(session: AsyncSession, user_id: int) -> int:
+    return await estimate_count(session, select(Reservation.id).where(Reservation.user_id == user_id))
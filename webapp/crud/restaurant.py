@@ -1,64 +1,126 @@
-from typing import List
+from datetime import datetime
+from typing import Any, List
 
-from sqlalchemy import select
+from sqlalchemy import Select, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from webapp.crud.projection import Projection
+from webapp.crud.returning import BeforeCommitT, json_rows, rows_from_json
+from webapp.models.sirius.dish import Dish
+from webapp.models.sirius.reservation import Reservation
+from webapp.models.sirius.reservation_archive import ReservationArchive
 from webapp.models.sirius.restaurant import Restaurant
-from webapp.schema.restaurant.restaurant import RestaurantCreate, RestaurantRead, RestaurantUpdate
+from webapp.schema.restaurant.restaurant import RestaurantCreate, RestaurantDeleted, RestaurantRead, RestaurantUpdate
+from webapp.utils.pagination import Page, estimate_count, paginate
 
+RESTAURANT = Projection(Restaurant, RestaurantRead)
 
-async def create_restaurant(session: AsyncSession, restaurant_data: RestaurantCreate) -> RestaurantRead | None:
+
+async def create_restaurant(
+    session: AsyncSession, restaurant_data: RestaurantCreate, before_commit: BeforeCommitT | None = None
+) -> RestaurantRead:
     restaurant = Restaurant(**restaurant_data.model_dump())
     session.add(restaurant)
+    await session.flush()
+    if before_commit is not None:
+        await before_commit([restaurant.id])
     await session.commit()
     await session.refresh(restaurant)
     return RestaurantRead.model_validate(restaurant)
 
 
 async def get_restaurant(session: AsyncSession, restaurant_id: int) -> RestaurantRead | None:
-    statement = select(Restaurant).where(Restaurant.id == restaurant_id)
-    result = await session.execute(statement)
-    restaurant = result.scalar()
-    if not restaurant:
-        return None
+    result = await session.execute(RESTAURANT.select().where(RESTAURANT.c.id == restaurant_id))
+    return RESTAURANT.one(result)
 
-    return RestaurantRead.model_validate(restaurant)
+
+async def get_restaurants(session: AsyncSession, page: Page | None = None) -> List[RestaurantRead] | None:
+    result = await session.execute(_restaurants(page))
+    return RESTAURANT.all(result) or None
+
+
+# То же, сразу телом ответа
+async def get_restaurants_json(session: AsyncSession, page: Page | None = None) -> bytes | None:
+    result = await session.execute(_restaurants(page))
+    return RESTAURANT.json(result)
+
+
+def _restaurants(page: Page | None = None) -> Select[Any]:
+    return paginate(RESTAURANT.select().order_by(RESTAURANT.c.id), RESTAURANT.c.id, page)
+
+
+async def estimate_restaurants(session: AsyncSession) -> int:
+    return await estimate_count(session, select(Restaurant.id))
 
 
-async def get_restaurants(session: AsyncSession) -> List[RestaurantRead] | None:
-    statement = select(Restaurant)
+# Рестораны с наибольшим числом бронирований на даты от since; рестораны без них - следом в порядке id
+async def get_busiest_restaurants(session: AsyncSession, since: datetime, limit: int) -> List[RestaurantRead]:
+    reservations = (
+        select(Reservation.restaurant_id, func.count().label('count'))
+        .where(Reservation.date_reserv >= since)
+        .group_by(Reservation.restaurant_id)
+        .subquery()
+    )
+    statement = (
+        RESTAURANT.select()
+        .outerjoin(reservations, reservations.c.restaurant_id == RESTAURANT.c.id)
+        .order_by(func.coalesce(reservations.c.count, 0).desc(), RESTAURANT.c.id)
+        .limit(limit)
+    )
     result = await session.execute(statement)
-    restaurants = result.scalars().all()
-    if not restaurants:
-        return None
+    return RESTAURANT.all(result)
+
 
-    return [RestaurantRead.model_validate(restaurant) for restaurant in restaurants]
+async def get_restaurants_by_ids(session: AsyncSession, restaurant_ids: List[int]) -> List[RestaurantRead]:
+    result = await session.execute(RESTAURANT.select().where(RESTAURANT.c.id.in_(restaurant_ids)))
+    return RESTAURANT.all(result)
 
 
 async def update_restaurant(
     session: AsyncSession, restaurant_id: int, restaurant_data: RestaurantUpdate
 ) -> RestaurantRead | None:
-    statement = select(Restaurant).where(Restaurant.id == restaurant_id)
-    result = await session.execute(statement)
+    values = restaurant_data.model_dump(exclude_unset=True)
+    if not values:
+        return await get_restaurant(session=session, restaurant_id=restaurant_id)
+
+    result = await session.execute(
+        update(Restaurant).where(Restaurant.id == restaurant_id).values(values).returning(Restaurant)
+    )
     restaurant = result.scalar()
     if not restaurant:
         return None
 
-    for field, value in restaurant_data.model_dump(exclude_unset=True).items():
-        setattr(restaurant, field, value)
-
+    updated_restaurant = RestaurantRead.model_validate(restaurant)
     await session.commit()
-    await session.refresh(restaurant)
-    return RestaurantRead.model_validate(restaurant)
-
-
-async def delete_restaurant(session: AsyncSession, restaurant_id: int) -> bool:
-    statement = select(Restaurant).where(Restaurant.id == restaurant_id)
-    result = await session.execute(statement)
-    restaurant = result.scalar()
-    if not restaurant:
-        return False
+    return updated_restaurant
+
+
+# Возвращает удаленный ресторан вместе с каскадно удаленными блюдами и бронированиями.
+# Блюда, бронирования и записи каталога архива бронирований удаляются в том же запросе (DELETE ... RETURNING в CTE)
+async def delete_restaurant(session: AsyncSession, restaurant_id: int) -> RestaurantDeleted | None:
+    menu = delete(Dish).where(Dish.restaurant_id == restaurant_id).returning(*Dish.__table__.c).cte('menu')
+    reservations = (
+        delete(Reservation)
+        .where(Reservation.restaurant_id == restaurant_id)
+        .returning(*Reservation.__table__.c)
+        .cte('reservations')
+    )
+    archive = delete(ReservationArchive).where(ReservationArchive.restaurant_id == restaurant_id).cte('archive')
+    statement = (
+        delete(Restaurant)
+        .where(Restaurant.id == restaurant_id)
+        .returning(Restaurant, json_rows(menu), json_rows(reservations))
+        .add_cte(archive)
+    )
+    row = (await session.execute(statement)).first()
+    if row is None:
+        return None
 
-    await session.delete(restaurant)
+    restaurant, deleted_menu, deleted_reservations = row
+    deleted_restaurant = RestaurantDeleted(
+        **RestaurantRead.model_validate(restaurant).model_dump(),
+        menu=rows_from_json(Dish, deleted_menu),
+        reservations=rows_from_json(Reservation, deleted_reservations),
+    )
     await session.commit()
-    return True
+    return deleted_restaurant
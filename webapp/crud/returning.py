@@ -0,0 +1,48 @@
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Type
+
+from sqlalchemy import CTE, JSON, ColumnElement, ScalarSelect, func, literal_column, select
+
+from webapp.models.meta import Base
+
+# Вызывается с id новых строк после INSERT, но до коммита (например, чтобы отметить id в фильтре существования):
+# ошибка в нем откатывает запись
+BeforeCommitT = Callable[[List[int]], Awaitable[None]]
+
+
+def locked_row(model: Type[Base], key: int) -> CTE:
+    # Строка до изменения для UPDATE ... FROM old RETURNING: блокируется в том же запросе,
+    # поэтому прежние и новые значения возвращаются за один запрос к БД
+    return select(*model.__table__.c).where(model.id == key).with_for_update().cte('old')
+
+
+def locked_rows(model: Type[Base], keys: Sequence[int]) -> CTE:
+    # То же для пакетного изменения нескольких строк
+    return select(*model.__table__.c).where(model.id.in_(keys)).with_for_update().cte('old')
+
+
+def all_locked(cte: CTE, keys: Sequence[int]) -> ColumnElement[bool]:
+    # Условие для пакета "все или ничего": запрос меняет строки, только если нашлись все (различные) ключи
+    return select(func.count()).select_from(cte).scalar_subquery() == len(keys)
+
+
+def json_rows(cte: CTE) -> ScalarSelect[Any]:
+    # Строки CTE (например, каскадно удаленные DELETE ... RETURNING) одним JSON-массивом в RETURNING основного запроса
+    return (
+        select(func.coalesce(func.json_agg(cte.table_valued()), literal_column("'[]'::json"), type_=JSON))
+        .select_from(cte)
+        .scalar_subquery()
+    )
+
+
+def rows_from_json(model: Type[Base], rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # json_agg отдает перечисления именами меток, остальные значения схемы pydantic разбирают сами
+    enums = {
+        column.name: column.type.enum_class
+        for column in model.__table__.c
+        if getattr(column.type, 'enum_class', None) is not None
+    }
+    for row in rows:
+        for name, enum_class in enums.items():
+            if row.get(name) is not None:
+                row[name] = enum_class[row[name]]
+    return rows
@@ -1,8 +1,12 @@
-from sqlalchemy import select
+from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from webapp.crud.returning import json_rows, rows_from_json
+from webapp.models.sirius.reservation import Reservation
+from webapp.models.sirius.reservation_archive import ReservationArchive
 from webapp.models.sirius.user import User as SQLAUser
-from webapp.schema.login.user import UserCreate, UserLogin, UserRead, UserUpdate
+from webapp.models.sirius.user_file import UserFile
+from webapp.schema.login.user import UserCreate, UserDeleted, UserLogin, UserRead, UserUpdate
 from webapp.utils.auth.password import hash_password
 
 
@@ -16,19 +20,21 @@ async def create_user(session: AsyncSession, user_data: UserCreate) -> UserRead:
 
 
 async def update_user(session: AsyncSession, user_id: int, user_data: UserUpdate) -> UserRead | None:
-    result = await session.execute(select(SQLAUser).where(SQLAUser.id == user_id))
-    user = result.scalars().first()
-    if user:
-        if user_data.password:
-            hashed_password = hash_password(user_data.password)
-            user.hashed_password = hashed_password
-        user_data_dict = user_data.model_dump(exclude={'password'})
-        for var, value in user_data_dict.items():
-            setattr(user, var, value) if value else None
-        await session.commit()
-        await session.refresh(user)
-        return UserRead.model_validate(user)
-    return None
+    # Пустые поля не меняются
+    values = {field: value for field, value in user_data.model_dump(exclude={'password'}).items() if value}
+    if user_data.password:
+        values['hashed_password'] = hash_password(user_data.password)
+    if not values:
+        return await get_user_by_id(session=session, user_id=user_id)
+
+    result = await session.execute(update(SQLAUser).where(SQLAUser.id == user_id).values(values).returning(SQLAUser))
+    user = result.scalar()
+    if not user:
+        return None
+
+    updated_user = UserRead.model_validate(user)
+    await session.commit()
+    return updated_user
 
 
 async def get_user(session: AsyncSession, user_info: UserLogin) -> SQLAUser | None:
@@ -50,11 +56,31 @@ async def get_user_by_id(session: AsyncSession, user_id: int) -> UserRead | None
     return None
 
 
-async def delete_user(session: AsyncSession, user_id: int) -> bool:
-    result = await session.execute(select(SQLAUser).where(SQLAUser.id == user_id))
-    result = result.scalars().first()
-    if result:
-        await session.delete(result)
-        await session.commit()
-        return True
-    return False
+# Возвращает удаленного пользователя вместе с каскадно удаленными бронированиями.
+# Бронирования, связи с файлами и записи каталога архива бронирований удаляются в том же запросе (DELETE в CTE)
+async def delete_user(session: AsyncSession, user_id: int) -> UserDeleted | None:
+    reservations = (
+        delete(Reservation)
+        .where(Reservation.user_id == user_id)
+        .returning(*Reservation.__table__.c)
+        .cte('reservations')
+    )
+    files = delete(UserFile).where(UserFile.user_id == user_id).cte('files')
+    archive = delete(ReservationArchive).where(ReservationArchive.user_id == user_id).cte('archive')
+    statement = (
+        delete(SQLAUser)
+        .where(SQLAUser.id == user_id)
+        .returning(SQLAUser, json_rows(reservations))
+        .add_cte(files, archive)
+    )
+    row = (await session.execute(statement)).first()
+    if row is None:
+        return None
+
+    user, deleted_reservations = row
+    deleted_user = UserDeleted(
+        **UserRead.model_validate(user).model_dump(),
+        reservations=rows_from_json(Reservation, deleted_reservations),
+    )
+    await session.commit()
+    return deleted_user
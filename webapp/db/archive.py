@@ -0,0 +1,136 @@
+import gzip
+import time
+import asyncio
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import IO, Any, Dict, List, Mapping, Set, Tuple
+
+import orjson
+import aiohttp
+from miniopy_async import Minio
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from webapp.db.partitions import lock_partitions, partition_months, partition_name
+from webapp.models.meta import DEFAULT_SCHEMA
+from webapp.models.sirius.reservation_archive import ReservationArchive
+
+# Архив бронирований: строки секции месяца выгружаются в MinIO сжатым JSONL (объект на шард user_id % shards,
+# чтобы история пользователя читала не весь месяц), в каталог sirius.reservation_archive записывается,
+# в каких объектах лежат бронирования каждого пользователя в каждом ресторане, и секция удаляется.
+# Все это - одна транзакция: до ее коммита строки читаются из таблицы, после - из архива. Прерванная архивация
+# не меняет БД, а выгруженные ею объекты без записей каталога не читаются
+
+BATCH_SIZE = 10_000
+CATALOG_BATCH_SIZE = 5_000
+ARCHIVE_READ_CONCURRENCY = 8
+
+ShardT = Tuple[IO[bytes], gzip.GzipFile]
+
+
+@dataclass
+class ArchiveReport:
+    month: date
+    rows: int = 0
+    objects: int = 0
+    seconds: float = 0.0
+    # Для инвалидации кэша и фильтра существования бронирований
+    reservation_ids: Set[int] = field(default_factory=set)
+    user_ids: Set[int] = field(default_factory=set)
+    restaurant_ids: Set[int] = field(default_factory=set)
+
+
+def object_name(month: date, run: str, shard: int) -> str:
+    # run - время запуска архивации: повторная архивация месяца (строки, пришедшие после первой) не перезаписывает
+    # уже выгруженные объекты
+    return f'reservation/{month:%Y-%m}/{run}/{shard:03d}.jsonl.gz'
+
+
+async def ensure_bucket(client: Minio, bucket: str) -> None:
+    if not await client.bucket_exists(bucket):
+        await client.make_bucket(bucket)
+
+
+async def archive_month(engine: AsyncEngine, client: Minio, bucket: str, month: date, shards: int) -> ArchiveReport:
+    start = time.perf_counter()
+    report = ArchiveReport(month=month)
+    name = f'{DEFAULT_SCHEMA}.{partition_name(month)}'
+    run = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+    files: Dict[int, ShardT] = {}
+    # (user_id, restaurant_id, шард) -> строк
+    catalog_rows: Dict[Tuple[int, int, int], int] = {}
+    try:
+        async with engine.begin() as connection:
+            await lock_partitions(connection)
+            if month not in await partition_months(connection):
+                return report
+            # Запись в секцию ждет конца архивации, чтение идет как обычно
+            await connection.execute(text(f'LOCK TABLE {name} IN SHARE MODE'))
+            # Явный курсор: его можно закрыть до удаления секции (курсор stream остается открытым до конца транзакции)
+            await connection.execute(text(f'DECLARE archive NO SCROLL CURSOR FOR SELECT * FROM {name}'))
+            while rows := (await connection.execute(text(f'FETCH {BATCH_SIZE} FROM archive'))).mappings().all():
+                for row in rows:
+                    shard = row['user_id'] % shards
+                    if shard not in files:
+                        raw: IO[bytes] = tempfile.TemporaryFile()
+                        files[shard] = raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6)
+                    files[shard][1].write(orjson.dumps(dict(row)) + b'\n')
+                    key = (row['user_id'], row['restaurant_id'], shard)
+                    catalog_rows[key] = catalog_rows.get(key, 0) + 1
+                    report.reservation_ids.add(row['id'])
+                report.rows += len(rows)
+            await connection.execute(text('CLOSE archive'))
+
+            for shard, (raw, compressed) in files.items():
+                compressed.close()
+                length = raw.tell()
+                raw.seek(0)
+                await client.put_object(
+                    bucket, object_name(month, run, shard), raw, length, content_type='application/x-ndjson'
+                )
+                report.objects += 1
+
+            catalog = [
+                {
+                    'user_id': user_id,
+                    'restaurant_id': restaurant_id,
+                    'month': month,
+                    'object_name': object_name(month, run, shard),
+                    'rows': rows,
+                }
+                for (user_id, restaurant_id, shard), rows in catalog_rows.items()
+            ]
+            for offset in range(0, len(catalog), CATALOG_BATCH_SIZE):
+                await connection.execute(insert(ReservationArchive), catalog[offset : offset + CATALOG_BATCH_SIZE])
+            await connection.execute(text(f'DROP TABLE {name}'))
+    finally:
+        for raw, _ in files.values():
+            raw.close()
+
+    report.user_ids = {user_id for user_id, _, _ in catalog_rows}
+    report.restaurant_ids = {restaurant_id for _, restaurant_id, _ in catalog_rows}
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+async def read_archive(
+    client: Minio, bucket: str, objects: Mapping[str, Set[int]], user_id: int
+) -> List[Dict[str, Any]]:
+    # Бронирования пользователя из объектов архива: objects - объект и рестораны, бронирования в которых
+    # еще числятся в каталоге. В объекте шарда лежат и чужие бронирования
+    semaphore = asyncio.Semaphore(ARCHIVE_READ_CONCURRENCY)
+
+    async def read(session: aiohttp.ClientSession, name: str) -> List[Dict[str, Any]]:
+        async with semaphore:
+            response = await client.get_object(bucket, name, session)
+            try:
+                data = await response.read()
+            finally:
+                response.release()
+        rows = (orjson.loads(line) for line in gzip.decompress(data).splitlines() if line)
+        return [row for row in rows if row['user_id'] == user_id and row['restaurant_id'] in objects[name]]
+
+    async with aiohttp.ClientSession() as session:
+        found = await asyncio.gather(*(read(session, name) for name in objects))
+    return [row for rows in found for row in rows]
@@ -0,0 +1,305 @@
+import csv
+import json
+import time
+import asyncio
+import decimal
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+import orjson
+from sqlalchemy import Boolean, DateTime, Enum, Integer, Numeric, Table, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql.schema import ScalarElementColumnDefault
+
+from webapp.models.meta import metadata
+
+# Загрузка данных в БД через COPY: файл читается потоково, строки приводятся к типам колонок пачками,
+# и каждая пачка уходит в БД отдельным COPY, пока читается следующая. Память не зависит от размера файла.
+# Имя файла без расширения - имя таблицы (sirius.reservation.json), формат - по расширению
+
+JSON_CHUNK_SIZE = 1024 * 1024
+JSON_DECODER = json.JSONDecoder()
+
+# Вторичные индексы и внешние ключи таблицы: (удаление, восстановление). Построить индекс и проверить ключ
+# одним проходом после загрузки в несколько раз быстрее, чем обновлять индексы и проверять ключи на каждую строку
+# Индекс секционированной таблицы (sirius.reservation) пересоздается без ONLY - сразу на всех секциях
+DEFERRED_QUERY = '''
+SELECT 'DROP INDEX ' || indexrelid::regclass::text, replace(pg_get_indexdef(indexrelid), ' ON ONLY ', ' ON ')
+FROM pg_index
+WHERE indrelid = $1::regclass AND NOT EXISTS (SELECT FROM pg_constraint WHERE conindid = indexrelid)
+UNION ALL
+SELECT format('ALTER TABLE %s DROP CONSTRAINT %I', conrelid::regclass, conname),
+       format('ALTER TABLE %s ADD CONSTRAINT %I %s', conrelid::regclass, conname, pg_get_constraintdef(oid))
+FROM pg_constraint
+WHERE conrelid = $1::regclass AND contype = 'f'
+'''
+
+ConvertT = Callable[[Any], Any]
+RowT = Tuple[Any, ...]
+BatchT = Tuple[List[str], List[RowT]]
+
+
+@dataclass
+class LoadReport:
+    table: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def read_json(path: Path) -> Iterator[Dict[str, Any]]:
+    # Массив объектов читается кусками по JSON_CHUNK_SIZE, объекты разбираются по одному
+    with open(path, 'r', encoding='utf-8') as file:
+        buffer = ''
+        position = 0
+        started = False
+        eof = False
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] != '[':
+                    raise ValueError(f'{path}: ожидается JSON-массив объектов')
+                started = True
+                position += 1
+                continue
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            try:
+                item, end = JSON_DECODER.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = file.read(JSON_CHUNK_SIZE)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                if eof and not buffer.strip():
+                    raise ValueError(f'{path}: JSON-массив не закрыт')
+                continue
+            yield item
+            position = end
+
+
+def read_json_lines(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, 'rb') as file:
+        for line in file:
+            if line.strip():
+                yield orjson.loads(line)
+
+
+def read_csv(path: Path) -> Iterator[Dict[str, Any]]:
+    # Пустое значение CSV - NULL для всех колонок, кроме строковых
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        yield from csv.DictReader(file)
+
+
+READERS: Dict[str, Callable[[Path], Iterator[Dict[str, Any]]]] = {
+    '.json': read_json,
+    '.jsonl': read_json_lines,
+    '.ndjson': read_json_lines,
+    '.csv': read_csv,
+}
+
+
+def table_for(path: Path) -> Table:
+    # sirius.reservation.jsonl -> sirius.reservation
+    name = path.name[: -len(path.suffix)]
+    if path.suffix not in READERS:
+        raise ValueError(f'{path}: неизвестный формат, ожидается один из {", ".join(READERS)}')
+    if name not in metadata.tables:
+        raise ValueError(f'{path}: таблица {name} не найдена')
+    return metadata.tables[name]
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 't', 'true', 'y', 'yes')
+    return bool(value)
+
+
+def _to_datetime(value: Any) -> datetime:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _to_enum(enum_class: Any) -> ConvertT:
+    # В БД хранятся имена меток; в файле допустимы и имена, и значения
+    names = {member.value: member.name for member in enum_class}
+
+    def convert(value: Any) -> str:
+        if isinstance(value, enum_class):
+            return value.name
+        return names.get(value, value)
+
+    return convert
+
+
+def _to_decimal(value: Any) -> decimal.Decimal:
+    return decimal.Decimal(str(value))
+
+
+def _converter(column: Any) -> ConvertT:
+    column_type = column.type
+    if isinstance(column_type, Enum) and column_type.enum_class is not None:
+        convert = _to_enum(column_type.enum_class)
+    elif isinstance(column_type, Boolean):
+        convert = _to_bool
+    elif isinstance(column_type, Integer):
+        convert = int
+    elif isinstance(column_type, Numeric):
+        convert = _to_decimal
+    elif isinstance(column_type, DateTime):
+        convert = _to_datetime
+    else:
+        return lambda value: value
+    return lambda value: None if value is None or value == '' else convert(value)
+
+
+class RowConverter:
+    # Колонки COPY определяются по первой строке файла; отсутствующие в файле колонки
+    # со значением по умолчанию на стороне приложения (status брони) заполняются им,
+    # остальные (id) получают значение по умолчанию БД
+    def __init__(self, table: Table, first: Dict[str, Any]) -> None:
+        unknown = set(first) - set(table.c.keys())
+        if unknown:
+            raise ValueError(f'{table.fullname}: неизвестные колонки {", ".join(sorted(unknown))}')
+        self.columns = [
+            column.name
+            for column in table.c
+            if column.name in first or isinstance(column.default, ScalarElementColumnDefault)
+        ]
+        self.defaults = {
+            column.name: column.default.arg
+            for column in table.c
+            if isinstance(column.default, ScalarElementColumnDefault)
+        }
+        self.converters = [_converter(table.c[name]) for name in self.columns]
+
+    def __call__(self, rows: Sequence[Dict[str, Any]]) -> List[RowT]:
+        return [
+            tuple(
+                convert(row.get(name, self.defaults.get(name))) for name, convert in zip(self.columns, self.converters)
+            )
+            for row in rows
+        ]
+
+
+def read_batches(path: Path, table: Table, batch_size: int) -> Iterator[BatchT]:
+    rows = READERS[path.suffix](path)
+    converter: RowConverter | None = None
+    batch: List[Dict[str, Any]] = []
+    for row in rows:
+        if converter is None:
+            converter = RowConverter(table, row)
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield converter.columns, converter(batch)
+            batch = []
+    if batch and converter is not None:
+        yield converter.columns, converter(batch)
+
+
+def _next_batch(batches: Iterator[BatchT]) -> BatchT | None:
+    return next(batches, None)
+
+
+async def copy_file(engine: AsyncEngine, path: Path, batch_size: int) -> LoadReport:
+    # Файл грузится в одной транзакции. Следующая пачка читается в потоке, пока предыдущая записывается
+    table = table_for(path)
+    start = time.perf_counter()
+    count = 0
+    batches = read_batches(path, table, batch_size)
+    async with engine.connect() as connection:
+        # COPY идет мимо курсора SQLAlchemy, который сам открывает транзакцию, поэтому транзакция - asyncpg
+        driver: Any = (await connection.get_raw_connection()).driver_connection
+        async with driver.transaction():
+            restore = await defer_indexes(driver, table)
+            pending: asyncio.Task[Any] | None = None
+            try:
+                while True:
+                    batch = await asyncio.to_thread(_next_batch, batches)
+                    if pending is not None:
+                        await pending
+                        pending = None
+                    if batch is None:
+                        break
+                    columns, records = batch
+                    pending = asyncio.create_task(
+                        driver.copy_records_to_table(
+                            table.name, records=records, columns=columns, schema_name=table.schema
+                        )
+                    )
+                    count += len(records)
+            except BaseException:
+                # Ошибка чтения файла: дожидаемся начатого COPY, чтобы откатить транзакцию на свободном соединении
+                if pending is not None:
+                    await asyncio.gather(pending, return_exceptions=True)
+                raise
+            for statement in restore:
+                await driver.execute(statement)
+    return LoadReport(table=table.fullname, rows=count, seconds=time.perf_counter() - start)
+
+
+async def defer_indexes(driver: Any, table: Table) -> List[str]:
+    # Только для пустой таблицы (первичная загрузка): до конца транзакции она заблокирована целиком,
+    # как и (на изменение) таблицы, на которые ссылаются ее внешние ключи. Возвращает команды восстановления
+    if not await driver.fetchval(f'SELECT NOT EXISTS (SELECT FROM {table.fullname})'):
+        return []
+    deferred = await driver.fetch(DEFERRED_QUERY, table.fullname)
+    for drop, _ in deferred:
+        await driver.execute(drop)
+    return [create for _, create in deferred]
+
+
+def load_order(tables: Sequence[Table]) -> List[List[Table]]:
+    # Уровни по внешним ключам: таблицы одного уровня не ссылаются друг на друга и грузятся параллельно
+    levels: Dict[Table, int] = {}
+    for table in metadata.sorted_tables:
+        if table in tables:
+            parents = [key.column.table for key in table.foreign_keys if key.column.table in tables]
+            levels[table] = 1 + max((levels[parent] for parent in parents if parent is not table), default=-1)
+    grouped: Dict[int, List[Table]] = {}
+    for table, level in levels.items():
+        grouped.setdefault(level, []).append(table)
+    return [grouped[level] for level in sorted(grouped)]
+
+
+async def reset_sequences(engine: AsyncEngine, tables: Sequence[Table]) -> None:
+    # Строки с явными id не двигают последовательность: следующий INSERT получил бы занятый id
+    async with engine.begin() as connection:
+        for table in tables:
+            if 'id' not in table.c or not table.c.id.autoincrement:
+                continue
+            await connection.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.fullname}', 'id'), "
+                    f'coalesce(max(id), 1), max(id) IS NOT NULL) FROM {table.fullname}'
+                )
+            )
+
+
+async def load_files(
+    engine: AsyncEngine, paths: Sequence[Path], batch_size: int = 10_000, jobs: int = 4
+) -> List[LoadReport]:
+    # Файлы одной таблицы грузятся по очереди, таблицы одного уровня - до jobs одновременно
+    by_table: Dict[Table, List[Path]] = {}
+    for path in paths:
+        by_table.setdefault(table_for(path), []).append(path)
+
+    semaphore = asyncio.Semaphore(jobs)
+
+    async def load_table(table: Table) -> List[LoadReport]:
+        async with semaphore:
+            return [await copy_file(engine, path, batch_size) for path in by_table[table]]
+
+    reports: List[LoadReport] = []
+    for level in load_order(list(by_table)):
+        for table_reports in await asyncio.gather(*(load_table(table) for table in level)):
+            reports.extend(table_reports)
+    await reset_sequences(engine, list(by_table))
+    return reports
@@ -0,0 +1,14 @@
+from miniopy_async import Minio
+
+from conf.config import settings
+
+minio = Minio(
+    settings.MINIO_ENDPOINT,
+    access_key=settings.MINIO_ACCESS_KEY,
+    secret_key=settings.MINIO_SECRET_KEY,
+    secure=settings.MINIO_SECURE,
+)
+
+
+def get_minio() -> Minio:
+    return minio
@@ -0,0 +1,94 @@
+import re
+from datetime import date, datetime, timezone
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from webapp.models.meta import DEFAULT_SCHEMA
+
+# Бронирования секционированы по месяцам date_reserv (границы - полночь первого числа по UTC).
+# Секция месяца называется reservation_YYYY_MM; даты без своей секции попадают в reservation_default,
+# откуда переносятся в секцию месяца при ее создании. Секции меняет один процесс за раз (advisory lock)
+
+TABLE = f'{DEFAULT_SCHEMA}.reservation'
+DEFAULT_PARTITION = f'{DEFAULT_SCHEMA}.reservation_default'
+PARTITION_NAME = re.compile(r'^reservation_(\d{4})_(\d{2})$')
+LOCK_KEY = 0x72657376
+
+PARTITIONS_QUERY = '''
+SELECT child.relname
+FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+WHERE pg_inherits.inhparent = to_regclass(:table)
+'''
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f'reservation_{month.year:04d}_{month.month:02d}'
+
+
+def partition_month(name: str) -> date | None:
+    found = PARTITION_NAME.match(name)
+    return date(int(found.group(1)), int(found.group(2)), 1) if found else None
+
+
+def partition_bounds(month: date) -> tuple[datetime, datetime]:
+    upper = add_months(month, 1)
+    return (
+        datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+        datetime(upper.year, upper.month, 1, tzinfo=timezone.utc),
+    )
+
+
+async def lock_partitions(connection: AsyncConnection) -> None:
+    # До конца транзакции
+    await connection.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': LOCK_KEY})
+
+
+async def partition_months(connection: AsyncConnection) -> List[date]:
+    result = await connection.execute(text(PARTITIONS_QUERY), {'table': TABLE})
+    months = [partition_month(name) for name in result.scalars()]
+    return sorted(month for month in months if month is not None)
+
+
+async def create_partition(connection: AsyncConnection, month: date) -> None:
+    # Строки месяца, уже попавшие в секцию по умолчанию, переносятся в новую секцию до ее присоединения:
+    # иначе присоединение нарушило бы ограничение секции по умолчанию
+    name = f'{DEFAULT_SCHEMA}.{partition_name(month)}'
+    lower, upper = partition_bounds(month)
+    await connection.execute(text(f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)'))
+    await connection.execute(
+        text(
+            f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date_reserv >= :lower AND date_reserv < :upper '
+            f'RETURNING *) INSERT INTO {name} SELECT * FROM moved'
+        ),
+        {'lower': lower, 'upper': upper},
+    )
+    await connection.execute(
+        text(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')")
+    )
+
+
+async def ensure_partitions(connection: AsyncConnection, today: date, months_ahead: int) -> List[date]:
+    # Секции с текущего месяца на months_ahead вперед и для месяцев, строки которых лежат в секции по умолчанию.
+    # Возвращает созданные месяцы
+    await lock_partitions(connection)
+    current = month_start(today)
+    wanted = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    result = await connection.execute(
+        text(f"SELECT DISTINCT date_trunc('month', date_reserv AT TIME ZONE 'UTC')::date FROM {DEFAULT_PARTITION}")
+    )
+    wanted.update(result.scalars())
+    missing = sorted(wanted - set(await partition_months(connection)))
+    for month in missing:
+        await create_partition(connection, month)
+    return missing
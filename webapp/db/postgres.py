@@ -1,19 +1,75 @@
-from typing import AsyncGenerator
+import time
+import uuid
+from typing import Any, AsyncGenerator, Dict
 
-from sqlalchemy import QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+from starlette.requests import Request
 
 from conf.config import settings
+from webapp.db import replica, statements
+from webapp.metrics import DB_POOL_ACQUIRE_SECONDS, DB_POOL_CONNECTIONS, DB_POOL_TIMEOUTS
 
 
-def create_engine() -> AsyncEngine:
-    return create_async_engine(
-        settings.DB_URL,
-        poolclass=QueuePool,
-        connect_args={
+class MeteredPool(AsyncAdaptedQueuePool):
+    # Пул asyncpg-соединений с метриками занятости и времени ожидания соединения
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_ACQUIRE_SECONDS.observe(time.perf_counter() - start)
+            self.report()
+
+    def _do_return_conn(self, record: ConnectionPoolEntry) -> None:
+        super()._do_return_conn(record)
+        self.report()
+
+    def report(self) -> None:
+        # overflow() отрицателен, пока открыто меньше DB_POOL_SIZE соединений
+        DB_POOL_CONNECTIONS.labels(state='checked_out').set(self.checkedout())
+        DB_POOL_CONNECTIONS.labels(state='idle').set(self.checkedin())
+        DB_POOL_CONNECTIONS.labels(state='overflow').set(max(self.overflow(), 0))
+
+
+def statement_cache_args() -> Dict[str, Any]:
+    # statement_cache_size - LRU asyncpg, prepared_statement_cache_size - LRU подготовленных запросов
+    # в адаптере asyncpg SQLAlchemy, через него выполняются все запросы ORM
+    if settings.DB_PREPARED_STATEMENTS == 'pgbouncer':
+        return {
             'statement_cache_size': 0,
-        },
+            'prepared_statement_cache_size': 0,
+            'prepared_statement_name_func': unique_statement_name,
+        }
+    return {
+        'statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+        'prepared_statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+def unique_statement_name() -> str:
+    # Порядковые имена asyncpg повторяются в разных клиентских соединениях и конфликтуют на общем серверном
+    return f'__asyncpg_{uuid.uuid4().hex}__'
+
+
+def create_engine(url: str | None = None) -> AsyncEngine:
+    engine = create_async_engine(
+        url or settings.DB_URL,
+        poolclass=MeteredPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        connect_args=statement_cache_args(),
     )
+    statements.instrument(engine)
+    return engine
 
 
 def create_session(engine: AsyncEngine | None = None) -> async_sessionmaker[AsyncSession]:
@@ -28,7 +84,27 @@ def create_session(engine: AsyncEngine | None = None) -> async_sessionmaker[Asyn
 engine = create_engine()
 async_session = create_session(engine)
 
+read_engine = create_engine(settings.DB_REPLICA_URL) if settings.DB_REPLICA_URL else None
+async_read_session = create_session(read_engine) if read_engine is not None else async_session
+
+
+async def read_session_maker(request: Request | None = None) -> async_sessionmaker[AsyncSession]:
+    # Реплика, если она успевает за записями (см. webapp/db/replica.py), иначе основная БД
+    if read_engine is not None and await replica.replica_usable(read_engine, request):
+        return async_read_session
+    return async_session
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with (await read_session_maker(request))() as session:
+        yield session
+
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session() as session:
+async def get_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    # GET и HEAD только читают и направляются на реплику автоматически
+    if request.method in replica.READ_METHODS:
+        session_maker = await read_session_maker(request)
+    else:
+        session_maker = async_session
+    async with session_maker() as session:
         yield session
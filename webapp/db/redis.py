@@ -1,6 +1,9 @@
+import asyncio
+
 from redis.asyncio import Redis
 
 redis: Redis
+invalidation_listener: asyncio.Task[None] | None = None
 
 
 def get_redis() -> Redis:
@@ -0,0 +1,118 @@
+import math
+import time
+import asyncio
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.requests import Request
+from starlette.responses import Response
+
+from conf.config import settings
+from webapp.cache.client import message_handlers
+from webapp.cache.local import local_cache
+from webapp.metrics import DB_READ_ROUTES, DB_REPLICA_LAG
+
+READ_METHODS = frozenset(('GET', 'HEAD'))
+
+# Время последней записи клиента (unix time): в течение DB_READ_YOUR_WRITES_TTL его чтения идут на основную БД
+READ_YOUR_WRITES_COOKIE = 'sirius_wrote_at'
+
+# Отставание воспроизведения WAL на реплике. Если все полученное уже воспроизведено, отставания нет,
+# даже если последняя транзакция была давно; узел не в режиме восстановления (стенд без репликации) не отстает
+LAG_QUERY = text(
+    '''
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    '''
+)
+
+# Время последней известной записи в БД: своей (middleware) или другого процесса (канал инвалидаций)
+last_write_at: float = 0.0
+# Последняя измеренная задержка реплики, None - реплика недоступна
+lag: float | None = None
+measured_at: float = -math.inf
+_probe_lock = asyncio.Lock()
+
+
+def note_write() -> None:
+    global last_write_at
+    last_write_at = time.time()
+
+
+async def replica_lag(engine: AsyncEngine) -> float | None:
+    global lag, measured_at
+
+    if time.monotonic() - measured_at < settings.DB_REPLICA_LAG_CHECK_INTERVAL:
+        return lag
+    async with _probe_lock:
+        if time.monotonic() - measured_at >= settings.DB_REPLICA_LAG_CHECK_INTERVAL:
+            try:
+                lag = await asyncio.wait_for(_measure_lag(engine), timeout=settings.DB_REPLICA_LAG_CHECK_TIMEOUT)
+                DB_REPLICA_LAG.set(lag)
+            except (SQLAlchemyError, OSError, asyncio.TimeoutError):
+                logging.warning('Replica lag check failed, reading from primary', exc_info=True)
+                lag = None
+            measured_at = time.monotonic()
+    return lag
+
+
+async def _measure_lag(engine: AsyncEngine) -> float:
+    async with engine.connect() as connection:
+        return float(await connection.scalar(LAG_QUERY) or 0)
+
+
+async def replica_usable(engine: AsyncEngine, request: Request | None = None) -> bool:
+    reason = await _primary_reason(engine, request)
+    DB_READ_ROUTES.labels(target='primary' if reason else 'replica', reason=reason or 'ok').inc()
+    return reason is None
+
+
+async def _primary_reason(engine: AsyncEngine, request: Request | None) -> str | None:
+    if request is not None and wrote_recently(request):
+        return 'read_your_writes'
+    # Чтения с реплики попадают в общий кэш: значение, прочитанное до того, как реплика получила запись,
+    # пережило бы инвалидацию. Поэтому реплика используется, только если все известные записи старше
+    # допустимой задержки, а о записях других процессов без подписки на инвалидации не узнать
+    if not local_cache.enabled:
+        return 'no_subscription'
+    if time.time() - last_write_at < settings.DB_REPLICA_MAX_LAG:
+        return 'recent_write'
+    current = await replica_lag(engine)
+    if current is None:
+        return 'unavailable'
+    if current > settings.DB_REPLICA_MAX_LAG:
+        return 'lag'
+    return None
+
+
+def wrote_recently(request: Request) -> bool:
+    try:
+        wrote_at = float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0))
+    except ValueError:
+        return False
+    return time.time() - wrote_at < settings.DB_READ_YOUR_WRITES_TTL
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    # После успешной записи клиент получает cookie со временем записи, а процесс запоминает ее
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        response = await call_next(request)
+        if request.method not in READ_METHODS and response.status_code < 400:
+            note_write()
+            response.set_cookie(
+                READ_YOUR_WRITES_COOKIE,
+                str(time.time()),
+                max_age=math.ceil(settings.DB_READ_YOUR_WRITES_TTL),
+                httponly=True,
+                samesite='lax',
+            )
+        return response
+
+
+# Любая смена поколений тегов в другом процессе - запись в БД
+message_handlers['tags'] = lambda tags: note_write()
@@ -0,0 +1,205 @@
+import re
+import time
+import random
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Set
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.requests import Request
+from starlette.responses import Response
+
+from conf.config import settings
+from webapp.metrics import DB_SLOW_STATEMENTS, DB_STATEMENT_ROWS, DB_STATEMENT_SECONDS
+
+# Учет запросов к БД по отпечаткам: отпечаток - текст запроса без значений, в котором списки параметров
+# любой длины (IN (...), многострочный VALUES) свернуты, так что пакеты разного размера - один отпечаток.
+# Статистика и снятые планы хранятся в памяти процесса (у каждого воркера свои)
+
+CAST_MODIFIERS = re.compile(r'(::\w+)\([\d, ]+\)')
+LITERAL = re.compile(r"'(?:[^']|'')*'|\$\d+|(?<![\w$.])-?\d+(?:\.\d+)?(?![\w.])")
+VALUE = r'\?(?:::\w+(?: WITH(?:OUT)? TIME ZONE)?(?:\[\])?)?'
+VALUE_LIST = re.compile(rf'\({VALUE}(?:, {VALUE})*\)')
+VALUE_LISTS = re.compile(r'\(\.\.\.\)(?:, \(\.\.\.\))+')
+WHITESPACE = re.compile(r'\s+')
+
+STARTED_KEY = 'statement_started'
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    id: str
+    operation: str
+    sql: str
+
+
+@dataclass
+class StatementStats:
+    fingerprint: str
+    operation: str
+    sql: str
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+    slow: int = 0
+
+
+@dataclass
+class CapturedPlan:
+    fingerprint: str
+    sql: str
+    parameters: str
+    seconds: float
+    captured_at: float
+    plan: Any
+
+
+statement_stats: Dict[str, StatementStats] = {}
+# Последние снятые планы по отпечаткам, не больше DB_EXPLAIN_MAX_PLANS
+captured_plans: OrderedDict[str, CapturedPlan] = OrderedDict()
+
+_explaining: Set[str] = set()
+_explain_tasks: Set[asyncio.Task[None]] = set()
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> Fingerprint:
+    sql = WHITESPACE.sub(' ', statement).strip()
+    sql = LITERAL.sub('?', CAST_MODIFIERS.sub(r'\1', sql))
+    sql = VALUE_LISTS.sub('(...)', VALUE_LIST.sub('(...)', sql))
+    operation = sql.split(' ', 1)[0].upper()
+    return Fingerprint(id=hashlib.sha1(sql.encode()).hexdigest()[:16], operation=operation, sql=sql)
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> str:
+    # Типы параметров без значений: в логе не должно быть паролей и персональных данных
+    if executemany:
+        return f'{len(parameters)} x {parameter_shape(parameters[0])}' if parameters else '[]'
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f'{name}: {_value_shape(value)}' for name, value in parameters.items()) + '}'
+    return '(' + ', '.join(_value_shape(value) for value in parameters or ()) + ')'
+
+
+def _value_shape(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return f'{type(value).__name__}[{len(value)}]'
+    return type(value).__name__
+
+
+def explain_enabled() -> bool:
+    return settings.APP_ENV != 'production' and settings.DB_EXPLAIN_SAMPLE_RATE > 0
+
+
+def instrument(engine: AsyncEngine) -> None:
+    def before_cursor_execute(
+        conn: Connection, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        conn.info.setdefault(STARTED_KEY, []).append(time.perf_counter())
+
+    def after_cursor_execute(
+        conn: Connection, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        seconds = time.perf_counter() - conn.info[STARTED_KEY].pop()
+        # Собственные EXPLAIN не учитываются
+        if statement.startswith('EXPLAIN'):
+            return
+        # rowcount - из статуса команды; строки возвращают SELECT и запросы с RETURNING
+        rows = cursor.rowcount if cursor.description is not None and cursor.rowcount > 0 else 0
+        found = fingerprint(statement)
+        slow = seconds >= settings.DB_SLOW_STATEMENT_THRESHOLD
+        record(found, seconds, rows, slow)
+        if not slow:
+            return
+
+        shape = parameter_shape(parameters, executemany)
+        logging.warning(
+            'Slow statement %s took %.1f ms, %d rows, parameters %s: %s',
+            found.id,
+            seconds * 1000,
+            rows,
+            shape,
+            found.sql,
+        )
+        # ANALYZE выполняет запрос еще раз, поэтому повторяются только чтения
+        if (
+            explain_enabled()
+            and found.operation == 'SELECT'
+            and not executemany
+            and found.id not in _explaining
+            and random.random() < settings.DB_EXPLAIN_SAMPLE_RATE
+        ):
+            _explaining.add(found.id)
+            task = asyncio.get_running_loop().create_task(explain(engine, found, statement, parameters, shape, seconds))
+            _explain_tasks.add(task)
+            task.add_done_callback(_explain_tasks.discard)
+
+    def handle_error(context: Any) -> None:
+        started = context.connection.info.get(STARTED_KEY) if context.connection is not None else None
+        if started:
+            started.pop()
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine.sync_engine, 'after_cursor_execute', after_cursor_execute)
+    event.listen(engine.sync_engine, 'handle_error', handle_error)
+
+
+def record(found: Fingerprint, seconds: float, rows: int, slow: bool) -> None:
+    DB_STATEMENT_SECONDS.labels(fingerprint=found.id, operation=found.operation).observe(seconds)
+    if rows:
+        DB_STATEMENT_ROWS.labels(fingerprint=found.id, operation=found.operation).inc(rows)
+    if slow:
+        DB_SLOW_STATEMENTS.labels(fingerprint=found.id, operation=found.operation).inc()
+
+    stats = statement_stats.get(found.id)
+    if stats is None:
+        stats = statement_stats[found.id] = StatementStats(found.id, found.operation, found.sql)
+    stats.calls += 1
+    stats.seconds += seconds
+    stats.max_seconds = max(stats.max_seconds, seconds)
+    stats.rows += rows
+    stats.slow += slow
+
+
+async def explain(
+    engine: AsyncEngine, found: Fingerprint, statement: str, parameters: Any, shape: str, seconds: float
+) -> None:
+    # Отдельное соединение: незакоммиченные изменения исходной транзакции в план не попадают
+    try:
+        async with engine.connect() as connection:
+            result = await connection.exec_driver_sql(
+                f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}', parameters
+            )
+            plan = result.scalar()
+            await connection.rollback()
+    except (SQLAlchemyError, OSError):
+        logging.warning('EXPLAIN of slow statement %s failed', found.id, exc_info=True)
+        return
+    finally:
+        _explaining.discard(found.id)
+
+    if isinstance(plan, (str, bytes)):
+        plan = orjson.loads(plan)
+    captured_plans[found.id] = CapturedPlan(found.id, found.sql, shape, seconds, time.time(), plan)
+    captured_plans.move_to_end(found.id)
+    while len(captured_plans) > settings.DB_EXPLAIN_MAX_PLANS:
+        captured_plans.popitem(last=False)
+
+
+def statements_report(request: Request) -> Response:
+    # Отладочная ручка (вне production): запросы процесса по суммарному времени и последние планы медленных
+    statements: List[StatementStats] = sorted(statement_stats.values(), key=lambda stats: stats.seconds, reverse=True)
+    body = {
+        'slow_threshold': settings.DB_SLOW_STATEMENT_THRESHOLD,
+        'statements': [asdict(stats) for stats in statements],
+        'plans': [asdict(plan) for plan in reversed(captured_plans.values())],
+    }
+    return Response(orjson.dumps(body), media_type='application/json')
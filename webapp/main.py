@@ -4,12 +4,19 @@ from typing import AsyncIterator
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from conf.config import settings
 from webapp.api.login.router import auth_router, user_router
 from webapp.api.restaurant.router import dish_router, reservation_router, restaurant_router
+from webapp.db.replica import ReadYourWritesMiddleware
+from webapp.db.statements import statements_report
 from webapp.metrics import metrics
-from webapp.on_shutdown import stop_producer
+from webapp.on_shutdown import stop_partitions, stop_postgres, stop_producer, stop_redis, stop_warmup
 from webapp.on_startup.kafka import create_producer
+from webapp.on_startup.partitions import start_partitions
+from webapp.on_startup.postgres import start_postgres
 from webapp.on_startup.redis import start_redis
+from webapp.on_startup.warmup import start_warmup
+from webapp.readiness import readiness
 from webapp.utils.middleware import MeasureLatencyMiddleware
 
 
@@ -22,12 +29,17 @@ def setup_middleware(app: FastAPI) -> None:
         allow_credentials=True,
         allow_methods=['*'],
         allow_headers=['*'],
+        expose_headers=['Link', 'X-Total-Count-Estimate'],
     )
+    app.add_middleware(ReadYourWritesMiddleware)
     app.add_middleware(MeasureLatencyMiddleware)
 
 
 def setup_routers(app: FastAPI) -> None:
     app.add_route('/metrics', metrics)
+    app.add_route('/ready', readiness)
+    if settings.APP_ENV != 'production':
+        app.add_route('/debug/statements', statements_report)
 
     app.include_router(auth_router)
     app.include_router(user_router)
@@ -38,11 +50,18 @@ def setup_routers(app: FastAPI) -> None:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await start_postgres()
+    await start_partitions()
     await start_redis()
     await create_producer()
+    await start_warmup()
     print('START APP')
     yield
+    await stop_warmup()
+    await stop_partitions()
     await stop_producer()
+    await stop_redis()
+    await stop_postgres()
     print('END APP')
 
 
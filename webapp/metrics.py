@@ -47,6 +47,170 @@ DEPS_LATENCY = prometheus_client.Histogram(
 )
 
 
+# Обращения к кэшу в разрезе уровня (l1 - память процесса, redis), семейства ключей (dish, menu, ...)
+# и результата (hit, miss, outdated - запись есть, но ее поколения тегов уже сменились)
+# sum(rate(sirius_cache_requests_total{result="hit"}[1m])) by (family) / sum(rate(sirius_cache_requests_total[1m])) by (family)
+CACHE_REQUESTS = prometheus_client.Counter(
+    'sirius_cache_requests_total',
+    'Количество обращений к кэшу',
+    ['tier', 'result', 'family'],
+)
+
+# Попадания в закэшированное отсутствие записи - доля 404 и пустых списков, отданных из кэша
+CACHE_EMPTY_HITS = prometheus_client.Counter(
+    'sirius_cache_empty_hits_total',
+    'Количество попаданий в кэш пустых значений',
+    ['tier', 'family'],
+)
+
+# Размер записей, попадающих в Redis (после кодека): основа для оценки памяти под семейство
+CACHE_VALUE_BYTES = prometheus_client.Histogram(
+    'sirius_cache_value_bytes',
+    'Размер записываемых в кэш значений в байтах',
+    ['family'],
+    buckets=(64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, float('+inf')),
+)
+
+CACHE_L1_ENTRIES = prometheus_client.Gauge(
+    'sirius_cache_l1_entries',
+    'Количество записей в локальном кэше процесса',
+    multiprocess_mode='livesum',
+)
+
+CACHE_L1_BYTES = prometheus_client.Gauge(
+    'sirius_cache_l1_bytes',
+    'Объем значений в локальном кэше процесса',
+    multiprocess_mode='livesum',
+)
+
+CACHE_L1_EVICTIONS = prometheus_client.Counter(
+    'sirius_cache_l1_evictions_total',
+    'Количество вытеснений из локального кэша процесса',
+    ['reason'],
+)
+
+
+# Устаревшие записи, отданные клиентам, пока значение обновляется в фоне
+CACHE_STALE_SERVED = prometheus_client.Counter(
+    'sirius_cache_stale_served_total',
+    'Количество устаревших записей кэша, отданных клиентам',
+    ['family'],
+)
+
+CACHE_STALENESS = prometheus_client.Histogram(
+    'sirius_cache_staleness_seconds',
+    'На сколько секунд отданная запись кэша старше мягкого времени устаревания',
+    ['family'],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, float('+inf')),
+)
+
+# Перестроения записей кэша: miss - значения нет, stale - устарело, early - вероятностное раннее обновление
+CACHE_REFRESHES = prometheus_client.Counter(
+    'sirius_cache_refreshes_total',
+    'Количество перестроений записей кэша',
+    ['family', 'reason'],
+)
+
+
+# Ошибки Redis при чтении: запрос обслужен напрямую из БД
+CACHE_ERRORS = prometheus_client.Counter(
+    'sirius_cache_errors_total',
+    'Количество чтений, обслуженных из БД из-за ошибки кэша',
+    ['family'],
+)
+
+
+# Записи в кэш при изменении данных: stored - записано, conflict - поколения или значение сменились
+# за время записи (ключ удален), skipped - список в кэше построен не перед этим изменением
+CACHE_WRITE_THROUGH = prometheus_client.Counter(
+    'sirius_cache_write_through_total',
+    'Количество записей в кэш при изменении данных',
+    ['family', 'result'],
+)
+
+
+# Ответы 304 на условные запросы (If-None-Match) по семействам ключей
+CACHE_NOT_MODIFIED = prometheus_client.Counter(
+    'sirius_cache_not_modified_total',
+    'Количество ответов 304 Not Modified',
+    ['family'],
+)
+
+
+# Проверки фильтра существования id: tier - где получен ответ (local - копия в памяти, redis - битовая карта
+# в Redis для id новее копии, none - фильтр не активен), result - absent (404 без кэша и БД) / present / unknown
+EXISTENCE_FILTER_CHECKS = prometheus_client.Counter(
+    'sirius_existence_filter_checks_total',
+    'Количество проверок фильтра существования',
+    ['filter', 'tier', 'result'],
+)
+# Ложные срабатывания: фильтр пропустил id, которого нет (например, удаление еще не дошло до копии)
+EXISTENCE_FILTER_FALSE_POSITIVES = prometheus_client.Counter(
+    'sirius_existence_filter_false_positives_total',
+    'Количество id, пропущенных фильтром существования, но не найденных',
+    ['filter'],
+)
+
+
+# Пул соединений с БД: checked_out - выданы сессиям, idle - открыты и свободны, overflow - открыты сверх DB_POOL_SIZE
+DB_POOL_CONNECTIONS = prometheus_client.Gauge(
+    'sirius_db_pool_connections',
+    'Количество соединений пула БД',
+    ['state'],
+    multiprocess_mode='livesum',
+)
+
+# histogram_quantile(0.99, sum(rate(sirius_db_pool_acquire_seconds_bucket[1m])) by (le))
+# рост задержки при checked_out около DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW - пула не хватает
+DB_POOL_ACQUIRE_SECONDS = prometheus_client.Histogram(
+    'sirius_db_pool_acquire_seconds',
+    'Время ожидания соединения из пула БД',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('+inf')),
+)
+
+DB_POOL_TIMEOUTS = prometheus_client.Counter(
+    'sirius_db_pool_timeouts_total',
+    'Количество запросов соединения, не дождавшихся его за DB_POOL_TIMEOUT',
+)
+
+
+# Выбор БД для чтения: target - replica или primary, reason - почему чтение ушло на основную БД
+# (read_your_writes, recent_write, lag, unavailable, no_subscription) или ok
+DB_READ_ROUTES = prometheus_client.Counter(
+    'sirius_db_read_routes_total',
+    'Количество чтений по выбранной БД',
+    ['target', 'reason'],
+)
+
+DB_REPLICA_LAG = prometheus_client.Gauge(
+    'sirius_db_replica_lag_seconds',
+    'Последняя измеренная задержка реплики',
+    multiprocess_mode='max',
+)
+
+
+# Запросы к БД по отпечаткам (webapp/db/statements.py, текст отпечатка - /debug/statements и лог медленных запросов)
+# topk(10, sum(rate(sirius_db_statement_seconds_sum[5m])) by (fingerprint)) - запросы, занимающие больше всего времени БД
+DB_STATEMENT_SECONDS = prometheus_client.Histogram(
+    'sirius_db_statement_seconds',
+    'Время выполнения запросов к БД',
+    ['fingerprint', 'operation'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float('+inf')),
+)
+
+DB_STATEMENT_ROWS = prometheus_client.Counter(
+    'sirius_db_statement_rows_total',
+    'Количество строк, возвращенных запросами к БД',
+    ['fingerprint', 'operation'],
+)
+
+DB_SLOW_STATEMENTS = prometheus_client.Counter(
+    'sirius_db_slow_statements_total',
+    'Количество запросов к БД дольше DB_SLOW_STATEMENT_THRESHOLD',
+    ['fingerprint', 'operation'],
+)
+
+
 def metrics(request: Request) -> Response:
     if 'prometheus_multiproc_dir' in os.environ:
         registry = CollectorRegistry()
@@ -1 +1 @@
-from . import dish, file, reservation, restaurant, user, user_file
+from . import dish, file, reservation, reservation_archive, restaurant, user, user_file
@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import ForeignKey, Integer, String, DECIMAL
+from sqlalchemy import ForeignKey, Index, Integer, String, DECIMAL
 from sqlalchemy.dialects.postgresql import ENUM
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -28,7 +28,13 @@ DishCategoryType: ENUM = ENUM(
 
 class Dish(Base):
     __tablename__ = 'dish'
-    __table_args__ = ({'schema': DEFAULT_SCHEMA},)
+    __table_args__ = (
+        # Меню ресторана (целиком и по категории) и список по категории читаются страницами в порядке id
+        Index('ix_dish_restaurant_id_id', 'restaurant_id', 'id'),
+        Index('ix_dish_restaurant_id_category_id', 'restaurant_id', 'category', 'id'),
+        Index('ix_dish_category_id', 'category', 'id'),
+        {'schema': DEFAULT_SCHEMA},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     restaurant_id: Mapped[int] = mapped_column(Integer, ForeignKey(f'{DEFAULT_SCHEMA}.restaurant.id'))
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String
+from sqlalchemy import DDL, Boolean, DateTime, ForeignKey, Index, Integer, String, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from webapp.models.meta import DEFAULT_SCHEMA, Base
@@ -6,15 +6,32 @@ from webapp.models.meta import DEFAULT_SCHEMA, Base
 
 class Reservation(Base):
     __tablename__ = 'reservation'
-    __table_args__ = ({'schema': DEFAULT_SCHEMA},)
+    __table_args__ = (
+        # Бронирования пользователя читаются страницами в порядке id; бронирования ресторана -
+        # страницами ресторана, при каскадном удалении и по дате
+        Index('ix_reservation_user_id_id', 'user_id', 'id'),
+        Index('ix_reservation_restaurant_id_date_reserv', 'restaurant_id', 'date_reserv'),
+        # Секции по месяцам date_reserv (webapp/db/partitions.py): ключ секционирования входит в первичный ключ,
+        # уникальность id обеспечивает последовательность
+        {'schema': DEFAULT_SCHEMA, 'postgresql_partition_by': 'RANGE (date_reserv)'},
+    )
+    __mapper_args__ = {'primary_key': ['id']}
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey(f'{DEFAULT_SCHEMA}.user.id'))
     restaurant_id: Mapped[int] = mapped_column(Integer, ForeignKey(f'{DEFAULT_SCHEMA}.restaurant.id'))
-    date_reserv: Mapped[DateTime] = mapped_column(DateTime(timezone=True))
+    date_reserv: Mapped[DateTime] = mapped_column(DateTime(timezone=True), primary_key=True)
     guest_count: Mapped[int] = mapped_column(Integer)
     status: Mapped[bool] = mapped_column(Boolean, default=False)
     comment: Mapped[str] = mapped_column(String)
 
     user = relationship('User', back_populates='reservations')
     restaurant = relationship('Restaurant', back_populates='reservations')
+
+
+# Секция по умолчанию принимает даты, для которых еще нет секции месяца
+event.listen(
+    Reservation.__table__,
+    'after_create',
+    DDL(f'CREATE TABLE {DEFAULT_SCHEMA}.reservation_default PARTITION OF {DEFAULT_SCHEMA}.reservation DEFAULT'),
+)
@@ -0,0 +1,27 @@
+from datetime import date
+
+from sqlalchemy import Date, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from webapp.models.meta import DEFAULT_SCHEMA, Base
+
+
+class ReservationArchive(Base):
+    # Каталог архива бронирований (webapp/db/archive.py): в каком объекте MinIO лежат бронирования
+    # пользователя в ресторане за месяц. Внешних ключей нет - архив переживает строки, из которых построен;
+    # удаление пользователя или ресторана удаляет его записи каталога, и бронирования пропадают из истории
+    __tablename__ = 'reservation_archive'
+    __table_args__ = (
+        # История пользователя (get_reservations_for_user с архивом)
+        Index('ix_reservation_archive_user_id_month', 'user_id', 'month'),
+        # Удаление ресторана
+        Index('ix_reservation_archive_restaurant_id', 'restaurant_id'),
+        {'schema': DEFAULT_SCHEMA},
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(Integer)
+    restaurant_id: Mapped[int] = mapped_column(Integer)
+    month: Mapped[date] = mapped_column(Date)
+    object_name: Mapped[str] = mapped_column(String)
+    rows: Mapped[int] = mapped_column(Integer)
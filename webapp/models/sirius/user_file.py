@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, Integer
+from sqlalchemy import ForeignKey, Index, Integer
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ..meta import DEFAULT_SCHEMA, Base
@@ -6,7 +6,11 @@ from ..meta import DEFAULT_SCHEMA, Base
 
 class UserFile(Base):
     __tablename__ = 'user_file'
-    __table_args__ = ({'schema': DEFAULT_SCHEMA},)
+    __table_args__ = (
+        # Файлы пользователя (User.files)
+        Index('ix_user_file_user_id_file_id', 'user_id', 'file_id'),
+        {'schema': DEFAULT_SCHEMA},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 
@@ -1,5 +1,41 @@
-from webapp.db import kafka
+import asyncio
+import contextlib
+
+from webapp.db import kafka, postgres, redis
+from webapp.on_startup import partitions, warmup
 
 
 async def stop_producer() -> None:
     await kafka.producer.stop()
+
+
+async def stop_warmup() -> None:
+    if warmup.warmup_task is not None:
+        warmup.warmup_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await warmup.warmup_task
+        warmup.warmup_task = None
+
+
+async def stop_partitions() -> None:
+    if partitions.partitions_task is not None:
+        partitions.partitions_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await partitions.partitions_task
+        partitions.partitions_task = None
+
+
+async def stop_postgres() -> None:
+    await postgres.engine.dispose()
+    if postgres.read_engine is not None:
+        await postgres.read_engine.dispose()
+
+
+async def stop_redis() -> None:
+    if redis.invalidation_listener is not None:
+        redis.invalidation_listener.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await redis.invalidation_listener
+        redis.invalidation_listener = None
+
+    await redis.redis.aclose()
@@ -0,0 +1,33 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from conf.config import settings
+from webapp.db import postgres
+from webapp.db.partitions import ensure_partitions
+
+partitions_task: asyncio.Task[None] | None = None
+
+
+async def start_partitions() -> None:
+    # Секции бронирований на ближайшие месяцы создаются заранее, пока в них нет строк:
+    # иначе брони на эти месяцы копились бы в секции по умолчанию
+    global partitions_task
+
+    partitions_task = asyncio.create_task(run_partitions())
+
+
+async def run_partitions() -> None:
+    while True:
+        try:
+            async with postgres.engine.begin() as connection:
+                created = await ensure_partitions(
+                    connection, datetime.now(timezone.utc).date(), settings.RESERVATION_PARTITION_MONTHS_AHEAD
+                )
+            if created:
+                logging.info('Reservation partitions created: %s', ', '.join(f'{month:%Y-%m}' for month in created))
+        except (SQLAlchemyError, OSError):
+            logging.exception('Reservation partition maintenance failed')
+        await asyncio.sleep(settings.RESERVATION_PARTITION_CHECK_INTERVAL)
@@ -0,0 +1,24 @@
+import asyncio
+import logging
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from conf.config import settings
+from webapp.db import postgres
+
+
+async def start_postgres() -> None:
+    # Соединения пула открываются заранее, чтобы первые запросы после старта не ждали подключения к БД
+    if not settings.DB_POOL_PREWARM:
+        return
+    for engine in (postgres.engine, postgres.read_engine):
+        if engine is None:
+            continue
+        try:
+            connections = await asyncio.gather(*(engine.connect() for _ in range(settings.DB_POOL_SIZE)))
+        except (SQLAlchemyError, OSError):
+            logging.exception('Database pool pre-warm failed for %s', engine.url.host)
+            continue
+        for connection in connections:
+            await connection.close()
+        logging.info('Database pool for %s pre-warmed with %d connections', engine.url.host, len(connections))
@@ -1,6 +1,9 @@
+import asyncio
+
 from redis.asyncio import ConnectionPool, Redis
 
 from conf.config import settings
+from webapp.cache.client import listen_invalidations
 from webapp.db import redis
 
 
@@ -13,3 +16,6 @@ async def start_redis() -> None:
     redis.redis = Redis(
         connection_pool=pool,
     )
+
+    if settings.CACHE_L1_ENABLED:
+        redis.invalidation_listener = asyncio.create_task(listen_invalidations(redis.redis))
@@ -0,0 +1,65 @@
+import time
+import uuid
+import asyncio
+import logging
+
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+
+from conf.config import settings
+from webapp import readiness
+from webapp.cache.client import eval_script
+from webapp.cache.existence import rebuild_filters
+from webapp.cache.key_builder import get_cache_lease
+from webapp.cache.read_through import RELEASE_LEASE_SCRIPT
+from webapp.cache.warmup import warm_up
+from webapp.db import postgres, redis
+
+warmup_task: asyncio.Task[None] | None = None
+
+
+async def start_warmup() -> None:
+    # Прогрев идет в фоне: приложение уже отвечает, но /ready отдает 503, пока он не закончится.
+    # В той же задаче строятся фильтры существования id
+    global warmup_task
+
+    readiness.ready = False
+    if not settings.CACHE_WARMUP_ENABLED and not settings.EXISTENCE_FILTER_ENABLED:
+        readiness.ready = True
+        return
+    warmup_task = asyncio.create_task(run_warmup())
+
+
+async def run_warmup() -> None:
+    try:
+        await asyncio.wait_for(_warm_up_once(), timeout=settings.CACHE_WARMUP_TIMEOUT)
+    except asyncio.TimeoutError:
+        logging.warning('Cache warm-up timed out after %s seconds', settings.CACHE_WARMUP_TIMEOUT)
+    except (SQLAlchemyError, RedisError, OSError):
+        logging.exception('Cache warm-up failed')
+    finally:
+        readiness.ready = True
+
+
+async def _warm_up_once() -> None:
+    # Воркеры стартуют одновременно, а прогревать кэш достаточно одному:
+    # остальные ждут, пока держатель аренды закончит
+    client = redis.get_redis()
+    lease_key = get_cache_lease('warmup')
+    token = uuid.uuid4().hex
+    if not await client.set(lease_key, token, nx=True, px=int(settings.CACHE_WARMUP_TIMEOUT * 1000)):
+        while await client.exists(lease_key):
+            await asyncio.sleep(settings.CACHE_LEASE_POLL_INTERVAL)
+        return
+
+    try:
+        start = time.perf_counter()
+        async with postgres.async_session() as session:
+            if settings.EXISTENCE_FILTER_ENABLED:
+                counts = await rebuild_filters(client, session)
+                logging.info('Existence filters rebuilt: %s', counts)
+            if settings.CACHE_WARMUP_ENABLED:
+                count = await warm_up(client, session)
+                logging.info('Cache warm-up stored %d keys in %.2f seconds', count, time.perf_counter() - start)
+    finally:
+        await eval_script(client, RELEASE_LEASE_SCRIPT, [lease_key], [token])
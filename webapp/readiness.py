@@ -0,0 +1,11 @@
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Готовность принимать трафик: выставляется после прогрева кэша (или по его таймауту)
+ready: bool = False
+
+
+def readiness(request: Request) -> Response:
+    if not ready:
+        return Response('warming up', status_code=503)
+    return Response('ok')
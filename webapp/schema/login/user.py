@@ -1,7 +1,9 @@
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
+from webapp.schema.reservation.reservation import ReservationRead
+
 
 class UserLogin(BaseModel):
     username: str
@@ -21,6 +23,11 @@ class UserRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Удаленный пользователь вместе с каскадно удаленными бронированиями
+class UserDeleted(UserRead):
+    reservations: List[ReservationRead]
+
+
 class UserCreate(BaseModel):
     username: str
     password: str
@@ -33,3 +33,8 @@ class DishUpdate(BaseModel):
     dish_name: Optional[str] = None
     description: Optional[str] = None
     price: Optional[float] = None
+
+
+# Модель для пакетного обновления: незаданные поля сохраняют прежние значения
+class DishBulkUpdate(DishUpdate):
+    id: int
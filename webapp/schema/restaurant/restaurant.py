@@ -1,7 +1,10 @@
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
+from webapp.schema.reservation.reservation import ReservationRead
+from webapp.schema.restaurant.dish import DishRead
+
 
 # Основная модель
 class RestaurantRead(BaseModel):
@@ -25,3 +28,9 @@ class RestaurantUpdate(BaseModel):
     name: Optional[str] = None
     address: Optional[str] = None
     description: Optional[str] = None
+
+
+# Удаленный ресторан вместе с каскадно удаленными блюдами и бронированиями
+class RestaurantDeleted(RestaurantRead):
+    menu: List[DishRead]
+    reservations: List[ReservationRead]
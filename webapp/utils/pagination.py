@@ -0,0 +1,70 @@
+import base64
+from dataclasses import dataclass
+from typing import Any
+
+import orjson
+from fastapi import HTTPException, Query
+from sqlalchemy import ColumnElement, Select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from conf.config import settings
+
+
+@dataclass(frozen=True)
+class Page:
+    # Страница списка по ключу (keyset): limit строк с id больше after в порядке id.
+    # В отличие от OFFSET, стоимость страницы не растет с ее номером, а вставки и удаления
+    # не сдвигают уже выданные страницы
+    limit: int
+    # id последней строки предыдущей страницы; 0 - первая страница
+    after: int = 0
+
+
+def encode_cursor(after: int) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps({'id': after})).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        after = orjson.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))['id']
+    except (ValueError, TypeError, KeyError):
+        raise ValueError(cursor)
+    if type(after) is not int or after < 0:
+        raise ValueError(cursor)
+    return after
+
+
+def get_page(
+    limit: int = Query(None, ge=1, description='Размер страницы'),
+    cursor: str = Query(None, description='Курсор следующей страницы из заголовка Link предыдущего ответа'),
+) -> Page:
+    if limit is None:
+        limit = settings.PAGE_DEFAULT_LIMIT
+    if limit > settings.PAGE_MAX_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f'На странице не более {settings.PAGE_MAX_LIMIT} записей'
+        )
+    if cursor is None:
+        return Page(limit=limit)
+    try:
+        return Page(limit=limit, after=decode_cursor(cursor))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Некорректный курсор')
+
+
+def paginate(statement: Select[Any], column: ColumnElement[int], page: Page | None) -> Select[Any]:
+    # statement уже упорядочен по column; без страницы возвращается весь список
+    if page is None:
+        return statement
+    return statement.where(column > page.after).limit(page.limit)
+
+
+async def estimate_count(session: AsyncSession, statement: Select[Any]) -> int:
+    # Оценка числа строк по статистике планировщика вместо COUNT(*): EXPLAIN не читает таблицу,
+    # точность зависит от свежести ANALYZE. Параметры - проверенные значения запроса, подставляются литералами
+    compiled = statement.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True})
+    result = await session.execute(text(f'EXPLAIN (FORMAT JSON) {compiled}'))
+    (plan,) = result.scalar_one()
+    return int(plan['Plan']['Plan Rows'])